@@ -5,8 +5,11 @@
 import json
 import boto3
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime
 
+from datalake.parquet_writer import write_table_bytes
+
 S3_BUCKET = 'estat-data-lake'
 DATASET_ID = '0002070002'
 
@@ -23,19 +26,22 @@ def load_from_s3(s3_path):
     return data
 
 def save_parquet_to_s3(df, dataset_id):
-    """DataFrameをParquet形式でS3に保存"""
+    """DataFrameをParquet形式でS3に保存（ディメンション列でソート、行グループ・圧縮はathenaプロファイル）"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     key = f'processed/{dataset_id}_complete_{timestamp}.parquet'
     s3_path = f's3://{S3_BUCKET}/{key}'
     
-    # 一時ファイルに保存
-    temp_file = f'/tmp/{dataset_id}_temp.parquet'
-    df.to_parquet(temp_file, engine='pyarrow', compression='snappy', index=False)
+    # コード列は辞書エンコードしてから書き込み
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = pa.table({
+        name: column.dictionary_encode() if pa.types.is_string(column.type) and name != '$' else column
+        for name, column in zip(table.column_names, table.columns)
+    })
+    body = write_table_bytes(table, profile='athena')
     
     # S3にアップロード
     s3 = boto3.client('s3')
-    with open(temp_file, 'rb') as f:
-        s3.put_object(Bucket=S3_BUCKET, Key=key, Body=f)
+    s3.put_object(Bucket=S3_BUCKET, Key=key, Body=body)
     
     print(f"Saved Parquet to: {s3_path}")
     return s3_path
@@ -2,14 +2,27 @@
 データ品質検証
 
 データの品質をチェックし、問題を検出・報告します。
+validate_table はArrowテーブル（またはNumPy配列の辞書）に対して、設定した全チェックを
+列単位の一括処理で実行します。
 """
 
 import logging
 from typing import Dict, Any, List, Optional, Set, Tuple
-from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# null扱いする文字列
+NULL_STRINGS = ["", "null"]
+
+# 数値として解釈できる文字列
+NUMERIC_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+# 結果に含める詳細の最大件数
+MAX_DETAILS = 10
+
+# 隔離ファイルの理由列
+QUARANTINE_REASON_COLUMN = "quarantine_reason"
+
 
 class DataQualityValidator:
     """データ品質検証"""
@@ -211,34 +224,35 @@ class DataQualityValidator:
                 "message": "No data to validate"
             }
         
-        # キーの組み合わせを作成
-        key_combinations = []
-        for record in data:
-            key = tuple(record.get(col) for col in key_columns)
-            key_combinations.append(key)
+        # キーの組み合わせを64ビットのフィンガープリントにしてカウント
+        import numpy as np
+        from .duplicate_detector import fingerprint_table, records_to_table
         
-        # 重複をカウント
-        key_counts = Counter(key_combinations)
-        duplicates = {key: count for key, count in key_counts.items() if count > 1}
+        fingerprints = fingerprint_table(records_to_table(data, key_columns), key_columns)
+        _, first_index, counts = np.unique(fingerprints, return_index=True, return_counts=True)
+        repeated = counts > 1
+        duplicate_count = int(repeated.sum())
         
-        if duplicates:
-            logger.warning(f"Found {len(duplicates)} duplicate key combinations")
+        if duplicate_count:
+            logger.warning(f"Found {duplicate_count} duplicate key combinations")
             
-            # 重複の詳細を作成
-            duplicate_details = []
-            for key, count in list(duplicates.items())[:10]:  # 最初の10件のみ
-                duplicate_details.append({
-                    "key": dict(zip(key_columns, key)),
-                    "count": count
-                })
+            # 重複の詳細を作成（出現順に最初の10件のみ）
+            order = np.argsort(first_index[repeated], kind="stable")[:MAX_DETAILS]
+            duplicate_details = [
+                {
+                    "key": {col: data[int(index)].get(col) for col in key_columns},
+                    "count": int(count)
+                }
+                for index, count in zip(first_index[repeated][order], counts[repeated][order])
+            ]
             
             return {
                 "has_duplicates": True,
-                "duplicate_count": len(duplicates),
-                "total_duplicate_records": sum(duplicates.values()),
+                "duplicate_count": duplicate_count,
+                "total_duplicate_records": int(counts[repeated].sum()),
                 "duplicate_details": duplicate_details,
                 "total_records": len(data),
-                "message": f"Found {len(duplicates)} duplicate key combinations"
+                "message": f"Found {duplicate_count} duplicate key combinations"
             }
         
         logger.info(f"No duplicates found")
@@ -258,6 +272,10 @@ class DataQualityValidator:
         """
         不正レコードを隔離
         
+        このクラスの検証メソッド（validate_required_columns / check_null_values /
+        validate_value_ranges / detect_duplicates）を指定した場合は、列単位の一括チェックで
+        不正行のマスクを作成します。それ以外の検証関数はレコードごとに呼び出します。
+        
         Args:
             data: 検証するデータ
             validation_func: 検証関数
@@ -266,6 +284,120 @@ class DataQualityValidator:
         Returns:
             (有効なレコード, 不正なレコード)のタプル
         """
+        check_kwargs = self._table_check_kwargs(validation_func, validation_kwargs)
+        if check_kwargs is None:
+            return self._quarantine_per_record(data, validation_func, **validation_kwargs)
+        
+        if not data:
+            return [], []
+        
+        table = self._to_table(data)
+        _, masks = self._run_table_checks(table, **check_kwargs)
+        invalid_mask, reasons = self._combine_masks(masks, table.num_rows)
+        
+        if invalid_mask is None:
+            logger.info(f"Quarantine complete: {len(data)} valid, 0 invalid")
+            return data, []
+        
+        import numpy as np
+        
+        invalid_indices = np.flatnonzero(invalid_mask)
+        valid_records = [data[i] for i in np.flatnonzero(~invalid_mask)]
+        invalid_records = [
+            {"index": int(i), "record": data[i], "reason": reason}
+            for i, reason in zip(invalid_indices, reasons.take(invalid_indices).to_pylist())
+        ]
+        
+        logger.info(f"Quarantine complete: {len(valid_records)} valid, {len(invalid_records)} invalid")
+        
+        return valid_records, invalid_records
+    
+    def quarantine_table(
+        self,
+        data: Any,
+        required_columns: Optional[List[str]] = None,
+        null_columns: Optional[List[str]] = None,
+        range_checks: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        duplicate_columns: Optional[List[str]] = None,
+        quarantine_path: Optional[str] = None,
+        s3_client=None
+    ) -> Dict[str, Any]:
+        """
+        一括チェックのマスクで不正行を隔離
+        
+        不正行は理由列（quarantine_reason）付きのテーブルとして返し、quarantine_path を指定した場合は
+        Parquetファイル（s3://形式の場合はS3）に書き込みます。不正行が無い場合、有効行は入力テーブルを
+        コピーせずにそのまま返します。
+        
+        Args:
+            data: Arrowテーブル・列名 -> NumPy配列の辞書・DataFrame・レコードのリスト
+            required_columns: 必須列のリスト
+            null_columns: null値をチェックする列のリスト
+            range_checks: 列名 -> {"min_value": 最小値, "max_value": 最大値} の辞書
+            duplicate_columns: 重複チェックに使用する列のリスト（各キーの最初の行は有効行として残す）
+            quarantine_path: 隔離ファイルの出力先（ローカルパスまたは s3://bucket/key）
+            s3_client: boto3 S3クライアント（S3に書き込む場合）
+        
+        Returns:
+            隔離結果（valid_table, quarantine_table, valid_count, invalid_count, reason_counts,
+            checks, quarantine_path）
+        """
+        import numpy as np
+        
+        table = self._to_table(data)
+        checks, masks = self._run_table_checks(
+            table, required_columns, null_columns, range_checks, duplicate_columns
+        )
+        invalid_mask, reasons = self._combine_masks(masks, table.num_rows)
+        
+        if invalid_mask is None:
+            logger.info(f"Quarantine complete: {table.num_rows} valid, 0 invalid")
+            return {
+                "valid_table": table,
+                "quarantine_table": None,
+                "valid_count": table.num_rows,
+                "invalid_count": 0,
+                "reason_counts": {},
+                "checks": checks,
+                "quarantine_path": None
+            }
+        
+        invalid_indices = np.flatnonzero(invalid_mask)
+        valid_table = table.filter(~invalid_mask)
+        quarantine = table.take(invalid_indices).append_column(
+            QUARANTINE_REASON_COLUMN, reasons.take(invalid_indices)
+        )
+        
+        reason_codes = reasons.indices.to_numpy(zero_copy_only=False)[invalid_indices]
+        reason_counts = {
+            reason: int(count)
+            for reason, count in zip(reasons.dictionary.to_pylist(),
+                                     np.bincount(reason_codes, minlength=len(reasons.dictionary)))
+            if count
+        }
+        
+        if quarantine_path:
+            self._write_quarantine(quarantine, quarantine_path, s3_client)
+        
+        logger.info(f"Quarantine complete: {valid_table.num_rows} valid, {quarantine.num_rows} invalid")
+        
+        return {
+            "valid_table": valid_table,
+            "quarantine_table": quarantine,
+            "valid_count": valid_table.num_rows,
+            "invalid_count": quarantine.num_rows,
+            "reason_counts": reason_counts,
+            "checks": checks,
+            "quarantine_path": quarantine_path
+        }
+    
+    def _quarantine_per_record(
+        self,
+        data: List[Dict[str, Any]],
+        validation_func,
+        **validation_kwargs
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """任意の検証関数をレコードごとに呼び出して隔離"""
         valid_records = []
         invalid_records = []
         
@@ -294,6 +426,419 @@ class DataQualityValidator:
         
         return valid_records, invalid_records
     
+    def _table_check_kwargs(self, validation_func, validation_kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """検証メソッドと引数を_run_table_checksの引数に変換（対応していない関数はNone）"""
+        name = getattr(validation_func, "__name__", None)
+        if getattr(validation_func, "__self__", None) is not self:
+            return None
+        
+        if name == "validate_required_columns":
+            return {"required_columns": validation_kwargs["required_columns"]}
+        if name == "check_null_values":
+            return {"null_columns": validation_kwargs["key_columns"]}
+        if name == "validate_value_ranges":
+            return {"range_checks": {
+                validation_kwargs["column"]: {
+                    "min_value": validation_kwargs.get("min_value"),
+                    "max_value": validation_kwargs.get("max_value")
+                }
+            }}
+        if name == "detect_duplicates":
+            return {"duplicate_columns": validation_kwargs["key_columns"]}
+        return None
+    
+    @staticmethod
+    def _combine_masks(masks: Dict[str, "np.ndarray"], total: int) -> Tuple[Optional["np.ndarray"], Optional["pa.Array"]]:
+        """
+        理由ごとのマスクを1つの不正行マスクと理由列にまとめる
+        
+        行ごとに該当する理由の組み合わせをビット列で表し、組み合わせごとに1回だけ理由文字列を作るため、
+        理由列は辞書型になります。
+        
+        Returns:
+            (不正行マスク, 理由の辞書型配列) のタプル（不正行が無い場合は (None, None)）
+        """
+        import numpy as np
+        import pyarrow as pa
+        
+        masks = {reason: mask for reason, mask in masks.items() if mask.any()}
+        if not masks:
+            return None, None
+        
+        reason_names = list(masks)
+        if len(reason_names) <= 63:
+            bits = np.zeros(total, dtype=np.int64)
+            for position, reason in enumerate(reason_names):
+                bits |= masks[reason].astype(np.int64) << position
+            combinations, indices = np.unique(bits, return_inverse=True)
+            dictionary = [
+                "; ".join(reason for position, reason in enumerate(reason_names) if combination >> position & 1)
+                for combination in combinations.tolist()
+            ]
+        else:
+            # 理由が多い場合は先頭の理由のみ
+            stacked = np.vstack([masks[reason] for reason in reason_names])
+            first = np.where(stacked.any(axis=0), stacked.argmax(axis=0), len(reason_names))
+            combinations, indices = np.unique(first, return_inverse=True)
+            dictionary = [reason_names[c] if c < len(reason_names) else "" for c in combinations.tolist()]
+        
+        invalid_mask = np.zeros(total, dtype=bool)
+        for mask in masks.values():
+            invalid_mask |= mask
+        
+        reasons = pa.DictionaryArray.from_arrays(
+            pa.array(indices.astype(np.int32).reshape(-1)), pa.array(dictionary, type=pa.string())
+        )
+        return invalid_mask, reasons
+    
+    @staticmethod
+    def _write_quarantine(table: "pa.Table", path: str, s3_client=None) -> None:
+        """隔離テーブルをParquetファイルに書き込み"""
+        from .parquet_writer import write_table_bytes
+        
+        body = write_table_bytes(table, profile="snappy")
+        if path.startswith("s3://"):
+            from .s3_cache import parse_s3_path
+            
+            if s3_client is None:
+                import boto3
+                s3_client = boto3.client("s3")
+            bucket, key = parse_s3_path(path)
+            s3_client.put_object(Bucket=bucket, Key=key, Body=body, ContentType="application/octet-stream")
+        else:
+            from pathlib import Path
+            
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_bytes(body)
+        logger.info(f"Wrote {table.num_rows} quarantined records to {path}")
+    
+    def validate_table(
+        self,
+        data: Any,
+        required_columns: Optional[List[str]] = None,
+        null_columns: Optional[List[str]] = None,
+        range_checks: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        duplicate_columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        設定したチェックを列単位でまとめて実行
+        
+        レコードごとのループを行わず、各列を1回ずつ一括処理します。
+        各チェックの結果は validate_required_columns / check_null_values /
+        validate_value_ranges / detect_duplicates と同じ構造です。
+        
+        Args:
+            data: Arrowテーブル・RecordBatch・列名 -> NumPy配列の辞書・DataFrame・レコードのリスト
+            required_columns: 必須列のリスト
+            null_columns: null値をチェックする列のリスト
+            range_checks: 列名 -> {"min_value": 最小値, "max_value": 最大値} の辞書
+            duplicate_columns: 重複チェックに使用する列のリスト
+        
+        Returns:
+            検証結果（valid, total_records, checks, message）
+        """
+        table = self._to_table(data)
+        checks, _ = self._run_table_checks(
+            table, required_columns, null_columns, range_checks, duplicate_columns
+        )
+        
+        valid = (
+            checks.get("required_columns", {}).get("valid", True)
+            and not checks.get("null_values", {}).get("has_nulls", False)
+            and all(check["valid"] for check in checks.get("value_ranges", {}).values())
+            and not checks.get("duplicates", {}).get("has_duplicates", False)
+        )
+        
+        result = {
+            "valid": valid,
+            "total_records": table.num_rows,
+            "checks": checks,
+            "message": f"Validation {'passed' if valid else 'failed'} for {table.num_rows} records"
+        }
+        self.validation_results.append({"valid": valid, "total_records": table.num_rows})
+        return result
+    
+    def _run_table_checks(
+        self,
+        table: "pa.Table",
+        required_columns: Optional[List[str]] = None,
+        null_columns: Optional[List[str]] = None,
+        range_checks: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        duplicate_columns: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, "np.ndarray"]]:
+        """
+        各チェックを実行し、結果と不正行のマスクを返す
+        
+        Args:
+            table: Arrowテーブル
+            required_columns: 必須列のリスト
+            null_columns: null値をチェックする列のリスト
+            range_checks: 列名 -> {"min_value", "max_value"} の辞書
+            duplicate_columns: 重複チェックに使用する列のリスト
+        
+        Returns:
+            (チェック結果, 理由 -> 不正行のブールマスク) のタプル
+        """
+        import numpy as np
+        import pyarrow.compute as pc
+        
+        total = table.num_rows
+        checks: Dict[str, Any] = {}
+        masks: Dict[str, np.ndarray] = {}
+        actual_columns = table.column_names
+        
+        if required_columns is not None:
+            missing_columns = [col for col in required_columns if col not in actual_columns]
+            if missing_columns:
+                logger.warning(f"Missing required columns: {set(missing_columns)}")
+                checks["required_columns"] = {
+                    "valid": False,
+                    "missing_columns": missing_columns,
+                    "actual_columns": actual_columns,
+                    "message": f"Missing {len(missing_columns)} required columns"
+                }
+                if total:
+                    masks[f"Missing required columns: {', '.join(missing_columns)}"] = np.ones(total, dtype=bool)
+            else:
+                checks["required_columns"] = {
+                    "valid": True,
+                    "missing_columns": [],
+                    "actual_columns": actual_columns,
+                    "message": "All required columns present"
+                }
+            
+            # 隔離用: 必須列の値が無い（レコードにキーが無い・null）行
+            for column in required_columns:
+                array = self._column(table, column) if total else None
+                if array is not None and array.null_count:
+                    masks[f"Missing required column: {column}"] = \
+                        pc.is_null(array).to_numpy(zero_copy_only=False)
+        
+        if total == 0:
+            # 空データの場合は各チェックの「No data to validate」結果を返す
+            if null_columns:
+                checks["null_values"] = {"has_nulls": False, "null_counts": {}, "message": "No data to validate"}
+            for column in (range_checks or {}):
+                checks.setdefault("value_ranges", {})[column] = {
+                    "valid": True, "out_of_range_count": 0, "message": "No data to validate"
+                }
+            if duplicate_columns:
+                checks["duplicates"] = {"has_duplicates": False, "duplicate_count": 0, "message": "No data to validate"}
+            return checks, masks
+        
+        if null_columns:
+            null_counts = {}
+            for column in null_columns:
+                mask = self._null_mask(table, column)
+                count = int(mask.sum())
+                if count:
+                    null_counts[column] = count
+                    masks[f"Null value in {column}"] = mask
+            
+            if null_counts:
+                logger.warning(f"Null values detected: {null_counts}")
+            checks["null_values"] = {
+                "has_nulls": bool(null_counts),
+                "null_counts": null_counts,
+                "total_records": total,
+                "message": (f"Null values found in {len(null_counts)} columns" if null_counts
+                            else "No null values in key columns")
+            }
+        
+        for column, bounds in (range_checks or {}).items():
+            min_value = bounds.get("min_value")
+            max_value = bounds.get("max_value")
+            values = self._numeric_values(table, column)
+            
+            # NaN（数値でない値・null）は比較がFalseになるため対象外
+            with np.errstate(invalid="ignore"):
+                below = values < min_value if min_value is not None else np.zeros(total, dtype=bool)
+                above = values > max_value if max_value is not None else np.zeros(total, dtype=bool)
+            above &= ~below
+            out_of_range = below | above
+            count = int(out_of_range.sum())
+            
+            result = {
+                "valid": count == 0,
+                "out_of_range_count": count,
+                "total_records": total,
+                "message": f"{count} values out of range" if count else "All values within range"
+            }
+            if count:
+                logger.warning(f"Found {count} out-of-range values in column '{column}'")
+                indices = np.flatnonzero(out_of_range)[:MAX_DETAILS]
+                result["out_of_range_records"] = [
+                    {
+                        "index": int(i),
+                        "value": float(values[i]),
+                        "reason": f"Below minimum ({min_value})" if below[i] else f"Above maximum ({max_value})"
+                    }
+                    for i in indices
+                ]
+                if below.any():
+                    masks[f"{column} below minimum ({min_value})"] = below
+                if above.any():
+                    masks[f"{column} above maximum ({max_value})"] = above
+            checks.setdefault("value_ranges", {})[column] = result
+        
+        if duplicate_columns:
+            group_ids = self._group_ids(table, duplicate_columns)
+            _, first_rows, inverse, counts = np.unique(
+                group_ids, return_index=True, return_inverse=True, return_counts=True
+            )
+            duplicate_groups = np.flatnonzero(counts > 1)
+            # 詳細は最初に出現した順に並べる
+            duplicate_groups = duplicate_groups[np.argsort(first_rows[duplicate_groups], kind="stable")]
+            
+            if len(duplicate_groups):
+                logger.warning(f"Found {len(duplicate_groups)} duplicate key combinations")
+                sample_groups = duplicate_groups[:MAX_DETAILS]
+                keys = table.select(
+                    [col for col in duplicate_columns if col in actual_columns]
+                ).take(first_rows[sample_groups]).to_pylist()
+                checks["duplicates"] = {
+                    "has_duplicates": True,
+                    "duplicate_count": int(len(duplicate_groups)),
+                    "total_duplicate_records": int(counts[duplicate_groups].sum()),
+                    "duplicate_details": [
+                        {"key": {col: key.get(col) for col in duplicate_columns}, "count": int(count)}
+                        for key, count in zip(keys, counts[sample_groups])
+                    ],
+                    "total_records": total,
+                    "message": f"Found {len(duplicate_groups)} duplicate key combinations"
+                }
+                # 最初に出現した行は残し、2件目以降だけを不正とする
+                repeats = np.ones(total, dtype=bool)
+                repeats[first_rows] = False
+                masks[f"Duplicate key ({', '.join(duplicate_columns)})"] = repeats
+            else:
+                checks["duplicates"] = {
+                    "has_duplicates": False,
+                    "duplicate_count": 0,
+                    "total_records": total,
+                    "message": "No duplicates found"
+                }
+        
+        return checks, masks
+    
+    @staticmethod
+    def _to_table(data: Any) -> "pa.Table":
+        """入力をArrowテーブルに揃える"""
+        import pyarrow as pa
+        
+        if isinstance(data, pa.Table):
+            return data
+        if isinstance(data, pa.RecordBatch):
+            return pa.Table.from_batches([data])
+        if isinstance(data, dict):
+            return pa.table(data)
+        if hasattr(data, "to_dict") and hasattr(data, "columns"):
+            return pa.Table.from_pandas(data, preserve_index=False)
+        
+        # レコードのリスト: 型が混在する列は文字列に揃える
+        records = [record for record in (data or []) if isinstance(record, dict)]
+        names: Dict[str, None] = {}
+        for record in records:
+            for key in record:
+                names.setdefault(key, None)
+        
+        columns = {}
+        for name in names:
+            raw = [record.get(name) for record in records]
+            try:
+                columns[name] = pa.array(raw)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                columns[name] = pa.array([None if v is None else str(v) for v in raw], type=pa.string())
+        if not columns:
+            return pa.table({})
+        return pa.table(columns)
+    
+    @staticmethod
+    def _column(table: "pa.Table", column: str) -> Optional["pa.Array"]:
+        """列を単一の配列として取得（列が無い場合はNone）"""
+        if column not in table.column_names:
+            return None
+        return table.column(column).combine_chunks()
+    
+    def _null_mask(self, table: "pa.Table", column: str) -> "np.ndarray":
+        """null・空文字・"null" の行のマスク（列が無い場合は全行）"""
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        array = self._column(table, column)
+        if array is None:
+            return np.ones(table.num_rows, dtype=bool)
+        
+        def null_like(values):
+            mask = pc.is_null(values)
+            if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+                mask = pc.or_(mask, pc.is_in(values, value_set=pa.array(NULL_STRINGS, type=values.type)))
+            return pc.fill_null(mask, True)
+        
+        if pa.types.is_dictionary(array.type):
+            # 辞書部分だけを判定し、インデックスで行に展開する
+            dictionary_mask = null_like(array.dictionary)
+            mask = pc.fill_null(dictionary_mask.take(array.indices), True)
+        else:
+            mask = null_like(array)
+        return mask.to_numpy(zero_copy_only=False)
+    
+    def _numeric_values(self, table: "pa.Table", column: str) -> "np.ndarray":
+        """列をfloat64のNumPy配列に変換（数値として解釈できない値・nullはNaN）"""
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        array = self._column(table, column)
+        if array is None:
+            return np.full(table.num_rows, np.nan)
+        
+        def to_float(values):
+            if pa.types.is_integer(values.type) or pa.types.is_floating(values.type) \
+                    or pa.types.is_boolean(values.type):
+                return pc.cast(values, pa.float64())
+            text = pc.utf8_trim_whitespace(pc.cast(values, pa.string()))
+            numeric_only = pc.if_else(
+                pc.match_substring_regex(text, NUMERIC_PATTERN), text, pa.scalar(None, type=pa.string())
+            )
+            return pc.cast(numeric_only, pa.float64())
+        
+        if pa.types.is_dictionary(array.type):
+            values = to_float(array.dictionary).take(array.indices)
+        else:
+            values = to_float(array)
+        return pc.fill_null(values, float("nan")).to_numpy(zero_copy_only=False)
+    
+    def _group_ids(self, table: "pa.Table", columns: List[str]) -> "np.ndarray":
+        """
+        キー列の組み合わせごとの整数IDを作成
+        
+        各列を辞書エンコードしたインデックス（nullも1つの値として扱う）を組み合わせ、
+        列を追加するたびに詰め直すため、列数が多くてもオーバーフローしません。
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        group_ids = np.zeros(table.num_rows, dtype=np.int64)
+        for column in columns:
+            array = self._column(table, column)
+            if array is None:
+                continue
+            if pa.types.is_dictionary(array.type):
+                if len(array.dictionary.unique()) != len(array.dictionary):
+                    array = array.cast(array.type.value_type).dictionary_encode()
+            else:
+                array = pc.dictionary_encode(array)
+            
+            cardinality = len(array.dictionary) + 1
+            codes = pc.fill_null(array.indices, cardinality - 1).to_numpy(zero_copy_only=False).astype(np.int64)
+            combined = group_ids * cardinality + codes
+            _, group_ids = np.unique(combined, return_inverse=True)
+            group_ids = group_ids.astype(np.int64).reshape(-1)
+        return group_ids
+    
     def get_validation_summary(self) -> Dict[str, Any]:
         """
         検証結果のサマリーを取得
@@ -0,0 +1,521 @@
+"""
+重複検出
+
+キー列の値を64ビットのフィンガープリントにハッシュし、バッチ単位で重複を検出します。
+既出のフィンガープリントはソート済み配列として保持し、上限を超えるとディスクへ退避して
+Bloomフィルタで候補を絞り込むモードに切り替わるため、数千万件を検査してもメモリ使用量は
+一定に保たれます。
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, Any, List, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# メモリ上に保持するフィンガープリントの上限（8バイト/件）
+DEFAULT_MAX_MEMORY_FINGERPRINTS = 4_000_000
+
+# Bloomフィルタの想定件数と偽陽性率
+DEFAULT_EXPECTED_ROWS = 50_000_000
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+# メモリ上のソート済み配列をまとめる数
+MAX_MEMORY_RUNS = 16
+
+# FNV-1a (64ビット)
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+# 型の区別を付けた文字列（"n:2020" / "s:2020"）の列であることを示すフィールドのメタデータ
+TYPED_FIELD_METADATA = {b"fingerprint": b"typed"}
+
+
+def _mix(values: "np.ndarray") -> "np.ndarray":
+    """splitmix64 の最終化関数でビットを拡散"""
+    import numpy as np
+
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def hash_strings(array: "pa.Array") -> "np.ndarray":
+    """
+    文字列配列の各値をFNV-1aで64ビットにハッシュ
+
+    文字列バッファとオフセットを直接読み、バイト位置ごとにまとめて計算します。
+
+    Args:
+        array: Arrow配列（文字列以外は文字列に変換）
+
+    Returns:
+        uint64のNumPy配列（nullの位置の値は不定）
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    if not pa.types.is_large_binary(array.type):
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)
+                or pa.types.is_binary(array.type)):
+            array = array.cast(pa.string())
+        array = array.cast(pa.large_binary())
+
+    count = len(array)
+    hashes = np.full(count, FNV_OFFSET_BASIS, dtype=np.uint64)
+    if count == 0:
+        return hashes
+
+    _, offsets_buffer, data_buffer = array.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[array.offset:array.offset + count + 1]
+    if data_buffer is None:
+        return hashes
+    data = np.frombuffer(data_buffer, dtype=np.uint8)
+
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+    prime = np.uint64(FNV_PRIME)
+
+    # 長い値ほど多く回るが、対象は辞書の一意値なので総バイト数程度で済む
+    position = 0
+    active = np.flatnonzero(lengths > 0)
+    while len(active):
+        hashes[active] ^= data[starts[active] + position].astype(np.uint64)
+        hashes[active] *= prime
+        position += 1
+        active = active[lengths[active] > position]
+    return hashes
+
+
+def type_tag(data_type: "pa.DataType") -> str:
+    """
+    値の種類を表すタグ（数値は整数・小数を区別せず "n"、文字列は "s"、真偽値は "b"）
+
+    Args:
+        data_type: Arrowの型
+
+    Returns:
+        タグ
+    """
+    import pyarrow as pa
+
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    if (pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+            or pa.types.is_binary(data_type) or pa.types.is_large_binary(data_type)):
+        return "s"
+    if pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_decimal(data_type):
+        return "n"
+    if pa.types.is_boolean(data_type):
+        return "b"
+    return "o"
+
+
+def typed_strings(array: "pa.Array") -> "pa.Array":
+    """
+    配列の値を、型のタグを付けた文字列にする（2020 と "2020" を区別するため）
+
+    Args:
+        array: Arrow配列（辞書型の場合は辞書の値）
+
+    Returns:
+        "<タグ>:<値>" の文字列配列（nullはそのまま）
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    return pc.binary_join_element_wise(f"{type_tag(array.type)}:", array.cast(pa.string()), "")
+
+
+def _typed_column(values: List[Any]) -> "pa.Array":
+    """
+    レコードの1列の値（型が混在しうる）を typed_strings と同じ形式の文字列配列にする
+
+    小数の文字列化は Arrow に合わせるため、まとめて Arrow で変換します。
+    """
+    import pyarrow as pa
+
+    texts: List[Optional[str]] = [None] * len(values)
+    float_positions = []
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, str):
+            texts[i] = f"s:{value}"
+        elif isinstance(value, bool):
+            texts[i] = "b:true" if value else "b:false"
+        elif isinstance(value, int):
+            texts[i] = f"n:{value}"
+        elif isinstance(value, float):
+            float_positions.append(i)
+        else:
+            texts[i] = f"o:{value}"
+
+    if float_positions:
+        floats = pa.array([values[i] for i in float_positions], type=pa.float64()).cast(pa.string())
+        for i, text in zip(float_positions, floats.to_pylist()):
+            texts[i] = f"n:{text}"
+    return pa.array(texts, type=pa.string())
+
+
+def fingerprint_table(table: "pa.Table", key_columns: List[str]) -> "np.ndarray":
+    """
+    キー列の組み合わせから行ごとの64ビットフィンガープリントを作成
+
+    列名もハッシュに含め、nullの列（または存在しない列）は組み合わせから除外するため、
+    列の並び順やレコードごとのキーの有無に左右されません（値が None のキーと、キーが無い
+    レコードは同じキーになります）。
+    値は型のタグを付けてハッシュするため、数値の 2020 と文字列の "2020" は別のキーになります。
+
+    Args:
+        table: Arrowテーブル
+        key_columns: キー列
+
+    Returns:
+        uint64のNumPy配列
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    fingerprints = np.zeros(table.num_rows, dtype=np.uint64)
+    for column in sorted(set(key_columns)):
+        if column not in table.column_names:
+            continue
+        array = table.column(column).combine_chunks()
+        if pa.types.is_null(array.type):
+            continue
+        # records_to_table の列はタグ付け済み
+        metadata = table.schema.field(column).metadata or {}
+        tagged = metadata.get(b"fingerprint") == TYPED_FIELD_METADATA[b"fingerprint"]
+
+        # 辞書の一意値だけをタグ付け・ハッシュしてインデックスで展開する
+        if pa.types.is_dictionary(array.type):
+            dictionary, indices = array.dictionary, array.indices
+        else:
+            encoded = pc.dictionary_encode(array)
+            dictionary, indices = encoded.dictionary, encoded.indices
+        values = hash_strings(dictionary if tagged else typed_strings(dictionary))
+
+        valid = pc.is_valid(indices).to_numpy(zero_copy_only=False)
+        codes = pc.fill_null(indices, 0).to_numpy(zero_copy_only=False).astype(np.int64)
+        name_hash = hash_strings(pa.array([column]))[0]
+
+        column_hashes = values[codes] if len(values) else np.zeros(len(codes), dtype=np.uint64)
+        mixed = _mix(fingerprints ^ _mix(column_hashes + name_hash))
+        fingerprints = np.where(valid, mixed, fingerprints)
+    return fingerprints
+
+
+def records_to_table(records: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> "pa.Table":
+    """
+    レコードのリストを重複検出用のArrowテーブルに変換
+
+    値は型のタグを付けた文字列（typed_strings と同じ形式）にするため、型が混在する列でも
+    2020 と "2020" を区別でき、Arrowテーブルを直接渡した場合とも同じフィンガープリントになります。
+    値が None のキーとキーが無いレコードはどちらも null になります。
+
+    Args:
+        records: レコードのリスト
+        columns: 対象の列（省略時は全レコードのキー）
+
+    Returns:
+        Arrowテーブル
+    """
+    import pyarrow as pa
+
+    if columns is None:
+        names: Dict[str, None] = {}
+        for record in records:
+            for key in record:
+                names.setdefault(key, None)
+        columns = list(names)
+
+    return pa.table(
+        [_typed_column([record.get(column) for record in records]) for column in columns],
+        schema=pa.schema([pa.field(column, pa.string(), metadata=TYPED_FIELD_METADATA) for column in columns])
+    )
+
+
+class DuplicateDetector:
+    """バッチ単位で既出キーを判定する重複検出器"""
+
+    def __init__(
+        self,
+        key_columns: Optional[List[str]] = None,
+        exclude_columns: Optional[List[str]] = None,
+        max_memory_fingerprints: int = DEFAULT_MAX_MEMORY_FINGERPRINTS,
+        expected_rows: int = DEFAULT_EXPECTED_ROWS,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+        spill_dir: Optional[str] = None
+    ):
+        """
+        初期化
+
+        Args:
+            key_columns: キー列（省略時は exclude_columns 以外の全列）
+            exclude_columns: キーから除外する列（例: 値列 "$"）
+            max_memory_fingerprints: メモリ上に保持するフィンガープリントの上限
+            expected_rows: Bloomフィルタの想定件数
+            false_positive_rate: Bloomフィルタの偽陽性率
+            spill_dir: 退避先ディレクトリ（省略時は一時ディレクトリ）
+        """
+        self.key_columns = list(key_columns) if key_columns else None
+        self.exclude_columns = set(exclude_columns or [])
+        self.max_memory_fingerprints = max_memory_fingerprints
+        self.expected_rows = expected_rows
+        self.false_positive_rate = false_positive_rate
+        self._spill_dir = spill_dir
+        self._owns_spill_dir = False
+
+        self._runs = []
+        self._memory_count = 0
+        self._spill_files = []
+        self._spilled_count = 0
+        self._bloom = None
+        self._bloom_bits = 0
+        self._bloom_hashes = 0
+
+        self.rows_checked = 0
+        self.duplicates_found = 0
+        self.bloom_candidates = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def mode(self) -> str:
+        """動作モード（メモリのみは memory、ディスク退避後は spill）"""
+        return "spill" if self._spill_files else "memory"
+
+    def fingerprints(self, data: Any) -> "np.ndarray":
+        """
+        テーブル・バッチ・レコードのリストのフィンガープリントを計算
+
+        Args:
+            data: Arrowテーブル、RecordBatch、またはレコードのリスト
+
+        Returns:
+            uint64のNumPy配列
+        """
+        table = self._to_table(data)
+        if self.key_columns is not None:
+            columns = self.key_columns
+        else:
+            columns = [name for name in table.column_names if name not in self.exclude_columns]
+        return fingerprint_table(table, columns)
+
+    def check_batch(self, data: Any) -> "np.ndarray":
+        """
+        バッチ内の各行が既出キーかを判定し、新しいキーを登録
+
+        同じバッチ内で繰り返されたキーも、2件目以降を重複として扱います。
+
+        Args:
+            data: Arrowテーブル、RecordBatch、またはレコードのリスト
+
+        Returns:
+            重複行がTrueのboolマスク
+        """
+        import numpy as np
+
+        fingerprints = self.fingerprints(data)
+        duplicates = np.ones(len(fingerprints), dtype=bool)
+
+        unique, first_index = np.unique(fingerprints, return_index=True)
+        seen = self._contains(unique)
+        new_keys = unique[~seen]
+        duplicates[first_index[~seen]] = False
+
+        self._add(new_keys)
+        self.rows_checked += len(fingerprints)
+        self.duplicates_found += int(duplicates.sum())
+        return duplicates
+
+    def filter_batch(self, data: Any) -> Any:
+        """
+        既出キーの行を取り除く
+
+        Args:
+            data: Arrowテーブル、RecordBatch、またはレコードのリスト
+
+        Returns:
+            入力と同じ形式の、初出の行のみのデータ
+        """
+        import pyarrow as pa
+
+        duplicates = self.check_batch(data)
+        if isinstance(data, (pa.Table, pa.RecordBatch)):
+            return data.filter(pa.array(~duplicates))
+        return [record for record, duplicate in zip(data, duplicates) if not duplicate]
+
+    def deduplicate(self, batches: Iterable[Any]) -> Iterable[Any]:
+        """
+        バッチを順に受け取り、重複を除いたバッチを返すジェネレータ
+
+        Args:
+            batches: テーブル・RecordBatch・レコードのリストの反復
+
+        Yields:
+            重複を除いたバッチ
+        """
+        for batch in batches:
+            yield self.filter_batch(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        検出状況を取得
+
+        Returns:
+            件数・モード・メモリ使用量の辞書
+        """
+        return {
+            "mode": self.mode,
+            "rows_checked": self.rows_checked,
+            "unique_keys": self._memory_count + self._spilled_count,
+            "duplicates_found": self.duplicates_found,
+            "memory_fingerprints": self._memory_count,
+            "spilled_fingerprints": self._spilled_count,
+            "spill_files": len(self._spill_files),
+            "bloom_candidates": self.bloom_candidates,
+            "memory_bytes": self._memory_count * 8 + (len(self._bloom) if self._bloom is not None else 0)
+        }
+
+    def close(self):
+        """退避ファイルを削除"""
+        for path in self._spill_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._spill_files = []
+        if self._owns_spill_dir and self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+            self._owns_spill_dir = False
+
+    def _to_table(self, data: Any) -> "pa.Table":
+        """入力をArrowテーブルに揃える"""
+        import pyarrow as pa
+
+        if isinstance(data, pa.Table):
+            return data
+        if isinstance(data, pa.RecordBatch):
+            return pa.Table.from_batches([data])
+        return records_to_table(list(data or []), self.key_columns)
+
+    def _contains(self, fingerprints: "np.ndarray") -> "np.ndarray":
+        """ソート済みの一意なフィンガープリントのうち既出のもののマスク"""
+        import numpy as np
+
+        found = np.zeros(len(fingerprints), dtype=bool)
+        for run in self._runs:
+            found |= self._in_sorted(run, fingerprints)
+
+        if self._spill_files:
+            # Bloomフィルタで陽性の候補だけを退避ファイルで確認する
+            candidates = np.flatnonzero(~found & self._bloom_contains(fingerprints))
+            self.bloom_candidates += len(candidates)
+            for path in self._spill_files:
+                if not len(candidates):
+                    break
+                spilled = np.load(path, mmap_mode="r")
+                hit = self._in_sorted(spilled, fingerprints[candidates])
+                found[candidates[hit]] = True
+                candidates = candidates[~hit]
+        return found
+
+    @staticmethod
+    def _in_sorted(sorted_values: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+        """values の各値が sorted_values に含まれるか"""
+        import numpy as np
+
+        if not len(sorted_values) or not len(values):
+            return np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(sorted_values, values)
+        positions[positions == len(sorted_values)] = len(sorted_values) - 1
+        return np.asarray(sorted_values[positions]) == values
+
+    def _add(self, fingerprints: "np.ndarray"):
+        """新しいフィンガープリント（ソート済み・既出なし）を登録"""
+        import numpy as np
+
+        if not len(fingerprints):
+            return
+        self._runs.append(fingerprints)
+        self._memory_count += len(fingerprints)
+
+        if len(self._runs) > MAX_MEMORY_RUNS:
+            self._runs = [np.sort(np.concatenate(self._runs))]
+        if self._memory_count > self.max_memory_fingerprints:
+            self._spill()
+
+    def _spill(self):
+        """メモリ上のフィンガープリントをディスクへ退避し、Bloomフィルタに登録"""
+        import numpy as np
+
+        merged = np.sort(np.concatenate(self._runs))
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="estat_dedup_")
+            self._owns_spill_dir = True
+        os.makedirs(self._spill_dir, exist_ok=True)
+
+        path = os.path.join(self._spill_dir, f"fingerprints_{len(self._spill_files):05d}.npy")
+        np.save(path, merged)
+        self._spill_files.append(path)
+        self._spilled_count += len(merged)
+
+        if self._bloom is None:
+            self._init_bloom()
+        self._bloom_add(merged)
+
+        logger.info(f"Spilled {len(merged):,} fingerprints to {path}")
+        self._runs = []
+        self._memory_count = 0
+
+    def _init_bloom(self):
+        """想定件数と偽陽性率からBloomフィルタのサイズを決定"""
+        import math
+        import numpy as np
+
+        expected = max(self.expected_rows, self.max_memory_fingerprints)
+        bits = int(-expected * math.log(self.false_positive_rate) / (math.log(2) ** 2))
+        bits = max(64, (bits + 7) // 8 * 8)
+        self._bloom_bits = bits
+        self._bloom_hashes = max(1, round(bits / expected * math.log(2)))
+        self._bloom = np.zeros(bits // 8, dtype=np.uint8)
+
+    def _bloom_positions(self, fingerprints: "np.ndarray"):
+        """ダブルハッシングでk個のビット位置を順に返す"""
+        import numpy as np
+
+        bits = np.uint64(self._bloom_bits)
+        step = _mix(fingerprints) | np.uint64(1)
+        for i in range(self._bloom_hashes):
+            yield (fingerprints + np.uint64(i) * step) % bits
+
+    def _bloom_add(self, fingerprints: "np.ndarray"):
+        import numpy as np
+
+        for positions in self._bloom_positions(fingerprints):
+            np.bitwise_or.at(
+                self._bloom, positions >> np.uint64(3),
+                (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8))
+            )
+
+    def _bloom_contains(self, fingerprints: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        found = np.ones(len(fingerprints), dtype=bool)
+        for positions in self._bloom_positions(fingerprints):
+            bytes_ = self._bloom[positions >> np.uint64(3)]
+            found &= (bytes_ >> (positions & np.uint64(7)).astype(np.uint8)) & 1 == 1
+        return found
@@ -0,0 +1,287 @@
+"""
+Iceberg Direct Commit
+
+transform_to_parquet / save_to_parquet で書き出したParquetファイルを、
+Athenaの INSERT を使わずにIcebergのデータファイルとして登録し、
+カタログ経由でスナップショットをコミットします。
+
+データは読み直さず、ファイルのフッター（行数・列統計）からマニフェストを作るため、
+投入時間はデータ量によらずメタデータのコミット1回分になります。
+
+カタログはGlue（本番）とSQL（SQLiteなどを使ったローカル検証）に対応します。
+pyiceberg が必要です（pip install "pyiceberg[glue,sql-sqlite]"）。
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_NAME = "estat"
+CATALOG_TYPES = ("glue", "sql")
+
+# ドメインスキーマの型名に対応するIcebergの型名
+ICEBERG_TYPES = {
+    "STRING": "string",
+    "INT": "int",
+    "BIGINT": "long",
+    "DOUBLE": "double",
+    "TIMESTAMP": "timestamp",
+    "DATE": "date",
+    "BOOLEAN": "boolean",
+}
+
+
+def _require_pyiceberg():
+    try:
+        import pyiceberg  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            'pyiceberg is required for direct Iceberg commits (pip install "pyiceberg[glue,sql-sqlite]")'
+        ) from e
+
+
+def load_catalog(catalog_type: str = "glue",
+                 name: str = DEFAULT_CATALOG_NAME,
+                 region: Optional[str] = None,
+                 uri: Optional[str] = None,
+                 warehouse: Optional[str] = None):
+    """
+    Icebergカタログを読み込む
+
+    Args:
+        catalog_type: カタログの種類（glue / sql）
+        name: カタログ名
+        region: Glueカタログのリージョン
+        uri: SQLカタログの接続URI（例: sqlite:////tmp/iceberg/catalog.db）
+        warehouse: テーブルデータの保存先（SQLカタログで必須、例: file:///tmp/iceberg/warehouse）
+
+    Returns:
+        pyiceberg のカタログ
+    """
+    _require_pyiceberg()
+    from pyiceberg.catalog import load_catalog as _load_catalog
+
+    catalog_type = catalog_type.lower()
+    if catalog_type not in CATALOG_TYPES:
+        raise ValueError(f"Unknown catalog type: {catalog_type} (available: {', '.join(CATALOG_TYPES)})")
+
+    properties: Dict[str, str] = {"type": catalog_type}
+    if catalog_type == "glue":
+        if region:
+            properties["glue.region"] = region
+    else:
+        if not uri or not warehouse:
+            raise ValueError("SQL catalog requires uri and warehouse")
+        properties["uri"] = uri
+    if warehouse:
+        properties["warehouse"] = warehouse
+
+    return _load_catalog(name, **properties)
+
+
+def iceberg_schema(columns: List[Dict[str, Any]]):
+    """
+    ドメインスキーマの列定義からIcebergスキーマを作成
+
+    Args:
+        columns: {"name", "type", "description"} のリスト（SchemaMapper のスキーマ）
+
+    Returns:
+        pyiceberg の Schema
+    """
+    _require_pyiceberg()
+    from pyiceberg import types
+    from pyiceberg.schema import Schema
+
+    type_classes = {
+        "string": types.StringType, "int": types.IntegerType, "long": types.LongType,
+        "double": types.DoubleType, "timestamp": types.TimestampType, "date": types.DateType,
+        "boolean": types.BooleanType,
+    }
+    fields = []
+    for field_id, column in enumerate(columns, start=1):
+        type_name = ICEBERG_TYPES.get(column["type"].upper(), "string")
+        fields.append(types.NestedField(
+            field_id=field_id,
+            name=column["name"],
+            field_type=type_classes[type_name](),
+            required=False,
+            doc=column.get("description")
+        ))
+    return Schema(*fields)
+
+
+def partition_spec(schema, partition_by: List[str]):
+    """
+    列名のリストから identity パーティションの仕様を作成
+
+    Args:
+        schema: pyiceberg の Schema
+        partition_by: パーティション列名のリスト（スキーマに無い列は無視）
+
+    Returns:
+        pyiceberg の PartitionSpec
+    """
+    _require_pyiceberg()
+    from pyiceberg.partitioning import PartitionField, PartitionSpec
+    from pyiceberg.transforms import IdentityTransform
+
+    fields = []
+    for partition_id, name in enumerate(partition_by, start=1000):
+        try:
+            source = schema.find_field(name)
+        except ValueError:
+            continue
+        fields.append(PartitionField(
+            source_id=source.field_id, field_id=partition_id, transform=IdentityTransform(), name=name
+        ))
+    return PartitionSpec(*fields)
+
+
+def _is_data_file(name: str) -> bool:
+    return name.endswith(".parquet") and not name.startswith(("_", "."))
+
+
+def list_parquet_files(s3_client, s3_path: str) -> List[str]:
+    """
+    Parquetファイル（またはパーティション出力のディレクトリ）のファイル一覧を取得
+
+    s3:// 以外のパスはローカルファイルとして扱います（SQLカタログでの検証用）。
+
+    Args:
+        s3_client: boto3 S3クライアント（ローカルパスの場合は未使用）
+        s3_path: Parquetファイルまたはディレクトリのパス（s3://bucket/key またはローカルパス）
+
+    Returns:
+        パスのリスト（_ / . で始まるファイルとParquet以外は除く）
+    """
+    if not s3_path.startswith("s3://"):
+        local_path = Path(s3_path[len("file://"):] if s3_path.startswith("file://") else s3_path)
+        if local_path.is_file():
+            return [str(local_path)]
+        if not local_path.is_dir():
+            raise ValueError(f"Path not found: {s3_path}")
+        return sorted(str(path) for path in local_path.rglob("*.parquet") if _is_data_file(path.name))
+
+    bucket, _, key = s3_path[5:].partition("/")
+    if key.endswith(".parquet"):
+        return [s3_path]
+
+    prefix = key.rstrip("/") + "/" if key else ""
+    paths = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            name = obj["Key"].rsplit("/", 1)[-1]
+            if _is_data_file(name):
+                paths.append(f"s3://{bucket}/{obj['Key']}")
+    return sorted(paths)
+
+
+def snapshot_summary(snapshot) -> Dict[str, Any]:
+    """
+    スナップショットのIDと追加件数を取得
+
+    Args:
+        snapshot: pyiceberg の Snapshot（None可）
+
+    Returns:
+        {"snapshot_id", "added_files", "added_records", "total_records"}
+    """
+    if snapshot is None:
+        return {"snapshot_id": None, "added_files": 0, "added_records": 0, "total_records": 0}
+
+    properties = getattr(snapshot.summary, "additional_properties", None) or {}
+
+    def _int(name: str) -> int:
+        return int(properties.get(name, 0) or 0)
+
+    return {
+        "snapshot_id": snapshot.snapshot_id,
+        "added_files": _int("added-data-files"),
+        "added_records": _int("added-records"),
+        "total_records": _int("total-records"),
+    }
+
+
+class IcebergCommitter:
+    """ParquetファイルをIcebergテーブルに直接コミット"""
+
+    def __init__(self, catalog, database: str):
+        """
+        Initialize the Iceberg Committer
+
+        Args:
+            catalog: pyiceberg のカタログ（load_catalog の戻り値）
+            database: 名前空間（Glueデータベース名）
+        """
+        self.catalog = catalog
+        self.database = database
+
+    def ensure_table(self, table_name: str, columns: List[Dict[str, Any]],
+                     partition_by: Optional[List[str]] = None,
+                     location: Optional[str] = None):
+        """
+        テーブルを読み込む（存在しない場合はスキーマ・パーティション仕様から作成）
+
+        Args:
+            table_name: テーブル名
+            columns: ドメインスキーマの列定義
+            partition_by: パーティション列名のリスト
+            location: テーブルの保存先（省略時はカタログのウェアハウス）
+
+        Returns:
+            pyiceberg の Table
+        """
+        _require_pyiceberg()
+        from pyiceberg.exceptions import NamespaceAlreadyExistsError, NoSuchTableError
+
+        identifier = (self.database, table_name)
+        try:
+            return self.catalog.load_table(identifier)
+        except NoSuchTableError:
+            pass
+
+        try:
+            self.catalog.create_namespace(self.database)
+        except NamespaceAlreadyExistsError:
+            pass
+
+        schema = iceberg_schema(columns)
+        logger.info(f"Creating Iceberg table {self.database}.{table_name}")
+        return self.catalog.create_table(
+            identifier,
+            schema=schema,
+            partition_spec=partition_spec(schema, partition_by or []),
+            location=location,
+            properties={"format-version": "2", "write.format.default": "parquet"}
+        )
+
+    def commit_files(self, table, file_paths: List[str],
+                     snapshot_properties: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Parquetファイルをデータファイルとして登録し、スナップショットを1回コミット
+
+        パーティション値はファイルの列統計（最小値 = 最大値）から決まるため、
+        パーティション列ごとに分割して書き出したファイルを渡してください。
+
+        Args:
+            table: pyiceberg の Table
+            file_paths: ParquetファイルのURIリスト
+            snapshot_properties: スナップショットのサマリーに追加するプロパティ
+
+        Returns:
+            コミット結果（スナップショットID・追加ファイル数・追加行数）
+        """
+        if not file_paths:
+            return {"success": False, "error": "No Parquet files to commit"}
+
+        table.add_files(file_paths, snapshot_properties=snapshot_properties or {})
+        table.refresh()
+
+        summary = snapshot_summary(table.current_snapshot())
+        logger.info(f"Committed {len(file_paths)} file(s) to {'.'.join(table.name())} "
+                    f"(snapshot {summary['snapshot_id']}, {summary['added_records']} records)")
+        return {"success": True, "files_committed": len(file_paths), **summary}
@@ -0,0 +1,320 @@
+"""
+Iceberg Table Maintenance
+
+投入のたびに小さなデータファイルが増えるドメインテーブルを、Athenaの
+OPTIMIZE（bin-packによる小ファイルの統合）と VACUUM（期限切れスナップショットの削除・
+孤立ファイルの削除）で保守します。
+
+実行するかどうかは $files / $snapshots メタデータテーブルから集計したファイル数・サイズ・
+スナップショット数としきい値で判定し、実行前後の統計を返します。
+"""
+
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# デフォルトのしきい値
+DEFAULT_SMALL_FILE_BYTES = 64 * 1024 * 1024
+DEFAULT_MIN_SMALL_FILES = 10
+DEFAULT_SNAPSHOT_RETENTION_DAYS = 5
+DEFAULT_MIN_SNAPSHOTS_TO_KEEP = 1
+
+# OPTIMIZE は大きなテーブルで時間がかかるため、待機時間を長めにとる
+DEFAULT_MAX_WAIT_SECONDS = 900
+
+
+def file_stats_query(database: str, table_name: str,
+                     small_file_bytes: int = DEFAULT_SMALL_FILE_BYTES) -> str:
+    """
+    データファイル・削除ファイルの統計を集計するクエリ
+
+    Args:
+        database: データベース名
+        table_name: テーブル名
+        small_file_bytes: 小ファイルとみなすサイズ（バイト）
+
+    Returns:
+        SQLクエリ
+    """
+    return f"""
+    SELECT
+        COUNT_IF(content = 0) AS data_files,
+        COUNT_IF(content <> 0) AS delete_files,
+        COALESCE(SUM(IF(content = 0, file_size_in_bytes)), 0) AS total_bytes,
+        COALESCE(SUM(IF(content = 0, record_count)), 0) AS records,
+        COUNT(DISTINCT IF(content = 0, partition)) AS partitions,
+        COUNT_IF(content = 0 AND file_size_in_bytes < {int(small_file_bytes)}) AS small_files,
+        COUNT(DISTINCT IF(content = 0 AND file_size_in_bytes < {int(small_file_bytes)}, partition))
+            AS small_file_partitions
+    FROM "{database}"."{table_name}$files"
+    """
+
+
+def snapshot_stats_query(database: str, table_name: str,
+                         retention_days: int = DEFAULT_SNAPSHOT_RETENTION_DAYS) -> str:
+    """
+    スナップショット数と保持期間を過ぎたスナップショット数を集計するクエリ
+
+    Args:
+        database: データベース名
+        table_name: テーブル名
+        retention_days: スナップショットの保持日数
+
+    Returns:
+        SQLクエリ
+    """
+    return f"""
+    SELECT
+        COUNT(*) AS snapshots,
+        COUNT_IF(committed_at < current_timestamp - INTERVAL '{int(retention_days)}' DAY) AS expired_snapshots
+    FROM "{database}"."{table_name}$snapshots"
+    """
+
+
+def plan_maintenance(stats: Dict[str, int],
+                     min_small_files: int = DEFAULT_MIN_SMALL_FILES) -> Dict[str, Any]:
+    """
+    統計としきい値から実行する保守作業を決める
+
+    小ファイルはパーティションごとに1ファイルまでしか減らせないため、
+    パーティション数を差し引いた「統合で減らせるファイル数」で判定します。
+
+    Args:
+        stats: file_stats_query / snapshot_stats_query の集計結果
+        min_small_files: OPTIMIZE を実行する統合可能な小ファイル数の下限
+
+    Returns:
+        {"optimize": bool, "vacuum": bool, "reasons": [...]}
+    """
+    reasons = []
+
+    mergeable = stats.get("small_files", 0) - stats.get("small_file_partitions", 0)
+    optimize = False
+    if mergeable >= min_small_files:
+        optimize = True
+        reasons.append(f"{mergeable} small file(s) can be merged (threshold: {min_small_files})")
+    if stats.get("delete_files", 0) > 0:
+        optimize = True
+        reasons.append(f"{stats['delete_files']} delete file(s) can be applied")
+
+    vacuum = stats.get("expired_snapshots", 0) > 0
+    if vacuum:
+        reasons.append(f"{stats['expired_snapshots']} snapshot(s) past retention")
+
+    return {"optimize": optimize, "vacuum": vacuum, "reasons": reasons}
+
+
+class IcebergMaintenance:
+    """Icebergテーブルの保守（OPTIMIZE / VACUUM）"""
+
+    def __init__(self, athena_client, database: str, output_location: str,
+                 max_wait_seconds: int = DEFAULT_MAX_WAIT_SECONDS,
+                 poll_interval: float = 1.0):
+        """
+        Initialize the Iceberg Maintenance
+
+        Args:
+            athena_client: boto3 Athenaクライアント
+            database: Glueデータベース名
+            output_location: Athenaクエリ結果の出力先（s3://...）
+            max_wait_seconds: 1クエリあたりの最大待機時間（秒）
+            poll_interval: クエリ状態の確認間隔（秒）
+        """
+        self.athena = athena_client
+        self.database = database
+        self.output_location = output_location
+        self.max_wait_seconds = max_wait_seconds
+        self.poll_interval = poll_interval
+
+    def _execute(self, query: str) -> Dict[str, Any]:
+        """
+        クエリを実行して完了を待つ
+
+        Args:
+            query: SQLクエリ
+
+        Returns:
+            {"success": bool, "query_execution_id", "error"}
+        """
+        response = self.athena.start_query_execution(
+            QueryString=query,
+            QueryExecutionContext={'Database': self.database},
+            ResultConfiguration={'OutputLocation': self.output_location}
+        )
+        query_execution_id = response['QueryExecutionId']
+
+        started = time.monotonic()
+        while True:
+            execution = self.athena.get_query_execution(QueryExecutionId=query_execution_id)['QueryExecution']
+            state = execution['Status']['State']
+            if state in ('SUCCEEDED', 'FAILED', 'CANCELLED'):
+                break
+            if time.monotonic() - started > self.max_wait_seconds:
+                return {"success": False, "query_execution_id": query_execution_id,
+                        "error": f"Query timed out after {self.max_wait_seconds}s"}
+            time.sleep(self.poll_interval)
+
+        if state != 'SUCCEEDED':
+            return {"success": False, "query_execution_id": query_execution_id,
+                    "error": execution['Status'].get('StateChangeReason', f"Query {state}")}
+        return {"success": True, "query_execution_id": query_execution_id}
+
+    def _query_row(self, query: str) -> Dict[str, int]:
+        """
+        1行を返す集計クエリを実行し、列名と整数値の辞書にする
+
+        Args:
+            query: SQLクエリ
+
+        Returns:
+            列名と値の辞書
+        """
+        result = self._execute(query)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+
+        rows = self.athena.get_query_results(
+            QueryExecutionId=result["query_execution_id"], MaxResults=2
+        )['ResultSet']['Rows']
+        names = [column.get('VarCharValue') for column in rows[0]['Data']]
+        values = [column.get('VarCharValue') for column in rows[1]['Data']] if len(rows) > 1 else []
+        return {name: int(float(value)) if value else 0 for name, value in zip(names, values)}
+
+    def table_stats(self, table_name: str,
+                    small_file_bytes: int = DEFAULT_SMALL_FILE_BYTES,
+                    retention_days: int = DEFAULT_SNAPSHOT_RETENTION_DAYS) -> Dict[str, int]:
+        """
+        テーブルのファイル・スナップショットの統計を取得
+
+        Args:
+            table_name: テーブル名
+            small_file_bytes: 小ファイルとみなすサイズ（バイト）
+            retention_days: スナップショットの保持日数
+
+        Returns:
+            data_files, delete_files, total_bytes, records, partitions, small_files,
+            small_file_partitions, snapshots, expired_snapshots
+        """
+        stats = self._query_row(file_stats_query(self.database, table_name, small_file_bytes))
+        stats.update(self._query_row(snapshot_stats_query(self.database, table_name, retention_days)))
+        return stats
+
+    def optimize(self, table_name: str, where: Optional[str] = None) -> Dict[str, Any]:
+        """
+        bin-packで小ファイルを統合（削除ファイルも適用）
+
+        Args:
+            table_name: テーブル名
+            where: 対象パーティションの条件（省略時はテーブル全体）
+
+        Returns:
+            実行結果
+        """
+        query = f"OPTIMIZE {self.database}.{table_name} REWRITE DATA USING BIN_PACK"
+        if where:
+            query += f" WHERE {where}"
+        logger.info(f"Optimizing {self.database}.{table_name}")
+        return self._execute(query)
+
+    def vacuum(self, table_name: str,
+               retention_days: int = DEFAULT_SNAPSHOT_RETENTION_DAYS,
+               min_snapshots_to_keep: int = DEFAULT_MIN_SNAPSHOTS_TO_KEEP) -> Dict[str, Any]:
+        """
+        保持期間を過ぎたスナップショットと、どのスナップショットからも参照されないファイルを削除
+
+        VACUUM の対象期間はテーブルプロパティで決まるため、先に保持期間を設定します。
+        OPTIMIZE で置き換えたファイルは、置き換え前のスナップショットが保持期間を過ぎた後の
+        VACUUM で削除されます。
+
+        Args:
+            table_name: テーブル名
+            retention_days: スナップショットの保持日数
+            min_snapshots_to_keep: 保持するスナップショットの最小数
+
+        Returns:
+            実行結果
+        """
+        properties = self._execute(
+            f"ALTER TABLE {self.database}.{table_name} SET TBLPROPERTIES ("
+            f"'vacuum_max_snapshot_age_seconds'='{int(retention_days) * 86400}', "
+            f"'vacuum_min_snapshots_to_keep'='{int(min_snapshots_to_keep)}')"
+        )
+        if not properties["success"]:
+            return properties
+
+        logger.info(f"Vacuuming {self.database}.{table_name}")
+        return self._execute(f"VACUUM {self.database}.{table_name}")
+
+    def maintain(self, table_name: str,
+                 small_file_bytes: int = DEFAULT_SMALL_FILE_BYTES,
+                 min_small_files: int = DEFAULT_MIN_SMALL_FILES,
+                 retention_days: int = DEFAULT_SNAPSHOT_RETENTION_DAYS,
+                 force: bool = False,
+                 dry_run: bool = False) -> Dict[str, Any]:
+        """
+        統計を取得し、しきい値を超えた保守作業を実行して前後の統計を返す
+
+        Args:
+            table_name: テーブル名
+            small_file_bytes: 小ファイルとみなすサイズ（バイト）
+            min_small_files: OPTIMIZE を実行する統合可能な小ファイル数の下限
+            retention_days: スナップショットの保持日数
+            force: しきい値に関係なく OPTIMIZE と VACUUM を実行するか
+            dry_run: 統計と判定だけを返し、実行しないか
+
+        Returns:
+            テーブルごとの保守結果
+        """
+        before = self.table_stats(table_name, small_file_bytes, retention_days)
+        plan = plan_maintenance(before, min_small_files)
+        if force:
+            plan.update(optimize=True, vacuum=True)
+
+        result: Dict[str, Any] = {
+            "success": True,
+            "table": f"{self.database}.{table_name}",
+            "before": before,
+            "plan": plan,
+            "actions": []
+        }
+        if dry_run or not (plan["optimize"] or plan["vacuum"]):
+            return result
+
+        for action, run in (("optimize", lambda: self.optimize(table_name)),
+                            ("vacuum", lambda: self.vacuum(table_name, retention_days))):
+            if not plan[action]:
+                continue
+            outcome = run()
+            result["actions"].append({"action": action, **outcome})
+            if not outcome["success"]:
+                result["success"] = False
+                result["error"] = f"{action} failed: {outcome['error']}"
+                break
+
+        result["after"] = self.table_stats(table_name, small_file_bytes, retention_days)
+        return result
+
+    def maintain_tables(self, table_names: List[str], **options) -> Dict[str, Any]:
+        """
+        複数のテーブルを順に保守（未作成のテーブルはスキップし、その他のエラーはテーブルごとに記録）
+
+        Args:
+            table_names: テーブル名のリスト
+            **options: maintain に渡すしきい値・オプション
+
+        Returns:
+            {"success": bool, "tables": [...]}
+        """
+        tables = []
+        for table_name in table_names:
+            try:
+                tables.append(self.maintain(table_name, **options))
+            except Exception as e:
+                if "TABLE_NOT_FOUND" in str(e) or "does not exist" in str(e):
+                    tables.append({"success": True, "table": f"{self.database}.{table_name}", "skipped": True})
+                    continue
+                logger.error(f"Maintenance failed for {self.database}.{table_name}: {e}")
+                tables.append({"success": False, "table": f"{self.database}.{table_name}", "error": str(e)})
+        return {"success": all(table["success"] for table in tables), "tables": tables}
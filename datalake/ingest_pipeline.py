@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+取り込みパイプライン
+
+生データ（S3のJSON）を1回だけ読み込み・デコードし、バッチごとのスキーマ変換・データ品質検証・
+Parquet保存を同じインメモリのArrowテーブルに対して順に実行します。
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from datalake.data_quality_validator import DataQualityValidator
+from datalake.parquet_writer import (
+    DEFAULT_MAX_ROWS_PER_FILE, PARQUET_CONTENT_TYPE, write_partitioned_to_s3, write_table_bytes
+)
+from datalake.schema_mapper import SchemaMapper
+
+logger = logging.getLogger(__name__)
+
+# 1回のスキーマ変換で扱うレコード数
+DEFAULT_BATCH_SIZE = 100000
+
+# null値チェックの対象列
+NULL_CHECK_COLUMNS = ["dataset_id", "year", "value"]
+
+# 重複チェックのキー列
+DUPLICATE_KEY_COLUMNS = ["dataset_id", "year", "region_code"]
+
+
+def extract_records(data: Any) -> List[Dict[str, Any]]:
+    """
+    デコードしたJSONからレコードのリストを取り出す
+
+    Args:
+        data: レコードのリスト、単一レコード、またはe-Stat APIレスポンス
+
+    Returns:
+        レコードのリスト
+    """
+    if isinstance(data, dict):
+        # e-Stat APIレスポンス形式の場合はVALUEを取り出す
+        data = data.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {}).get('DATA_INF', {}).get('VALUE', [data])
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+
+class IngestPipeline:
+    """読み込み1回で変換・検証・保存を行う取り込みパイプライン"""
+
+    def __init__(self, s3_client, domain: str, dataset_id: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE, cache=None):
+        """
+        Args:
+            s3_client: boto3 S3クライアント
+            domain: ドメイン名
+            dataset_id: データセットID
+            batch_size: 1回のスキーマ変換で扱うレコード数
+            cache: S3ObjectCache（省略時はS3から直接取得）
+        """
+        self.s3_client = s3_client
+        self.domain = domain
+        self.dataset_id = dataset_id
+        self.batch_size = max(1, int(batch_size))
+        self.cache = cache
+        self.mapper = SchemaMapper()
+        self.validator = DataQualityValidator()
+
+    def read(self, bucket: str, key: str) -> List[Dict[str, Any]]:
+        """
+        生データを読み込んでデコード
+
+        Args:
+            bucket: S3バケット
+            key: S3キー
+
+        Returns:
+            レコードのリスト
+        """
+        if self.cache is not None:
+            data = self.cache.read_json(bucket, key)
+        else:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            data = json.loads(response["Body"].read().decode("utf-8"))
+        return extract_records(data)
+
+    def transform(self, records: List[Dict[str, Any]]) -> "pa.Table":
+        """
+        レコードをバッチごとにIcebergスキーマへ変換
+
+        Args:
+            records: レコードのリスト
+
+        Returns:
+            バッチをチャンクとして持つArrowテーブル
+        """
+        import pyarrow as pa
+
+        tables = [
+            self.mapper.map_batch(records[offset:offset + self.batch_size],
+                                  domain=self.domain, dataset_id=self.dataset_id)
+            for offset in range(0, len(records), self.batch_size)
+        ]
+        if not tables:
+            return self.mapper.map_batch([], domain=self.domain, dataset_id=self.dataset_id)
+        return pa.concat_tables(tables)
+
+    def validation_checks(self, check_duplicates: bool = False) -> Dict[str, Any]:
+        """
+        ドメインのスキーマに基づく検証設定
+
+        Args:
+            check_duplicates: 重複チェックを行うか
+
+        Returns:
+            validate_table / quarantine_table に渡すチェック設定
+        """
+        schema = self.mapper.get_schema(self.domain)
+        return {
+            "required_columns": [col["name"] for col in schema["columns"]],
+            "null_columns": NULL_CHECK_COLUMNS,
+            "duplicate_columns": DUPLICATE_KEY_COLUMNS if check_duplicates else None
+        }
+
+    def validate(self, table: "pa.Table", check_duplicates: bool = False,
+                 quarantine_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        変換済みテーブルのデータ品質を検証
+
+        Args:
+            table: 変換済みテーブル
+            check_duplicates: 重複チェックを行うか
+            quarantine_path: 不正行の隔離先（ローカルパスまたはs3://）
+
+        Returns:
+            検証結果（valid, total_records, checks, quarantine）
+        """
+        return self._validate(table, check_duplicates, quarantine_path)[0]
+
+    def _validate(self, table: "pa.Table", check_duplicates: bool,
+                  quarantine_path: Optional[str]) -> Tuple[Dict[str, Any], "pa.Table"]:
+        """検証結果と保存対象のテーブル（隔離した場合は不正行を除いたテーブル）を返す"""
+        check_kwargs = self.validation_checks(check_duplicates)
+
+        quarantine = None
+        valid_table = table
+        if quarantine_path:
+            # 同じチェックのマスクで不正行を隔離ファイルに書き出す
+            quarantine = self.validator.quarantine_table(
+                table, quarantine_path=quarantine_path, s3_client=self.s3_client, **check_kwargs
+            )
+            checks = quarantine["checks"]
+            valid = quarantine["invalid_count"] == 0 and checks["required_columns"]["valid"]
+            valid_table = quarantine["valid_table"]
+        else:
+            result = self.validator.validate_table(table, **check_kwargs)
+            checks = result["checks"]
+            valid = result["valid"]
+
+        result = {
+            "valid": valid,
+            "total_records": table.num_rows,
+            "checks": checks
+        }
+        if quarantine is not None:
+            result["quarantine"] = {
+                "valid_count": quarantine["valid_count"],
+                "invalid_count": quarantine["invalid_count"],
+                "reason_counts": quarantine["reason_counts"],
+                "quarantine_path": quarantine["quarantine_path"]
+            }
+        return result, valid_table
+
+    def write(self, table: "pa.Table", bucket: str, key: str, partitioned: bool = True,
+              max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE, overwrite: bool = False) -> Dict[str, Any]:
+        """
+        変換済みテーブルをParquetでS3に保存
+
+        Args:
+            table: 変換済みテーブル
+            bucket: 出力先バケット
+            key: 出力先キー（partitioned の場合はプレフィックス）
+            partitioned: partition_by に従ってディレクトリを分割するか
+            max_rows_per_file: 1ファイルあたりの最大行数
+            overwrite: partitioned の場合に、保存後にプレフィックス配下の前回のParquetファイルを削除するか
+
+        Returns:
+            保存結果（output_path, file_count, file_size_bytes など）
+        """
+        partition_by = self.mapper.get_schema(self.domain).get("partition_by", [])
+
+        if partitioned:
+            # 出力パスが .parquet で終わる場合は拡張子を除いたものをプレフィックスとする
+            prefix = key[:-len(".parquet")] if key.endswith(".parquet") else key
+            write_result = write_partitioned_to_s3(
+                self.s3_client, table, bucket, prefix,
+                partition_by=partition_by,
+                max_rows_per_file=max_rows_per_file,
+                overwrite=overwrite
+            )
+            return {
+                "output_path": write_result["output_path"],
+                "partition_by": write_result["partition_by"],
+                "partitions": write_result["partitions"],
+                "file_count": write_result["file_count"],
+                "records_saved": table.num_rows,
+                "file_size_bytes": write_result["total_bytes"]
+            }
+
+        body = write_table_bytes(table, partition_by=partition_by)
+        self.s3_client.put_object(Bucket=bucket, Key=key, Body=body, ContentType=PARQUET_CONTENT_TYPE)
+        return {
+            "output_path": f"s3://{bucket}/{key}",
+            "file_count": 1,
+            "records_saved": table.num_rows,
+            "file_size_bytes": len(body)
+        }
+
+    def run(self, bucket: str, key: str, output_bucket: str, output_key: str,
+            partitioned: bool = True, max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+            check_duplicates: bool = False, quarantine_path: Optional[str] = None,
+            overwrite: bool = False) -> Dict[str, Any]:
+        """
+        読み込み・変換・検証・保存を順に実行
+
+        いずれかのステージで失敗した場合は、それ以降のステージを実行しません。
+        quarantine_path を指定した場合は、隔離した行を除いたテーブルを保存します。
+
+        Args:
+            bucket: 入力バケット
+            key: 入力キー
+            output_bucket: 出力先バケット
+            output_key: 出力先キー（partitioned の場合はプレフィックス）
+            partitioned: partition_by に従ってディレクトリを分割するか
+            max_rows_per_file: 1ファイルあたりの最大行数
+            check_duplicates: 重複チェックを行うか
+            quarantine_path: 不正行の隔離先
+            overwrite: partitioned の場合に、保存後にプレフィックス配下の前回のParquetファイルを削除するか
+
+        Returns:
+            実行結果（success, stages, timings と各ステージの結果）
+        """
+        result = {
+            "success": False,
+            "input_path": f"s3://{bucket}/{key}",
+            "stages": [],
+            "timings": {}
+        }
+
+        def run_stage(name, func):
+            started = time.perf_counter()
+            try:
+                value = func()
+            except Exception as e:
+                logger.error(f"Ingest stage '{name}' failed: {e}")
+                result["stages"].append({"stage": name, "success": False, "error": str(e)})
+                raise
+            finally:
+                result["timings"][name] = round(time.perf_counter() - started, 3)
+            return value
+
+        try:
+            records = run_stage("read", lambda: self.read(bucket, key))
+            result["input_records"] = len(records)
+            result["stages"].append({"stage": "read", "success": True, "records": len(records)})
+
+            table = run_stage("transform", lambda: self.transform(records))
+            del records
+            result["stages"].append({
+                "stage": "transform",
+                "success": True,
+                "records": table.num_rows,
+                "message": f"Transformed {table.num_rows} records for domain '{self.domain}'"
+            })
+
+            validation, valid_table = run_stage(
+                "validate", lambda: self._validate(table, check_duplicates, quarantine_path)
+            )
+            result["validation"] = validation
+            result["stages"].append({
+                "stage": "validate",
+                "success": True,
+                "valid": validation["valid"],
+                "message": f"Validation {'passed' if validation['valid'] else 'failed'} "
+                           f"for {validation['total_records']} records"
+            })
+
+            write_result = run_stage(
+                "save_parquet",
+                lambda: self.write(valid_table, output_bucket, output_key, partitioned, max_rows_per_file, overwrite)
+            )
+            result["parquet"] = write_result
+            result["stages"].append({
+                "stage": "save_parquet",
+                "success": True,
+                "output_path": write_result["output_path"],
+                "message": f"Saved {write_result['records_saved']} records to Parquet "
+                           f"({write_result['file_count']} files)"
+            })
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+
+        result["success"] = True
+        result["records"] = table.num_rows
+        return result
@@ -14,6 +14,8 @@ import aiohttp
 import boto3
 from concurrent.futures import ThreadPoolExecutor
 
+from datalake.s3_preview import record_count_metadata
+
 
 class ParallelFetcher:
     """並列データ取得クラス"""
@@ -290,7 +292,8 @@ class ParallelFetcher:
             Bucket=bucket,
             Key=key,
             Body=json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
-            ContentType='application/json'
+            ContentType='application/json',
+            Metadata=record_count_metadata(len(data))
         )
 
 
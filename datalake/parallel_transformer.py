@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+並列変換モジュール
+
+ParallelFetcherが保存したチャンクファイル（raw/{dataset_id}/{dataset_id}_chunk_NNN_{timestamp}.json）を
+プロセスプールで並列にParquetへ変換します。
+各ワーカーは自分のチャンクを読み込み・マッピングし、パーティションごとのファイル
+（chunk-NNN-00000.parquet）を直接書き込みます。全チャンクの完了後に _manifest.json を出力します。
+全チャンクが成功した場合は前回の変換で残ったParquetファイルを削除するため、再実行しても前回のファイルは残りません。
+失敗したチャンクがある場合は削除せず、すべてのチャンクが失敗した場合は前回のマニフェストも残します。
+"""
+
+import os
+import re
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from datalake.parquet_writer import DEFAULT_MAX_ROWS_PER_FILE, delete_keys, list_keys, write_partitioned_to_s3
+from datalake.s3_cache import parse_s3_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "_manifest.json"
+
+# チャンクファイル名: {dataset_id}_chunk_{NNN}_{YYYYMMDD_HHMMSS}.json
+CHUNK_KEY_PATTERN = re.compile(r"_chunk_(\d+)_(\d{8}_\d{6})\.json$")
+
+
+def find_chunk_keys(keys: List[str], timestamp: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    S3キーの一覧からチャンクファイルを抽出
+
+    同じデータセットを複数回取得している場合は、指定したタイムスタンプ（省略時は最新）の回のみを対象にします。
+
+    Args:
+        keys: S3キーのリスト
+        timestamp: 対象とする取得時のタイムスタンプ（YYYYMMDD_HHMMSS）
+
+    Returns:
+        チャンク番号順の {"key", "chunk_num", "timestamp"} のリスト
+    """
+    chunks = []
+    for key in keys:
+        match = CHUNK_KEY_PATTERN.search(key)
+        if match:
+            chunks.append({"key": key, "chunk_num": int(match.group(1)), "timestamp": match.group(2)})
+
+    if not chunks:
+        return []
+
+    target = timestamp or max(chunk["timestamp"] for chunk in chunks)
+    return sorted(
+        (chunk for chunk in chunks if chunk["timestamp"] == target),
+        key=lambda chunk: chunk["chunk_num"]
+    )
+
+
+def transform_chunk(task: Dict[str, Any], s3_client=None,
+                    s3_client_factory: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """
+    1チャンクを変換してParquetを書き込み（ワーカープロセスで実行）
+
+    Args:
+        task: 変換タスク（bucket, key, chunk_num, domain, dataset_id, output_bucket, output_prefix など）
+        s3_client: boto3 S3クライアント（省略時はワーカー内で作成）
+        s3_client_factory: ワーカー内でS3クライアントを作成する関数（省略時は boto3）
+
+    Returns:
+        変換結果（書き込んだファイル一覧・レコード数）
+    """
+    from datalake.schema_mapper import SchemaMapper
+    from datalake.s3_cache import S3ObjectCache
+
+    started = datetime.now()
+    try:
+        if s3_client is None and s3_client_factory is not None:
+            s3_client = s3_client_factory()
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client('s3', region_name=task.get("aws_region", "ap-northeast-1"))
+
+        data = S3ObjectCache(s3_client).read_json(task["bucket"], task["key"])
+        if isinstance(data, dict):
+            # e-Stat APIレスポンス形式の場合はVALUEを取り出す
+            data = data.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {}).get('DATA_INF', {}).get('VALUE', [data])
+        if isinstance(data, dict):
+            data = [data]
+
+        mapper = SchemaMapper()
+        table = mapper.map_batch(data, domain=task["domain"], dataset_id=task["dataset_id"])
+        del data
+
+        write_result = write_partitioned_to_s3(
+            s3_client, table, task["output_bucket"], task["output_prefix"],
+            partition_by=mapper.get_schema(task["domain"]).get("partition_by", []),
+            max_rows_per_file=task.get("max_rows_per_file", DEFAULT_MAX_ROWS_PER_FILE),
+            profile=task.get("profile"),
+            file_prefix=f"chunk-{task['chunk_num']:03d}"
+        )
+
+        return {
+            "success": True,
+            "chunk_num": task["chunk_num"],
+            "source_key": task["key"],
+            "records": table.num_rows,
+            "files": write_result["files"],
+            "processing_time": (datetime.now() - started).total_seconds()
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "chunk_num": task["chunk_num"],
+            "source_key": task["key"],
+            "error": str(e)
+        }
+
+
+class ParallelTransformer:
+    """チャンクファイルの並列変換クラス"""
+
+    def __init__(self, s3_client=None, max_workers: Optional[int] = None,
+                 use_processes: bool = True, aws_region: Optional[str] = None,
+                 s3_client_factory: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            s3_client: boto3 S3クライアント（一覧取得・マニフェスト書き込みに使用）
+            max_workers: 最大ワーカー数（デフォルト: CPUコア数）
+            use_processes: プロセスプールを使うか（Falseの場合はスレッドプールで s3_client を共有）
+            aws_region: AWSリージョン
+            s3_client_factory: ワーカープロセスでS3クライアントを作成する関数
+                （プロセスに渡すためpickle可能であること。省略時は boto3 で作成）
+        """
+        self.aws_region = aws_region or os.environ.get('AWS_REGION', 'ap-northeast-1')
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client('s3', region_name=self.aws_region)
+        self.s3_client = s3_client
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.s3_client_factory = s3_client_factory
+
+    def list_chunks(self, bucket: str, dataset_id: str,
+                    timestamp: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        データセットのチャンクファイルを一覧
+
+        Args:
+            bucket: S3バケット
+            dataset_id: データセットID
+            timestamp: 対象とする取得時のタイムスタンプ（省略時は最新）
+
+        Returns:
+            チャンク番号順のチャンク情報のリスト
+        """
+        keys = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=f"raw/{dataset_id}/"):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        return find_chunk_keys(keys, timestamp)
+
+    def transform_dataset(self, bucket: str, dataset_id: str, domain: str,
+                          output_bucket: Optional[str] = None,
+                          output_prefix: Optional[str] = None,
+                          chunk_keys: Optional[List[str]] = None,
+                          timestamp: Optional[str] = None,
+                          max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+                          profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        チャンクファイルを並列に変換し、マニフェストを出力
+
+        出力先プレフィックスの既存ファイル（前回のチャンク・マニフェスト）は変換の前に削除します。
+
+        Args:
+            bucket: チャンクファイルのバケット
+            dataset_id: データセットID
+            domain: ドメイン
+            output_bucket: 出力先バケット（デフォルト: bucket）
+            output_prefix: 出力先プレフィックス（デフォルト: parquet/{domain}/{dataset_id}）
+            chunk_keys: 変換するチャンクのキーまたはS3パス（省略時は raw/{dataset_id}/ から検索）
+            timestamp: 対象とする取得時のタイムスタンプ（chunk_keys省略時のみ）
+            max_rows_per_file: 1ファイルあたりの最大行数
+            profile: Parquet書き込みプロファイル名
+
+        Returns:
+            変換結果（マニフェストのパス、レコード数、失敗したチャンク）
+        """
+        started = datetime.now()
+        output_bucket = output_bucket or bucket
+        output_prefix = (output_prefix or f"parquet/{domain}/{dataset_id}").strip("/")
+
+        if chunk_keys:
+            # s3://形式のパス（ParallelFetcherのs3_paths）も受け付ける
+            chunks = []
+            for i, chunk_key in enumerate(chunk_keys):
+                _, key = parse_s3_path(chunk_key, bucket)
+                match = CHUNK_KEY_PATTERN.search(key)
+                chunks.append({"key": key, "chunk_num": int(match.group(1)) if match else i})
+        else:
+            chunks = self.list_chunks(bucket, dataset_id, timestamp)
+
+        if not chunks:
+            return {
+                "success": False,
+                "error": "No chunk files found",
+                "message": f"s3://{bucket}/raw/{dataset_id}/ にチャンクファイルが見つかりません"
+            }
+
+        tasks = [
+            {
+                "bucket": bucket,
+                "key": chunk["key"],
+                "chunk_num": chunk["chunk_num"],
+                "domain": domain,
+                "dataset_id": dataset_id,
+                "output_bucket": output_bucket,
+                "output_prefix": output_prefix,
+                "max_rows_per_file": max_rows_per_file,
+                "profile": profile,
+                "aws_region": self.aws_region
+            }
+            for chunk in chunks
+        ]
+
+        # チャンク数が変わった再実行で前回の chunk-NNN が残らないよう、既存のファイルを列挙しておく
+        # （削除は全チャンクの成功後に行い、失敗時は前回の出力を残す）
+        existing = [key for key in list_keys(self.s3_client, output_bucket, output_prefix)
+                    if key.endswith(".parquet")]
+
+        results = self._run(tasks)
+        results.sort(key=lambda r: r["chunk_num"])
+
+        succeeded = [r for r in results if r["success"]]
+        failed = [r for r in results if not r["success"]]
+        total_records = sum(r["records"] for r in succeeded)
+
+        if not failed:
+            written = {file["key"] for r in succeeded for file in r["files"]}
+            deleted = delete_keys(self.s3_client, output_bucket, [key for key in existing if key not in written])
+            if deleted:
+                logger.info(f"Deleted {deleted} stale files under s3://{output_bucket}/{output_prefix}/")
+
+        manifest = {
+            "dataset_id": dataset_id,
+            "domain": domain,
+            "status": "complete" if not failed else "partial",
+            "created_at": datetime.now().isoformat(),
+            "source_keys": [f"s3://{bucket}/{chunk['key']}" for chunk in chunks],
+            "output_path": f"s3://{output_bucket}/{output_prefix}/",
+            "total_records": total_records,
+            "files": [
+                dict(file, chunk_num=r["chunk_num"])
+                for r in succeeded for file in r["files"]
+            ],
+            "failed_chunks": [
+                {"chunk_num": r["chunk_num"], "source_key": r["source_key"], "error": r["error"]}
+                for r in failed
+            ]
+        }
+
+        manifest_key = f"{output_prefix}/{MANIFEST_FILENAME}"
+        if succeeded:
+            self.s3_client.put_object(
+                Bucket=output_bucket,
+                Key=manifest_key,
+                Body=json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'),
+                ContentType='application/json'
+            )
+        else:
+            logger.warning(f"All {len(tasks)} chunks failed; keeping the previous output "
+                           f"under s3://{output_bucket}/{output_prefix}/")
+
+        processing_time = (datetime.now() - started).total_seconds()
+        logger.info(f"Transformed {len(succeeded)}/{len(tasks)} chunks ({total_records} records) "
+                    f"in {processing_time:.1f}s")
+
+        return {
+            "success": not failed,
+            "dataset_id": dataset_id,
+            "domain": domain,
+            "output_path": manifest["output_path"],
+            "manifest_path": f"s3://{output_bucket}/{manifest_key}" if succeeded else None,
+            "chunks_total": len(tasks),
+            "chunks_succeeded": len(succeeded),
+            "failed_chunks": manifest["failed_chunks"],
+            "records_transformed": total_records,
+            "file_count": len(manifest["files"]),
+            "workers": min(self.max_workers, len(tasks)),
+            "processing_time": f"{processing_time:.1f}秒",
+            "message": f"{len(tasks)}チャンク中{len(succeeded)}チャンク（{total_records}件）をParquetに変換しました"
+        }
+
+    def _run(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """タスクをワーカープールで実行"""
+        workers = min(self.max_workers, len(tasks))
+
+        if self.use_processes:
+            # 親プロセスのスレッド・コネクションを引き継がないようにspawnで起動
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            worker = partial(transform_chunk, s3_client_factory=self.s3_client_factory)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            worker = partial(transform_chunk, s3_client=self.s3_client)
+
+        results = []
+        with executor:
+            futures = {executor.submit(worker, task): task for task in tasks}
+            for i, future in enumerate(as_completed(futures)):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        "success": False,
+                        "chunk_num": task["chunk_num"],
+                        "source_key": task["key"],
+                        "error": str(e)
+                    }
+                results.append(result)
+                logger.info(f"進捗: {i + 1}/{len(tasks)} チャンク完了")
+
+        return results
@@ -0,0 +1,362 @@
+"""
+S3オブジェクトのプレビュー
+
+オブジェクト全体をダウンロードせずに、レンジGETでレコード数とサンプルを取得します。
+
+- Parquet: フッターのメタデータから行数、先頭の行グループからサンプル
+- NDJSON: 先頭数KBの行からサンプル
+- JSON配列（e-Stat APIレスポンスのVALUE配列を含む）: 先頭部分を逐次デコードしてサンプル
+
+レコード数は保存時に付与したオブジェクトメタデータ（record-count）を優先し、
+無い場合のみ一定サイズ以下のオブジェクトを全体読み込みして数えます。
+"""
+
+import io
+import json
+import logging
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# S3オブジェクトメタデータのレコード数キー（x-amz-meta-record-count）
+RECORD_COUNT_METADATA_KEY = "record-count"
+
+# プレビュー設定
+DEFAULT_SAMPLE_SIZE = 3
+INITIAL_RANGE_BYTES = 64 * 1024  # 64KB
+MAX_SAMPLE_RANGE_BYTES = 8 * 1024 * 1024  # 8MB
+FULL_READ_LIMIT_BYTES = 64 * 1024 * 1024  # 64MB
+
+PARQUET_EXTENSIONS = (".parquet", ".parq")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def record_count_metadata(record_count: int) -> Dict[str, str]:
+    """
+    put_objectに渡すレコード数メタデータを作成
+
+    Args:
+        record_count: レコード数
+
+    Returns:
+        S3オブジェクトメタデータ
+    """
+    return {RECORD_COUNT_METADATA_KEY: str(record_count)}
+
+
+class S3RangeFile(io.RawIOBase):
+    """レンジGETで読み込むシーク可能なS3ファイルオブジェクト"""
+
+    def __init__(self, s3_client, bucket: str, key: str, size: int,
+                 block_size: int = INITIAL_RANGE_BYTES):
+        """
+        初期化
+
+        Args:
+            s3_client: boto3 S3クライアント
+            bucket: S3バケット
+            key: S3キー
+            size: オブジェクトサイズ（バイト）
+            block_size: 1回のレンジGETで先読みする最小バイト数
+        """
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.block_size = block_size
+        self.position = 0
+        self.bytes_requested = 0
+        self._buffer = b""
+        self._buffer_start = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self.position = max(0, min(self.position, self.size))
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self.position
+        end = min(self.position + size, self.size)
+        if end <= self.position:
+            return b""
+
+        buffer_end = self._buffer_start + len(self._buffer)
+        if not (self._buffer_start <= self.position and end <= buffer_end):
+            fetch_end = min(max(end, self.position + self.block_size), self.size)
+            self._buffer = self.read_range(self.position, fetch_end)
+            self._buffer_start = self.position
+
+        offset = self.position - self._buffer_start
+        data = self._buffer[offset:offset + (end - self.position)]
+        self.position += len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """
+        [start, end) の範囲をレンジGETで取得
+
+        Args:
+            start: 開始オフセット
+            end: 終了オフセット（含まない）
+
+        Returns:
+            取得したバイト列
+        """
+        if end <= start:
+            return b""
+        response = self.s3_client.get_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Range=f"bytes={start}-{end - 1}"
+        )
+        data = response["Body"].read()
+        self.bytes_requested += len(data)
+        return data
+
+
+def detect_format(key: str) -> str:
+    """
+    キーの拡張子からフォーマットを判定
+
+    Args:
+        key: S3キー
+
+    Returns:
+        "parquet" / "ndjson" / "json"
+    """
+    lower = key.lower()
+    if lower.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if lower.endswith(NDJSON_EXTENSIONS):
+        return "ndjson"
+    return "json"
+
+
+def preview_s3_object(
+    s3_client,
+    bucket: str,
+    key: str,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    full_read_limit: int = FULL_READ_LIMIT_BYTES,
+    cache=None
+) -> Dict[str, Any]:
+    """
+    S3オブジェクトのレコード数とサンプルを取得
+
+    Args:
+        s3_client: boto3 S3クライアント
+        bucket: S3バケット
+        key: S3キー
+        sample_size: サンプルのレコード数
+        full_read_limit: メタデータが無い場合に全体読み込みでレコード数を数える上限サイズ
+        cache: 全体読み込みに使うS3ObjectCache（省略時は直接GET）
+
+    Returns:
+        プレビュー結果（format, size_bytes, record_count, record_count_source, sample）
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    size = head.get("ContentLength", 0)
+    metadata = head.get("Metadata", {}) or {}
+    file_format = detect_format(key)
+
+    f = S3RangeFile(s3_client, bucket, key, size)
+
+    if file_format == "parquet":
+        record_count, sample = _preview_parquet(f, sample_size)
+        record_count_source = "parquet_footer"
+    else:
+        if file_format == "ndjson":
+            sample = _sample_ndjson(f, sample_size)
+        else:
+            sample = _sample_json(f, sample_size)
+
+        record_count = None
+        record_count_source = None
+        if RECORD_COUNT_METADATA_KEY in metadata:
+            try:
+                record_count = int(metadata[RECORD_COUNT_METADATA_KEY])
+                record_count_source = "object_metadata"
+            except ValueError:
+                logger.warning(f"Invalid record-count metadata on s3://{bucket}/{key}")
+
+        if record_count is None and size <= full_read_limit:
+            record_count = _count_records_full(s3_client, bucket, key, file_format, cache)
+            record_count_source = "full_read"
+
+    return {
+        "format": file_format,
+        "size_bytes": size,
+        "record_count": record_count,
+        "record_count_source": record_count_source,
+        "sample": sample,
+        "bytes_read": f.bytes_requested
+    }
+
+
+def _preview_parquet(f: S3RangeFile, sample_size: int) -> Tuple[int, List[Dict[str, Any]]]:
+    """フッターから行数、先頭行グループからサンプルを取得"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(f)
+    num_rows = parquet_file.metadata.num_rows
+
+    sample = []
+    if parquet_file.metadata.num_row_groups > 0 and sample_size > 0:
+        batches = parquet_file.iter_batches(batch_size=sample_size, row_groups=[0])
+        batch = next(batches, None)
+        if batch is not None:
+            sample = batch.slice(0, sample_size).to_pylist()
+
+    return num_rows, sample
+
+
+def _sample_ndjson(f: S3RangeFile, sample_size: int) -> List[Dict[str, Any]]:
+    """先頭の完全な行からサンプルを取得"""
+    chunk = b""
+    range_bytes = INITIAL_RANGE_BYTES
+    while True:
+        # 読み込み済みの部分に続く範囲だけを取得し、合計を MAX_SAMPLE_RANGE_BYTES までに抑える
+        end = min(range_bytes, MAX_SAMPLE_RANGE_BYTES, f.size)
+        chunk += f.read_range(len(chunk), end)
+        complete = len(chunk) >= f.size
+        lines = chunk.split(b"\n")
+        if not complete:
+            # 末尾の行は途中で切れている可能性がある
+            lines = lines[:-1]
+
+        sample = [json.loads(line) for line in islice((l for l in lines if l.strip()), sample_size)]
+        if len(sample) >= sample_size or complete or end >= MAX_SAMPLE_RANGE_BYTES:
+            return sample
+        range_bytes *= 4
+
+
+def _sample_json(f: S3RangeFile, sample_size: int) -> Any:
+    """JSON配列の先頭要素を逐次デコードしてサンプルを取得"""
+    decoder = json.JSONDecoder()
+    chunk = b""
+    range_bytes = INITIAL_RANGE_BYTES
+    while True:
+        # 読み込み済みの部分に続く範囲だけを取得し、合計を MAX_SAMPLE_RANGE_BYTES までに抑える
+        end = min(range_bytes, MAX_SAMPLE_RANGE_BYTES, f.size)
+        chunk += f.read_range(len(chunk), end)
+        complete = len(chunk) >= f.size
+        # マルチバイト文字の途中で切れた末尾は無視する
+        text = chunk.decode("utf-8", errors="ignore")
+
+        if complete:
+            data = json.loads(text) if text.strip() else []
+            return _sample_from_document(data, sample_size)
+
+        sample, finished = _decode_array_prefix(decoder, text, sample_size)
+        if finished or end >= MAX_SAMPLE_RANGE_BYTES:
+            return sample
+        range_bytes *= 4
+
+
+def _extract_value_list(data: Any) -> Optional[List[Any]]:
+    """JSONドキュメントからレコードのリストを取り出す（e-Stat APIレスポンス形式にも対応）"""
+    if isinstance(data, list):
+        return data
+
+    if isinstance(data, dict):
+        value_list = (
+            data.get("GET_STATS_DATA", {})
+            .get("STATISTICAL_DATA", {})
+            .get("DATA_INF", {})
+            .get("VALUE")
+        )
+        if isinstance(value_list, dict):
+            return [value_list]
+        if isinstance(value_list, list):
+            return value_list
+
+    return None
+
+
+def _sample_from_document(data: Any, sample_size: int) -> Any:
+    """デコード済みJSONからサンプルを取り出す"""
+    value_list = _extract_value_list(data)
+    if value_list is None:
+        return data
+    return value_list[:sample_size]
+
+
+def _decode_array_prefix(decoder: json.JSONDecoder, text: str,
+                         sample_size: int) -> Tuple[List[Any], bool]:
+    """
+    途中までのJSONテキストから配列の先頭要素をデコード
+
+    Returns:
+        (サンプル, これ以上読み込む必要がないか)
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        pos = len(text) - len(stripped) + 1
+    else:
+        # e-Stat APIレスポンス形式: "VALUE": [ ... ]
+        marker = text.find('"VALUE"')
+        if marker < 0:
+            return [], False
+        pos = text.find("[", marker)
+        if pos < 0:
+            return [], False
+        pos += 1
+
+    sample = []
+    length = len(text)
+    while len(sample) < sample_size:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length:
+            return sample, False
+        if text[pos] == "]":
+            return sample, True
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return sample, False
+        sample.append(item)
+
+    return sample, True
+
+
+def _count_records_full(s3_client, bucket: str, key: str, file_format: str, cache=None) -> int:
+    """オブジェクト全体を読み込んでレコード数を数える"""
+    if cache is not None:
+        body = cache.read_bytes(bucket, key)
+    else:
+        body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    if file_format == "ndjson":
+        return sum(1 for line in body.split(b"\n") if line.strip())
+
+    if not body.strip():
+        return 0
+
+    data = json.loads(body.decode("utf-8"))
+    value_list = _extract_value_list(data)
+    return len(value_list) if value_list is not None else 1
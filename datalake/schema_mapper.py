@@ -4,10 +4,12 @@
 E-statデータ構造の解析、Icebergスキーマへのマッピング、データ型推論と変換を行います。
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import re
 
+from .time_codes import parse_time_code, expand_time_columns
+
 
 # ドメイン別スキーマ定義
 DOMAIN_SCHEMAS = {
@@ -187,12 +189,101 @@ DOMAIN_SCHEMAS = {
 }
 
 
+# 全ドメイン共通の列のソース定義: 列名 -> (種類, ソースフィールド, 補助情報)
+#   dataset_id: 指定されたデータセットID（未指定時はソースフィールド）
+#   field:      ソースフィールドの文字列
+#   label:      ソースフィールドのコードをcategory_labelsでラベルに変換
+#   time:       @time から年・四半期・月を抽出
+#   value:      数値に変換（変換できない場合は0.0）
+#   timestamp:  バッチ処理時刻
+COMMON_SOURCE_FIELDS = {
+    "dataset_id": ("dataset_id", "@id", None),
+    "stats_data_id": ("field", "@id", None),
+    "year": ("time", "@time", "year"),
+    "value": ("value", "$", None),
+    "unit": ("field", "@unit", None),
+    "updated_at": ("timestamp", None, None)
+}
+
+# ドメイン固有の列のソース定義（DOMAIN_SCHEMASの列とE-statレコードのフィールドの対応）
+DOMAIN_SOURCE_FIELDS = {
+    "population": {
+        "region_code": ("field", "@area", None),
+        "region_name": ("label", "@area", "area"),
+        "category": ("field", "@cat01", None)
+    },
+    "economy": {
+        "quarter": ("time", "@time", "quarter"),
+        "region_code": ("field", "@area", None),
+        "indicator": ("field", "@cat01", None)
+    },
+    "labor": {
+        "month": ("time", "@time", "month"),
+        "region_code": ("field", "@area", None),
+        "industry_code": ("field", "@cat01", None),
+        "occupation_code": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "education": {
+        "region_code": ("field", "@area", None),
+        "school_type": ("field", "@cat01", None),
+        "category": ("field", "@cat02", None)
+    },
+    "health": {
+        "region_code": ("field", "@area", None),
+        "facility_type": ("field", "@cat01", None),
+        "disease_code": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "agriculture": {
+        "region_code": ("field", "@area", None),
+        "sector": ("field", "@cat01", None),
+        "product_code": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "construction": {
+        "month": ("time", "@time", "month"),
+        "region_code": ("field", "@area", None),
+        "building_type": ("field", "@cat01", None),
+        "structure_type": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "transport": {
+        "month": ("time", "@time", "month"),
+        "region_code": ("field", "@area", None),
+        "transport_mode": ("field", "@cat01", None),
+        "indicator": ("field", "@cat02", None)
+    },
+    "trade": {
+        "quarter": ("time", "@time", "quarter"),
+        "region_code": ("field", "@area", None),
+        "industry_code": ("field", "@cat01", None),
+        "business_type": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "social_welfare": {
+        "region_code": ("field", "@area", None),
+        "facility_type": ("field", "@cat01", None),
+        "service_type": ("field", "@cat02", None),
+        "indicator": ("field", "@cat03", None)
+    },
+    "generic": {
+        "region_code": ("field", "@area", None),
+        "category": ("field", "@cat01", None)
+    }
+}
+
+# 数値として解釈できる文字列（カンマ除去後）
+NUMERIC_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
 class SchemaMapper:
     """スキーママッピングエンジン"""
     
     def __init__(self):
         """SchemaMapperを初期化"""
         self.domain_schemas = DOMAIN_SCHEMAS
+        self._column_plans = {}
     
     def infer_domain(self, metadata: Dict[str, Any]) -> str:
         """
@@ -312,6 +403,189 @@ class SchemaMapper:
         else:
             return self._map_generic(estat_record, dataset_id, category_labels)
     
+    def get_column_plan(self, domain: str) -> List[Tuple[str, str, str, Optional[str], Optional[str]]]:
+        """
+        ドメインの列プランを取得（初回のみDOMAIN_SCHEMASからコンパイル）
+        
+        Args:
+            domain: ドメイン名
+        
+        Returns:
+            (列名, 型, 種類, ソースフィールド, 補助情報) のリスト
+        """
+        if domain not in self.domain_schemas:
+            domain = "generic"
+        
+        if domain not in self._column_plans:
+            source_fields = dict(COMMON_SOURCE_FIELDS)
+            source_fields.update(DOMAIN_SOURCE_FIELDS.get(domain, {}))
+            
+            plan = []
+            for column in self.domain_schemas[domain]["columns"]:
+                kind, source, extra = source_fields[column["name"]]
+                plan.append((column["name"], column["type"], kind, source, extra))
+            self._column_plans[domain] = plan
+        
+        return self._column_plans[domain]
+    
+    def map_batch(self, records: Any,
+                  domain: str,
+                  dataset_id: Optional[str] = None,
+                  category_labels: Optional[Dict[str, Dict[str, str]]] = None) -> "pa.Table":
+        """
+        E-statレコードのバッチをIcebergスキーマの列にまとめて変換
+        
+        map_estat_to_iceberg と同じ値を、レコード単位のループを使わずに列単位で生成します。
+        時間コードとラベルは重複を除いたコードごとに1回だけ解釈します。
+        
+        Args:
+            records: E-statレコードのリスト、pyarrowのTable/RecordBatch、
+                     またはフィールド名をキーとする配列の辞書
+            domain: ドメイン名
+            dataset_id: データセットID（オプション）
+            category_labels: カテゴリコードとラベルのマッピング
+        
+        Returns:
+            Icebergスキーマの列順・型を持つpyarrow Table
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        batch = self._to_arrow_batch(records)
+        length = batch.num_rows
+        updated_at = datetime.now()
+        time_parts = {}
+        source_columns = {}
+        
+        def get_source(field: str, default: str) -> "pa.Array":
+            # 同じソースフィールドは1回だけ取り出す
+            if field not in source_columns:
+                source_columns[field] = self._source_column(batch, field)
+            return pc.fill_null(source_columns[field], default)
+        
+        arrays = []
+        fields = []
+        for name, column_type, kind, source, extra in self.get_column_plan(domain):
+            if kind == "dataset_id":
+                if dataset_id:
+                    array = pa.repeat(pa.scalar(dataset_id, type=pa.string()), length)
+                else:
+                    array = get_source(source, "")
+            elif kind == "field":
+                array = get_source(source, "")
+            elif kind == "label":
+                array = self._map_labels(get_source(source, ""), category_labels, extra)
+            elif kind == "time":
+                if not time_parts:
+                    time_parts = self._map_time_parts(get_source(source, ""))
+                array = time_parts[extra]
+            elif kind == "value":
+                array = self._parse_value_array(get_source(source, "0"))
+            else:
+                array = pa.repeat(pa.scalar(updated_at, type=pa.timestamp("us")), length)
+            
+            arrow_type = self._arrow_type(column_type)
+            if array.type != arrow_type:
+                array = pc.cast(array, arrow_type)
+            arrays.append(array)
+            fields.append(pa.field(name, arrow_type))
+        
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    
+    @staticmethod
+    def _arrow_type(column_type: str) -> "pa.DataType":
+        """スキーマの型名をpyarrowの型に変換"""
+        import pyarrow as pa
+        
+        return {
+            "INT": pa.int32(),
+            "BIGINT": pa.int64(),
+            "DOUBLE": pa.float64(),
+            "TIMESTAMP": pa.timestamp("us"),
+            "BOOLEAN": pa.bool_()
+        }.get(column_type, pa.string())
+    
+    @staticmethod
+    def _to_arrow_batch(records: Any) -> "pa.Table":
+        """入力をpyarrow Table（レコードのリストの場合は_RecordList）に揃える"""
+        import pyarrow as pa
+        
+        if isinstance(records, pa.Table):
+            return records
+        if isinstance(records, pa.RecordBatch):
+            return pa.Table.from_batches([records])
+        if isinstance(records, dict):
+            return pa.table(records)
+        if hasattr(records, "to_dict") and hasattr(records, "columns"):
+            return pa.Table.from_pandas(records, preserve_index=False)
+        
+        # レコードのリスト: 必要なフィールドを後で個別に取り出す
+        return _RecordList(records)
+    
+    @staticmethod
+    def _source_column(batch: Any, field: str) -> "pa.Array":
+        """ソースフィールドを文字列配列として取得"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        if isinstance(batch, _RecordList):
+            raw = [record.get(field) for record in batch.records]
+            try:
+                array = pa.array(raw, type=pa.string())
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                array = pa.array([None if v is None else str(v) for v in raw], type=pa.string())
+        elif field in batch.column_names:
+            array = batch.column(field).combine_chunks()
+            if pa.types.is_dictionary(array.type):
+                array = array.cast(array.type.value_type)
+            if not pa.types.is_string(array.type):
+                array = pc.cast(array, pa.string())
+        else:
+            array = pa.nulls(batch.num_rows, type=pa.string())
+        
+        return array
+    
+    def _map_time_parts(self, time_codes: "pa.Array") -> Dict[str, "pa.Array"]:
+        """時間コード列から年・四半期・月・年度の列を作成"""
+        return expand_time_columns(time_codes)
+    
+    @staticmethod
+    def _map_labels(codes: "pa.Array",
+                    category_labels: Optional[Dict[str, Dict[str, str]]],
+                    category_type: str) -> "pa.Array":
+        """コード列をラベル列に変換（ラベルが無い場合は空文字）"""
+        import pyarrow as pa
+        
+        labels = (category_labels or {}).get(category_type)
+        if not labels:
+            return pa.repeat(pa.scalar("", type=pa.string()), len(codes))
+        
+        encoded = codes.dictionary_encode()
+        mapped = pa.array([labels.get(code, "") for code in encoded.dictionary.to_pylist()],
+                          type=pa.string())
+        return mapped.take(encoded.indices)
+    
+    def _parse_value_array(self, values: "pa.Array") -> "pa.Array":
+        """
+        値列を一括でfloat64に変換（_parse_value と同じ結果を返す）
+        
+        通常の数値表記はArrowで一括変換し、それ以外の値（秘匿記号 "-" "***"、"nan"、
+        全角数字など）は種類ごとに _parse_value で変換します。
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        cleaned = pc.utf8_trim_whitespace(pc.replace_substring(values, ",", ""))
+        is_numeric = pc.fill_null(pc.match_substring_regex(cleaned, NUMERIC_PATTERN), False)
+        parsed = pc.cast(pc.if_else(is_numeric, cleaned, pa.scalar("0", type=pa.string())), pa.float64())
+        if pc.all(is_numeric).as_py() is not False:
+            return parsed
+        
+        others = pc.unique(pc.filter(values, pc.invert(is_numeric)))
+        others_parsed = pa.array([self._parse_value(value) for value in others.to_pylist()], type=pa.float64())
+        fallback = others_parsed.take(pc.index_in(values, value_set=others, skip_nulls=False))
+        return pc.if_else(is_numeric, parsed, fallback)
+    
     def _map_population(self, record: Dict[str, Any],
                        dataset_id: Optional[str] = None,
                        category_labels: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
@@ -520,40 +794,24 @@ class SchemaMapper:
         時間文字列から年を抽出
         
         Args:
-            time_str: 時間文字列 (例: "2020", "2020Q1", "2020-01")
+            time_str: 時間文字列 (例: "2020", "2020Q1", "2020-01", "2020000000")
         
         Returns:
             年 (整数)
         """
-        if not time_str:
-            return 2020  # デフォルト値
-        
-        # 4桁の年を抽出
-        match = re.search(r'(\d{4})', str(time_str))
-        if match:
-            return int(match.group(1))
-        
-        return 2020  # デフォルト値
+        return parse_time_code(time_str)[0]
     
     def _extract_year_quarter(self, time_str: str) -> tuple:
         """
         時間文字列から年と四半期を抽出
         
         Args:
-            time_str: 時間文字列 (例: "2020Q1", "2020-Q1")
+            time_str: 時間文字列 (例: "2020Q1", "2020-Q1", "2020000103")
         
         Returns:
             (年, 四半期) のタプル
         """
-        year = self._extract_year(time_str)
-        
-        # 四半期を抽出 (Q1, Q2, Q3, Q4)
-        match = re.search(r'Q([1-4])', str(time_str), re.IGNORECASE)
-        if match:
-            quarter = int(match.group(1))
-        else:
-            quarter = 0  # 四半期情報なし
-        
+        year, quarter, _, _ = parse_time_code(time_str)
         return year, quarter
     
     def _extract_month(self, time_str: str) -> int:
@@ -561,30 +819,12 @@ class SchemaMapper:
         時間文字列から月を抽出
         
         Args:
-            time_str: 時間文字列 (例: "2020-01", "202001")
+            time_str: 時間文字列 (例: "2020-01", "202001", "2020000101")
         
         Returns:
-            月 (整数、1-12)
+            月 (整数、1-12。月情報なしの場合は0)
         """
-        if not time_str:
-            return 0  # 月情報なし
-        
-        # ハイフン区切りの月を抽出 (例: "2020-01")
-        match = re.search(r'\d{4}-(\d{2})', str(time_str))
-        if match:
-            return int(match.group(1))
-        
-        # 連続した8桁から月を抽出 (例: "20200115")
-        match = re.search(r'\d{4}(\d{2})\d{2}', str(time_str))
-        if match:
-            return int(match.group(1))
-        
-        # 連続した6桁から月を抽出 (例: "202001")
-        match = re.search(r'\d{4}(\d{2})', str(time_str))
-        if match:
-            return int(match.group(1))
-        
-        return 0  # 月情報なし
+        return parse_time_code(time_str)[2]
     
     def _parse_value(self, value_str: str) -> float:
         """
@@ -695,3 +935,11 @@ class SchemaMapper:
         name = name.strip('_')
         
         return name or "column"
+
+
+class _RecordList:
+    """map_batchに渡されたレコードのリスト（必要なフィールドだけを列として取り出す）"""
+    
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = [record for record in records if isinstance(record, dict)]
+        self.num_rows = len(self.records)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+テスト共通のフェイククライアントとテストデータ
+
+S3・Athenaのインメモリ実装と、e-Stat APIのVALUEレコードの生成をテスト間で共有します。
+"""
+
+import hashlib
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+
+
+def estat_values(n, start=0, years=3):
+    """
+    e-Stat APIのVALUEレコードを作成
+
+    Args:
+        n: レコード数
+        start: 最初の値（$）
+        years: 時間軸の年数（2019年から順に割り当てる）
+
+    Returns:
+        地域（13000 / 27000）・年が交互に変わるレコードのリスト
+    """
+    return [
+        {"@area": "13000" if i % 2 else "27000", "@cat01": "001", "@time": f"{2019 + i % years}000000", "$": str(i)}
+        for i in range(start, start + n)
+    ]
+
+
+class FakeS3Client:
+    """インメモリS3クライアント（条件付きGET・レンジGET・一覧・一括削除に対応）"""
+
+    def __init__(self):
+        self.objects = {}
+        self.metadata = {}
+        self.get_calls = 0
+        self.downloads = 0
+        self.bytes_served = 0
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, Metadata=None, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+        self.metadata[(Bucket, Key)] = Metadata or {}
+
+    def head_object(self, Bucket, Key):
+        body = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(body), "Metadata": self.metadata[(Bucket, Key)]}
+
+    def get_object(self, Bucket, Key, Range=None, IfNoneMatch=None, **kwargs):
+        self.get_calls += 1
+        body = self.objects[(Bucket, Key)]
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if IfNoneMatch == etag:
+            raise ClientError(
+                {"Error": {"Code": "304", "Message": "Not Modified"},
+                 "ResponseMetadata": {"HTTPStatusCode": 304}},
+                "GetObject"
+            )
+        if Range:
+            start, end = Range[len("bytes="):].split("-")
+            body = body[int(start):int(end) + 1]
+        self.downloads += 1
+        self.bytes_served += len(body)
+        return {"Body": io.BytesIO(body), "ETag": etag, "ContentLength": len(body)}
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {"Contents": [
+            {"Key": key, "Size": len(body)}
+            for (bucket, key), body in sorted(self.objects.items())
+            if bucket == Bucket and key.startswith(Prefix)
+        ]}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+            self.metadata.pop((Bucket, obj["Key"]), None)
+
+
+class FakeAthenaClient:
+    """すぐに完了し、実行したクエリを記録するAthenaクライアント
+
+    結果は results（クエリを受け取り {列名: 値} の行のリストを返す関数）で指定します。
+    failing のキーワードを含むクエリは、対応する理由で失敗します。
+    """
+
+    def __init__(self, results=None, failing=None):
+        self.results = results or (lambda query: [])
+        self.failing = failing or {}
+        self.queries = []
+
+    def start_query_execution(self, QueryString, **kwargs):
+        self.queries.append(QueryString)
+        return {"QueryExecutionId": str(len(self.queries) - 1)}
+
+    def get_query_execution(self, QueryExecutionId):
+        query = self.queries[int(QueryExecutionId)]
+        for keyword, reason in self.failing.items():
+            if keyword in query:
+                return {"QueryExecution": {"Status": {"State": "FAILED", "StateChangeReason": reason}}}
+        return {"QueryExecution": {"Status": {"State": "SUCCEEDED"}}}
+
+    def get_query_results(self, QueryExecutionId, MaxResults=1000, NextToken=None):
+        rows = self.results(self.queries[int(QueryExecutionId)])
+        names = list(rows[0]) if rows else []
+        return {"ResultSet": {"Rows": [{"Data": [{"VarCharValue": name} for name in names]}] + [
+            {"Data": [{"VarCharValue": str(row[name])} for name in names]} for row in rows[:MaxResults - 1]
+        ]}}
+
+
+@pytest.fixture
+def s3_client():
+    return FakeS3Client()
@@ -248,6 +248,16 @@ class TestDuplicateDetection:
         assert result["has_duplicates"] is True
         assert result["duplicate_count"] == 1
     
+    def test_typed_keys(self, validator):
+        """数値と文字列の同じ表記は別のキー"""
+        data = [
+            {"year": 2020, "value": 100},
+            {"year": "2020", "value": 150}
+        ]
+        result = validator.detect_duplicates(data, ["year"])
+        
+        assert result["has_duplicates"] is False
+    
     def test_empty_data(self, validator):
         """データが空の場合"""
         result = validator.detect_duplicates([], ["year"])
@@ -316,6 +326,167 @@ class TestQuarantineInvalidRecords:
         assert len(invalid) == 0
 
 
+class TestValidateTable:
+    """列単位の一括検証のテスト"""
+    
+    @pytest.fixture
+    def table(self):
+        import pyarrow as pa
+        return pa.table({
+            "year": [2020, 2020, None, 2021],
+            "region": pa.array(["Tokyo", "Tokyo", "", "null"]).dictionary_encode(),
+            "value": ["100", "-5", "x", "500"]
+        })
+    
+    def test_all_checks(self, validator, table):
+        """全チェックを一括実行し、個別メソッドと同じ構造の結果を返す"""
+        result = validator.validate_table(
+            table,
+            required_columns=["year", "region", "value", "category"],
+            null_columns=["year", "region"],
+            range_checks={"value": {"min_value": 0, "max_value": 300}},
+            duplicate_columns=["year", "region"]
+        )
+        checks = result["checks"]
+        
+        assert result["valid"] is False
+        assert result["total_records"] == 4
+        assert checks["required_columns"]["missing_columns"] == ["category"]
+        assert checks["null_values"]["null_counts"] == {"year": 1, "region": 2}
+        ranges = checks["value_ranges"]["value"]
+        assert ranges["out_of_range_count"] == 2
+        assert [r["index"] for r in ranges["out_of_range_records"]] == [1, 3]
+        assert checks["duplicates"]["duplicate_count"] == 1
+        assert checks["duplicates"]["duplicate_details"][0] == {"key": {"year": 2020, "region": "Tokyo"}, "count": 2}
+    
+    def test_matches_record_checks(self, validator):
+        """レコードのリストでも既存メソッドと同じ結果になる"""
+        data = [
+            {"year": 2020, "region": "Tokyo", "value": 100},
+            {"year": 2020, "region": "Tokyo", "value": 150},
+            {"year": 2021, "region": "Osaka", "value": 200},
+            {"year": 2021, "region": "Osaka", "value": 250}
+        ]
+        result = validator.validate_table(data, duplicate_columns=["year", "region"])
+        expected = validator.detect_duplicates(data, ["year", "region"])
+        
+        assert result["checks"]["duplicates"] == expected
+    
+    def test_numpy_arrays(self, validator):
+        """NumPy配列の辞書を検証"""
+        import numpy as np
+        result = validator.validate_table(
+            {"year": np.array([2020, 2021, 2021]), "value": np.array([1.0, np.nan, 3.0])},
+            null_columns=["year"],
+            range_checks={"value": {"min_value": 2}},
+            duplicate_columns=["year"]
+        )
+        
+        assert result["checks"]["null_values"]["has_nulls"] is False
+        assert result["checks"]["value_ranges"]["value"]["out_of_range_count"] == 1
+        assert result["checks"]["duplicates"]["total_duplicate_records"] == 2
+    
+    def test_empty_data(self, validator):
+        """データが空の場合"""
+        result = validator.validate_table([], null_columns=["year"], duplicate_columns=["year"])
+        
+        assert result["valid"] is True
+        assert result["checks"]["null_values"]["message"] == "No data to validate"
+
+
+class TestQuarantineTable:
+    """マスクによる一括隔離のテスト"""
+    
+    @pytest.fixture
+    def table(self):
+        import pyarrow as pa
+        return pa.table({
+            "year": [2020, 2020, 2021, None],
+            "region": ["Tokyo", "Tokyo", "Osaka", "Kyoto"],
+            "value": [100.0, 150.0, -1.0, 50.0]
+        })
+    
+    def test_split_with_reasons(self, validator, table, tmp_path):
+        """不正行を理由列付きで隔離ファイルに書き出す"""
+        import pyarrow.parquet as pq
+        path = tmp_path / "quarantine" / "0001.parquet"
+        
+        result = validator.quarantine_table(
+            table,
+            null_columns=["year"],
+            range_checks={"value": {"min_value": 0}},
+            duplicate_columns=["year", "region"],
+            quarantine_path=str(path)
+        )
+        
+        assert result["valid_count"] == 1
+        assert result["invalid_count"] == 3
+        assert result["valid_table"].column("value").to_pylist() == [100.0]
+        quarantined = pq.read_table(path)
+        reasons = dict(zip(quarantined.column("value").to_pylist(),
+                           quarantined.column("quarantine_reason").to_pylist()))
+        assert reasons[-1.0] == "value below minimum (0)"
+        assert reasons[50.0] == "Null value in year"
+        # 重複キーは最初の行を残し、2件目以降だけを隔離する
+        assert reasons[150.0] == "Duplicate key (year, region)"
+        assert 100.0 not in reasons
+        assert result["reason_counts"]["Duplicate key (year, region)"] == 1
+    
+    def test_multiple_reasons_joined(self, validator, table):
+        """1行が複数の理由に該当する場合は連結する"""
+        result = validator.quarantine_table(
+            table, null_columns=["year"], range_checks={"value": {"max_value": 10}}
+        )
+        
+        reasons = result["quarantine_table"].column("quarantine_reason").to_pylist()
+        assert "Null value in year; value above maximum (10)" in reasons
+        assert result["valid_table"].column("value").to_pylist() == [-1.0]
+    
+    def test_valid_rows_not_copied(self, validator, table):
+        """不正行が無い場合は入力テーブルをそのまま返す"""
+        result = validator.quarantine_table(table, range_checks={"value": {"max_value": 1000}})
+        
+        assert result["valid_table"] is table
+        assert result["quarantine_table"] is None
+        assert result["invalid_count"] == 0
+    
+    def test_s3_output(self, validator, table, s3_client):
+        """s3://形式のパスにはS3クライアントで書き込む"""
+        validator.quarantine_table(
+            table, null_columns=["year"], quarantine_path="s3://bucket/quarantine/0001.parquet",
+            s3_client=s3_client
+        )
+        
+        assert ("bucket", "quarantine/0001.parquet") in s3_client.objects
+    
+    def test_duplicate_records_quarantined(self, validator):
+        """detect_duplicatesを指定した場合は重複キーの2件目以降を隔離する"""
+        data = [
+            {"year": 2020, "region": "Tokyo"},
+            {"year": 2020, "region": "Tokyo"},
+            {"year": 2021, "region": "Osaka"}
+        ]
+        valid, invalid = validator.quarantine_invalid_records(
+            data, validator.detect_duplicates, key_columns=["year", "region"]
+        )
+        
+        assert valid == [data[0], data[2]]
+        assert [r["index"] for r in invalid] == [1]
+    
+    def test_custom_function_per_record(self, validator, sample_data):
+        """このクラス以外の検証関数はレコードごとに呼び出す"""
+        calls = []
+        
+        def validation_func(records):
+            calls.append(records)
+            return {"valid": records[0]["year"] != 2021}
+        
+        valid, invalid = validator.quarantine_invalid_records(sample_data, validation_func)
+        
+        assert len(calls) == 3
+        assert [r["index"] for r in invalid] == [1]
+
+
 class TestValidationSummary:
     """検証結果サマリーのテスト"""
     
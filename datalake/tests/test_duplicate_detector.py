@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+重複検出モジュールのテスト
+
+フィンガープリント計算・バッチ単位の重複判定・ディスク退避モードをテスト
+"""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from datalake.data_quality_validator import DataQualityValidator
+from datalake.duplicate_detector import DuplicateDetector, fingerprint_table, hash_strings, records_to_table
+
+
+@pytest.fixture
+def records():
+    return [
+        {"@area": "13000", "@time": "2020000000", "$": "100"},
+        {"@time": "2020000000", "@area": "13000", "$": "200"},
+        {"@area": "27000", "@time": "2020000000", "$": "100"},
+        {"@area": "13000", "$": "100"},
+    ]
+
+
+class TestFingerprint:
+    """フィンガープリント計算のテストクラス"""
+
+    def test_hash_strings_fnv1a(self):
+        hashes = hash_strings(pa.array(["", "a", None, "a"]))
+        assert hashes[0] == 0xCBF29CE484222325
+        assert hashes[1] == 0xAF63DC4C8601EC8C
+        assert hashes[1] == hashes[3]
+
+    def test_dictionary_and_plain_columns_match(self):
+        plain = pa.table({"area": ["13000", "27000", "13000"], "time": ["2020", "2020", "2021"]})
+        encoded = pa.table({
+            "area": pa.array(["13000", "27000", "13000"]).dictionary_encode(),
+            "time": pa.array(["2020", "2020", "2021"]).dictionary_encode()
+        })
+        assert np.array_equal(
+            fingerprint_table(plain, ["area", "time"]),
+            fingerprint_table(encoded, ["time", "area"])
+        )
+
+    def test_column_names_are_part_of_key(self):
+        table = pa.table({"a": pa.array(["1"]), "b": pa.array([None], type=pa.string())})
+        swapped = pa.table({"a": pa.array([None], type=pa.string()), "b": pa.array(["1"])})
+        assert fingerprint_table(table, ["a", "b"])[0] != fingerprint_table(swapped, ["a", "b"])[0]
+
+    def test_values_are_typed(self):
+        records = [{"year": 2020}, {"year": "2020"}, {"year": 2020.0}, {"year": True}, {"year": 1}]
+        fingerprints = fingerprint_table(records_to_table(records), ["year"])
+
+        assert fingerprints[0] != fingerprints[1]
+        assert fingerprints[0] == fingerprints[2]
+        assert fingerprints[3] != fingerprints[4]
+
+    def test_records_match_arrow_table(self):
+        records = [{"year": 2020, "value": 1.5e-7, "area": "13000"}, {"year": 2021, "value": 2.0, "area": None}]
+        table = pa.table({"year": [2020, 2021], "value": [1.5e-7, 2.0], "area": ["13000", None]})
+        assert np.array_equal(
+            fingerprint_table(records_to_table(records), ["year", "value", "area"]),
+            fingerprint_table(table, ["year", "value", "area"])
+        )
+
+    def test_none_value_matches_missing_key(self):
+        # null と欠けたキーはどちらも組み合わせから除外する（Arrowテーブルでは区別できないため）
+        fingerprints = fingerprint_table(records_to_table([{"a": "1", "b": None}, {"a": "1"}]), ["a", "b"])
+        assert fingerprints[0] == fingerprints[1]
+
+
+class TestDuplicateDetector:
+    """DuplicateDetectorのテストクラス"""
+
+    def test_filter_records(self, records):
+        detector = DuplicateDetector(exclude_columns=["$"])
+
+        # キーの並び順は問わず、キーが欠けたレコードは別物として扱う
+        assert detector.filter_batch(records) == [records[0], records[2], records[3]]
+        assert detector.stats()["duplicates_found"] == 1
+
+    def test_duplicates_across_batches(self):
+        table = pa.table({"area": ["13000", "27000", "13000", "01000"], "value": [1, 2, 3, 4]})
+        detector = DuplicateDetector(key_columns=["area"])
+
+        first, second = table.to_batches(max_chunksize=2)
+        assert detector.check_batch(first).tolist() == [False, False]
+        assert detector.check_batch(second).tolist() == [True, False]
+        assert detector.filter_batch(table).num_rows == 0
+
+    def test_spill_mode_keeps_exact_results(self, tmp_path):
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 3000, 10000).astype(str)
+        table = pa.table({"area": keys})
+
+        with DuplicateDetector(
+            key_columns=["area"], max_memory_fingerprints=500,
+            expected_rows=5000, spill_dir=str(tmp_path)
+        ) as detector:
+            duplicates = np.concatenate([
+                detector.check_batch(batch) for batch in table.to_batches(max_chunksize=1000)
+            ])
+            stats = detector.stats()
+
+            assert stats["mode"] == "spill"
+            assert stats["spill_files"] > 0
+            assert stats["memory_fingerprints"] <= 500
+
+        _, first_index = np.unique(keys, return_index=True)
+        expected = np.ones(len(keys), dtype=bool)
+        expected[first_index] = False
+        assert np.array_equal(duplicates, expected)
+        assert stats["unique_keys"] == len(first_index)
+        # 終了時に退避ファイルは削除される
+        assert list(tmp_path.iterdir()) == []
+
+    def test_deduplicate_batches(self, records):
+        detector = DuplicateDetector(exclude_columns=["$"])
+        batches = list(detector.deduplicate([records[:2], records[1:]]))
+        assert [len(batch) for batch in batches] == [1, 2]
+
+
+class TestDetectDuplicates:
+    """DataQualityValidator.detect_duplicatesのテストクラス"""
+
+    def test_details_in_first_seen_order(self, records):
+        data = records + [{"@area": "27000", "@time": "2020000000", "$": "1"}]
+        result = DataQualityValidator().detect_duplicates(data, ["@area", "@time"])
+
+        assert result["has_duplicates"]
+        assert result["duplicate_count"] == 2
+        assert result["total_duplicate_records"] == 4
+        assert result["duplicate_details"] == [
+            {"key": {"@area": "13000", "@time": "2020000000"}, "count": 2},
+            {"key": {"@area": "27000", "@time": "2020000000"}, "count": 2},
+        ]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Iceberg直接コミットのテスト
+
+Parquetファイルの列挙・スナップショットのサマリーと、SQLカタログを使ったコミットをテスト
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from datalake.iceberg_commit import IcebergCommitter, list_parquet_files, snapshot_summary
+
+
+class TestListParquetFiles:
+    """list_parquet_filesのテストクラス"""
+
+    def test_directory_skips_markers_and_other_files(self, s3_client):
+        for key in [
+            "parquet/population/year=2021/part-1.parquet",
+            "parquet/population/year=2020/part-0.parquet",
+            "parquet/population/_SUCCESS",
+            "parquet/population/.part-0.parquet.crc",
+            "parquet/population/_common_metadata.parquet",
+            "parquet/population_old/part-0.parquet",
+        ]:
+            s3_client.put_object("bucket", key, b"")
+        assert list_parquet_files(s3_client, "s3://bucket/parquet/population") == [
+            "s3://bucket/parquet/population/year=2020/part-0.parquet",
+            "s3://bucket/parquet/population/year=2021/part-1.parquet",
+        ]
+
+    def test_single_file(self):
+        path = "s3://bucket/parquet/population.parquet"
+        assert list_parquet_files(None, path) == [path]
+
+    def test_local_directory(self, tmp_path):
+        (tmp_path / "year=2020").mkdir()
+        (tmp_path / "year=2020" / "part-0.parquet").write_bytes(b"")
+        (tmp_path / "_SUCCESS").write_bytes(b"")
+        assert list_parquet_files(None, f"file://{tmp_path}") == [str(tmp_path / "year=2020" / "part-0.parquet")]
+
+    def test_missing_local_path(self, tmp_path):
+        with pytest.raises(ValueError):
+            list_parquet_files(None, str(tmp_path / "missing"))
+
+
+class TestSnapshotSummary:
+    """snapshot_summaryのテストクラス"""
+
+    def test_counts(self):
+        snapshot = SimpleNamespace(snapshot_id=42, summary=SimpleNamespace(additional_properties={
+            "added-data-files": "2", "added-records": "10", "total-records": "25"
+        }))
+        assert snapshot_summary(snapshot) == {
+            "snapshot_id": 42, "added_files": 2, "added_records": 10, "total_records": 25
+        }
+
+    def test_no_snapshot(self):
+        assert snapshot_summary(None)["snapshot_id"] is None
+
+
+class TestSqlCatalogCommit:
+    """SQLカタログ（SQLite）を使ったコミットのテストクラス"""
+
+    def test_partitioned_files_are_committed(self, tmp_path):
+        pytest.importorskip("pyiceberg")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from datalake.iceberg_commit import load_catalog
+
+        columns = [
+            {"name": "region_code", "type": "STRING"},
+            {"name": "year", "type": "INT"},
+            {"name": "value", "type": "DOUBLE"},
+        ]
+        data_dir = tmp_path / "parquet"
+        for year in (2020, 2021):
+            (data_dir / f"year={year}").mkdir(parents=True)
+            pq.write_table(pa.table({
+                "region_code": pa.array(["13000", "13000"]),
+                "year": pa.array([year, year], pa.int32()),
+                "value": pa.array([1.0, 2.0]),
+            }), data_dir / f"year={year}" / "part-0.parquet")
+
+        catalog = load_catalog("sql", uri=f"sqlite:///{tmp_path}/catalog.db", warehouse=f"file://{tmp_path}/warehouse")
+        committer = IcebergCommitter(catalog, "estat_iceberg_db")
+        table = committer.ensure_table("population_data", columns, ["year"])
+
+        result = committer.commit_files(table, list_parquet_files(None, str(data_dir)))
+
+        assert result["success"] is True
+        assert result["added_files"] == 2
+        assert result["added_records"] == 4
+        assert table.scan().to_arrow().num_rows == 4
+        # 2回目は既存テーブルを読み込む（ファイルが無い場合はコミットしない）
+        table = committer.ensure_table("population_data", columns, ["year"])
+        assert committer.commit_files(table, [])["success"] is False
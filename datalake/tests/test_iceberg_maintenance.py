@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Icebergテーブル保守のテスト
+
+しきい値による実行判定と、OPTIMIZE / VACUUM の実行・前後の統計をテスト
+"""
+
+from datalake.iceberg_maintenance import IcebergMaintenance, plan_maintenance
+from datalake.tests.conftest import FakeAthenaClient
+
+
+FILE_STATS = {"data_files": 40, "delete_files": 0, "total_bytes": 4000, "records": 100,
+              "partitions": 4, "small_files": 40, "small_file_partitions": 4}
+
+
+def _stats_client(file_stats, snapshot_stats, failing=None):
+    """メタデータテーブルの集計結果を返すAthenaクライアント（OPTIMIZE 後は統合された統計を返す）"""
+    client = FakeAthenaClient(failing=failing)
+
+    def results(query):
+        if "$files" not in query:
+            return [snapshot_stats]
+        if any(q.startswith("OPTIMIZE") for q in client.queries):
+            return [{**file_stats, "data_files": file_stats["partitions"], "small_files": file_stats["partitions"],
+                     "small_file_partitions": file_stats["partitions"], "delete_files": 0}]
+        return [file_stats]
+
+    client.results = results
+    return client
+
+
+class TestPlanMaintenance:
+    """plan_maintenanceのテストクラス"""
+
+    def test_one_small_file_per_partition_is_not_compacted(self):
+        plan = plan_maintenance({"small_files": 30, "small_file_partitions": 30})
+        assert plan["optimize"] is False
+
+    def test_thresholds(self):
+        plan = plan_maintenance({**FILE_STATS, "expired_snapshots": 2}, min_small_files=10)
+        assert plan["optimize"] is True
+        assert plan["vacuum"] is True
+        assert len(plan["reasons"]) == 2
+
+    def test_delete_files_trigger_optimize(self):
+        assert plan_maintenance({"delete_files": 1})["optimize"] is True
+
+
+class TestIcebergMaintenance:
+    """IcebergMaintenanceのテストクラス"""
+
+    def test_maintain_runs_planned_actions_and_reports_stats(self):
+        client = _stats_client(FILE_STATS, {"snapshots": 12, "expired_snapshots": 8})
+        maintenance = IcebergMaintenance(client, "estat_iceberg_db", "s3://bucket/athena-results/")
+
+        result = maintenance.maintain("population_data", retention_days=7)
+
+        assert result["success"] is True
+        assert [action["action"] for action in result["actions"]] == ["optimize", "vacuum"]
+        assert result["before"]["data_files"] == 40
+        assert result["after"]["data_files"] == 4
+        assert "OPTIMIZE estat_iceberg_db.population_data REWRITE DATA USING BIN_PACK" in client.queries
+        assert any("'vacuum_max_snapshot_age_seconds'='604800'" in q for q in client.queries)
+        assert "VACUUM estat_iceberg_db.population_data" in client.queries
+
+    def test_below_threshold_and_dry_run_do_nothing(self):
+        client = _stats_client({**FILE_STATS, "small_files": 5}, {"snapshots": 1, "expired_snapshots": 0})
+        maintenance = IcebergMaintenance(client, "estat_iceberg_db", "s3://bucket/athena-results/")
+        assert maintenance.maintain("population_data")["actions"] == []
+
+        client = _stats_client(FILE_STATS, {"snapshots": 1, "expired_snapshots": 0})
+        maintenance = IcebergMaintenance(client, "estat_iceberg_db", "s3://bucket/athena-results/")
+        result = maintenance.maintain("population_data", dry_run=True)
+        assert result["plan"]["optimize"] is True
+        assert result["actions"] == []
+        assert not any(q.startswith("OPTIMIZE") for q in client.queries)
+
+    def test_failures_are_recorded_per_table(self):
+        client = _stats_client(FILE_STATS, {"snapshots": 1, "expired_snapshots": 0},
+                               failing={"OPTIMIZE": "ICEBERG_OPTIMIZE_MORE_RUNS_NEEDED"})
+        maintenance = IcebergMaintenance(client, "estat_iceberg_db", "s3://bucket/athena-results/")
+
+        result = maintenance.maintain_tables(["population_data"])
+
+        assert result["success"] is False
+        assert "ICEBERG_OPTIMIZE_MORE_RUNS_NEEDED" in result["tables"][0]["error"]
+
+    def test_missing_table_is_skipped(self):
+        client = _stats_client(FILE_STATS, {}, failing={
+            "economy_data$files": "TABLE_NOT_FOUND: Table 'estat_iceberg_db.economy_data$files' does not exist"
+        })
+        maintenance = IcebergMaintenance(client, "estat_iceberg_db", "s3://bucket/athena-results/")
+
+        result = maintenance.maintain_tables(["economy_data"])
+
+        assert result["success"] is True
+        assert result["tables"][0]["skipped"] is True
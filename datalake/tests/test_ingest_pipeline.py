@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+取り込みパイプラインのテスト
+
+1回の読み込みでの変換・検証・Parquet保存と、失敗時のステージ中断をテスト
+"""
+
+import io
+import json
+import pyarrow.parquet as pq
+import pytest
+from datalake.ingest_pipeline import IngestPipeline, extract_records
+from datalake.tests.conftest import FakeS3Client, estat_values
+
+
+@pytest.fixture
+def s3_client():
+    client = FakeS3Client()
+    client.put_object("bucket", "raw/0001.json", json.dumps(estat_values(25)).encode("utf-8"))
+    return client
+
+
+class TestExtractRecords:
+    """extract_recordsのテストクラス"""
+
+    def test_api_response(self):
+        response = {"GET_STATS_DATA": {"STATISTICAL_DATA": {"DATA_INF": {"VALUE": {"$": "1"}}}}}
+        assert extract_records(response) == [{"$": "1"}]
+
+    def test_list_and_single_record(self):
+        assert extract_records([{"$": "1"}]) == [{"$": "1"}]
+        assert extract_records({"$": "1"}) == [{"$": "1"}]
+
+
+class TestIngestPipeline:
+    """IngestPipelineのテストクラス"""
+
+    def test_run_reads_once(self, s3_client):
+        pipeline = IngestPipeline(s3_client, "population", "0001", batch_size=10)
+        result = pipeline.run("bucket", "raw/0001.json", "bucket", "parquet/population/0001/")
+
+        assert result["success"]
+        assert s3_client.get_calls == 1
+        assert result["records"] == 25
+        assert [stage["stage"] for stage in result["stages"]] == ["read", "transform", "validate", "save_parquet"]
+        assert set(result["timings"]) == {"read", "transform", "validate", "save_parquet"}
+        assert result["validation"]["valid"]
+        assert result["parquet"]["output_path"] == "s3://bucket/parquet/population/0001/"
+
+        saved = [
+            pq.read_table(io.BytesIO(body)).num_rows
+            for (bucket, key), body in s3_client.objects.items() if key.endswith(".parquet")
+        ]
+        assert sum(saved) == 25
+
+    def test_transform_batches_match_single_batch(self, s3_client):
+        records = estat_values(25)
+        batched = IngestPipeline(s3_client, "population", "0001", batch_size=7).transform(records)
+        single = IngestPipeline(s3_client, "population", "0001").transform(records)
+
+        assert batched.drop(["updated_at"]).to_pylist() == single.drop(["updated_at"]).to_pylist()
+
+    def test_duplicate_check(self, s3_client):
+        pipeline = IngestPipeline(s3_client, "population", "0001")
+        table = pipeline.transform(estat_values(25))
+        result = pipeline.validate(table, check_duplicates=True)
+
+        assert not result["valid"]
+        assert result["checks"]["duplicates"]["has_duplicates"]
+
+    def test_quarantined_rows_are_not_saved(self, s3_client):
+        pipeline = IngestPipeline(s3_client, "population", "0001")
+        result = pipeline.run("bucket", "raw/0001.json", "bucket", "parquet/population/0001/",
+                              check_duplicates=True, quarantine_path="s3://bucket/quarantine/0001.parquet")
+
+        # キー（dataset_id, year, region_code）は6通りで、残りの19行は重複として隔離する
+        assert result["validation"]["quarantine"]["invalid_count"] == 19
+        assert result["parquet"]["records_saved"] == 6
+        saved = [
+            pq.read_table(io.BytesIO(body)).num_rows
+            for (bucket, key), body in s3_client.objects.items() if key.startswith("parquet/")
+        ]
+        assert sum(saved) == 6
+        assert pq.read_table(io.BytesIO(s3_client.objects[("bucket", "quarantine/0001.parquet")])).num_rows == 19
+
+    def test_read_failure_stops_pipeline(self, s3_client):
+        pipeline = IngestPipeline(s3_client, "population", "0001")
+        result = pipeline.run("bucket", "raw/missing.json", "bucket", "parquet/population/0001/")
+
+        assert not result["success"]
+        assert result["stages"] == [{"stage": "read", "success": False, "error": result["error"]}]
+        assert not any(key.endswith(".parquet") for _, key in s3_client.objects)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+並列変換モジュールのテスト
+
+チャンクファイルの検索・並列変換・マニフェスト出力をテスト
+"""
+
+import io
+import json
+from functools import partial
+from pathlib import Path
+
+import pytest
+import pyarrow.parquet as pq
+from datalake.parallel_transformer import (
+    MANIFEST_FILENAME,
+    ParallelTransformer,
+    find_chunk_keys,
+    transform_chunk
+)
+from datalake.tests.conftest import FakeS3Client, estat_values
+
+
+class LocalS3Client:
+    """ローカルディレクトリを使うS3クライアント（pickle可能なため spawn したワーカーでも使える）"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, bucket, key):
+        return self.root / bucket / key
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+
+    def get_object(self, Bucket, Key, **kwargs):
+        body = self._path(Bucket, Key).read_bytes()
+        return {"Body": io.BytesIO(body), "ContentLength": len(body)}
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        base = self.root / Bucket
+        keys = sorted(p.relative_to(base).as_posix() for p in base.rglob("*") if p.is_file())
+        yield {"Contents": [{"Key": key} for key in keys if key.startswith(Prefix)]}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self._path(Bucket, obj["Key"]).unlink()
+
+
+@pytest.fixture(autouse=True)
+def disable_s3_cache(monkeypatch):
+    monkeypatch.setenv("S3_CACHE_ENABLED", "false")
+
+
+@pytest.fixture
+def s3_client():
+    client = FakeS3Client()
+    for num in range(3):
+        key = f"raw/0001/0001_chunk_{num:03d}_20240101_120000.json"
+        client.put_object("bucket", key, json.dumps(estat_values(10, start=num * 10, years=2)).encode("utf-8"))
+    # 古い取得分・統合ファイルは対象外
+    client.put_object("bucket", "raw/0001/0001_chunk_000_20230101_120000.json", b"[]")
+    client.put_object("bucket", "raw/0001/0001_complete_20240101_120000.json", b"[]")
+    return client
+
+
+class TestFindChunkKeys:
+    """find_chunk_keysのテストクラス"""
+
+    def test_latest_run_in_chunk_order(self):
+        keys = [
+            "raw/x/x_chunk_001_20240101_120000.json",
+            "raw/x/x_chunk_000_20240101_120000.json",
+            "raw/x/x_chunk_000_20230101_120000.json",
+            "raw/x/x_complete_20240101_120000.json",
+        ]
+        chunks = find_chunk_keys(keys)
+        assert [c["chunk_num"] for c in chunks] == [0, 1]
+        assert all(c["timestamp"] == "20240101_120000" for c in chunks)
+
+    def test_specific_timestamp(self):
+        keys = ["raw/x/x_chunk_000_20240101_120000.json", "raw/x/x_chunk_000_20230101_120000.json"]
+        assert [c["key"] for c in find_chunk_keys(keys, "20230101_120000")] == keys[1:]
+
+    def test_no_chunks(self):
+        assert find_chunk_keys(["raw/x/x_complete_20240101_120000.json"]) == []
+
+
+class TestParallelTransformer:
+    """ParallelTransformerのテストクラス"""
+
+    def test_transform_chunk_writes_prefixed_parts(self, s3_client):
+        result = transform_chunk({
+            "bucket": "bucket",
+            "key": "raw/0001/0001_chunk_002_20240101_120000.json",
+            "chunk_num": 2,
+            "domain": "population",
+            "dataset_id": "0001",
+            "output_bucket": "bucket",
+            "output_prefix": "parquet/population/0001"
+        }, s3_client=s3_client)
+
+        assert result["success"]
+        assert result["records"] == 10
+        assert all("/chunk-002-" in f["key"] for f in result["files"])
+
+    def test_transform_dataset_with_manifest(self, s3_client):
+        transformer = ParallelTransformer(s3_client, max_workers=2, use_processes=False)
+        result = transformer.transform_dataset("bucket", "0001", "population")
+
+        assert result["success"]
+        assert result["chunks_total"] == 3
+        assert result["records_transformed"] == 30
+        assert result["output_path"] == "s3://bucket/parquet/population/0001/"
+
+        manifest = json.loads(s3_client.objects[("bucket", f"parquet/population/0001/{MANIFEST_FILENAME}")])
+        assert manifest["status"] == "complete"
+        assert manifest["total_records"] == 30
+        assert sum(f["records"] for f in manifest["files"]) == 30
+
+        # 各パートは読み込み可能で、パーティション値ごとに分かれている
+        for file in manifest["files"]:
+            table = pq.read_table(io.BytesIO(s3_client.objects[("bucket", file["key"])]))
+            assert table.num_rows == file["records"]
+            assert f"year={table.column('year')[0].as_py()}/" in file["key"]
+
+    def test_failed_chunk_is_reported(self, s3_client):
+        s3_client.put_object("bucket", "raw/0001/0001_chunk_003_20240101_120000.json", b"not json")
+
+        transformer = ParallelTransformer(s3_client, max_workers=2, use_processes=False)
+        result = transformer.transform_dataset("bucket", "0001", "population")
+
+        assert not result["success"]
+        assert result["chunks_succeeded"] == 3
+        assert [c["chunk_num"] for c in result["failed_chunks"]] == [3]
+
+        manifest = json.loads(s3_client.objects[("bucket", f"parquet/population/0001/{MANIFEST_FILENAME}")])
+        assert manifest["status"] == "partial"
+
+    def test_explicit_chunk_paths(self, s3_client):
+        transformer = ParallelTransformer(s3_client, max_workers=1, use_processes=False)
+        result = transformer.transform_dataset(
+            "bucket", "0001", "population",
+            chunk_keys=["s3://bucket/raw/0001/0001_chunk_001_20240101_120000.json"]
+        )
+        assert result["records_transformed"] == 10
+
+    def test_rerun_replaces_previous_output(self, s3_client):
+        transformer = ParallelTransformer(s3_client, max_workers=2, use_processes=False)
+        transformer.transform_dataset("bucket", "0001", "population")
+
+        # 2回目はチャンク数が減っても前回の chunk-002 が残らない
+        result = transformer.transform_dataset(
+            "bucket", "0001", "population",
+            chunk_keys=["raw/0001/0001_chunk_000_20240101_120000.json"]
+        )
+
+        keys = [key for _, key in s3_client.objects if key.startswith("parquet/population/0001/")]
+        assert result["records_transformed"] == 10
+        assert not any("/chunk-001-" in key or "/chunk-002-" in key for key in keys)
+        assert len(keys) == result["file_count"] + 1
+
+    def test_rerun_with_failed_chunk_keeps_previous_files(self, s3_client):
+        transformer = ParallelTransformer(s3_client, max_workers=2, use_processes=False)
+        transformer.transform_dataset("bucket", "0001", "population")
+        s3_client.put_object("bucket", "raw/0001/0001_chunk_002_20240101_120000.json", b"not json")
+
+        result = transformer.transform_dataset("bucket", "0001", "population")
+
+        assert not result["success"]
+        keys = [key for _, key in s3_client.objects if key.startswith("parquet/population/0001/")]
+        assert any("/chunk-002-" in key for key in keys)
+
+    def test_rerun_with_every_chunk_failing_keeps_previous_output(self, s3_client):
+        transformer = ParallelTransformer(s3_client, max_workers=2, use_processes=False)
+        transformer.transform_dataset("bucket", "0001", "population")
+        before = {k: v for k, v in s3_client.objects.items() if k[1].startswith("parquet/")}
+        for num in range(3):
+            s3_client.put_object("bucket", f"raw/0001/0001_chunk_{num:03d}_20240101_120000.json", b"not json")
+
+        result = transformer.transform_dataset("bucket", "0001", "population")
+
+        assert not result["success"]
+        assert result["chunks_succeeded"] == 0
+        assert result["manifest_path"] is None
+        assert {k: v for k, v in s3_client.objects.items() if k[1].startswith("parquet/")} == before
+        manifest = json.loads(s3_client.objects[("bucket", f"parquet/population/0001/{MANIFEST_FILENAME}")])
+        assert manifest["status"] == "complete"
+
+    def test_process_pool(self, tmp_path):
+        s3_client = LocalS3Client(tmp_path)
+        for num in range(2):
+            key = f"raw/0001/0001_chunk_{num:03d}_20240101_120000.json"
+            s3_client.put_object("bucket", key, json.dumps(estat_values(10, start=num * 10, years=2)).encode("utf-8"))
+
+        transformer = ParallelTransformer(
+            s3_client, max_workers=2, s3_client_factory=partial(LocalS3Client, str(tmp_path))
+        )
+        result = transformer.transform_dataset("bucket", "0001", "population")
+
+        assert result["success"], result["failed_chunks"]
+        assert result["records_transformed"] == 20
+        manifest = json.loads((tmp_path / "bucket/parquet/population/0001" / MANIFEST_FILENAME).read_text())
+        assert sum(pq.read_table(tmp_path / "bucket" / f["key"]).num_rows for f in manifest["files"]) == 20
+
+    def test_no_chunks(self, s3_client):
+        transformer = ParallelTransformer(s3_client, use_processes=False)
+        result = transformer.transform_dataset("bucket", "9999", "population")
+        assert not result["success"]
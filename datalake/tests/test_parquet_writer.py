@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+パーティション形式Parquet書き込みのテスト
+
+パーティション分割・Hiveパス生成・ファイル行数上限・書き込みプロファイルをテスト
+"""
+
+import io
+import pytest
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datalake.parquet_writer import (
+    HIVE_DEFAULT_PARTITION,
+    PARQUET_WRITE_PROFILES,
+    bloom_filter_options,
+    dimension_columns,
+    get_write_profile,
+    partition_path,
+    row_group_size,
+    sort_table,
+    split_partitions,
+    write_partitioned_to_s3,
+    write_table_bytes
+)
+
+
+@pytest.fixture
+def table():
+    return pa.table({
+        "year": pa.array([2021, 2020, 2020, 2021, 2020], type=pa.int32()),
+        "region_code": ["13000", "27000", "13000", "13000", None],
+        "value": [1.0, 2.0, 3.0, 4.0, 5.0],
+    })
+
+
+class TestPartitionPath:
+    """partition_pathのテストクラス"""
+
+    def test_hive_path(self):
+        assert partition_path(["year", "region_code"], (2020, "13000")) == "year=2020/region_code=13000"
+
+    def test_null_and_escaping(self):
+        assert partition_path(["region_code"], (None,)) == f"region_code={HIVE_DEFAULT_PARTITION}"
+        assert partition_path(["category"], ("a/b=c",)) == "category=a%2Fb%3Dc"
+
+
+class TestSplitPartitions:
+    """split_partitionsのテストクラス"""
+
+    def test_groups_rows_by_values(self, table):
+        partitions = {values: part for values, part in split_partitions(table, ["year", "region_code"])}
+
+        assert set(partitions) == {(2020, "13000"), (2020, "27000"), (2020, None), (2021, "13000")}
+        assert partitions[(2021, "13000")].column("value").to_pylist() == [1.0, 4.0]
+        assert partitions[(2020, None)].column("value").to_pylist() == [5.0]
+        assert sum(part.num_rows for part in partitions.values()) == table.num_rows
+
+    def test_dictionary_columns(self, table):
+        table = table.set_column(1, "region_code", table.column("region_code").dictionary_encode())
+        values = [values for values, _ in split_partitions(table, ["region_code"])]
+        assert sorted(values, key=str) == [("13000",), ("27000",), (None,)]
+
+    def test_no_partition_columns(self, table):
+        assert [part.num_rows for _, part in split_partitions(table, [])] == [5]
+
+    def test_empty_table(self, table):
+        assert list(split_partitions(table.slice(0, 0), ["year"])) == []
+
+
+class TestWritePartitionedToS3:
+    """write_partitioned_to_s3のテストクラス"""
+
+    def test_writes_hive_layout(self, table, tmp_path, s3_client):
+        result = write_partitioned_to_s3(
+            s3_client, table, "bucket", "parquet/population/0001/",
+            partition_by=["year", "region_code"]
+        )
+
+        assert result["output_path"] == "s3://bucket/parquet/population/0001/"
+        assert result["partitions"] == 4
+        key = "parquet/population/0001/year=2021/region_code=13000/part-00000.parquet"
+        assert ("bucket", key) in s3_client.objects
+
+        # ローカルに展開してパーティション認識付きで読めること
+        for (_, key), body in s3_client.objects.items():
+            path = tmp_path / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(body)
+        dataset = ds.dataset(tmp_path / "parquet/population/0001", format="parquet")
+        filtered = dataset.to_table(filter=ds.field("year") == 2021)
+        assert filtered.column("value").to_pylist() == [1.0, 4.0]
+
+    def test_max_rows_per_file(self, table, s3_client):
+        result = write_partitioned_to_s3(
+            s3_client, table, "bucket", "out", partition_by=["year"], max_rows_per_file=2
+        )
+
+        assert result["file_count"] == 3
+        assert all(f["records"] <= 2 for f in result["files"])
+        part = pq.read_table(io.BytesIO(s3_client.objects[("bucket", "out/year=2020/part-00001.parquet")]))
+        assert part.num_rows == 1
+
+    def test_unknown_partition_columns_are_ignored(self, table, s3_client):
+        result = write_partitioned_to_s3(s3_client, table, "bucket", "out", partition_by=["missing"])
+
+        assert result["partition_by"] == []
+        assert list(s3_client.objects) == [("bucket", "out/part-00000.parquet")]
+
+    def test_concurrent_upload_keeps_file_order(self, table, s3_client):
+        result = write_partitioned_to_s3(
+            s3_client, table, "bucket", "out", partition_by=["year"], max_rows_per_file=1, upload_workers=2
+        )
+
+        assert [f["key"] for f in result["files"]] == [
+            f"out/year={year}/part-{part:05d}.parquet" for year, parts in ((2021, 2), (2020, 3))
+            for part in range(parts)
+        ]
+        assert sorted(key for _, key in s3_client.objects) == sorted(f["key"] for f in result["files"])
+
+    def test_overwrite_removes_stale_files(self, table, s3_client):
+        s3_client.put_object("bucket", "out/year=2019/part-00000.parquet", b"stale")
+        s3_client.put_object("bucket", "out_other/part-00000.parquet", b"other")
+
+        write_partitioned_to_s3(s3_client, table, "bucket", "out", partition_by=["year"], overwrite=True)
+
+        assert ("bucket", "out/year=2019/part-00000.parquet") not in s3_client.objects
+        assert ("bucket", "out_other/part-00000.parquet") in s3_client.objects
+        assert ("bucket", "out/year=2020/part-00000.parquet") in s3_client.objects
+
+    def test_overwrite_keeps_other_files(self, table, s3_client):
+        s3_client.put_object("bucket", "out/year=2019/part-00000.parquet", b"stale")
+        s3_client.put_object("bucket", "out/_profile.json", b"{}")
+
+        write_partitioned_to_s3(s3_client, table, "bucket", "out", partition_by=["year"])
+        assert ("bucket", "out/year=2019/part-00000.parquet") in s3_client.objects
+
+        write_partitioned_to_s3(s3_client, table, "bucket", "out", partition_by=["year"], overwrite=True)
+        assert ("bucket", "out/year=2019/part-00000.parquet") not in s3_client.objects
+        assert ("bucket", "out/_profile.json") in s3_client.objects
+
+    def test_overwrite_keeps_previous_output_when_upload_fails(self, table, s3_client):
+        s3_client.put_object("bucket", "out/year=2019/part-00000.parquet", b"stale")
+        put_object = s3_client.put_object
+
+        def failing_put_object(Bucket, Key, Body, **kwargs):
+            if "year=2020" in Key:
+                raise IOError("upload failed")
+            put_object(Bucket, Key, Body, **kwargs)
+
+        s3_client.put_object = failing_put_object
+        with pytest.raises(IOError):
+            write_partitioned_to_s3(s3_client, table, "bucket", "out", partition_by=["year"], overwrite=True)
+
+        assert ("bucket", "out/year=2019/part-00000.parquet") in s3_client.objects
+
+
+class TestWriteProfiles:
+    """書き込みプロファイルのテストクラス"""
+
+    @pytest.fixture
+    def mapped(self):
+        return pa.table({
+            "stats_data_id": pa.array(["0001"] * 6).dictionary_encode(),
+            "year": pa.array([2021, 2020, 2021, 2020, 2020, 2021], type=pa.int32()),
+            "region_code": pa.array(["27000", "13000", "13000", None, "27000", "13000"]).dictionary_encode(),
+            "region_code_name": ["大阪府", "東京都", "東京都", None, "大阪府", "東京都"],
+            "value": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        })
+
+    def test_dimension_columns(self, mapped):
+        assert dimension_columns(mapped) == ["year", "region_code"]
+        assert dimension_columns(mapped, ["region_code"]) == ["region_code", "year"]
+
+    def test_sort_table_dictionary_columns(self, mapped):
+        result = sort_table(mapped, ["year", "region_code"])
+
+        assert result.column("year").to_pylist() == [2020, 2020, 2020, 2021, 2021, 2021]
+        assert result.column("region_code").to_pylist() == ["13000", "27000", None, "13000", "13000", "27000"]
+        assert pa.types.is_dictionary(result.schema.field("region_code").type)
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            get_write_profile("unknown")
+
+    def test_row_group_size(self, mapped):
+        profile = {"row_group_bytes": mapped.nbytes // 3, "min_row_group_rows": 1}
+        assert row_group_size(mapped, profile) == 2
+        assert row_group_size(mapped, PARQUET_WRITE_PROFILES["snappy"]) is None
+        assert row_group_size(mapped, PARQUET_WRITE_PROFILES["athena"]) == mapped.num_rows
+
+    def test_athena_profile_layout(self, mapped):
+        parquet_file = pq.ParquetFile(io.BytesIO(write_table_bytes(mapped, profile="athena")))
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema_arrow
+
+        year = metadata.row_group(0).column(schema.get_field_index("year"))
+        assert year.compression == "ZSTD"
+        assert year.statistics.has_min_max
+        assert (year.statistics.min, year.statistics.max) == (2020, 2021)
+
+        region = metadata.row_group(0).column(schema.get_field_index("region_code"))
+        assert any("DICTIONARY" in encoding for encoding in region.encodings)
+
+        table = parquet_file.read()
+        assert table.column("year").to_pylist() == [2020, 2020, 2020, 2021, 2021, 2021]
+        if hasattr(metadata.row_group(0), "sorting_columns"):
+            sorting = metadata.row_group(0).sorting_columns
+            assert [c.column_index for c in sorting] == [
+                schema.get_field_index("year"), schema.get_field_index("region_code")
+            ]
+
+    def test_snappy_profile_keeps_order(self, mapped):
+        table = pq.read_table(io.BytesIO(write_table_bytes(mapped, profile="snappy")))
+        assert table.column("value").to_pylist() == mapped.column("value").to_pylist()
+
+    def test_partitioned_files_are_sorted(self, mapped, s3_client):
+        write_partitioned_to_s3(s3_client, mapped, "bucket", "out", partition_by=["year"])
+
+        part = pq.read_table(io.BytesIO(s3_client.objects[("bucket", "out/year=2021/part-00000.parquet")]))
+        assert part.column("region_code").to_pylist() == ["13000", "13000", "27000"]
+
+
+class TestLookupIndexes:
+    """ブルームフィルタ・ページインデックスのテストクラス"""
+
+    @pytest.fixture
+    def codes(self):
+        return pa.table({
+            "year": pa.array([2020] * 4, type=pa.int32()),
+            "region_code": pa.array(["13000", "13000", "27000", "27000"]).dictionary_encode(),
+            "category": ["001", "002", "001", None],
+            "unit": pa.array(["人"] * 4).dictionary_encode(),
+            "value": [1.0, 2.0, 3.0, 4.0],
+        })
+
+    def test_bloom_filter_options(self, codes):
+        profile = PARQUET_WRITE_PROFILES["athena"]
+        options = bloom_filter_options(codes, profile)
+
+        assert set(options) == {"region_code", "category"}
+        assert options["region_code"] == {"ndv": 2, "fpp": profile["bloom_filter_fpp"]}
+        assert set(bloom_filter_options(codes, profile, ["region_code"])) == {"category"}
+        assert bloom_filter_options(codes, PARQUET_WRITE_PROFILES["snappy"]) == {}
+
+    def test_athena_profile_writes_indexes(self, codes):
+        parquet_file = pq.ParquetFile(io.BytesIO(write_table_bytes(codes, profile="athena")))
+        row_group = parquet_file.metadata.row_group(0)
+        schema = parquet_file.schema_arrow
+
+        category = row_group.column(schema.get_field_index("category"))
+        value = row_group.column(schema.get_field_index("value"))
+        if hasattr(category, "bloom_filter_offset"):
+            assert category.bloom_filter_offset is not None
+            assert value.bloom_filter_offset is None
+        if hasattr(category, "has_column_index"):
+            assert category.has_column_index
+            assert category.has_offset_index
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+S3オブジェクトキャッシュのテスト
+
+S3ObjectCacheクラスの機能をテスト
+"""
+
+import json
+import pytest
+from datalake.s3_cache import S3ObjectCache, parse_s3_path
+from datalake.tests.conftest import FakeS3Client
+
+
+class TestS3ObjectCache:
+    """S3ObjectCacheのテストクラス"""
+
+    @pytest.fixture
+    def s3_client(self):
+        client = FakeS3Client()
+        client.put_object("bucket", "raw/data.json", json.dumps([{"@time": "2020", "$": "1"}]).encode("utf-8"))
+        return client
+
+    @pytest.fixture
+    def cache(self, s3_client, tmp_path):
+        return S3ObjectCache(s3_client, cache_dir=str(tmp_path), max_bytes=1024 * 1024)
+
+    def test_read_json_miss_then_hit(self, cache, s3_client):
+        """2回目の読み込みはダウンロードせずキャッシュから返す"""
+        first = cache.read_json("bucket", "raw/data.json")
+        second = cache.read_json("bucket", "raw/data.json")
+
+        assert first == second == [{"@time": "2020", "$": "1"}]
+        assert s3_client.get_calls == 2
+        assert s3_client.downloads == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_changed_object_is_refetched(self, cache, s3_client):
+        """ETagが変わった場合は再ダウンロードする"""
+        cache.read_json("bucket", "raw/data.json")
+        s3_client.put_object("bucket", "raw/data.json", b'[{"$": "2"}]')
+
+        data = cache.read_json("bucket", "raw/data.json")
+
+        assert data == [{"$": "2"}]
+        assert s3_client.downloads == 2
+
+    def test_empty_object(self, cache, s3_client):
+        """空のオブジェクトも読み込める"""
+        s3_client.put_object("bucket", "empty.json", b"")
+        assert cache.read_bytes("bucket", "empty.json") == b""
+        assert cache.read_bytes("bucket", "empty.json") == b""
+        assert cache.hits == 1
+
+    def test_lru_eviction(self, s3_client, tmp_path):
+        """上限を超えた場合は最終アクセスが古いエントリから削除する"""
+        cache = S3ObjectCache(s3_client, cache_dir=str(tmp_path), max_bytes=250)
+        for i in range(3):
+            s3_client.put_object("bucket", f"obj{i}", bytes([i]) * 100)
+            cache.read_bytes("bucket", f"obj{i}")
+
+        stats = cache.get_stats()
+        assert stats["total_bytes"] <= 250
+        assert stats["entries"] == 2
+
+        # 最も古いobj0は削除されているので再ダウンロードされる
+        downloads = s3_client.downloads
+        cache.read_bytes("bucket", "obj0")
+        assert s3_client.downloads == downloads + 1
+
+    def test_object_larger_than_cache_is_not_stored(self, s3_client, tmp_path):
+        """キャッシュ上限より大きいオブジェクトは直接読み込む"""
+        cache = S3ObjectCache(s3_client, cache_dir=str(tmp_path), max_bytes=10)
+        s3_client.put_object("bucket", "big", b"x" * 100)
+
+        assert cache.read_bytes("bucket", "big") == b"x" * 100
+        assert cache.get_stats()["entries"] == 0
+        # 上限の確認に使ったGETのレスポンスをそのまま読み込み、再取得しない
+        assert s3_client.get_calls == 1
+
+    def test_disabled_cache_reads_directly(self, s3_client, tmp_path):
+        """無効化されたキャッシュは毎回S3から読み込む"""
+        cache = S3ObjectCache(s3_client, cache_dir=str(tmp_path), enabled=False)
+        cache.read_json("bucket", "raw/data.json")
+        cache.read_json("bucket", "raw/data.json")
+
+        assert s3_client.downloads == 2
+        assert cache.get_local_path("bucket", "raw/data.json") is None
+
+    def test_invalidate(self, cache, s3_client):
+        """invalidateでエントリを削除する"""
+        cache.read_json("bucket", "raw/data.json")
+        cache.invalidate("bucket", "raw/data.json")
+        cache.read_json("bucket", "raw/data.json")
+
+        assert s3_client.downloads == 2
+
+    def test_parse_s3_path(self):
+        """S3パスの分解"""
+        assert parse_s3_path("s3://bucket/a/b.json") == ("bucket", "a/b.json")
+        assert parse_s3_path("a/b.json", default_bucket="default") == ("default", "a/b.json")
+        with pytest.raises(ValueError):
+            parse_s3_path("a/b.json")
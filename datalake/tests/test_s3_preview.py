@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+S3プレビューのテスト
+
+レンジGETによるレコード数・サンプル取得をテスト
+"""
+
+import io
+import json
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datalake import s3_preview
+from datalake.s3_preview import (
+    S3RangeFile,
+    preview_s3_object,
+    record_count_metadata,
+    detect_format
+)
+from datalake.tests.conftest import FakeS3Client, estat_values
+
+
+class TestS3Preview:
+    """preview_s3_objectのテストクラス"""
+
+    def test_json_with_record_count_metadata(self, s3_client):
+        """メタデータがある場合は先頭部分のみ読み込む"""
+        records = estat_values(20000)
+        body = json.dumps(records, ensure_ascii=False, indent=2).encode("utf-8")
+        s3_client.put_object("bucket", "raw/a.json", body, Metadata=record_count_metadata(len(records)))
+
+        preview = preview_s3_object(s3_client, "bucket", "raw/a.json")
+
+        assert preview["record_count"] == 20000
+        assert preview["record_count_source"] == "object_metadata"
+        assert preview["sample"] == records[:3]
+        assert s3_client.bytes_served < len(body) / 10
+
+    def test_json_without_metadata_falls_back_to_full_read(self, s3_client):
+        """メタデータが無く小さいオブジェクトは全体を読み込んで数える"""
+        records = estat_values(10)
+        s3_client.put_object("bucket", "raw/a.json", json.dumps(records).encode("utf-8"))
+
+        preview = preview_s3_object(s3_client, "bucket", "raw/a.json")
+
+        assert preview["record_count"] == 10
+        assert preview["record_count_source"] == "full_read"
+        assert preview["sample"] == records[:3]
+
+    def test_json_without_metadata_over_limit(self, s3_client):
+        """上限を超える場合はレコード数を返さない"""
+        records = estat_values(5000)
+        body = json.dumps(records).encode("utf-8")
+        s3_client.put_object("bucket", "raw/a.json", body)
+
+        preview = preview_s3_object(s3_client, "bucket", "raw/a.json", full_read_limit=1024)
+
+        assert preview["record_count"] is None
+        assert preview["sample"] == records[:3]
+        assert s3_client.bytes_served < len(body)
+
+    def test_estat_api_response(self, s3_client):
+        """e-Stat APIレスポンス形式のVALUE配列からサンプルを取得"""
+        records = estat_values(5000)
+        data = {"GET_STATS_DATA": {"STATISTICAL_DATA": {"DATA_INF": {"NOTE": [], "VALUE": records}}}}
+        s3_client.put_object("bucket", "raw/data/a.json", json.dumps(data).encode("utf-8"),
+                             Metadata=record_count_metadata(len(records)))
+
+        preview = preview_s3_object(s3_client, "bucket", "raw/data/a.json", sample_size=2)
+
+        assert preview["sample"] == records[:2]
+        assert preview["record_count"] == 5000
+
+    def test_ndjson(self, s3_client):
+        """NDJSONは先頭行からサンプルを取得"""
+        records = estat_values(100)
+        body = "\n".join(json.dumps(r) for r in records).encode("utf-8")
+        s3_client.put_object("bucket", "raw/a.ndjson", body)
+
+        preview = preview_s3_object(s3_client, "bucket", "raw/a.ndjson")
+
+        assert preview["format"] == "ndjson"
+        assert preview["record_count"] == 100
+        assert preview["sample"] == records[:3]
+
+    def test_parquet_footer(self, s3_client):
+        """Parquetはフッターから行数、先頭行グループからサンプルを取得"""
+        table = pa.table({"year": list(range(100000)), "value": [float(i) for i in range(100000)]})
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, row_group_size=10000)
+        body = buffer.getvalue()
+        s3_client.put_object("bucket", "parquet/a.parquet", body)
+
+        preview = preview_s3_object(s3_client, "bucket", "parquet/a.parquet")
+
+        assert preview["format"] == "parquet"
+        assert preview["record_count"] == 100000
+        assert preview["record_count_source"] == "parquet_footer"
+        assert preview["sample"] == [{"year": 0, "value": 0.0}, {"year": 1, "value": 1.0},
+                                     {"year": 2, "value": 2.0}]
+        assert s3_client.bytes_served < len(body)
+
+    def test_empty_json(self, s3_client):
+        """空オブジェクト"""
+        s3_client.put_object("bucket", "raw/empty.json", b"")
+        preview = preview_s3_object(s3_client, "bucket", "raw/empty.json")
+        assert preview["record_count"] == 0
+        assert preview["sample"] == []
+
+    @pytest.mark.parametrize("key, body", [
+        ("raw/a.json", json.dumps({"NOTE": "x" * 1024 * 1024}).encode("utf-8")),
+        ("raw/a.ndjson", json.dumps({"NOTE": "x" * 1024 * 1024}).encode("utf-8") + b"\n{}"),
+    ], ids=["json", "ndjson"])
+    def test_sample_read_is_capped(self, s3_client, monkeypatch, key, body):
+        """サンプルが見つからない場合も読み込みは MAX_SAMPLE_RANGE_BYTES までに収まる"""
+        monkeypatch.setattr(s3_preview, "MAX_SAMPLE_RANGE_BYTES", 300 * 1024)
+        s3_client.put_object("bucket", key, body, Metadata=record_count_metadata(1))
+
+        preview = preview_s3_object(s3_client, "bucket", key)
+
+        assert preview["bytes_read"] <= s3_preview.MAX_SAMPLE_RANGE_BYTES
+        assert s3_client.bytes_served <= s3_preview.MAX_SAMPLE_RANGE_BYTES
+
+
+class TestS3RangeFile:
+    """S3RangeFileのテストクラス"""
+
+    def test_seek_and_read(self):
+        client = FakeS3Client()
+        client.put_object("bucket", "k", bytes(range(256)))
+        f = S3RangeFile(client, "bucket", "k", 256, block_size=16)
+
+        f.seek(-4, io.SEEK_END)
+        assert f.read() == bytes([252, 253, 254, 255])
+        f.seek(10)
+        assert f.read(3) == bytes([10, 11, 12])
+        assert f.tell() == 13
+
+    def test_detect_format(self):
+        assert detect_format("a/b.parquet") == "parquet"
+        assert detect_format("a/b.jsonl") == "ndjson"
+        assert detect_format("a/b.json") == "json"
@@ -470,3 +470,94 @@ class TestCategoryLabels:
         
         label = mapper._get_label("99000", category_labels, "area")
         assert label == ""
+
+
+class TestBatchMapping:
+    """バッチマッピングのテスト"""
+    
+    RECORDS = [
+        {"@id": "0003448237", "@area": "01000", "@cat01": "001", "@cat02": "A", "@cat03": "X",
+         "@time": "2020Q1", "@unit": "人", "$": "1,234"},
+        {"@id": "0003448237", "@area": "13000", "@cat01": "002", "@cat02": "B", "@cat03": "Y",
+         "@time": "2021-03", "@unit": "人", "$": "-"},
+        {"@id": "0003448237", "@area": "13000", "@cat01": "002",
+         "@time": "202104", "$": 56},
+        {"@id": "0003448237", "@time": "", "$": ""}
+    ]
+    
+    @pytest.mark.parametrize("domain", list(DOMAIN_SCHEMAS.keys()))
+    def test_map_batch_matches_record_mapping(self, domain):
+        """map_batchはレコード単位のマッピングと同じ結果を返す"""
+        mapper = SchemaMapper()
+        category_labels = {"area": {"01000": "北海道"}}
+        
+        table = mapper.map_batch(self.RECORDS, domain, "test_dataset", category_labels)
+        
+        for row, record in zip(table.to_pylist(), self.RECORDS):
+            expected = mapper.map_estat_to_iceberg(record, domain, "test_dataset", category_labels)
+            row.pop("updated_at")
+            expected.pop("updated_at")
+            assert row == expected
+    
+    def test_map_batch_schema(self):
+        """出力列の順序と型はドメインスキーマに従う"""
+        import pyarrow as pa
+        
+        mapper = SchemaMapper()
+        table = mapper.map_batch(self.RECORDS, "labor")
+        
+        expected_names = [col["name"] for col in DOMAIN_SCHEMAS["labor"]["columns"]]
+        assert table.column_names == expected_names
+        assert table.schema.field("year").type == pa.int32()
+        assert table.schema.field("month").type == pa.int32()
+        assert table.schema.field("value").type == pa.float64()
+        assert table.schema.field("updated_at").type == pa.timestamp("us")
+        # dataset_id未指定時は@idを使用
+        assert table.column("dataset_id").to_pylist() == ["0003448237"] * 4
+    
+    def test_map_batch_from_arrow_table(self):
+        """pyarrow Tableを入力にできる"""
+        import pyarrow as pa
+        
+        mapper = SchemaMapper()
+        source = pa.table({
+            "@area": ["01000", "13000"],
+            "@time": ["2020", "2021"],
+            "$": ["10", "20"]
+        })
+        
+        table = mapper.map_batch(source, "generic", "ds")
+        
+        assert table.column("year").to_pylist() == [2020, 2021]
+        assert table.column("value").to_pylist() == [10.0, 20.0]
+        assert table.column("category").to_pylist() == ["", ""]
+    
+    def test_map_batch_empty(self):
+        """空のバッチ"""
+        mapper = SchemaMapper()
+        table = mapper.map_batch([], "population", "ds")
+        
+        assert table.num_rows == 0
+        assert len(table.column_names) == len(DOMAIN_SCHEMAS["population"]["columns"])
+
+    def test_map_batch_values_match_parse_value(self):
+        """値の変換はレコード単位の_parse_valueと同じ規則に従う"""
+        import math
+
+        mapper = SchemaMapper()
+        values = ["nan", "inf", "-Infinity", "１２３", "1_000", " 1,234.5 ", "1e3", ".5",
+                  "-", "***", "x", "", None, 42, "nan", "１２３"]
+
+        table = mapper.map_batch([{"@time": "2020", "$": value} for value in values], "generic", "ds")
+
+        for actual, value in zip(table.column("value").to_pylist(), values):
+            expected = mapper._parse_value(value)
+            assert actual == expected or (math.isnan(actual) and math.isnan(expected)), value
+
+    def test_column_plan_is_compiled_once(self):
+        """列プランはドメインごとに1回だけ作成される"""
+        mapper = SchemaMapper()
+        
+        plan = mapper.get_column_plan("economy")
+        assert mapper.get_column_plan("economy") is plan
+        assert mapper.get_column_plan("unknown") is mapper.get_column_plan("generic")
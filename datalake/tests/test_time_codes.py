@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+時間コード解析のテスト
+
+parse_time_code・時間ディメンションの機能をテスト
+"""
+
+import pyarrow as pa
+import pytest
+from datalake.time_codes import parse_time_code, build_time_dimension, expand_time_columns
+
+
+class TestParseTimeCode:
+    """parse_time_codeのテストクラス"""
+
+    @pytest.mark.parametrize("code, expected", [
+        ("2020000000", (2020, 0, 0, 2020)),  # 暦年
+        ("2020100000", (2020, 0, 0, 2020)),  # 年度
+        ("2020000101", (2020, 1, 1, 2019)),  # 1月
+        ("2020001010", (2020, 4, 10, 2020)),  # 10月
+        ("2020000103", (2020, 1, 0, 2019)),  # 1～3月期
+        ("2020000406", (2020, 2, 0, 2020)),  # 4～6月期
+        ("2020000106", (2020, 0, 0, 2019)),  # 上半期
+    ])
+    def test_estat_codes(self, code, expected):
+        assert parse_time_code(code) == expected
+
+    @pytest.mark.parametrize("code, expected", [
+        ("2020", (2020, 0, 0, 2020)),
+        ("2020Q1", (2020, 1, 0, 2019)),
+        ("2021Q4", (2021, 4, 0, 2021)),
+        ("2020-03", (2020, 0, 3, 2019)),
+        ("202012", (2020, 0, 12, 2020)),
+        ("20200115", (2020, 0, 1, 2019)),
+        ("", (2020, 0, 0, 2020)),
+        ("invalid", (2020, 0, 0, 2020)),
+    ])
+    def test_legacy_formats(self, code, expected):
+        assert parse_time_code(code) == expected
+
+    def test_none(self):
+        assert parse_time_code(None) == (2020, 0, 0, 2020)
+
+    def test_cached(self):
+        parse_time_code.cache_clear()
+        parse_time_code("2020000101")
+        parse_time_code("2020000101")
+        assert parse_time_code.cache_info().hits == 1
+
+
+class TestTimeDimension:
+    """時間ディメンションのテストクラス"""
+
+    def test_build_time_dimension(self):
+        dimension = build_time_dimension(["2020000000", "2020000303"])
+
+        assert dimension.column_names == ["time_code", "year", "quarter", "month", "fiscal_year"]
+        assert dimension.column("month").to_pylist() == [0, 3]
+        assert dimension.column("fiscal_year").to_pylist() == [2020, 2019]
+
+    def test_expand_time_columns(self):
+        codes = pa.array(["2020000101", "2021000000", "2020000101", None])
+        columns = expand_time_columns(codes)
+
+        assert columns["year"].to_pylist() == [2020, 2021, 2020, 2020]
+        assert columns["month"].to_pylist() == [1, 0, 1, 0]
+        assert columns["quarter"].to_pylist() == [1, 0, 1, 0]
+        assert columns["fiscal_year"].type == pa.int32()
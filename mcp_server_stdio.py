@@ -85,7 +85,10 @@ TOOLS = {
         "parameters": {
             "s3_json_path": {"type": "string", "required": True},
             "data_type": {"type": "string", "required": True},
-            "output_prefix": {"type": "string", "required": False}
+            "output_prefix": {"type": "string", "required": False},
+            "convert_to_japanese": {"type": "boolean", "default": False},
+            "partitioned": {"type": "boolean", "default": True},
+            "max_rows_per_file": {"type": "integer", "required": False}
         }
     },
     "load_to_iceberg": {
@@ -103,7 +106,29 @@ TOOLS = {
         "parameters": {
             "table_name": {"type": "string", "required": True},
             "analysis_type": {"type": "string", "default": "basic"},
-            "custom_query": {"type": "string", "required": False}
+            "custom_query": {"type": "string", "required": False},
+            "use_profiles": {"type": "boolean", "default": True}
+        }
+    },
+    "get_athena_query_results": {
+        "handler": lambda **kwargs: estat_server.get_athena_query_results(**kwargs),
+        "description": "実行済みのAthenaクエリの結果をページ単位で取得（next_tokenで続きを取得）",
+        "parameters": {
+            "query_execution_id": {"type": "string", "required": True},
+            "next_token": {"type": "string", "required": False},
+            "page_size": {"type": "integer", "default": 1000}
+        }
+    },
+    "export_athena_results": {
+        "handler": lambda **kwargs: estat_server.export_athena_results(**kwargs),
+        "description": "Athenaクエリの結果をS3から直接読み込み、CSV / Arrow IPC / Parquetファイルとしてエクスポート",
+        "parameters": {
+            "query": {"type": "string", "required": False},
+            "query_execution_id": {"type": "string", "required": False},
+            "export_format": {"type": "string", "enum": ["csv", "arrow", "feather", "parquet"], "default": "parquet"},
+            "output_filename": {"type": "string", "required": False},
+            "use_unload": {"type": "boolean", "default": True},
+            "compression": {"type": "string", "enum": ["lz4", "zstd", "uncompressed"], "required": False}
         }
     },
     "save_dataset_as_csv": {
@@ -113,7 +138,11 @@ TOOLS = {
             "dataset_id": {"type": "string", "required": True},
             "s3_json_path": {"type": "string", "required": False},
             "local_json_path": {"type": "string", "required": False},
-            "output_filename": {"type": "string", "required": False}
+            "output_filename": {"type": "string", "required": False},
+            "convert_to_japanese": {"type": "boolean", "default": False},
+            "rows_per_file": {"type": "integer", "required": False},
+            "export_format": {"type": "string", "enum": ["csv", "arrow", "feather", "parquet"], "default": "csv"},
+            "compression": {"type": "string", "enum": ["lz4", "zstd", "uncompressed"], "required": False}
         }
     },
     "save_metadata_as_csv": {
@@ -126,10 +155,12 @@ TOOLS = {
     },
     "download_csv_from_s3": {
         "handler": lambda **kwargs: estat_server.download_csv_from_s3(**kwargs),
-        "description": "S3に保存されたCSVファイルをローカルにダウンロード",
+        "description": "S3に保存されたCSV / Arrow IPC / Parquetファイルをローカルにダウンロード（export_formatで形式変換）",
         "parameters": {
             "s3_path": {"type": "string", "required": True},
-            "local_path": {"type": "string", "required": False}
+            "local_path": {"type": "string", "required": False},
+            "export_format": {"type": "string", "enum": ["csv", "arrow", "feather", "parquet"], "required": False},
+            "compression": {"type": "string", "enum": ["lz4", "zstd", "uncompressed"], "required": False}
         }
     }
 }
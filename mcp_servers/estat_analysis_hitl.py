@@ -793,8 +793,10 @@ class EStatHITLServer:
         
         print(f"   📅 Using time category '{time_category}' with {len(time_values)} periods")
         
-        # 年度別に分割取得
+        # 年度別に分割取得（重複はチャンクごとに除去し、キーはフィンガープリントのみ保持）
         all_chunked_records = []
+        raw_record_count = 0
+        detector = self._create_duplicate_detector()
         successful_chunks = 0
         failed_chunks = 0
         
@@ -842,6 +844,9 @@ class EStatHITLServer:
                     chunk_values = [chunk_values]
                 
                 if chunk_values:
+                    raw_record_count += len(chunk_values)
+                    if detector is not None:
+                        chunk_values = detector.filter_batch(chunk_values)
                     all_chunked_records.extend(chunk_values)
                     successful_chunks += 1
                     print(f"   ✅ Year {year_num}: {len(chunk_values)} records")
@@ -874,15 +879,21 @@ class EStatHITLServer:
                 
                 continue
         
+        if detector is not None:
+            detector.close()
+        
         # 重複除去
         if all_chunked_records:
-            print(f"   🔄 Deduplicating chunked data...")
-            unique_chunked_records = self._deduplicate_records(all_chunked_records)
+            if detector is None:
+                print(f"   🔄 Deduplicating chunked data...")
+                unique_chunked_records = self._deduplicate_records(all_chunked_records)
+            else:
+                unique_chunked_records = all_chunked_records
             
             print(f"   📊 Chunked retrieval summary:")
             print(f"      - Successful chunks: {successful_chunks}")
             print(f"      - Failed chunks: {failed_chunks}")
-            print(f"      - Raw records: {len(all_chunked_records):,}")
+            print(f"      - Raw records: {raw_record_count:,}")
             print(f"      - Unique records: {len(unique_chunked_records):,}")
             print(f"      - Completeness: {len(unique_chunked_records)/expected_total*100:.1f}%")
             
@@ -890,6 +901,27 @@ class EStatHITLServer:
         
         return []
     
+    def _create_duplicate_detector(self):
+        """
+        値フィールド（$）以外の全属性をキーとする重複検出器を作成
+        
+        Returns:
+            DuplicateDetector（numpy/pyarrowが無い環境ではNone）
+        """
+        try:
+            import sys
+            from pathlib import Path
+            
+            # プロジェクトルートをパスに追加
+            project_root = Path(__file__).parent.parent
+            if str(project_root) not in sys.path:
+                sys.path.insert(0, str(project_root))
+            
+            from datalake.duplicate_detector import DuplicateDetector
+            return DuplicateDetector(exclude_columns=['$'])
+        except ImportError:
+            return None
+    
     def _deduplicate_records(self, records: list) -> list:
         """
         レコードの重複を除去
@@ -903,6 +935,11 @@ class EStatHITLServer:
         if not records:
             return records
         
+        detector = self._create_duplicate_detector()
+        if detector is not None:
+            with detector:
+                return detector.filter_batch([r for r in records if isinstance(r, dict)])
+        
         # レコードを一意のキーでグループ化
         seen_keys = set()
         unique_records = []
@@ -17,6 +17,15 @@ from .utils.error_handler import format_error_response, EStatError, AWSError, Da
 from .utils.retry import retry_with_backoff, RetryableError
 from .utils.logger import setup_logger, log_tool_call, log_tool_result
 from .utils.response_formatter import format_success_response, format_dataset_info
+from .utils.s3_cache import S3ObjectCache
+from .utils.csv_export import (
+    export_records_to_s3,
+    format_for_key,
+    get_export_format,
+    normalize_export_format,
+    replace_extension,
+    EXPORT_FORMATS
+)
 
 # 環境変数
 ESTAT_APP_ID = os.environ.get('ESTAT_APP_ID', '320dd2fbff6974743e3f95505c9f346650ab635e')
@@ -26,6 +35,20 @@ AWS_REGION = os.environ.get('AWS_REGION', 'ap-northeast-1')
 # 定数
 LARGE_DATASET_THRESHOLD = 100000  # 10万件
 
+# Icebergテーブル・ステージングテーブルの列定義
+ICEBERG_COLUMNS = [
+    ("stats_data_id", "STRING"),
+    ("year", "INT"),
+    ("region_code", "STRING"),
+    ("category", "STRING"),
+    ("value", "DOUBLE"),
+    ("unit", "STRING"),
+    ("updated_at", "TIMESTAMP"),
+]
+
+# "$path" のIN条件で指定するファイル数の上限（超える場合はプレフィックスで絞り込む）
+MAX_LOAD_PATHS = 1000
+
 # ロガー設定
 logger = setup_logger(__name__, os.environ.get('LOG_LEVEL', 'INFO'))
 
@@ -60,6 +83,21 @@ class EStatAWSServer:
             self.s3_client = None
             self.athena_client = None
             logger.error(f"Failed to initialize AWS clients: {e}")
+        
+        # S3読み込み用のローカルディスクキャッシュ
+        self.s3_cache = S3ObjectCache(self.s3_client) if self.s3_client else None
+        
+        # 統計表IDごとの和名ラベルインデックス
+        self.label_indexes: Dict[str, Dict[str, Any]] = {}
+        
+        # Athenaクエリの非同期実行（初回使用時に作成）
+        self.athena_executor = None
+        
+        # テーブルのバージョン取得用のGlueクライアント（初回使用時に作成）
+        self.glue_client = None
+        
+        # 存在を確認済みのAthena出力先・データベース・テーブル（投入ごとの確認を省く）
+        self.ready_resources = set()
     
     # ========================================
     # ツール1: search_estat_data
@@ -600,6 +638,96 @@ class EStatAWSServer:
         else:
             return ''
     
+    async def _get_label_index(
+        self,
+        dataset_id: str,
+        response: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        和名ラベルインデックスを取得
+        
+        レスポンスにCLASS_INFが含まれていればそれを使い、無ければgetMetaInfoを呼び出します。
+        結果は統計表IDごとにキャッシュします。
+        
+        Args:
+            dataset_id: データセットID
+            response: getStatsData / getMetaInfo のレスポンス（オプション）
+        
+        Returns:
+            ラベルインデックス（取得できない場合は空の辞書）
+        """
+        if dataset_id in self.label_indexes:
+            return self.label_indexes[dataset_id]
+        
+        from .utils.labels import extract_class_inf, build_label_index
+        
+        class_inf = extract_class_inf(response)
+        if not class_inf:
+            try:
+                meta_data = await self._call_estat_api(
+                    "getMetaInfo", {"appId": self.app_id, "statsDataId": dataset_id}
+                )
+                class_inf = extract_class_inf(meta_data)
+            except Exception as e:
+                logger.warning(f"Failed to get labels for {dataset_id}: {e}")
+                return {}
+        
+        label_index = build_label_index(class_inf)
+        if label_index:
+            self.label_indexes[dataset_id] = label_index
+        return label_index
+    
+    async def _label_sample_data(
+        self,
+        dataset_id: str,
+        sample_data: List[Any],
+        response: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        サンプルデータに和名ラベルを付与（pyarrowが無い場合はそのまま返す）
+        
+        Args:
+            dataset_id: データセットID
+            sample_data: VALUEレコードのサンプル
+            response: getStatsData / getMetaInfo のレスポンス（オプション）
+        
+        Returns:
+            ラベルを付与したサンプルデータ
+        """
+        try:
+            from .utils.labels import label_records
+        except ImportError:
+            logger.warning("pyarrow not available, skipping label conversion")
+            return sample_data
+        
+        return label_records(sample_data, await self._get_label_index(dataset_id, response))
+    
+    async def _get_label_maps(
+        self,
+        dataset_id: str,
+        response: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        CSV出力用に次元ごとの コード -> 和名ラベル 辞書を取得（pyarrowが無い場合は空の辞書）
+        
+        Args:
+            dataset_id: データセットID
+            response: getStatsData / getMetaInfo のレスポンス（オプション）
+        
+        Returns:
+            次元IDをキーとする コード -> ラベル の辞書
+        """
+        try:
+            label_index = await self._get_label_index(dataset_id, response)
+        except ImportError:
+            logger.warning("pyarrow not available, skipping label conversion")
+            return {}
+        
+        return {
+            dimension: dict(zip(codes.to_pylist(), labels.to_pylist()))
+            for dimension, (codes, labels) in label_index.items()
+        }
+    
     async def _fetch_single_request(
         self,
         dataset_id: str,
@@ -645,7 +773,8 @@ class EStatAWSServer:
                         Bucket=S3_BUCKET,
                         Key=s3_key,
                         Body=json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
-                        ContentType='application/json'
+                        ContentType='application/json',
+                        Metadata={'record-count': str(len(value_list))}
                     )
                     s3_location = f"s3://{S3_BUCKET}/{s3_key}"
                     logger.info(f"Successfully saved to: {s3_location}")
@@ -658,6 +787,8 @@ class EStatAWSServer:
                 s3_location = "S3 client not available"
             
             sample_data = value_list[:5] if len(value_list) > 5 else value_list
+            if convert_to_japanese:
+                sample_data = await self._label_sample_data(dataset_id, sample_data, data)
             
             logger.info(f"Fetched {records_fetched:,} records in {processing_time:.1f}s")
             
@@ -776,7 +907,8 @@ class EStatAWSServer:
                         Bucket=S3_BUCKET,
                         Key=s3_key,
                         Body=json.dumps(chunk_data, ensure_ascii=False, indent=2).encode('utf-8'),
-                        ContentType='application/json'
+                        ContentType='application/json',
+                        Metadata={'record-count': str(len(chunk_values))}
                     )
                     s3_location = f"s3://{S3_BUCKET}/{s3_key}"
                     logger.info(f"Saved chunk 1 to: {s3_location}")
@@ -787,6 +919,8 @@ class EStatAWSServer:
             log_tool_result(logger, "fetch_large_dataset_complete", True, processing_time)
             
             sample_data = chunk_values[:5] if len(chunk_values) > 5 else chunk_values
+            if convert_to_japanese:
+                sample_data = await self._label_sample_data(dataset_id, sample_data, meta_data)
             
             return {
                 "success": True,
@@ -981,7 +1115,8 @@ class EStatAWSServer:
                         Bucket=S3_BUCKET,
                         Key=s3_key,
                         Body=json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
-                        ContentType='application/json'
+                        ContentType='application/json',
+                        Metadata={'record-count': str(len(value_list))}
                     )
                     s3_location = f"s3://{S3_BUCKET}/{s3_key}"
                     logger.info(f"Saved to: {s3_location}")
@@ -989,6 +1124,8 @@ class EStatAWSServer:
                     logger.warning(f"S3 save failed: {e}")
             
             sample_data = value_list[:5] if len(value_list) > 5 else value_list
+            if convert_to_japanese:
+                sample_data = await self._label_sample_data(dataset_id, sample_data, meta_data)
             
             log_tool_result(logger, "fetch_dataset_filtered", True, processing_time)
             
@@ -1024,7 +1161,10 @@ class EStatAWSServer:
         self,
         s3_json_path: str,
         data_type: str,
-        output_prefix: Optional[str] = None
+        output_prefix: Optional[str] = None,
+        convert_to_japanese: bool = False,
+        partitioned: bool = True,
+        max_rows_per_file: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         JSONデータをParquet形式に変換してS3に保存
@@ -1033,6 +1173,9 @@ class EStatAWSServer:
             s3_json_path: S3上のJSONファイルパス
             data_type: データ種別
             output_prefix: 出力先プレフィックス（オプション）
+            convert_to_japanese: コード列に和名ラベル列（<列名>_name）を追加するか
+            partitioned: year= のHiveパーティション形式で保存するか（既存の出力は置き換える）
+            max_rows_per_file: 1ファイルあたりの最大行数（オプション）
         
         Returns:
             変換結果
@@ -1044,10 +1187,10 @@ class EStatAWSServer:
         })
         
         try:
-            import pandas as pd
-            import pyarrow as pa
-            import pyarrow.parquet as pq
-            from io import BytesIO
+            from .utils.columnar import build_value_table
+            from .utils.parquet_writer import (
+                DEFAULT_PARTITION_BY, DEFAULT_MAX_ROWS_PER_FILE, write_partitioned_to_s3, write_table_bytes
+            )
             
             if not self.s3_client:
                 return {"success": False, "error": "S3 client not available"}
@@ -1064,8 +1207,7 @@ class EStatAWSServer:
             logger.info(f"Reading JSON from s3://{bucket}/{key}")
             
             # JSONデータを読み込み
-            response = self.s3_client.get_object(Bucket=bucket, Key=key)
-            data = json.loads(response['Body'].read())
+            data = self.s3_cache.read_json(bucket, key)
             
             # データ形式を判定
             # 形式1: E-stat API標準形式（GET_STATS_DATA構造）
@@ -1089,59 +1231,16 @@ class EStatAWSServer:
             if isinstance(values, dict):
                 values = [values]
             
-            # DataFrameに変換
-            records = []
+            # Arrow列を直接構築（レコード単位のループ・DataFrameを経由しない）
             dataset_id = key.split('/')[-1].split('_')[0]
+            label_index = None
+            if convert_to_japanese:
+                label_index = await self._get_label_index(dataset_id, data)
+            table = build_value_table(values, data_type, dataset_id, label_index=label_index)
+            record_count = table.num_rows
+            del data, values
             
-            for value in values:
-                # 辞書でない場合はスキップ
-                if not isinstance(value, dict):
-                    logger.warning(f"Skipping non-dict value: {type(value)}")
-                    continue
-                
-                # 値を取得（'-'や空文字の場合はNoneに変換）
-                raw_value = value.get('$', '0')
-                try:
-                    numeric_value = float(raw_value) if raw_value and raw_value != '-' else None
-                except (ValueError, TypeError):
-                    numeric_value = None
-                
-                record = {
-                    'stats_data_id': dataset_id,
-                    'value': numeric_value,
-                    'unit': value.get('@unit', ''),
-                    'updated_at': datetime.now()
-                }
-                
-                # カテゴリ別の追加フィールド
-                if data_type == 'population':
-                    record['year'] = int(value.get('@time', '2020'))
-                    record['region_code'] = value.get('@cat01', '')
-                    record['region_name'] = ''
-                    record['category'] = value.get('@cat02', '')
-                elif data_type == 'economy':
-                    record['year'] = int(value.get('@time', '2020'))
-                    record['quarter'] = 1
-                    record['region_code'] = value.get('@area', '')
-                    record['indicator'] = value.get('@cat01', '')
-                elif data_type == 'education':
-                    record['year'] = int(value.get('@time', '2020'))
-                    record['region_code'] = value.get('@area', '')
-                    record['school_type'] = value.get('@cat01', '')
-                    record['metric'] = value.get('@cat02', '')
-                else:
-                    # 汎用フィールド
-                    record['year'] = int(value.get('@time', '2020'))
-                    record['region_code'] = value.get('@area', '')
-                    record['category'] = value.get('@cat01', '')
-                
-                records.append(record)
-            
-            logger.info(f"Converting {len(records)} records to DataFrame")
-            df = pd.DataFrame(records)
-            
-            # Parquetに変換
-            table = pa.Table.from_pandas(df)
+            logger.info(f"Built Arrow table with {record_count} records")
             
             # 出力パスを決定
             if output_prefix:
@@ -1150,31 +1249,49 @@ class EStatAWSServer:
                 parquet_key = key.replace('raw/data/', 'processed/').replace('.json', '.parquet')
             
             # S3に保存
-            buffer = BytesIO()
-            pq.write_table(table, buffer)
-            buffer.seek(0)
+            write_result = None
+            if partitioned:
+                # 拡張子を除いたパスをプレフィックスとして year= に分割
+                # 出力先は入力から決まるため、再実行時は書き込み後に前回の残りのファイルを削除する
+                prefix = parquet_key[:-len('.parquet')] if parquet_key.endswith('.parquet') else parquet_key
+                write_result = write_partitioned_to_s3(
+                    self.s3_client, table, bucket, prefix,
+                    partition_by=DEFAULT_PARTITION_BY,
+                    max_rows_per_file=max_rows_per_file or DEFAULT_MAX_ROWS_PER_FILE,
+                    overwrite=True
+                )
+                s3_parquet_path = write_result["output_path"]
+            else:
+                self.s3_client.put_object(
+                    Bucket=bucket,
+                    Key=parquet_key,
+                    Body=write_table_bytes(table),
+                    ContentType='application/octet-stream'
+                )
+                s3_parquet_path = f"s3://{bucket}/{parquet_key}"
             
-            self.s3_client.put_object(
-                Bucket=bucket,
-                Key=parquet_key,
-                Body=buffer.getvalue(),
-                ContentType='application/octet-stream'
+            # 列プロファイルのサイドカーを保存（基本分析をAthenaを使わずに回答するため）
+            profile_path = self._write_profile(
+                table, bucket, prefix if partitioned else parquet_key,
+                dataset_id=dataset_id, data_type=data_type, source_path=s3_parquet_path
             )
             
-            s3_parquet_path = f"s3://{bucket}/{parquet_key}"
-            
             processing_time = (datetime.now() - start_time).total_seconds()
             log_tool_result(logger, "transform_to_parquet", True, processing_time)
             
-            logger.info(f"Converted {len(records)} records to Parquet: {s3_parquet_path}")
+            logger.info(f"Converted {record_count} records to Parquet: {s3_parquet_path}")
             
             return {
                 "success": True,
                 "source_path": s3_json_path,
                 "target_path": s3_parquet_path,
-                "records_processed": len(records),
+                "records_processed": record_count,
                 "data_type": data_type,
-                "message": f"Successfully converted {len(records)} records to Parquet format"
+                "columns": table.column_names,
+                "partitions": write_result["partitions"] if write_result else None,
+                "file_count": write_result["file_count"] if write_result else 1,
+                "profile_path": profile_path,
+                "message": f"Successfully converted {record_count} records to Parquet format"
             }
             
         except ImportError as e:
@@ -1224,21 +1341,9 @@ class EStatAWSServer:
             # Athenaの出力場所を既存のバケットに設定
             output_location = f's3://{S3_BUCKET}/athena-results/'
             
-            # 出力ディレクトリが存在することを確認
-            try:
-                self.s3_client.put_object(
-                    Bucket=S3_BUCKET,
-                    Key='athena-results/.keep',
-                    Body=b''
-                )
-                logger.info(f"Athena output location ready: {output_location}")
-            except Exception as e:
-                logger.error(f"Failed to create athena-results directory: {e}")
-                return {
-                    "success": False,
-                    "error": f"Failed to setup Athena output location: {str(e)}",
-                    "message": f"S3バケット '{S3_BUCKET}' にathena-resultsディレクトリを作成できませんでした。バケットのアクセス権限を確認してください。"
-                }
+            output_error = self._ensure_athena_output(output_location)
+            if output_error:
+                return output_error
             
             # S3パスを解析
             if s3_parquet_path.startswith('s3://'):
@@ -1251,123 +1356,75 @@ class EStatAWSServer:
             
             logger.info(f"Loading Parquet data to table: {table_name}")
             
-            # 1. データベースの存在確認と作成
-            logger.info(f"Checking database: {database}")
-            try:
-                import boto3
-                glue_client = boto3.client('glue', region_name=AWS_REGION)
-                glue_client.get_database(Name=database)
-                logger.info(f"Database {database} exists")
-            except Exception:
-                logger.info(f"Creating database: {database}")
-                create_db_query = f"CREATE DATABASE IF NOT EXISTS {database}"
-                db_result = await self._execute_athena_query(create_db_query, database="default", output_location=output_location)
-                if not db_result[0]:
-                    return {"success": False, "error": f"Failed to create database: {db_result[1]}"}
+            # 1. 投入するParquetファイルを特定（ディレクトリ内の無関係なファイルは含めない）
+            parquet_paths = self._list_parquet_paths(bucket, parquet_key)
+            if not parquet_paths:
+                return {"success": False, "error": f"No Parquet files found at {s3_parquet_path}"}
             
-            # 2. Icebergテーブル作成（存在しない場合）
-            if create_if_not_exists:
-                logger.info(f"Creating Iceberg table: {table_name}")
-                
-                # Athena Iceberg形式のテーブルとして作成
-                # TBLPROPERTIES で 'table_type'='ICEBERG' を指定
-                create_table_query = f"""
-                CREATE TABLE IF NOT EXISTS {database}.{table_name} (
-                    stats_data_id STRING,
-                    year INT,
-                    region_code STRING,
-                    category STRING,
-                    value DOUBLE,
-                    unit STRING,
-                    updated_at TIMESTAMP
-                )
-                LOCATION 's3://{bucket}/iceberg-tables/{table_name}/'
-                TBLPROPERTIES (
-                    'table_type'='ICEBERG',
-                    'format'='parquet'
-                )
-                """
-                
-                table_result = await self._execute_athena_query(create_table_query, database=database, output_location=output_location)
-                if not table_result[0]:
-                    return {"success": False, "error": f"Failed to create Iceberg table: {table_result[1]}"}
-                
-                logger.info(f"Iceberg table {table_name} created successfully")
-            
-            # 3. 外部テーブルを作成してParquetデータを読み込み
-            external_table = f"{table_name}_temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            logger.info(f"Creating external table: {external_table}")
-            
-            # Parquetファイルのディレクトリを取得
-            parquet_dir = parquet_key.rsplit("/", 1)[0] + "/"
-            
-            create_external_query = f"""
-            CREATE EXTERNAL TABLE IF NOT EXISTS {database}.{external_table} (
-                stats_data_id STRING,
-                year INT,
-                region_code STRING,
-                category STRING,
-                value DOUBLE,
-                unit STRING,
-                updated_at TIMESTAMP
+            # 2. データベース・Icebergテーブル・ステージングテーブルを確認（確認済みの場合は省略）
+            # 投入前にテーブルが無かったかどうかは、列プロファイルの投入履歴の起点になる
+            table_existed = self._table_exists(database, table_name)
+            success, error = await self._ensure_iceberg_table(
+                database, table_name, bucket, create_if_not_exists, output_location
             )
-            STORED AS PARQUET
-            LOCATION 's3://{bucket}/{parquet_dir}'
-            """
-            
-            external_result = await self._execute_athena_query(create_external_query, database=database, output_location=output_location)
-            if not external_result[0]:
-                return {"success": False, "error": f"Failed to create external table: {external_result[1]}"}
-            
-            logger.info(f"External table created")
-            
-            # 4. データをメインテーブルに投入
-            logger.info(f"Inserting data...")
+            if not success:
+                return {"success": False, "error": error}
+            base_version = self._get_table_versions([(database, table_name)])[0]
+            
+            success, staging_table = await self._ensure_staging_table(database, bucket, parquet_key, output_location)
+            if not success:
+                return {"success": False, "error": staging_table}
+            
+            # 3. 対象ファイルだけを "$path" で絞り込んで投入
+            column_list = ", ".join(name for name, _ in ICEBERG_COLUMNS)
+            if len(parquet_paths) <= MAX_LOAD_PATHS:
+                path_filter = '"$path" IN (' + ", ".join(f"'{path}'" for path in parquet_paths) + ")"
+            else:
+                prefix = f"s3://{bucket}/{parquet_key.rstrip('/')}/"
+                path_filter = f"starts_with(\"$path\", '{prefix}') AND \"$path\" LIKE '%.parquet'"
             insert_query = f"""
-            INSERT INTO {database}.{table_name}
-            SELECT * FROM {database}.{external_table}
+            INSERT INTO {database}.{table_name} ({column_list})
+            SELECT {column_list} FROM {database}.{staging_table}
+            WHERE {path_filter}
             """
             
-            insert_result = await self._execute_athena_query(insert_query, database=database, output_location=output_location)
+            logger.info(f"Inserting {len(parquet_paths)} file(s) via {staging_table}")
+            insert_result = await self._get_athena_executor().execute_statement(
+                insert_query, database, output_location
+            )
             if not insert_result[0]:
-                # 外部テーブルを削除してからエラーを返す
-                await self._execute_athena_query(f"DROP TABLE IF EXISTS {database}.{external_table}", database=database, output_location=output_location)
+                # テーブルが外部で削除された可能性があるため、次回は確認し直す
+                self.ready_resources.discard(("table", database, table_name))
+                self.ready_resources.discard(("table", database, staging_table))
                 return {"success": False, "error": f"Failed to insert data: {insert_result[1]}"}
             
-            logger.info(f"Data inserted")
-            
-            # 5. レコード数を確認
-            logger.info(f"Counting records...")
-            count_query = f"SELECT COUNT(*) FROM {database}.{table_name}"
-            count_result = await self._execute_athena_query(count_query, database=database, output_location=output_location)
-            
-            record_count = "不明"
-            if count_result[0] and count_result[1]:
-                try:
-                    if isinstance(count_result[1], list) and len(count_result[1]) > 0:
-                        record_count = count_result[1][0][0] if isinstance(count_result[1][0], list) else count_result[1][0]
-                    else:
-                        record_count = str(count_result[1])
-                except:
-                    record_count = "不明"
+            # 投入行数はクエリの実行統計から取得（テーブル全体の COUNT(*) は行わない）
+            record_count = insert_result[1]["output_rows"]
+            if record_count is None:
+                record_count = "不明"
             
-            # 6. クリーンアップ（外部テーブル）
-            logger.info(f"Cleaning up external table...")
-            drop_query = f"DROP TABLE IF EXISTS {database}.{external_table}"
-            await self._execute_athena_query(drop_query, database=database, output_location=output_location)
+            # 投入したデータの列プロファイルを、投入前後のテーブルバージョンと共に登録
+            table_version = self._get_table_versions([(database, table_name)])[0]
+            profile_registered = self._register_profile(
+                table_name, bucket, parquet_key, table_version, base_version, base_empty=table_existed is False
+            )
             
             processing_time = (datetime.now() - start_time).total_seconds()
             log_tool_result(logger, "load_to_iceberg", True, processing_time)
             
-            logger.info(f"Loaded data to table: {record_count} records")
+            logger.info(f"Loaded data to table: {record_count} records in {processing_time:.1f}s")
             
             return {
                 "success": True,
                 "table_name": table_name,
                 "database": database,
                 "records_loaded": record_count,
+                "files_loaded": len(parquet_paths),
                 "source_path": s3_parquet_path,
                 "table_location": f"s3://{bucket}/iceberg-tables/{table_name}/",
+                "query_execution_id": insert_result[1]["query_execution_id"],
+                "profile_registered": profile_registered,
+                "processing_time_seconds": round(processing_time, 2),
                 "message": f"Successfully loaded data to table {table_name} ({record_count} records)"
             }
             
@@ -1385,15 +1442,20 @@ class EStatAWSServer:
         self,
         table_name: str,
         analysis_type: str = "basic",
-        custom_query: Optional[str] = None
+        custom_query: Optional[str] = None,
+        use_profiles: bool = True
     ) -> Dict[str, Any]:
         """
         Athenaで統計分析を実行
         
+        basic はテーブルの現在の内容に対応する列プロファイルがそろっていれば、
+        Athenaクエリを実行せずにプロファイルを集計して回答します。
+        
         Args:
             table_name: テーブル名
             analysis_type: 分析タイプ（basic/advanced）
             custom_query: カスタムクエリ（オプション）
+            use_profiles: basic で列プロファイルを使うか（Falseの場合は常にAthenaで集計）
         
         Returns:
             分析結果
@@ -1405,165 +1467,97 @@ class EStatAWSServer:
         })
         
         try:
+            database = 'estat_db'
+            
+            # 結果キャッシュのキー（データを投入するとバージョンが変わり、キャッシュは使われなくなる）
+            if custom_query:
+                from .utils.query_cache import table_references
+                # 参照するテーブルを確定できないクエリはキャッシュしない
+                references = table_references(custom_query, database)
+                versions = self._get_table_versions(references) if references is not None else None
+            else:
+                versions = self._get_table_versions([(database, table_name)])
+            
+            if analysis_type == "basic" and not custom_query and use_profiles and self.s3_client:
+                profile = self._load_table_profile(table_name, versions[0])
+                if profile:
+                    from .utils.column_profile import basic_statistics
+                    
+                    processing_time = (datetime.now() - start_time).total_seconds()
+                    log_tool_result(logger, "analyze_with_athena", True, processing_time)
+                    logger.info(f"Answered basic analysis from {profile['profile_count']} profiles")
+                    
+                    return {
+                        "success": True,
+                        "table_name": table_name,
+                        "database": database,
+                        "analysis_type": analysis_type,
+                        "source": "profile",
+                        "profile_count": profile["profile_count"],
+                        "results": basic_statistics(profile),
+                        "message": f"Successfully analyzed table {table_name} from column profiles"
+                    }
+            
             if not self.athena_client:
                 return {"success": False, "error": "Athena client not available"}
             
             if not self.s3_client:
                 return {"success": False, "error": "S3 client not available"}
             
-            database = 'estat_db'
             # Athenaの出力場所を既存のバケットに設定
             output_location = f's3://{S3_BUCKET}/athena-results/'
             
-            # 出力ディレクトリが存在することを確認
-            try:
-                self.s3_client.put_object(
-                    Bucket=S3_BUCKET,
-                    Key='athena-results/.keep',
-                    Body=b''
-                )
-                logger.info(f"Athena output location ready: {output_location}")
-            except Exception as e:
-                logger.error(f"Failed to create athena-results directory: {e}")
-                return {
-                    "success": False,
-                    "error": f"Failed to setup Athena output location: {str(e)}",
-                    "message": f"S3バケット '{S3_BUCKET}' にathena-resultsディレクトリを作成できませんでした。バケットのアクセス権限を確認してください。"
-                }
+            output_error = self._ensure_athena_output(output_location)
+            if output_error:
+                return output_error
             
             results = {}
             
             if custom_query:
                 # カスタムクエリを実行
                 logger.info("Executing custom query")
-                query_result = await self._execute_athena_query(custom_query, database=database, output_location=output_location)
+                # 最初のページだけ返し、続きは get_athena_query_results で取得する
+                page = await self._get_athena_executor().execute_page(
+                    custom_query, database=database, output_location=output_location, versions=versions
+                )
                 results["custom_query"] = {
-                    "success": query_result[0],
-                    "result": query_result[1] if query_result[0] else None,
-                    "error": query_result[1] if not query_result[0] else None
+                    "success": page["success"],
+                    "result": page.get("rows"),
+                    "columns": page.get("columns"),
+                    "query_execution_id": page.get("query_execution_id"),
+                    "next_token": page.get("next_token"),
+                    "error": page.get("error")
                 }
             
             elif analysis_type == "basic":
-                # 基本分析
+                # 基本分析（レコード数・基本統計・年別集計を1回のスキャンで集計）
                 logger.info("Executing basic analysis")
+                from .utils.analysis_queries import basic_analysis_query, split_basic_rows
                 
-                # 1. レコード数
-                count_query = f"SELECT COUNT(*) as total_records FROM {database}.{table_name}"
-                count_result = await self._execute_athena_query(count_query, database=database, output_location=output_location)
-                if count_result[0] and count_result[1]:
-                    try:
-                        results["total_records"] = int(count_result[1][0][0]) if count_result[1] else 0
-                    except:
-                        results["total_records"] = count_result[1]
-                else:
-                    results["total_records"] = None
-                
-                # 2. 基本統計
-                stats_query = f"""
-                SELECT 
-                    COUNT(*) as count,
-                    AVG(value) as avg_value,
-                    MIN(value) as min_value,
-                    MAX(value) as max_value,
-                    SUM(value) as sum_value
-                FROM {database}.{table_name}
-                WHERE value IS NOT NULL
-                """
-                stats_result = await self._execute_athena_query(stats_query, database=database, output_location=output_location)
-                if stats_result[0] and stats_result[1]:
-                    try:
-                        row = stats_result[1][0]
-                        results["statistics"] = {
-                            "count": int(row[0]) if row[0] else 0,
-                            "avg_value": float(row[1]) if row[1] else 0.0,
-                            "min_value": float(row[2]) if row[2] else 0.0,
-                            "max_value": float(row[3]) if row[3] else 0.0,
-                            "sum_value": float(row[4]) if row[4] else 0.0
-                        }
-                    except Exception as e:
-                        logger.warning(f"Failed to parse statistics: {e}")
-                        results["statistics"] = stats_result[1]
-                else:
-                    results["statistics"] = None
-                
-                # 3. 年別集計
-                year_query = f"""
-                SELECT 
-                    year,
-                    COUNT(*) as count,
-                    AVG(value) as avg_value
-                FROM {database}.{table_name}
-                WHERE value IS NOT NULL
-                GROUP BY year
-                ORDER BY year
-                LIMIT 10
-                """
-                year_result = await self._execute_athena_query(year_query, database=database, output_location=output_location)
-                if year_result[0] and year_result[1]:
-                    try:
-                        results["by_year"] = [
-                            {
-                                "year": int(row[0]) if row[0] else 0,
-                                "count": int(row[1]) if row[1] else 0,
-                                "avg_value": float(row[2]) if row[2] else 0.0
-                            }
-                            for row in year_result[1]
-                        ]
-                    except Exception as e:
-                        logger.warning(f"Failed to parse year data: {e}")
-                        results["by_year"] = year_result[1]
+                success, rows = await self._execute_athena_query(
+                    basic_analysis_query(f"{database}.{table_name}"),
+                    database=database, output_location=output_location, versions=versions
+                )
+                if success:
+                    results.update(split_basic_rows(rows))
                 else:
-                    results["by_year"] = None
+                    logger.warning(f"Basic analysis query failed: {rows}")
+                    results.update({"total_records": None, "statistics": None, "by_year": None})
                 
             elif analysis_type == "advanced":
-                # 高度分析
+                # 高度分析（地域別・カテゴリ別・時系列トレンドを1回のスキャンで集計）
                 logger.info("Executing advanced analysis")
+                from .utils.analysis_queries import advanced_analysis_query, split_advanced_rows
                 
-                # 1. 地域別集計
-                region_query = f"""
-                SELECT 
-                    region_code,
-                    COUNT(*) as count,
-                    AVG(value) as avg_value,
-                    SUM(value) as sum_value
-                FROM {database}.{table_name}
-                WHERE value IS NOT NULL
-                GROUP BY region_code
-                ORDER BY sum_value DESC
-                LIMIT 10
-                """
-                region_result = await self._execute_athena_query(region_query, database=database, output_location=output_location)
-                results["by_region"] = region_result[1] if region_result[0] else None
-                
-                # 2. カテゴリ別集計
-                category_query = f"""
-                SELECT 
-                    category,
-                    COUNT(*) as count,
-                    AVG(value) as avg_value
-                FROM {database}.{table_name}
-                WHERE value IS NOT NULL AND category IS NOT NULL
-                GROUP BY category
-                ORDER BY count DESC
-                LIMIT 10
-                """
-                category_result = await self._execute_athena_query(category_query, database=database, output_location=output_location)
-                results["by_category"] = category_result[1] if category_result[0] else None
-                
-                # 3. 時系列トレンド
-                trend_query = f"""
-                SELECT 
-                    year,
-                    AVG(value) as avg_value,
-                    MIN(value) as min_value,
-                    MAX(value) as max_value
-                FROM {database}.{table_name}
-                WHERE value IS NOT NULL
-                GROUP BY year
-                ORDER BY year
-                """
-                trend_result = await self._execute_athena_query(trend_query, database=database, output_location=output_location)
-                results["trend"] = trend_result[1] if trend_result[0] else None
+                success, rows = await self._execute_athena_query(
+                    advanced_analysis_query(f"{database}.{table_name}"),
+                    database=database, output_location=output_location, versions=versions
+                )
+                if success:
+                    results.update(split_advanced_rows(rows))
+                else:
+                    logger.warning(f"Advanced analysis query failed: {rows}")
+                    results.update({"by_region": None, "by_category": None, "trend": None})
             
             processing_time = (datetime.now() - start_time).total_seconds()
             log_tool_result(logger, "analyze_with_athena", True, processing_time)
@@ -1575,6 +1569,7 @@ class EStatAWSServer:
                 "table_name": table_name,
                 "database": database,
                 "analysis_type": analysis_type,
+                "source": "athena",
                 "results": results,
                 "message": f"Successfully analyzed table {table_name}"
             }
@@ -1585,6 +1580,119 @@ class EStatAWSServer:
                 "table_name": table_name
             })
     
+    # ========================================
+    # 列プロファイルヘルパーメソッド
+    # ========================================
+    
+    def _write_profile(self, table, bucket: str, parquet_key: str, **attributes) -> Optional[str]:
+        """
+        Parquet出力の列プロファイルをサイドカーとして保存
+        
+        Args:
+            table: 書き込んだArrowテーブル
+            bucket: S3バケット
+            parquet_key: Parquetファイルのキーまたはパーティション出力のプレフィックス
+            **attributes: プロファイルに含める追加情報
+        
+        Returns:
+            サイドカーのS3パス（失敗した場合はNone）
+        """
+        try:
+            from .utils.column_profile import profile_key_for, profile_table
+            from .utils.parquet_writer import DEFAULT_PARTITION_BY
+            
+            profile = profile_table(table, partition_by=DEFAULT_PARTITION_BY, **attributes)
+            profile_key = profile_key_for(parquet_key)
+            self.s3_client.put_object(
+                Bucket=bucket,
+                Key=profile_key,
+                Body=json.dumps(profile, ensure_ascii=False).encode('utf-8'),
+                ContentType='application/json'
+            )
+            return f"s3://{bucket}/{profile_key}"
+        except Exception as e:
+            # プロファイルは分析の高速化用のため、失敗しても変換自体は成功とする
+            logger.warning(f"Failed to write column profile: {e}")
+            return None
+    
+    def _register_profile(
+        self,
+        table_name: str,
+        bucket: str,
+        parquet_key: str,
+        table_version: Optional[str],
+        base_version: Optional[str],
+        base_empty: bool
+    ) -> bool:
+        """
+        投入したParquetのサイドカーをテーブルのプロファイルとして登録
+        
+        Args:
+            table_name: テーブル名
+            bucket: Parquetのバケット
+            parquet_key: Parquetファイルのキーまたはパーティション出力のプレフィックス
+            table_version: 投入後のテーブルバージョン
+            base_version: 投入前のテーブルバージョン
+            base_empty: 投入前のテーブルが作成直後の空のテーブルだったか
+        
+        Returns:
+            登録できたか（バージョンが分からない場合は登録しない）
+        """
+        from .utils.column_profile import profile_key_for, registered_profile_key, registration_metadata
+        
+        if not table_version or not base_version:
+            logger.info(f"Table version of {table_name} unknown, column profile not registered")
+            return False
+        
+        profile_key = profile_key_for(parquet_key)
+        try:
+            self.s3_client.copy_object(
+                Bucket=S3_BUCKET,
+                Key=registered_profile_key(table_name, table_version),
+                CopySource={"Bucket": bucket, "Key": profile_key},
+                ContentType='application/json',
+                Metadata=registration_metadata(table_version, base_version, base_empty),
+                MetadataDirective='REPLACE'
+            )
+            return True
+        except Exception as e:
+            logger.info(f"No column profile registered for s3://{bucket}/{profile_key}: {e}")
+            return False
+    
+    def _load_table_profile(self, table_name: str, table_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        テーブルの現在の内容に対応する列プロファイルを読み込んで統合
+        
+        Args:
+            table_name: テーブル名
+            table_version: 現在のテーブルバージョン
+        
+        Returns:
+            統合したプロファイル（現在のバージョンまでの投入履歴がそろわない・読み込めない場合はNone）
+        """
+        if not table_version:
+            return None
+        try:
+            from .utils.column_profile import PROFILE_PREFIX, merge_profiles, profile_chain
+            
+            registrations = []
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=f"{PROFILE_PREFIX}/{table_name}/"):
+                for obj in page.get('Contents', []):
+                    response = self.s3_client.get_object(Bucket=S3_BUCKET, Key=obj['Key'])
+                    registrations.append((
+                        response.get('Metadata', {}),
+                        json.loads(response['Body'].read().decode('utf-8'))
+                    ))
+            
+            profiles = profile_chain(registrations, table_version)
+            if profiles is None and registrations:
+                logger.info(f"Column profiles of {table_name} do not cover the current table version")
+            return merge_profiles(profiles) if profiles else None
+        except Exception as e:
+            logger.warning(f"Failed to load column profiles for {table_name}: {e}")
+            return None
+    
     # ========================================
     # Athenaヘルパーメソッド
     # ========================================
@@ -1593,7 +1701,8 @@ class EStatAWSServer:
         self,
         query: str,
         database: str,
-        output_location: str
+        output_location: str,
+        versions: Optional[List[Optional[str]]] = None
     ) -> tuple:
         """
         Athenaクエリを実行
@@ -1602,302 +1711,455 @@ class EStatAWSServer:
             query: SQLクエリ
             database: データベース名
             output_location: 結果の出力先
+            versions: クエリが参照するテーブルのバージョン（指定した場合は結果をキャッシュ）
         
         Returns:
             (success, result/error)
         """
+        # estat-mcp-workgroupを明示的に指定し、ワークグループの出力場所を使用
+        return await self._get_athena_executor().execute(query, database, output_location, versions)
+    
+    def _get_athena_executor(self):
+        """
+        非同期Athenaクエリ実行クラスを取得（同時実行数の枠をサーバー内で共有）
+        
+        Returns:
+            AthenaExecutor
+        """
+        from .utils.athena_executor import AthenaExecutor
+        from .utils.query_cache import QueryResultCache
+        
+        if self.athena_executor is None:
+            self.athena_executor = AthenaExecutor(self.athena_client, cache=QueryResultCache())
+        else:
+            self.athena_executor.athena_client = self.athena_client
+        return self.athena_executor
+    
+    def _get_table_versions(self, tables: List[tuple]) -> List[Optional[str]]:
+        """
+        テーブルのバージョン（Icebergは metadata_location）を取得
+        
+        Args:
+            tables: (database, table) のリスト
+        
+        Returns:
+            バージョンのリスト（取得できないテーブルはNone）
+        """
+        from .utils.query_cache import table_version
+        
+        glue_client = self._get_glue_client()
+        if glue_client is None:
+            logger.warning("Glue client not available, Athena result cache disabled")
+            return [None] * len(tables)
+        
+        return [table_version(glue_client, database, table.lower()) for database, table in tables]
+    
+    def _table_exists(self, database: str, table_name: str) -> Optional[bool]:
+        """
+        Glueカタログにテーブルがあるか
+        
+        Args:
+            database: データベース名
+            table_name: テーブル名
+        
+        Returns:
+            存在するか（確認できない場合はNone）
+        """
+        glue_client = self._get_glue_client()
+        if glue_client is None:
+            return None
         try:
-            import time
-            
-            # クエリを実行（estat-mcp-workgroupを使用）
-            # WorkGroupを明示的に指定することで、正しい出力場所を使用
-            try:
-                response = self.athena_client.start_query_execution(
-                    QueryString=query,
-                    QueryExecutionContext={'Database': database},
-                    WorkGroup='estat-mcp-workgroup'
-                )
-            except Exception as e:
-                logger.error(f"Failed to start query execution: {e}")
-                return (False, f"Failed to start query: {str(e)}")
-            
-            query_execution_id = response['QueryExecutionId']
-            
-            # クエリの完了を待機
-            max_wait = 60  # 最大60秒
-            wait_interval = 2
-            elapsed = 0
-            
-            while elapsed < max_wait:
-                response = self.athena_client.get_query_execution(
-                    QueryExecutionId=query_execution_id
-                )
-                
-                status = response['QueryExecution']['Status']['State']
-                
-                if status == 'SUCCEEDED':
-                    # 結果を取得
-                    result_response = self.athena_client.get_query_results(
-                        QueryExecutionId=query_execution_id
-                    )
-                    
-                    # 結果を解析
-                    rows = result_response['ResultSet']['Rows']
-                    if len(rows) > 1:
-                        # ヘッダーを除く
-                        data_rows = []
-                        for row in rows[1:]:
-                            data_row = [col.get('VarCharValue', '') for col in row['Data']]
-                            data_rows.append(data_row)
-                        return (True, data_rows)
-                    else:
-                        return (True, [])
-                
-                elif status in ['FAILED', 'CANCELLED']:
-                    error_msg = response['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
-                    return (False, error_msg)
-                
-                time.sleep(wait_interval)
-                elapsed += wait_interval
-            
-            return (False, "Query timeout")
-            
+            glue_client.get_table(DatabaseName=database, Name=table_name.lower())
+            return True
+        except glue_client.exceptions.EntityNotFoundException:
+            return False
         except Exception as e:
-            return (False, str(e))
+            logger.debug(f"Failed to check table {database}.{table_name}: {e}")
+            return None
     
-    # ========================================
-    # ツール9: save_dataset_as_csv
-    # ========================================
+    def _get_glue_client(self):
+        """
+        Glueクライアントを取得（初回使用時に作成）
+        
+        Returns:
+            boto3 Glueクライアント（作成できない場合はNone）
+        """
+        if self.glue_client is None:
+            try:
+                import boto3
+                self.glue_client = boto3.client('glue', region_name=AWS_REGION)
+            except Exception as e:
+                logger.warning(f"Failed to create Glue client: {e}")
+                return None
+        return self.glue_client
     
-    async def save_dataset_as_csv(
-        self,
-        dataset_id: str,
-        s3_json_path: Optional[str] = None,
-        local_json_path: Optional[str] = None,
-        output_filename: Optional[str] = None
-    ) -> Dict[str, Any]:
+    def _ensure_athena_output(self, output_location: str) -> Optional[Dict[str, Any]]:
         """
-        取得したデータセットをCSV形式でS3に保存
+        Athenaの出力ディレクトリを用意（プロセス内で1回だけ確認）
         
         Args:
-            dataset_id: データセットID
-            s3_json_path: S3上のJSONファイルパス（オプション）
-            local_json_path: ローカルのJSONファイルパス（オプション）
-            output_filename: 出力ファイル名（オプション）
+            output_location: 出力先のS3 URI
         
         Returns:
-            保存結果
+            失敗した場合のエラーレスポンス（成功した場合はNone）
         """
-        start_time = datetime.now()
-        log_tool_call(logger, "save_dataset_as_csv", {
-            "dataset_id": dataset_id,
-            "s3_json_path": s3_json_path,
-            "local_json_path": local_json_path,
-            "output_filename": output_filename
-        })
+        if ("output", output_location) in self.ready_resources:
+            return None
         
         try:
-            import pandas as pd
-            import io
+            self.s3_client.put_object(
+                Bucket=S3_BUCKET,
+                Key='athena-results/.keep',
+                Body=b''
+            )
+            logger.info(f"Athena output location ready: {output_location}")
+        except Exception as e:
+            logger.error(f"Failed to create athena-results directory: {e}")
+            return {
+                "success": False,
+                "error": f"Failed to setup Athena output location: {str(e)}",
+                "message": f"S3バケット '{S3_BUCKET}' にathena-resultsディレクトリを作成できませんでした。バケットのアクセス権限を確認してください。"
+            }
+        
+        self.ready_resources.add(("output", output_location))
+        return None
+    
+    def _glue_resource_exists(self, database: str, table_name: Optional[str] = None) -> bool:
+        """
+        Glueカタログにデータベース（またはテーブル）があるか
+        
+        Args:
+            database: データベース名
+            table_name: テーブル名（省略時はデータベースを確認）
+        
+        Returns:
+            存在するか（確認できない場合はFalse）
+        """
+        glue_client = self._get_glue_client()
+        if glue_client is None:
+            return False
+        try:
+            if table_name:
+                glue_client.get_table(DatabaseName=database, Name=table_name.lower())
+            else:
+                glue_client.get_database(Name=database)
+            return True
+        except Exception:
+            return False
+    
+    async def _ensure_iceberg_table(
+        self,
+        database: str,
+        table_name: str,
+        bucket: str,
+        create_if_not_exists: bool,
+        output_location: str
+    ) -> tuple:
+        """
+        データベースとIcebergテーブルを用意（確認済みの場合は何もしない）
+        
+        Args:
+            database: データベース名
+            table_name: テーブル名
+            bucket: テーブルデータのバケット
+            create_if_not_exists: テーブルが存在しない場合に作成するか
+            output_location: Athenaの出力先
+        
+        Returns:
+            (success, エラーメッセージ)
+        """
+        if ("database", database) not in self.ready_resources:
+            if not self._glue_resource_exists(database):
+                logger.info(f"Creating database: {database}")
+                db_result = await self._execute_athena_query(
+                    f"CREATE DATABASE IF NOT EXISTS {database}", database="default", output_location=output_location
+                )
+                if not db_result[0]:
+                    return (False, f"Failed to create database: {db_result[1]}")
+            self.ready_resources.add(("database", database))
+        
+        if ("table", database, table_name) in self.ready_resources:
+            return (True, None)
+        
+        if not self._glue_resource_exists(database, table_name):
+            if not create_if_not_exists:
+                return (False, f"Table {database}.{table_name} does not exist")
+            
+            logger.info(f"Creating Iceberg table: {table_name}")
+            columns = ",\n                ".join(f"{name} {column_type}" for name, column_type in ICEBERG_COLUMNS)
+            # Athena Iceberg形式のテーブルとして作成
+            # TBLPROPERTIES で 'table_type'='ICEBERG' を指定
+            create_table_query = f"""
+            CREATE TABLE IF NOT EXISTS {database}.{table_name} (
+                {columns}
+            )
+            LOCATION 's3://{bucket}/iceberg-tables/{table_name}/'
+            TBLPROPERTIES (
+                'table_type'='ICEBERG',
+                'format'='parquet'
+            )
+            """
+            table_result = await self._execute_athena_query(create_table_query, database=database, output_location=output_location)
+            if not table_result[0]:
+                return (False, f"Failed to create Iceberg table: {table_result[1]}")
+        
+        self.ready_resources.add(("table", database, table_name))
+        return (True, None)
+    
+    async def _ensure_staging_table(
+        self,
+        database: str,
+        bucket: str,
+        parquet_key: str,
+        output_location: str
+    ) -> tuple:
+        """
+        Parquetファイルを読むための永続ステージングテーブルを用意
+        
+        ステージングテーブルはバケットとキーの最上位プレフィックス（processed/ など）ごとに1つ作成し、
+        投入ごとの作成・削除は行いません。投入するファイルは INSERT 側で "$path" により絞り込みます。
+        
+        Args:
+            database: データベース名
+            bucket: Parquetのバケット
+            parquet_key: Parquetファイルのキーまたはプレフィックス
+            output_location: Athenaの出力先
+        
+        Returns:
+            (success, ステージングテーブル名 / エラーメッセージ)
+        """
+        import hashlib
+        
+        root = parquet_key.split('/', 1)[0] + '/' if '/' in parquet_key else ''
+        location = f"s3://{bucket}/{root}"
+        staging_table = f"staging_{hashlib.sha1(location.encode('utf-8')).hexdigest()[:12]}"
+        
+        if ("table", database, staging_table) in self.ready_resources:
+            return (True, staging_table)
+        
+        if not self._glue_resource_exists(database, staging_table):
+            logger.info(f"Creating staging table {staging_table} for {location}")
+            columns = ",\n                ".join(f"{name} {column_type}" for name, column_type in ICEBERG_COLUMNS)
+            create_staging_query = f"""
+            CREATE EXTERNAL TABLE IF NOT EXISTS {database}.{staging_table} (
+                {columns}
+            )
+            STORED AS PARQUET
+            LOCATION '{location}'
+            """
+            staging_result = await self._execute_athena_query(create_staging_query, database=database, output_location=output_location)
+            if not staging_result[0]:
+                return (False, f"Failed to create staging table: {staging_result[1]}")
+        
+        self.ready_resources.add(("table", database, staging_table))
+        return (True, staging_table)
+    
+    def _list_parquet_paths(self, bucket: str, parquet_key: str) -> List[str]:
+        """
+        投入対象のParquetファイルのS3 URIを列挙
+        
+        Args:
+            bucket: バケット
+            parquet_key: Parquetファイルのキーまたはパーティション出力のプレフィックス
+        
+        Returns:
+            S3 URIのリスト（_ / . で始まるファイルとParquet以外は除く）
+        """
+        if parquet_key.endswith('.parquet'):
+            return [f"s3://{bucket}/{parquet_key}"]
+        
+        prefix = parquet_key.rstrip('/') + '/'
+        paths = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                name = obj['Key'].rsplit('/', 1)[-1]
+                if name.endswith('.parquet') and not name.startswith(('_', '.')):
+                    paths.append(f"s3://{bucket}/{obj['Key']}")
+        return paths
+    
+    # ========================================
+    # ツール9: save_dataset_as_csv
+    # ========================================
+    
+    async def save_dataset_as_csv(
+        self,
+        dataset_id: str,
+        s3_json_path: Optional[str] = None,
+        local_json_path: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        convert_to_japanese: bool = False,
+        rows_per_file: Optional[int] = None,
+        export_format: str = "csv",
+        compression: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        取得したデータセットをCSV形式でS3に保存
+        
+        VALUEレコードを1行ずつCSVに書き出し、S3のマルチパートアップロードへ直接ストリーミングします。
+        export_format に arrow / feather / parquet を指定すると、コード列を辞書型、値を数値型（value列）にした
+        Arrow IPC（Feather V2）またはParquetで出力します（pyarrowが必要）。
+        
+        Args:
+            dataset_id: データセットID
+            s3_json_path: S3上のJSONファイルパス（オプション）
+            local_json_path: ローカルのJSONファイルパス（オプション）
+            output_filename: 出力ファイル名（オプション）
+            convert_to_japanese: コード列ごとに和名ラベル列（<次元ID>_name）を追加するか
+            rows_per_file: 1ファイルあたりの最大行数（指定時は {名前}_part00001.csv 形式で分割）
+            export_format: 出力形式（csv / arrow / feather / parquet）デフォルト: csv
+            compression: Arrow IPCの圧縮方式（lz4 / zstd / uncompressed）デフォルト: lz4
+        
+        Returns:
+            保存結果
+        """
+        start_time = datetime.now()
+        log_tool_call(logger, "save_dataset_as_csv", {
+            "dataset_id": dataset_id,
+            "s3_json_path": s3_json_path,
+            "local_json_path": local_json_path,
+            "output_filename": output_filename,
+            "rows_per_file": rows_per_file,
+            "export_format": export_format
+        })
+        
+        try:
+            if not self.s3_client:
+                return {"success": False, "error": "S3 client not initialized"}
             
-            # データソースの決定
-            data = None
+            try:
+                export_format = normalize_export_format(export_format)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
             
-            if s3_json_path:
-                # S3からJSONを読み込み
-                logger.info(f"Loading from S3: {s3_json_path}")
-                if not self.s3_client:
-                    return {"success": False, "error": "S3 client not initialized"}
-                
-                # S3パスをパース
-                if s3_json_path.startswith('s3://'):
-                    s3_json_path = s3_json_path[5:]
-                
-                parts = s3_json_path.split('/', 1)
-                bucket = parts[0]
-                key = parts[1] if len(parts) > 1 else ''
-                
-                logger.info(f"Reading from S3 bucket: {bucket}, key: {key}")
-                response = self.s3_client.get_object(Bucket=bucket, Key=key)
-                data = json.loads(response['Body'].read().decode('utf-8'))
-                
-            elif local_json_path:
+            # データソースの決定
+            if local_json_path:
                 # ローカルファイルから読み込み
                 logger.info(f"Loading from local: {local_json_path}")
                 with open(local_json_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-            
             else:
-                # データソースが指定されていない場合、最新のデータを取得してS3に保存
-                logger.info(f"No data source specified, fetching fresh data for dataset: {dataset_id}")
-                fetch_result = await self.fetch_dataset_auto(dataset_id, save_to_s3=True, convert_to_japanese=True)
-                
-                if not fetch_result.get('success'):
-                    return {
-                        "success": False,
-                        "error": "Failed to fetch dataset and no data source provided"
-                    }
-                
-                # fetch_dataset_autoで保存されたS3パスを取得
-                s3_location = fetch_result.get('s3_location')
-                if not s3_location:
-                    return {
-                        "success": False,
-                        "error": "Data was fetched but S3 location not available"
-                    }
-                
-                logger.info(f"Data fetched and saved to: {s3_location}")
-                logger.info(f"Now loading from S3 to convert to CSV...")
+                if not s3_json_path:
+                    # データソースが指定されていない場合、最新のデータを取得してS3に保存
+                    logger.info(f"No data source specified, fetching fresh data for dataset: {dataset_id}")
+                    fetch_result = await self.fetch_dataset_auto(dataset_id, save_to_s3=True)
+                    
+                    if not fetch_result.get('success'):
+                        return {
+                            "success": False,
+                            "error": "Failed to fetch dataset and no data source provided"
+                        }
+                    
+                    s3_json_path = fetch_result.get('s3_location')
+                    if not s3_json_path:
+                        return {
+                            "success": False,
+                            "error": "Data was fetched but S3 location not available"
+                        }
+                    logger.info(f"Data fetched and saved to: {s3_json_path}")
                 
                 # S3からJSONを読み込み
-                if not self.s3_client:
-                    return {"success": False, "error": "S3 client not initialized"}
-                
-                # S3パスをパース
-                if s3_location.startswith('s3://'):
-                    s3_location = s3_location[5:]
+                if s3_json_path.startswith('s3://'):
+                    s3_json_path = s3_json_path[5:]
                 
-                parts = s3_location.split('/', 1)
+                parts = s3_json_path.split('/', 1)
                 bucket = parts[0]
                 key = parts[1] if len(parts) > 1 else ''
                 
                 logger.info(f"Reading from S3 bucket: {bucket}, key: {key}")
-                response = self.s3_client.get_object(Bucket=bucket, Key=key)
-                data = json.loads(response['Body'].read().decode('utf-8'))
-                
-                # データを抽出
-                stats_data = data.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {})
-                value_list = stats_data.get('DATA_INF', {}).get('VALUE', [])
-                
-                if isinstance(value_list, dict):
-                    value_list = [value_list]
-                
-                if not value_list:
-                    return {"success": False, "error": "No data found in fetched JSON"}
-                
-                logger.info(f"Converting {len(value_list):,} records to CSV")
-                
-                # DataFrameに変換
-                df = pd.DataFrame(value_list)
-                
-                # 出力ファイル名を決定
-                if not output_filename:
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    output_filename = f"{dataset_id}_{timestamp}.csv"
-                
-                # CSVに変換
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8-sig')
-                csv_content = csv_buffer.getvalue()
-                
-                # S3に保存
-                s3_key = f"csv/{output_filename}"
-                
-                if not self.s3_client:
-                    return {"success": False, "error": "S3 client not initialized"}
-                
-                try:
-                    logger.info(f"Saving CSV to S3: s3://{S3_BUCKET}/{s3_key}")
-                    self.s3_client.put_object(
-                        Bucket=S3_BUCKET,
-                        Key=s3_key,
-                        Body=csv_content.encode('utf-8-sig'),
-                        ContentType='text/csv'
-                    )
-                    
-                    s3_csv_location = f"s3://{S3_BUCKET}/{s3_key}"
-                    
-                    processing_time = (datetime.now() - start_time).total_seconds()
-                    log_tool_result(logger, "save_dataset_as_csv", True, processing_time)
-                    
-                    logger.info(f"CSV saved to: {s3_csv_location}")
-                    
-                    return {
-                        "success": True,
-                        "dataset_id": dataset_id,
-                        "records_count": len(value_list),
-                        "columns": list(df.columns),
-                        "s3_location": s3_csv_location,
-                        "s3_bucket": S3_BUCKET,
-                        "s3_key": s3_key,
-                        "filename": output_filename,
-                        "message": f"Successfully saved {len(value_list):,} records as CSV to S3"
-                    }
-                except Exception as s3_error:
-                    logger.error(f"S3 save failed: {s3_error}")
-                    return {
-                        "success": False,
-                        "error": f"Failed to save CSV to S3: {str(s3_error)}",
-                        "dataset_id": dataset_id
-                    }
+                data = self.s3_cache.read_json(bucket, key)
             
-            # 既存のJSONデータからCSV変換の処理
-            if data:
-                # データを抽出
-                stats_data = data.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {})
-                value_list = stats_data.get('DATA_INF', {}).get('VALUE', [])
-                
-                if isinstance(value_list, dict):
-                    value_list = [value_list]
-                
-                if not value_list:
-                    return {"success": False, "error": "No data found in JSON"}
-                
-                logger.info(f"Converting {len(value_list):,} records to CSV")
-                
-                # DataFrameに変換
-                df = pd.DataFrame(value_list)
-                
-                # CSVに変換
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8-sig')
-                csv_content = csv_buffer.getvalue()
-                
-                # 出力ファイル名を決定
-                if not output_filename:
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    output_filename = f"{dataset_id}_{timestamp}.csv"
-                
-                # S3に保存
-                s3_key = f"csv/{output_filename}"
-                
-                if not self.s3_client:
-                    return {"success": False, "error": "S3 client not initialized"}
-                
-                try:
-                    logger.info(f"Saving CSV to S3: s3://{S3_BUCKET}/{s3_key}")
-                    self.s3_client.put_object(
-                        Bucket=S3_BUCKET,
-                        Key=s3_key,
-                        Body=csv_content.encode('utf-8-sig'),
-                        ContentType='text/csv'
+            # データを抽出
+            stats_data = data.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {})
+            value_list = stats_data.get('DATA_INF', {}).get('VALUE', [])
+            
+            if isinstance(value_list, dict):
+                value_list = [value_list]
+            
+            if not value_list:
+                return {"success": False, "error": "No data found in JSON"}
+            
+            # 出力ファイル名を決定
+            format_settings = EXPORT_FORMATS[export_format]
+            if not output_filename:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                output_filename = f"{dataset_id}_{timestamp}{format_settings['extension']}"
+            elif format_for_key(output_filename) != export_format:
+                output_filename = replace_extension(output_filename, export_format)
+            s3_key = f"{format_settings['prefix']}/{output_filename}"
+            
+            logger.info(f"Streaming {len(value_list):,} records as {export_format} to s3://{S3_BUCKET}/{s3_key}")
+            try:
+                if export_format == "csv":
+                    label_maps = None
+                    if convert_to_japanese:
+                        label_maps = await self._get_label_maps(dataset_id, data)
+                    export_result = export_records_to_s3(
+                        self.s3_client, value_list, S3_BUCKET, s3_key,
+                        rows_per_file=rows_per_file,
+                        label_maps=label_maps
                     )
+                else:
+                    try:
+                        from .utils.columnar import build_record_table
+                        from .utils.csv_export import export_table_to_s3
+                    except ImportError:
+                        return {
+                            "success": False,
+                            "error": f"pyarrow is required for {export_format} export"
+                        }
                     
-                    s3_location = f"s3://{S3_BUCKET}/{s3_key}"
-                    
-                    processing_time = (datetime.now() - start_time).total_seconds()
-                    log_tool_result(logger, "save_dataset_as_csv", True, processing_time)
-                    
-                    logger.info(f"CSV saved to: {s3_location}")
-                    
-                    return {
-                        "success": True,
-                        "dataset_id": dataset_id,
-                        "records_count": len(value_list),
-                        "columns": list(df.columns),
-                        "s3_location": s3_location,
-                        "s3_bucket": S3_BUCKET,
-                        "s3_key": s3_key,
-                        "filename": output_filename,
-                        "message": f"Successfully saved {len(value_list):,} records as CSV to S3"
-                    }
-                except Exception as s3_error:
-                    logger.error(f"S3 save failed: {s3_error}")
-                    return {
-                        "success": False,
-                        "error": f"Failed to save CSV to S3: {str(s3_error)}",
-                        "dataset_id": dataset_id
-                    }
+                    label_index = None
+                    if convert_to_japanese:
+                        label_index = await self._get_label_index(dataset_id, data)
+                    table = build_record_table(value_list, label_index)
+                    export_result = export_table_to_s3(
+                        self.s3_client, table, S3_BUCKET, s3_key, export_format,
+                        compression=compression,
+                        rows_per_file=rows_per_file
+                    )
+            except ValueError as e:
+                return {"success": False, "error": str(e), "dataset_id": dataset_id}
+            except Exception as s3_error:
+                logger.error(f"S3 save failed: {s3_error}")
+                return {
+                    "success": False,
+                    "error": f"Failed to save {export_format} to S3: {str(s3_error)}",
+                    "dataset_id": dataset_id
+                }
+            
+            files = [
+                {
+                    "s3_location": f"s3://{S3_BUCKET}/{file['key']}",
+                    "rows": file["rows"],
+                    "size_bytes": file["size_bytes"]
+                }
+                for file in export_result["files"]
+            ]
+            s3_key = export_result["files"][0]["key"]
+            s3_location = f"s3://{S3_BUCKET}/{s3_key}"
+            
+            processing_time = (datetime.now() - start_time).total_seconds()
+            log_tool_result(logger, "save_dataset_as_csv", True, processing_time)
+            
+            logger.info(f"{export_format.upper()} saved to: {s3_location} ({len(files)} file(s))")
+            
+            return {
+                "success": True,
+                "dataset_id": dataset_id,
+                "records_count": export_result["rows"],
+                "columns": export_result["columns"],
+                "s3_location": s3_location,
+                "s3_bucket": S3_BUCKET,
+                "s3_key": s3_key,
+                "filename": s3_key.rsplit('/', 1)[-1],
+                "export_format": export_format,
+                "content_type": format_settings["content_type"],
+                "files": files,
+                "file_count": len(files),
+                "message": f"Successfully saved {export_result['rows']:,} records as {export_format.upper()} to S3"
+                           + (f" ({len(files)} files)" if len(files) > 1 else "")
+            }
             
         except Exception as e:
             logger.error(f"Error in save_dataset_as_csv: {e}", exc_info=True)
@@ -1918,8 +2180,11 @@ class EStatAWSServer:
         """
         S3 CSVファイルの署名付きダウンロードURLを生成
         
+        Arrow IPC（.arrow / .feather）・Parquet（.parquet）ファイルにも対応し、
+        拡張子に応じたContent-Typeでダウンロードされます。
+        
         Args:
-            s3_path: S3上のCSVファイルパス（s3://bucket/key 形式）
+            s3_path: S3上のCSV / Arrow IPC / Parquetファイルパス（s3://bucket/key 形式）
             expires_in: URL有効期限（秒）デフォルト3600秒（1時間）
             filename: ダウンロード時のファイル名（省略時はS3のキー名を使用）
         
@@ -1976,10 +2241,12 @@ class EStatAWSServer:
                 file_size_mb = None
             
             # 署名付きURL生成
+            file_format = format_for_key(key)
             params = {
                 'Bucket': bucket,
                 'Key': key,
-                'ResponseContentDisposition': f'attachment; filename="{filename}"'
+                'ResponseContentDisposition': f'attachment; filename="{filename}"',
+                'ResponseContentType': get_export_format(file_format)["content_type"]
             }
             
             presigned_url = self.s3_client.generate_presigned_url(
@@ -2000,6 +2267,7 @@ class EStatAWSServer:
                 "s3_key": key,
                 "download_url": presigned_url,
                 "filename": filename,
+                "format": file_format,
                 "expires_in_seconds": expires_in,
                 "expires_at": (datetime.now().timestamp() + expires_in),
                 "processing_time_seconds": round(processing_time, 2),
@@ -2259,23 +2527,32 @@ class EStatAWSServer:
         self,
         s3_path: str,
         local_path: Optional[str] = None,
-        return_content: bool = False
+        return_content: bool = False,
+        export_format: Optional[str] = None,
+        compression: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         S3に保存されたCSVファイルをダウンロード
         
+        export_format を指定すると、ダウンロードしたファイルをその形式（csv / arrow / feather / parquet）に
+        変換して保存します（pyarrowが必要）。省略時はS3上のファイルをそのまま保存します。
+        
         Args:
-            s3_path: S3上のCSVファイルパス（s3://bucket/key 形式）
+            s3_path: S3上のCSV / Arrow IPC / Parquetファイルパス（s3://bucket/key 形式）
             local_path: ローカル保存先パス（return_content=Falseの場合のみ使用）
-            return_content: Trueの場合、CSV内容を直接返す（リモートサーバー向け）
+            return_content: Trueの場合、ファイル内容を直接返す（リモートサーバー向け）
+            export_format: 保存する形式（省略時はS3上の形式のまま）
+            compression: Arrow IPCの圧縮方式（lz4 / zstd / uncompressed）
         
         Returns:
-            ダウンロード結果（return_content=Trueの場合はcontentフィールドにCSV内容を含む）
+            ダウンロード結果（return_content=Trueの場合はcontentフィールドに内容を含む。
+            CSV以外はBase64エンコード）
         """
         start_time = datetime.now()
         log_tool_call(logger, "download_csv_from_s3", {
             "s3_path": s3_path,
-            "local_path": local_path
+            "local_path": local_path,
+            "export_format": export_format
         })
         
         try:
@@ -2294,23 +2571,14 @@ class EStatAWSServer:
             if not key:
                 return {"success": False, "error": "Invalid S3 path: missing object key"}
             
-            # ローカルパスを決定
-            if not local_path:
-                filename = key.split('/')[-1]
-                local_path = filename
-            
-            # パスを正規化（絶対パスに変換）
-            import os
-            local_path = os.path.abspath(local_path)
-            
-            # ディレクトリが存在しない場合は作成
-            local_dir = os.path.dirname(local_path)
-            if local_dir and not os.path.exists(local_dir):
-                os.makedirs(local_dir, exist_ok=True)
-                logger.info(f"Created directory: {local_dir}")
+            # 形式を決定
+            source_format = format_for_key(key)
+            try:
+                output_format = normalize_export_format(export_format or source_format)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
             
             logger.info(f"Downloading from S3: {bucket}/{key}")
-            logger.info(f"Saving to: {local_path}")
             
             # S3オブジェクトの存在確認
             try:
@@ -2328,49 +2596,82 @@ class EStatAWSServer:
                 logger.warning(f"Could not verify S3 object: {e}")
             
             # S3からダウンロード
-            response = self.s3_client.get_object(Bucket=bucket, Key=key)
-            content = response['Body'].read()
+            content = self.s3_cache.read_bytes(bucket, key)
             
-            # return_content=Trueの場合、内容を直接返す（リモートサーバー向け）
-            if return_content:
+            # 形式を変換
+            if output_format != source_format or (compression and output_format in ("arrow", "feather")):
                 try:
-                    csv_content = content.decode('utf-8')
-                    line_count = len(csv_content.split('\n'))
-                    
-                    processing_time = (datetime.now() - start_time).total_seconds()
-                    log_tool_result(logger, "download_csv_from_s3", True, processing_time)
-                    
-                    logger.info(f"Returning CSV content: {len(content)} bytes, {line_count} lines")
-                    
-                    return {
-                        "success": True,
-                        "s3_path": s3_path,
-                        "s3_bucket": bucket,
-                        "s3_key": key,
-                        "content": csv_content,
-                        "file_size_bytes": len(content),
-                        "file_size_mb": round(len(content) / (1024 * 1024), 2),
-                        "line_count": line_count,
-                        "processing_time_seconds": round(processing_time, 2),
-                        "message": f"Successfully retrieved CSV content ({len(content) / (1024*1024):.2f} MB, {line_count} lines)"
-                    }
-                except UnicodeDecodeError as e:
-                    logger.error(f"Failed to decode CSV as UTF-8: {e}")
+                    from .utils.csv_export import convert_export_bytes
+                except ImportError:
                     return {
                         "success": False,
-                        "error": f"Failed to decode CSV as UTF-8: {e}",
-                        "s3_path": s3_path
+                        "error": f"pyarrow is required to convert {source_format} to {output_format}"
                     }
+                logger.info(f"Converting {source_format} to {output_format}")
+                content = convert_export_bytes(content, source_format, output_format, compression)
+            
+            # return_content=Trueの場合、内容を直接返す（リモートサーバー向け）
+            if return_content:
+                result = {
+                    "success": True,
+                    "s3_path": s3_path,
+                    "s3_bucket": bucket,
+                    "s3_key": key,
+                    "format": output_format,
+                    "file_size_bytes": len(content),
+                    "file_size_mb": round(len(content) / (1024 * 1024), 2)
+                }
+                
+                if output_format == "csv":
+                    try:
+                        csv_content = content.decode('utf-8')
+                    except UnicodeDecodeError as e:
+                        logger.error(f"Failed to decode CSV as UTF-8: {e}")
+                        return {
+                            "success": False,
+                            "error": f"Failed to decode CSV as UTF-8: {e}",
+                            "s3_path": s3_path
+                        }
+                    line_count = len(csv_content.split('\n'))
+                    result.update({"content": csv_content, "line_count": line_count})
+                    message = f"Successfully retrieved CSV content ({len(content) / (1024*1024):.2f} MB, {line_count} lines)"
+                else:
+                    import base64
+                    result.update({
+                        "content": base64.b64encode(content).decode('ascii'),
+                        "content_encoding": "base64"
+                    })
+                    message = f"Successfully retrieved {output_format} content ({len(content) / (1024*1024):.2f} MB, base64)"
+                
+                processing_time = (datetime.now() - start_time).total_seconds()
+                log_tool_result(logger, "download_csv_from_s3", True, processing_time)
+                
+                logger.info(f"Returning {output_format} content: {len(content)} bytes")
+                
+                result["processing_time_seconds"] = round(processing_time, 2)
+                result["message"] = message
+                return result
             
-            # ファイルに書き込み（従来の動作）
+            # ローカルパスを決定
             if not local_path:
-                filename = key.split('/')[-1]
-                local_path = filename
+                local_path = key.split('/')[-1]
+                if output_format != source_format:
+                    local_path = replace_extension(local_path, output_format)
             
             # パスを正規化（絶対パスに変換）
-            import os
             local_path = os.path.abspath(local_path)
             
+            # ディレクトリが存在しない場合は作成
+            local_dir = os.path.dirname(local_path)
+            if local_dir and not os.path.exists(local_dir):
+                os.makedirs(local_dir, exist_ok=True)
+                logger.info(f"Created directory: {local_dir}")
+            
+            # ファイルに書き込み
+            logger.info(f"Saving to: {local_path}")
+            with open(local_path, 'wb') as f:
+                f.write(content)
+            
             # ダウンロード後の検証
             if not os.path.exists(local_path):
                 return {
@@ -2393,13 +2694,14 @@ class EStatAWSServer:
             logger.info(f"Downloaded: {file_size_mb:.2f} MB in {processing_time:.2f}s")
             
             # CSVファイルの行数をカウント（オプション）
-            try:
-                with open(local_path, 'r', encoding='utf-8') as f:
-                    line_count = sum(1 for _ in f)
-                logger.info(f"CSV contains {line_count:,} lines")
-            except Exception as e:
-                logger.warning(f"Could not count lines: {e}")
-                line_count = None
+            line_count = None
+            if output_format == "csv":
+                try:
+                    with open(local_path, 'r', encoding='utf-8') as f:
+                        line_count = sum(1 for _ in f)
+                    logger.info(f"CSV contains {line_count:,} lines")
+                except Exception as e:
+                    logger.warning(f"Could not count lines: {e}")
             
             result = {
                 "success": True,
@@ -2407,10 +2709,11 @@ class EStatAWSServer:
                 "s3_bucket": bucket,
                 "s3_key": key,
                 "local_path": local_path,
+                "format": output_format,
                 "file_size_bytes": file_size,
                 "file_size_mb": round(file_size_mb, 2),
                 "processing_time_seconds": round(processing_time, 2),
-                "message": f"Successfully downloaded CSV to {local_path} ({file_size_mb:.2f} MB)"
+                "message": f"Successfully downloaded {output_format.upper()} to {local_path} ({file_size_mb:.2f} MB)"
             }
             
             if line_count is not None:
@@ -2438,3 +2741,182 @@ class EStatAWSServer:
                 "s3_path": s3_path,
                 "local_path": local_path
             })
+    
+    # ========================================
+    # ツール14: get_athena_query_results
+    # ========================================
+    
+    async def get_athena_query_results(
+        self,
+        query_execution_id: str,
+        next_token: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        実行済みのAthenaクエリの結果をページ単位で取得
+        
+        クエリを再実行せずに、analyze_with_athena のカスタムクエリなどの結果を
+        next_token で順にたどれます。値は結果セットの列型に従って変換します。
+        
+        Args:
+            query_execution_id: クエリ実行ID
+            next_token: 前のページの next_token（省略時は最初のページ）
+            page_size: 1ページの行数（最大1000）
+        
+        Returns:
+            列情報・行・次のページの next_token（最後のページはNone）
+        """
+        start_time = datetime.now()
+        log_tool_call(logger, "get_athena_query_results", {
+            "query_execution_id": query_execution_id,
+            "next_token": next_token
+        })
+        
+        try:
+            if not self.athena_client:
+                return {"success": False, "error": "Athena client not available"}
+            
+            page = await self._get_athena_executor().fetch_page(query_execution_id, next_token, page_size)
+            
+            processing_time = (datetime.now() - start_time).total_seconds()
+            log_tool_result(logger, "get_athena_query_results", True, processing_time)
+            
+            return {
+                "success": True,
+                "query_execution_id": query_execution_id,
+                "columns": page["columns"],
+                "rows": page["rows"],
+                "row_count": len(page["rows"]),
+                "next_token": page["next_token"],
+                "has_more": page["next_token"] is not None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in get_athena_query_results: {e}", exc_info=True)
+            return format_error_response(e, "get_athena_query_results", {
+                "query_execution_id": query_execution_id
+            })
+    
+    # ========================================
+    # ツール15: export_athena_results
+    # ========================================
+    
+    async def export_athena_results(
+        self,
+        query: Optional[str] = None,
+        query_execution_id: Optional[str] = None,
+        export_format: str = "parquet",
+        output_filename: Optional[str] = None,
+        use_unload: bool = True,
+        compression: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Athenaクエリの結果をファイルとしてS3にエクスポート
+        
+        結果は get_query_results のページングを使わず、出力先のCSV（use_unload の場合は
+        UNLOAD したParquet）をS3から直接Arrowテーブルとして読み込んでから書き出します。
+        query_execution_id を指定すると、実行済みのクエリの結果を再実行せずにエクスポートします。
+        
+        Args:
+            query: SELECTクエリ（query_execution_id を指定しない場合は必須）
+            query_execution_id: 実行済みクエリの実行ID
+            export_format: 出力形式（csv / arrow / feather / parquet）デフォルト: parquet
+            output_filename: 出力ファイル名（省略時は自動生成）
+            use_unload: query を UNLOAD でParquetに出力して読むか（Falseの場合・ORDER BY のあるクエリは結果のCSVを読む）
+            compression: Arrow IPCの圧縮方式（lz4 / zstd / uncompressed）
+        
+        Returns:
+            エクスポート結果
+        """
+        start_time = datetime.now()
+        log_tool_call(logger, "export_athena_results", {
+            "query_execution_id": query_execution_id,
+            "export_format": export_format,
+            "use_unload": use_unload
+        })
+        
+        try:
+            if not query and not query_execution_id:
+                return {"success": False, "error": "Either query or query_execution_id is required"}
+            
+            if not self.athena_client:
+                return {"success": False, "error": "Athena client not available"}
+            
+            if not self.s3_client:
+                return {"success": False, "error": "S3 client not available"}
+            
+            try:
+                export_format = normalize_export_format(export_format)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            
+            executor = self._get_athena_executor()
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            
+            if query_execution_id:
+                table = await executor.fetch_arrow(query_execution_id, self.s3_client)
+                source = "csv"
+            else:
+                from .utils.athena_results import has_top_level_order_by
+                
+                output_location = f's3://{S3_BUCKET}/athena-results/'
+                unload_location = None
+                if use_unload and has_top_level_order_by(query):
+                    # UNLOAD はファイルをまたいだ順序を保たないため、ORDER BY の結果はCSVから読む
+                    logger.info("Query has ORDER BY, reading the CSV result instead of UNLOAD")
+                    use_unload = False
+                if use_unload:
+                    # UNLOAD の出力先は空のプレフィックスである必要がある
+                    unload_location = f"{output_location}unload/{timestamp}_{os.urandom(4).hex()}/"
+                from .utils.query_cache import table_references
+                
+                references = table_references(query, 'estat_db')
+                success, table = await executor.execute_arrow(
+                    query, 'estat_db', self.s3_client,
+                    output_location=output_location,
+                    unload_location=unload_location,
+                    versions=self._get_table_versions(references) if references is not None else None
+                )
+                if not success:
+                    return {"success": False, "error": table}
+                source = "unload" if use_unload else "csv"
+            
+            from .utils.csv_export import export_table_to_s3
+            
+            format_settings = EXPORT_FORMATS[export_format]
+            if not output_filename:
+                output_filename = f"athena_{timestamp}{format_settings['extension']}"
+            elif format_for_key(output_filename) != export_format:
+                output_filename = replace_extension(output_filename, export_format)
+            s3_key = f"{format_settings['prefix']}/{output_filename}"
+            
+            logger.info(f"Exporting {table.num_rows:,} Athena result rows as {export_format} to s3://{S3_BUCKET}/{s3_key}")
+            try:
+                export_result = export_table_to_s3(
+                    self.s3_client, table, S3_BUCKET, s3_key, export_format,
+                    compression=compression
+                )
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            
+            s3_location = f"s3://{S3_BUCKET}/{export_result['files'][0]['key']}"
+            processing_time = (datetime.now() - start_time).total_seconds()
+            log_tool_result(logger, "export_athena_results", True, processing_time)
+            
+            return {
+                "success": True,
+                "source": source,
+                "records_count": export_result["rows"],
+                "columns": [{"name": field.name, "type": str(field.type)} for field in table.schema],
+                "s3_location": s3_location,
+                "export_format": export_format,
+                "content_type": format_settings["content_type"],
+                "processing_time_seconds": round(processing_time, 2),
+                "message": f"Successfully exported {export_result['rows']:,} rows as {export_format.upper()} to S3"
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in export_athena_results: {e}", exc_info=True)
+            return format_error_response(e, "export_athena_results", {
+                "query_execution_id": query_execution_id
+            })
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+テスト共通のフェイククライアント
+
+S3・Athenaのインメモリ実装をテスト間で共有します。
+"""
+
+import io
+import threading
+import time
+
+import pytest
+
+
+class TooManyRequestsException(Exception):
+    """Athenaのスロットリングエラー"""
+
+
+class FakeS3Client:
+    """インメモリS3クライアント（一覧・一括削除・マルチパートアップロードに対応）"""
+
+    def __init__(self):
+        self.objects = {}
+        self.content_types = {}
+        self.uploads = {}
+        self.aborted = []
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+        self.content_types[(Bucket, Key)] = ContentType
+
+    def get_object(self, Bucket, Key, **kwargs):
+        body = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "ContentLength": len(body)}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {"Contents": [
+            {"Key": key, "Size": len(body)}
+            for (bucket, key), body in sorted(self.objects.items())
+            if bucket == Bucket and key.startswith(Prefix)
+        ]}
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, **kwargs):
+        self.content_types[(Bucket, Key)] = ContentType
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[(Bucket, Key)] = b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(Key)
+
+
+class FakeAthenaClient:
+    """一定時間後に完了するクエリを模したAthenaクライアント
+
+    結果は columns / result_rows で指定します（省略時は実行したクエリ文字列を1行返す）。
+    """
+
+    def __init__(self, duration=0.0, throttle_first=0, fail_queries=(), result_rows=None, columns=None,
+                 output_location="s3://bucket/athena-results/"):
+        self.duration = duration
+        self.result_rows = result_rows
+        self.columns = columns or [{"Name": "year", "Type": "integer"}, {"Name": "value", "Type": "double"}]
+        self.output_location = output_location
+        self.result_calls = []
+        self.throttle_first = throttle_first
+        self.fail_queries = set(fail_queries)
+        self.executions = {}
+        self.start_calls = []
+        self.queries = []
+        self.stopped = []
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def _running(self):
+        now = time.monotonic()
+        return sum(1 for e in self.executions.values() if e["finish"] > now and e["id"] not in self.stopped)
+
+    def start_query_execution(self, **kwargs):
+        with self._lock:
+            self.start_calls.append(kwargs)
+            if self.throttle_first:
+                self.throttle_first -= 1
+                raise TooManyRequestsException("Too many queries")
+            execution_id = f"q-{len(self.executions)}"
+            self.queries.append(kwargs["QueryString"])
+            self.executions[execution_id] = {
+                "id": execution_id,
+                "query": kwargs["QueryString"],
+                "workgroup": kwargs.get("WorkGroup"),
+                "finish": time.monotonic() + self.duration,
+                "polls": 0
+            }
+            self.max_running = max(self.max_running, self._running())
+            return {"QueryExecutionId": execution_id}
+
+    def get_query_execution(self, QueryExecutionId):
+        execution = self.executions[QueryExecutionId]
+        execution["polls"] += 1
+        if QueryExecutionId in self.stopped:
+            state = "CANCELLED"
+        elif time.monotonic() < execution["finish"]:
+            state = "RUNNING"
+        elif execution["query"] in self.fail_queries:
+            state = "FAILED"
+        else:
+            state = "SUCCEEDED"
+        status = {"State": state}
+        if state == "FAILED":
+            status["StateChangeReason"] = "SYNTAX_ERROR"
+        return {"QueryExecution": {
+            "QueryExecutionId": QueryExecutionId,
+            "Status": status,
+            "ResultConfiguration": {"OutputLocation": f"{self.output_location}{QueryExecutionId}.csv"}
+        }}
+
+    def stop_query_execution(self, QueryExecutionId):
+        self.stopped.append(QueryExecutionId)
+
+    def get_query_results(self, QueryExecutionId, MaxResults=1000, NextToken=None):
+        self.result_calls.append(NextToken)
+        if self.result_rows is None:
+            columns = [{"Name": "query", "Type": "varchar"}]
+            rows = [[self.executions[QueryExecutionId]["query"]]]
+        else:
+            columns = self.columns
+            rows = self.result_rows
+
+        # 列名の行を含めて MaxResults 行ずつ返す
+        rows = [[column["Name"] for column in columns]] + rows
+        offset = int(NextToken or 0)
+        response = {"ResultSet": {
+            "Rows": [
+                {"Data": [{} if value is None else {"VarCharValue": value} for value in row]}
+                for row in rows[offset:offset + MaxResults]
+            ],
+            "ResultSetMetadata": {"ColumnInfo": columns}
+        }}
+        if offset + MaxResults < len(rows):
+            response["NextToken"] = str(offset + MaxResults)
+        return response
+
+
+@pytest.fixture
+def s3_client():
+    return FakeS3Client()
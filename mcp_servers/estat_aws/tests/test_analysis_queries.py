@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+analyze_with_athena の集計クエリのテスト
+
+GROUPING SETS の結果行を基本分析・高度分析の各項目に振り分ける処理をテスト
+"""
+
+from mcp_servers.estat_aws.utils.analysis_queries import (
+    GROUPING_CATEGORY,
+    GROUPING_REGION,
+    GROUPING_YEAR,
+    advanced_analysis_query,
+    basic_analysis_query,
+    split_advanced_rows,
+    split_basic_rows
+)
+
+
+def test_queries_scan_once():
+    for query in (basic_analysis_query("estat_db.population"), advanced_analysis_query("estat_db.population")):
+        assert query.count("FROM estat_db.population") == 1
+        assert "GROUPING SETS" in query
+
+
+class TestSplitBasicRows:
+    """split_basic_rowsのテストクラス"""
+
+    def test_total_and_years(self):
+        # grouping_id, year, total_records, count, avg, min, max, sum
+        rows = [
+            [0, 2021, 3, 2, 4.0, 3.0, 5.0, 8.0],
+            [1, None, 6, 5, 3.0, 1.0, 5.0, 15.0],
+            [0, None, 1, 1, 2.0, 2.0, 2.0, 2.0],
+            [0, 2020, 2, 2, 2.5, 1.0, 4.0, 5.0],
+            # 値が全てnullの年は含めない
+            [0, 2019, 1, 0, None, None, None, None],
+        ]
+        results = split_basic_rows(rows)
+
+        assert results["total_records"] == 6
+        assert results["statistics"] == {
+            "count": 5, "avg_value": 3.0, "min_value": 1.0, "max_value": 5.0, "sum_value": 15.0
+        }
+        assert results["by_year"] == [
+            {"year": 2020, "count": 2, "avg_value": 2.5},
+            {"year": 2021, "count": 2, "avg_value": 4.0},
+            {"year": 0, "count": 1, "avg_value": 2.0},
+        ]
+
+    def test_by_year_limit(self):
+        rows = [[0, 2000 + i, 1, 1, 1.0, 1.0, 1.0, 1.0] for i in range(15)]
+        assert [row["year"] for row in split_basic_rows(rows, top_n=10)["by_year"]] == list(range(2000, 2010))
+
+    def test_empty_table(self):
+        assert split_basic_rows([[1, None, 0, 0, None, None, None, None]]) == {
+            "total_records": 0,
+            "statistics": {"count": 0, "avg_value": 0.0, "min_value": 0.0, "max_value": 0.0, "sum_value": 0.0},
+            "by_year": []
+        }
+
+
+class TestSplitAdvancedRows:
+    """split_advanced_rowsのテストクラス"""
+
+    def test_sections_keep_previous_columns(self):
+        # grouping_id, region_code, category, year, count, avg, sum, min, max
+        rows = [
+            [GROUPING_YEAR, None, None, 2021, 2, 3.0, 6.0, 1.0, 5.0],
+            [GROUPING_REGION, "13000", None, None, 2, 5.0, 10.0, 4.0, 6.0],
+            [GROUPING_CATEGORY, None, "001", None, 1, 2.0, 2.0, 2.0, 2.0],
+            [GROUPING_REGION, "01000", None, None, 3, 1.0, 3.0, 1.0, 1.0],
+            [GROUPING_CATEGORY, None, "002", None, 4, 3.0, 12.0, 1.0, 6.0],
+            [GROUPING_YEAR, None, None, 2020, 3, 2.0, 6.0, 1.0, 4.0],
+        ]
+        results = split_advanced_rows(rows)
+
+        assert results["by_region"] == [["13000", 2, 5.0, 10.0], ["01000", 3, 1.0, 3.0]]
+        assert results["by_category"] == [["002", 4, 3.0], ["001", 1, 2.0]]
+        assert results["trend"] == [[2020, 2.0, 1.0, 4.0], [2021, 3.0, 1.0, 5.0]]
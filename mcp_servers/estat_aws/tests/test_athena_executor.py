@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+非同期Athenaクエリ実行のテスト
+
+バックオフ付きポーリング・並行実行・同時実行数の制限・スロットリング時の再送と、
+結果のページ読み込み・列型による変換をテスト
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from mcp_servers.estat_aws.tests.conftest import FakeAthenaClient
+from mcp_servers.estat_aws.utils.athena_executor import AthenaExecutor, parse_rows
+
+
+def test_parse_rows():
+    response = {"ResultSet": {
+        "Rows": [
+            {"Data": [{"VarCharValue": "year"}, {"VarCharValue": "count"}, {"VarCharValue": "ok"}]},
+            {"Data": [{"VarCharValue": "2020"}, {}, {"VarCharValue": "true"}]},
+        ],
+        "ResultSetMetadata": {"ColumnInfo": [
+            {"Name": "year", "Type": "varchar"},
+            {"Name": "count", "Type": "bigint"},
+            {"Name": "ok", "Type": "boolean"},
+        ]}
+    }}
+    assert parse_rows(response) == [["2020", None, True]]
+    assert len(parse_rows(response, skip_header=False)) == 2
+
+
+class TestAthenaExecutor:
+    """AthenaExecutorのテストクラス"""
+
+    def test_execute_with_workgroup(self):
+        client = FakeAthenaClient(duration=0.05)
+        executor = AthenaExecutor(client, workgroup="wg", poll_interval=0.01)
+
+        assert asyncio.run(executor.execute("SELECT 1", "db")) == (True, [["SELECT 1"]])
+        assert client.executions["q-0"]["workgroup"] == "wg"
+
+    def test_queries_run_concurrently(self):
+        client = FakeAthenaClient(duration=0.3)
+        executor = AthenaExecutor(client, max_concurrent=5, poll_interval=0.01)
+
+        started = time.monotonic()
+        results = asyncio.run(executor.execute_many({"a": "A", "b": "B", "c": "C"}, "db"))
+        elapsed = time.monotonic() - started
+
+        assert results == {"a": (True, [["A"]]), "b": (True, [["B"]]), "c": (True, [["C"]])}
+        assert client.max_running == 3
+        assert elapsed < 0.6
+
+    def test_concurrency_limit_queues_queries(self):
+        client = FakeAthenaClient(duration=0.1)
+        executor = AthenaExecutor(client, max_concurrent=2, poll_interval=0.01)
+
+        results = asyncio.run(executor.execute_many([f"Q{i}" for i in range(6)], "db"))
+
+        assert [rows for _, rows in results] == [[[f"Q{i}"]] for i in range(6)]
+        assert client.max_running <= 2
+
+    def test_poll_interval_backs_off(self):
+        client = FakeAthenaClient(duration=0.5)
+        executor = AthenaExecutor(client, poll_interval=0.01, max_poll_interval=1.0)
+
+        asyncio.run(executor.execute("SELECT 1", "db"))
+        # 0.01秒間隔のままなら約50回ポーリングする
+        assert client.executions["q-0"]["polls"] < 15
+
+    def test_throttled_submit_is_retried(self, monkeypatch):
+        monkeypatch.setattr("mcp_servers.estat_aws.utils.athena_executor.SUBMIT_RETRY_DELAY", 0.01)
+        client = FakeAthenaClient(duration=0.01, throttle_first=2)
+        executor = AthenaExecutor(client, poll_interval=0.01)
+
+        assert asyncio.run(executor.execute("SELECT 1", "db"))[0]
+        assert len(client.start_calls) == 3
+
+    def test_failed_query(self):
+        client = FakeAthenaClient(duration=0.01, fail_queries=["BAD"])
+        executor = AthenaExecutor(client, poll_interval=0.01)
+
+        assert asyncio.run(executor.execute("BAD", "db")) == (False, "SYNTAX_ERROR")
+
+    def test_timeout_stops_query(self):
+        client = FakeAthenaClient(duration=10)
+        executor = AthenaExecutor(client, timeout=0.1, poll_interval=0.02)
+
+        assert asyncio.run(executor.execute("SLOW", "db")) == (False, "Query timeout")
+        assert client.stopped == ["q-0"]
+
+    def test_error_without_throttling_is_not_retried(self):
+        class BrokenClient(FakeAthenaClient):
+            def start_query_execution(self, **kwargs):
+                self.start_calls.append(kwargs["QueryString"])
+                raise ValueError("AccessDenied")
+
+        client = BrokenClient()
+        success, error = asyncio.run(AthenaExecutor(client).execute("SELECT 1", "db"))
+
+        assert not success
+        assert "AccessDenied" in error
+        assert len(client.start_calls) == 1
+
+
+class TestResultPaging:
+    """結果のページ読み込みのテストクラス"""
+
+    @pytest.fixture
+    def client(self):
+        return FakeAthenaClient(duration=0.01, result_rows=[[str(2000 + i), f"{i}.5"] for i in range(2500)])
+
+    def test_execute_reads_all_pages(self, client):
+        executor = AthenaExecutor(client, poll_interval=0.01)
+        success, rows = asyncio.run(executor.execute("SELECT year, value FROM t", "db"))
+
+        assert success
+        assert len(rows) == 2500
+        assert rows[0] == [2000, 0.5]
+        assert rows[-1] == [4499, 2499.5]
+        assert client.result_calls == [None, "1000", "2000"]
+
+    def test_page_cursor(self, client):
+        executor = AthenaExecutor(client, poll_interval=0.01)
+        first = asyncio.run(executor.execute_page("SELECT year, value FROM t", "db", page_size=1000))
+
+        assert first["success"]
+        assert first["columns"] == [{"name": "year", "type": "integer"}, {"name": "value", "type": "double"}]
+        assert len(first["rows"]) == 999
+
+        rows = first["rows"]
+        token = first["next_token"]
+        while token:
+            page = asyncio.run(executor.fetch_page(first["query_execution_id"], token))
+            rows += page["rows"]
+            token = page["next_token"]
+        assert [row[0] for row in rows] == list(range(2000, 4500))
+        # 結果の取得でクエリを再実行しない
+        assert len(client.start_calls) == 1
+
+    def test_fetch_rows_max_rows(self, client):
+        client.executions["q-0"] = {"query": "SELECT 1"}
+        rows = asyncio.run(AthenaExecutor(client).fetch_rows("q-0", max_rows=10))
+
+        assert len(rows) == 10
+        assert client.result_calls == [None]
+
+
+class TestExecuteStatement:
+    """AthenaExecutor.execute_statementのテストクラス"""
+
+    def test_output_rows_from_runtime_statistics(self):
+        class StatisticsClient(FakeAthenaClient):
+            def get_query_runtime_statistics(self, QueryExecutionId):
+                return {"QueryRuntimeStatistics": {"Rows": {"InputRows": 500, "OutputRows": 250}}}
+
+        client = StatisticsClient(duration=0.01)
+        success, info = asyncio.run(AthenaExecutor(client, poll_interval=0.01).execute_statement("INSERT INTO t SELECT 1", "db"))
+
+        assert success
+        assert info == {"query_execution_id": "q-0", "output_rows": 250}
+        # 結果の行は読まない
+        assert client.result_calls == []
+
+    def test_statistics_unavailable(self):
+        client = FakeAthenaClient(duration=0.01)
+        success, info = asyncio.run(AthenaExecutor(client, poll_interval=0.01).execute_statement("INSERT INTO t SELECT 1", "db"))
+
+        assert success
+        assert info["output_rows"] is None
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Athenaクエリ結果のS3からの一括読み込みのテスト
+
+結果CSVの型付け・null の扱い、UNLOAD したParquetの読み込み、実行クラスからの呼び出しをテスト
+"""
+
+import asyncio
+import datetime
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from mcp_servers.estat_aws.tests.conftest import FakeAthenaClient
+from mcp_servers.estat_aws.utils.athena_executor import AthenaExecutor
+from mcp_servers.estat_aws.utils.athena_results import (
+    arrow_type,
+    delete_prefix,
+    has_top_level_order_by,
+    read_csv_result,
+    read_parquet_prefix,
+    unload_statement
+)
+
+COLUMNS = [
+    {"name": "year", "type": "integer"},
+    {"name": "region_code", "type": "varchar"},
+    {"name": "value", "type": "double"},
+    {"name": "time", "type": "date"},
+]
+
+# Athenaの結果CSV: 値は引用符付き、nullは引用符なしの空欄
+RESULT_CSV = (
+    '"year","region_code","value","time"\n'
+    '"2020","01000","1.5","2020-01-01"\n'
+    '"2021","",,"2021-01-01"\n'
+    ',"13000","3.0",\n'
+).encode("utf-8")
+
+
+class ResultWritingAthenaClient(FakeAthenaClient):
+    """結果を出力先のS3に書くAthenaクライアント（UNLOAD はParquetを2ファイルに分けて出力）"""
+
+    def __init__(self, s3_client):
+        super().__init__(
+            columns=[{"Name": c["name"], "Type": c["type"]} for c in COLUMNS], result_rows=[]
+        )
+        self.s3_client = s3_client
+
+    def start_query_execution(self, **kwargs):
+        response = super().start_query_execution(**kwargs)
+        query_execution_id = response["QueryExecutionId"]
+        query = kwargs["QueryString"]
+        if query.startswith("UNLOAD"):
+            location = query.split("TO '", 1)[1].split("'", 1)[0]
+            bucket, prefix = location[len("s3://"):].split("/", 1)
+            table = pa.table({"year": pa.array([2020, 2021], pa.int32()), "value": [1.5, 2.5]})
+            for i in range(2):
+                output = io.BytesIO()
+                pq.write_table(table.slice(i, 1), output)
+                self.s3_client.put_object(Bucket=bucket, Key=f"{prefix}{query_execution_id}_{i}", Body=output.getvalue())
+        else:
+            self.s3_client.put_object(Bucket="bucket", Key=f"athena-results/{query_execution_id}.csv", Body=RESULT_CSV)
+        return response
+
+
+def test_arrow_type():
+    assert arrow_type("bigint") == pa.int64()
+    assert arrow_type("decimal(10,2)") == pa.float64()
+    assert arrow_type("array(varchar)") == pa.string()
+
+
+def test_unload_statement():
+    assert unload_statement("SELECT * FROM t;\n", "s3://bucket/unload/1/") == (
+        "UNLOAD (SELECT * FROM t) TO 's3://bucket/unload/1/' WITH (format = 'PARQUET', compression = 'SNAPPY')"
+    )
+
+
+def test_has_top_level_order_by():
+    assert has_top_level_order_by("SELECT * FROM t ORDER BY year DESC")
+    assert not has_top_level_order_by("SELECT * FROM (SELECT * FROM t ORDER BY year LIMIT 5)")
+    assert not has_top_level_order_by("SELECT ROW_NUMBER() OVER (ORDER BY year) FROM t")
+    assert not has_top_level_order_by("SELECT 'order by' FROM t")
+
+
+class TestReadResults:
+    """結果ファイルの読み込みのテストクラス"""
+
+    def test_read_csv_result(self, s3_client):
+        s3_client.put_object(Bucket="bucket", Key="athena-results/q.csv", Body=RESULT_CSV)
+        table = read_csv_result(s3_client, "s3://bucket/athena-results/q.csv", COLUMNS)
+
+        assert table.schema.types == [pa.int32(), pa.string(), pa.float64(), pa.date32()]
+        assert table.column("year").to_pylist() == [2020, 2021, None]
+        # 先頭ゼロを保ち、引用符付きの空文字はnullにしない
+        assert table.column("region_code").to_pylist() == ["01000", "", "13000"]
+        assert table.column("value").to_pylist() == [1.5, None, 3.0]
+        assert table.column("time").to_pylist()[0] == datetime.date(2020, 1, 1)
+
+    def test_read_parquet_prefix(self, s3_client):
+        for i in range(3):
+            output = io.BytesIO()
+            pq.write_table(pa.table({"year": [2020 + i]}), output)
+            s3_client.put_object(Bucket="bucket", Key=f"unload/1/part{i}", Body=output.getvalue())
+        s3_client.put_object(Bucket="bucket", Key="unload/2/part0", Body=b"other")
+
+        table = read_parquet_prefix(s3_client, "s3://bucket/unload/1/")
+        assert sorted(table.column("year").to_pylist()) == [2020, 2021, 2022]
+
+    def test_delete_prefix(self, s3_client):
+        for i in range(3):
+            s3_client.put_object(Bucket="bucket", Key=f"unload/1/part{i}", Body=b"x")
+        s3_client.put_object(Bucket="bucket", Key="unload/10/part0", Body=b"x")
+
+        assert delete_prefix(s3_client, "s3://bucket/unload/1/") == 3
+        assert list(s3_client.objects) == [("bucket", "unload/10/part0")]
+
+    def test_empty_unload(self, s3_client):
+        schema = pa.schema([("year", pa.int32())])
+        assert read_parquet_prefix(s3_client, "s3://bucket/unload/none/", schema).schema == schema
+
+
+class TestExecuteArrow:
+    """AthenaExecutor.execute_arrowのテストクラス"""
+
+    def test_csv_result(self, s3_client):
+        athena_client = ResultWritingAthenaClient(s3_client)
+        success, table = asyncio.run(AthenaExecutor(athena_client).execute_arrow("SELECT * FROM t", "db", s3_client))
+
+        assert success
+        assert table.num_rows == 3
+        # 列型の取得だけに get_query_results を使う
+        assert len(athena_client.result_calls) == 1
+
+    def test_unload_result(self, s3_client):
+        athena_client = ResultWritingAthenaClient(s3_client)
+        success, table = asyncio.run(AthenaExecutor(athena_client).execute_arrow(
+            "SELECT year, value FROM t", "db", s3_client, unload_location="s3://bucket/unload/x/"
+        ))
+
+        assert success
+        assert athena_client.queries[0].startswith("UNLOAD (SELECT year, value FROM t)")
+        assert table.column("value").to_pylist() == [1.5, 2.5]
+        assert athena_client.result_calls == []
+        # 一時的な出力先は読み込み後に削除する
+        assert not any(key.startswith("unload/x/") for _, key in s3_client.objects)
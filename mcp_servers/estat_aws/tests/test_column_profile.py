@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+列プロファイルのテスト
+
+HyperLogLog・t-digest・パーティション集計と、プロファイルからの基本分析をテスト
+"""
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from mcp_servers.estat_aws.utils.column_profile import (
+    HyperLogLog,
+    TDigest,
+    basic_statistics,
+    hash_values,
+    merge_profiles,
+    profile_chain,
+    profile_key_for,
+    profile_table,
+    registration_metadata
+)
+
+
+@pytest.fixture
+def table():
+    return pa.table({
+        "stats_data_id": pa.array(["0001"] * 6).dictionary_encode(),
+        "year": pa.array([2020, 2020, 2021, 2021, 2021, None], type=pa.int32()),
+        "region_code": pa.array(["13000", "27000", "13000", "27000", "13000", "13000"]).dictionary_encode(),
+        "value": pa.array([1.0, 3.0, None, 5.0, 7.0, 100.0]),
+    })
+
+
+class TestSketches:
+    """HyperLogLog・t-digestのテストクラス"""
+
+    def test_hll_estimate(self):
+        values = pa.array(np.arange(50000) % 20000)
+        hll = HyperLogLog().add_hashes(hash_values(values))
+        assert abs(hll.estimate() - 20000) / 20000 < 0.05
+
+        restored = HyperLogLog.from_dict(json.loads(json.dumps(hll.to_dict())))
+        assert restored.estimate() == hll.estimate()
+
+    def test_hll_merge_counts_overlap_once(self):
+        first = HyperLogLog().add_hashes(hash_values(pa.array([str(i) for i in range(3000)])))
+        second = HyperLogLog().add_hashes(hash_values(pa.array([str(i) for i in range(2000, 5000)])))
+        assert abs(first.merge(second).estimate() - 5000) / 5000 < 0.05
+
+    def test_small_cardinality_is_exact(self):
+        hll = HyperLogLog().add_hashes(hash_values(pa.array(["a", "b", "a", None]).dictionary_encode()))
+        assert hll.estimate() == 2
+
+    def test_tdigest_quantiles(self):
+        values = np.random.default_rng(0).normal(0, 1, 100000)
+        digest = TDigest.from_values(values[:50000]).merge(TDigest.from_values(values[50000:]))
+
+        for q in (0.01, 0.5, 0.99):
+            assert digest.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.02)
+        assert len(digest.means) < 200
+
+
+class TestProfileTable:
+    """profile_tableのテストクラス"""
+
+    def test_column_profile(self, table):
+        profile = profile_table(table, partition_by=["year", "region_code"], dataset_id="0001")
+
+        assert profile["dataset_id"] == "0001"
+        assert profile["row_count"] == 6
+        value = profile["columns"]["value"]
+        assert (value["count"], value["null_count"]) == (5, 1)
+        assert (value["min"], value["max"], value["sum"]) == (1.0, 100.0, 116.0)
+        assert profile["columns"]["region_code"]["distinct_estimate"] == 2
+        assert profile["columns"]["region_code"]["min"] == "13000"
+
+    def test_partitions(self, table):
+        profile = profile_table(table, partition_by=["year", "region_code"])
+        partitions = profile["partitions"][0]
+
+        assert partitions["keys"] == ["year", "region_code"]
+        assert partitions["values"]["year"] == [2020, 2020, 2021, 2021, None]
+        assert partitions["row_count"] == [1, 1, 2, 1, 1]
+        assert partitions["columns"]["value"]["count"] == [1, 1, 1, 1, 1]
+        assert partitions["columns"]["value"]["sum"] == [1.0, 3.0, 7.0, 5.0, 100.0]
+
+    def test_basic_statistics_from_merged_profiles(self, table):
+        profile = json.loads(json.dumps(profile_table(table, partition_by=["year", "region_code"])))
+        results = basic_statistics(merge_profiles([profile, profile]))
+
+        assert results["total_records"] == 12
+        assert results["statistics"] == {
+            "count": 10, "avg_value": 23.2, "min_value": 1.0, "max_value": 100.0, "sum_value": 232.0
+        }
+        # year が null のパーティションは年別集計に含めない
+        assert results["by_year"] == [
+            {"year": 2020, "count": 4, "avg_value": 2.0},
+            {"year": 2021, "count": 4, "avg_value": 6.0},
+        ]
+        assert results["distinct"]["region_code"] == 2
+
+    def test_profile_key_for(self):
+        assert profile_key_for("processed/0001_20240101") == "processed/0001_20240101/_profile.json"
+        assert profile_key_for("processed/0001/") == "processed/0001/_profile.json"
+        assert profile_key_for("processed/0001.parquet") == "processed/_0001_profile.json"
+
+
+class TestProfileChain:
+    """profile_chainのテストクラス"""
+
+    def test_chain_to_empty_table(self):
+        registrations = [
+            (registration_metadata("v2", "v1", base_empty=False), {"id": "second"}),
+            (registration_metadata("v1", "v0", base_empty=True), {"id": "first"}),
+            # 再作成前のテーブルのプロファイルはたどらない
+            (registration_metadata("old", "older", base_empty=True), {"id": "old"}),
+        ]
+        assert [p["id"] for p in profile_chain(registrations, "v2")] == ["second", "first"]
+
+    def test_load_without_profile(self):
+        # v1 の前にプロファイルの無い投入がある（起点が空のテーブルではない）
+        registrations = [(registration_metadata("v2", "v1", base_empty=False), {})]
+        assert profile_chain(registrations, "v2") is None
+
+    def test_table_changed_after_last_profile(self):
+        # 同じParquetの再投入などでバージョンが進んだ場合
+        registrations = [(registration_metadata("v1", "v0", base_empty=True), {})]
+        assert profile_chain(registrations, "v2") is None
+        assert profile_chain(registrations, None) is None
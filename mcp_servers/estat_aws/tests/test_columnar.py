@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+列指向変換ユーティリティのテスト
+
+build_value_tableの列構築・数値パースをテスト
+"""
+
+from datetime import datetime
+
+import pyarrow as pa
+import pytest
+
+from mcp_servers.estat_aws.utils.columnar import (
+    build_value_table,
+    filter_records,
+    parse_numeric
+)
+
+
+@pytest.fixture
+def values():
+    return [
+        {"@area": "13000", "@cat01": "001", "@time": "2020", "@unit": "人", "$": "1,234"},
+        {"@area": "13000", "@cat01": "002", "@time": "2021", "@unit": "人", "$": "567.5"},
+        {"@area": "27000", "@cat01": "001", "@time": "2020", "@unit": "人", "$": "-"},
+        {"@area": "27000", "@cat01": "002", "@time": "2021", "$": "890"},
+    ]
+
+
+class TestParseNumeric:
+    """parse_numericのテストクラス"""
+
+    def test_markers_become_null(self):
+        column = pa.array(["1", " 2.5 ", "-", "…", "x", "***", "", None, "1e3", "-4"])
+        assert parse_numeric(column).to_pylist() == [
+            1.0, 2.5, None, None, None, None, None, None, 1000.0, -4.0
+        ]
+
+    def test_numeric_input(self):
+        assert parse_numeric(pa.array([1, 2])).to_pylist() == [1.0, 2.0]
+
+
+class TestBuildValueTable:
+    """build_value_tableのテストクラス"""
+
+    def test_generic_columns(self, values):
+        updated_at = datetime(2024, 1, 1, 12, 0, 0)
+        table = build_value_table(values, "generic", "0003448237", updated_at)
+
+        assert table.column_names == [
+            "stats_data_id", "value", "unit", "updated_at", "year", "region_code", "category"
+        ]
+        assert table.column("stats_data_id").to_pylist() == ["0003448237"] * 4
+        assert table.column("value").to_pylist() == [None, 567.5, None, 890.0]
+        assert table.column("unit").to_pylist() == ["人", "人", "人", ""]
+        assert table.column("year").to_pylist() == [2020, 2021, 2020, 2021]
+        assert table.column("region_code").to_pylist() == ["13000", "13000", "27000", "27000"]
+        assert table.column("updated_at").to_pylist() == [updated_at] * 4
+
+    def test_code_columns_are_dictionary_encoded(self, values):
+        table = build_value_table(values, "generic", "0003448237")
+        for name in ("stats_data_id", "unit", "region_code", "category"):
+            assert pa.types.is_dictionary(table.schema.field(name).type)
+
+    def test_economy_columns(self, values):
+        table = build_value_table(values, "economy", "0003448237")
+        assert table.column("quarter").to_pylist() == [0] * 4
+        assert table.column("indicator").to_pylist() == ["001", "002", "001", "002"]
+
+    def test_population_columns(self, values):
+        table = build_value_table(values, "population", "0003448237")
+        assert table.column("region_code").to_pylist() == ["001", "002", "001", "002"]
+        assert table.column("region_name").to_pylist() == [""] * 4
+
+    def test_mixed_value_types_and_non_dict(self):
+        values = [{"$": 10, "@time": "2020"}, {"$": "20", "@time": "2020"}, "invalid"]
+        assert len(filter_records(values)) == 2
+
+        table = build_value_table(values, "generic", "x")
+        assert table.column("value").to_pylist() == [10.0, 20.0]
+
+    def test_missing_fields_use_defaults(self):
+        table = build_value_table([{"$": "1"}], "generic", "x")
+        assert table.column("year").to_pylist() == [2020]
+        assert table.column("region_code").to_pylist() == [""]
+
+    def test_estat_time_codes(self):
+        values = [
+            {"@time": "2020000000", "$": "1"},
+            {"@time": "2020001010", "$": "2"},
+            {"@time": "2021000103", "$": "3"},
+        ]
+        table = build_value_table(values, "economy", "x")
+        assert table.column("year").to_pylist() == [2020, 2020, 2021]
+        assert table.column("quarter").to_pylist() == [0, 4, 1]
+        assert table.schema.field("year").type == pa.int32()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+ストリーミングCSVエクスポートのテスト
+
+マルチパートアップロード・ラベル列の付与・ファイル分割・Arrow IPC / Parquet出力をテスト
+"""
+
+import csv
+import io
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+
+from mcp_servers.estat_aws.utils.columnar import build_record_table
+from mcp_servers.estat_aws.utils.csv_export import (
+    S3MultipartWriter,
+    convert_export_bytes,
+    export_records_to_s3,
+    export_table_to_s3,
+    format_for_key,
+    read_table,
+    record_columns,
+    replace_extension,
+    write_arrow_csv,
+    write_records_csv
+)
+
+
+def _read_csv(body):
+    return list(csv.reader(io.StringIO(body.decode("utf-8-sig"))))
+
+
+@pytest.fixture
+def records():
+    return [
+        {"@area": "13000", "@cat01": "001", "@time": "2020000000", "$": "100"},
+        {"@area": "27000", "@cat01": "001", "@time": "2020000000", "$": "200"},
+        {"@area": "99999", "@cat01": "001", "@time": "2020000000", "$": "-", "@unit": "人"},
+    ]
+
+
+class TestWriteRecordsCsv:
+    """write_records_csvのテストクラス"""
+
+    def test_columns_in_first_seen_order(self, records):
+        assert record_columns(records) == ["@area", "@cat01", "@time", "$", "@unit"]
+
+    def test_label_columns_follow_codes(self, records):
+        stream = io.BytesIO()
+        rows = write_records_csv(
+            stream, records, record_columns(records),
+            label_maps={"area": {"13000": "東京都", "27000": "大阪府"}}
+        )
+
+        assert rows == 3
+        body = stream.getvalue()
+        assert body.startswith(b"\xef\xbb\xbf")
+        lines = _read_csv(body)
+        assert lines[0] == ["@area", "area_name", "@cat01", "@time", "$", "@unit"]
+        assert lines[1] == ["13000", "東京都", "001", "2020000000", "100", ""]
+        # 未知のコードのラベルは空
+        assert lines[3][:2] == ["99999", ""]
+
+    def test_arrow_batches(self):
+        table = pa.table({"area": ["13000", "27000"], "value": [1.5, None]})
+        stream = io.BytesIO()
+
+        assert write_arrow_csv(stream, table.to_batches(max_chunksize=1)) == 2
+        lines = _read_csv(stream.getvalue())
+        assert lines[0] == ["area", "value"]
+        assert lines[1:] == [["13000", "1.5"], ["27000", ""]]
+
+
+class TestS3MultipartWriter:
+    """S3MultipartWriterのテストクラス"""
+
+    def test_small_object_uses_put_object(self, s3_client):
+        with S3MultipartWriter(s3_client, "bucket", "small.csv") as writer:
+            writer.write(b"a,b\n")
+
+        assert s3_client.objects[("bucket", "small.csv")] == b"a,b\n"
+        assert s3_client.uploads == {}
+
+    def test_large_object_uses_parts(self, s3_client):
+        writer = S3MultipartWriter(s3_client, "bucket", "large.csv", part_size=0)
+        chunk = b"x" * (writer.part_size // 2 + 1)
+        for _ in range(3):
+            writer.write(chunk)
+        writer.close()
+
+        assert s3_client.objects[("bucket", "large.csv")] == chunk * 3
+        assert writer.bytes_written == len(chunk) * 3
+
+    def test_error_aborts_upload(self, s3_client):
+        with pytest.raises(RuntimeError):
+            with S3MultipartWriter(s3_client, "bucket", "broken.csv", part_size=0) as writer:
+                writer.write(b"x" * writer.part_size)
+                raise RuntimeError("boom")
+
+        assert s3_client.aborted == ["broken.csv"]
+        assert ("bucket", "broken.csv") not in s3_client.objects
+
+
+class TestExportRecordsToS3:
+    """export_records_to_s3のテストクラス"""
+
+    def test_single_file(self, records, s3_client):
+        result = export_records_to_s3(s3_client, records, "bucket", "csv/0001.csv")
+
+        assert result["rows"] == 3
+        assert [f["key"] for f in result["files"]] == ["csv/0001.csv"]
+        assert len(_read_csv(s3_client.objects[("bucket", "csv/0001.csv")])) == 4
+
+    def test_rows_per_file(self, records, s3_client):
+        result = export_records_to_s3(s3_client, records, "bucket", "csv/0001.csv", rows_per_file=2)
+
+        assert [(f["key"], f["rows"]) for f in result["files"]] == [
+            ("csv/0001_part00001.csv", 2),
+            ("csv/0001_part00002.csv", 1),
+        ]
+        # 各ファイルにヘッダーが付く
+        second = _read_csv(s3_client.objects[("bucket", "csv/0001_part00002.csv")])
+        assert second[0] == result["columns"]
+        assert second[1][0] == "99999"
+
+
+class TestExportFormats:
+    """Arrow IPC / Parquet出力のテストクラス"""
+
+    def test_format_for_key(self):
+        assert format_for_key("csv/0001.csv") == "csv"
+        assert format_for_key("export/0001.FEATHER") == "feather"
+        assert format_for_key("export/0001") == "csv"
+        assert replace_extension("0001.csv", "parquet") == "0001.parquet"
+        assert replace_extension("0001", "arrow") == "0001.arrow"
+
+    def test_record_table_types(self, records):
+        table = build_record_table(records, {})
+
+        assert pa.types.is_dictionary(table.schema.field("@area").type)
+        assert table.schema.field("value").type == pa.float64()
+        # 元の記号（$）は残し、value は null
+        assert table.column("$").to_pylist()[2] == "-"
+        assert table.column("value").to_pylist() == [100.0, 200.0, None]
+
+    @pytest.mark.parametrize("export_format", ["arrow", "feather", "parquet"])
+    def test_export_table(self, records, export_format, s3_client):
+        table = build_record_table(records, {})
+        result = export_table_to_s3(
+            s3_client, table, "bucket", f"export/0001.{export_format}", export_format, rows_per_file=2
+        )
+
+        assert [f["rows"] for f in result["files"]] == [2, 1]
+        first = result["files"][0]["key"]
+        assert first == f"export/0001_part00001.{export_format}"
+        assert s3_client.content_types[("bucket", first)] != "text/csv"
+        body = s3_client.objects[("bucket", first)]
+        assert read_table(body, export_format).to_pylist() == table.slice(0, 2).to_pylist()
+
+    def test_arrow_file_is_compressed_and_mappable(self, records, tmp_path, s3_client):
+        export_table_to_s3(
+            s3_client, build_record_table(records, {}), "bucket", "0001.arrow", "arrow", compression="zstd"
+        )
+        path = tmp_path / "0001.arrow"
+        path.write_bytes(s3_client.objects[("bucket", "0001.arrow")])
+
+        with pa.memory_map(str(path)) as source:
+            table = ipc.open_file(source).read_all()
+        assert table.column("value").to_pylist() == [100.0, 200.0, None]
+
+    def test_convert_csv_keeps_codes(self):
+        body = "\ufeff@area,$\n01000,12\n02000,-\n".encode("utf-8")
+        converted = convert_export_bytes(body, "csv", "parquet")
+
+        table = pq.read_table(pa.BufferReader(converted))
+        assert table.column("@area").to_pylist() == ["01000", "02000"]
+        assert table.column("value").to_pylist() == [12.0, None]
+        assert convert_export_bytes(body, "csv", "csv") is body
+
+    def test_unknown_format(self, records, s3_client):
+        with pytest.raises(ValueError):
+            export_table_to_s3(s3_client, build_record_table(records, {}), "bucket", "x", "xlsx")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+和名ラベル変換ユーティリティのテスト
+
+CLASS_INFからのラベルインデックス作成と辞書型ラベル列の付与をテスト
+"""
+
+import pyarrow as pa
+import pytest
+
+from mcp_servers.estat_aws.utils.columnar import build_value_table
+from mcp_servers.estat_aws.utils.labels import (
+    build_label_index,
+    extract_class_inf,
+    label_column,
+    label_records
+)
+
+
+@pytest.fixture
+def class_inf():
+    return {
+        "CLASS_OBJ": [
+            {
+                "@id": "area",
+                "@name": "地域",
+                "CLASS": [
+                    {"@code": "13000", "@name": "東京都"},
+                    {"@code": "27000", "@name": "大阪府"},
+                ]
+            },
+            {
+                "@id": "cat01",
+                "@name": "男女別",
+                # 要素が1つの場合は辞書で返される
+                "CLASS": {"@code": "001", "@name": "総数"}
+            },
+        ]
+    }
+
+
+@pytest.fixture
+def label_index(class_inf):
+    return build_label_index(class_inf)
+
+
+class TestExtractClassInf:
+    """extract_class_infのテストクラス"""
+
+    def test_stats_data_response(self, class_inf):
+        response = {"GET_STATS_DATA": {"STATISTICAL_DATA": {"CLASS_INF": class_inf}}}
+        assert extract_class_inf(response) is class_inf
+
+    def test_meta_info_response(self, class_inf):
+        response = {"GET_META_INFO": {"METADATA_INF": {"CLASS_INF": class_inf}}}
+        assert extract_class_inf(response) is class_inf
+
+    def test_missing(self):
+        assert extract_class_inf({}) is None
+        assert extract_class_inf(None) is None
+
+
+class TestLabelColumn:
+    """label_columnのテストクラス"""
+
+    def test_build_label_index(self, label_index):
+        assert set(label_index) == {"area", "cat01"}
+        codes, labels = label_index["cat01"]
+        assert codes.to_pylist() == ["001"]
+        assert labels.to_pylist() == ["総数"]
+
+    def test_dictionary_codes_reuse_indices(self, label_index):
+        codes = pa.array(["13000", "27000", "13000", "99999"]).dictionary_encode()
+        labels = label_column(codes, label_index["area"])
+
+        assert pa.types.is_dictionary(labels.type)
+        assert labels.indices.equals(codes.indices.cast(pa.int32()))
+        assert labels.to_pylist() == ["東京都", "大阪府", "東京都", ""]
+
+    def test_plain_codes_and_nulls(self, label_index):
+        labels = label_column(pa.array(["27000", None]), label_index["area"])
+        assert labels.to_pylist() == ["大阪府", None]
+
+    def test_label_records(self, label_index):
+        records = [{"@area": "13000", "$": "1"}, {"@cat01": "001", "$": "2"}]
+        labeled = label_records(records, label_index)
+
+        assert labeled[0]["area_name"] == "東京都"
+        assert "cat01_name" not in labeled[0]
+        assert labeled[1]["cat01_name"] == "総数"
+        # 元のレコードは変更しない
+        assert "area_name" not in records[0]
+
+
+class TestBuildValueTableLabels:
+    """build_value_tableのラベル列のテストクラス"""
+
+    def test_generic_label_columns(self, label_index):
+        values = [
+            {"@area": "13000", "@cat01": "001", "@time": "2020", "$": "1"},
+            {"@area": "27000", "@cat01": "001", "@time": "2020", "$": "2"},
+        ]
+        table = build_value_table(values, "generic", "x", label_index=label_index)
+
+        assert table.column_names[-4:] == ["region_code", "region_code_name", "category", "category_name"]
+        assert table.column("region_code_name").to_pylist() == ["東京都", "大阪府"]
+        assert table.column("category_name").to_pylist() == ["総数", "総数"]
+
+    def test_population_region_name(self, label_index):
+        values = [{"@cat01": "001", "$": "1"}]
+        table = build_value_table(values, "population", "x", label_index=label_index)
+
+        assert table.column("region_name").to_pylist() == ["総数"]
+        assert "region_code_name" not in table.column_names
+
+    def test_without_label_index(self):
+        table = build_value_table([{"@area": "13000", "$": "1"}], "generic", "x")
+        assert "region_code_name" not in table.column_names
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Athenaクエリ結果キャッシュのテスト
+
+SQLの正規化・テーブル参照の抽出・LRU/有効期限と、実行クラスでのキャッシュ・結果再利用の指定をテスト
+"""
+
+import asyncio
+
+from mcp_servers.estat_aws.tests.conftest import FakeAthenaClient
+from mcp_servers.estat_aws.utils.athena_executor import AthenaExecutor
+from mcp_servers.estat_aws.utils.query_cache import (
+    QueryResultCache,
+    normalize_sql,
+    table_references,
+    table_version
+)
+
+
+def _count_client():
+    """COUNT(*) の結果（n = 42）を返すAthenaクライアント"""
+    return FakeAthenaClient(columns=[{"Name": "n", "Type": "bigint"}], result_rows=[["42"]])
+
+
+class FakeGlueClient:
+    """テーブルのパラメータを返すGlueクライアント"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def get_table(self, DatabaseName, Name):
+        if Name not in self.tables:
+            raise KeyError(Name)
+        return {"Table": self.tables[Name]}
+
+
+class TestNormalizeSql:
+    """SQLの正規化のテストクラス"""
+
+    def test_whitespace_comments_and_case(self):
+        first = "SELECT  year,\n  COUNT(*) -- 件数\nFROM estat_db.population;"
+        second = "select year, count(*) /* 件数 */ from ESTAT_DB.population"
+        assert normalize_sql(first) == normalize_sql(second) == "select year, count(*) from estat_db.population"
+
+    def test_literals_are_kept(self):
+        assert normalize_sql("SELECT * FROM t WHERE name = 'Tokyo  City'") == "select * from t where name = 'Tokyo  City'"
+        assert normalize_sql("SELECT 'A'") != normalize_sql("SELECT 'a'")
+
+    def test_table_references(self):
+        query = 'SELECT * FROM estat_db."Population" p JOIN regions r ON p.code = r.code'
+        assert table_references(query, "estat_db") == [("estat_db", "population"), ("estat_db", "regions")]
+
+    def test_comma_joins(self):
+        assert table_references("SELECT * FROM a, b x, estat_db.c AS y", "estat_db") == [
+            ("estat_db", "a"), ("estat_db", "b"), ("estat_db", "c")
+        ]
+        query = "SELECT * FROM (SELECT * FROM a) x, b CROSS JOIN UNNEST(b.items) AS u(item)"
+        assert sorted(table_references(query, "estat_db")) == [("estat_db", "a"), ("estat_db", "b")]
+
+    def test_unparsed_from_clause(self):
+        # 参照するテーブルを確定できない場合はキャッシュしない
+        assert table_references("SELECT * FROM a LATERAL VIEW explode(items) t AS item", "estat_db") is None
+
+
+class TestQueryResultCache:
+    """QueryResultCacheのテストクラス"""
+
+    def test_lru_eviction(self):
+        cache = QueryResultCache(max_entries=2)
+        for i in range(3):
+            cache.put(("k", i), i)
+
+        assert cache.get(("k", 0)) is None
+        assert cache.get(("k", 2)) == 2
+        assert cache.stats() == {"entries": 2, "hits": 1, "misses": 1}
+
+    def test_ttl(self):
+        cache = QueryResultCache(ttl_seconds=-1)
+        cache.put(("k",), 1)
+        assert cache.get(("k",)) is None
+
+    def test_disabled(self):
+        cache = QueryResultCache(max_entries=0)
+        cache.put(("k",), 1)
+        assert cache.get(("k",)) is None
+
+    def test_table_version(self):
+        glue_client = FakeGlueClient({
+            "population": {"Parameters": {"metadata_location": "s3://bucket/metadata/00002.metadata.json"}},
+            "regions": {"Parameters": {}, "VersionId": "3"},
+        })
+        assert table_version(glue_client, "estat_db", "population") == "s3://bucket/metadata/00002.metadata.json"
+        assert table_version(glue_client, "estat_db", "regions") == "estat_db.regions@3"
+        assert table_version(glue_client, "estat_db", "missing") is None
+
+
+class TestExecutorCache:
+    """AthenaExecutorのキャッシュのテストクラス"""
+
+    def test_same_version_is_cached(self):
+        client = _count_client()
+        executor = AthenaExecutor(client, cache=QueryResultCache())
+
+        first = asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=["v1"]))
+        second = asyncio.run(executor.execute("select count(*)\nfrom t;", "db", versions=["v1"]))
+
+        assert first == second == (True, [[42]])
+        assert len(client.start_calls) == 1
+
+    def test_new_version_reruns_query(self):
+        client = _count_client()
+        executor = AthenaExecutor(client, cache=QueryResultCache())
+
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=["v1"]))
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=["v2"]))
+        # バージョンが分からないテーブルを参照するクエリはキャッシュしない
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=[None]))
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=[None]))
+
+        assert len(client.start_calls) == 4
+
+    def test_cached_page_keeps_execution_id(self):
+        client = _count_client()
+        executor = AthenaExecutor(client, cache=QueryResultCache())
+
+        first = asyncio.run(executor.execute_page("SELECT n FROM t", "db", versions=["v1"]))
+        second = asyncio.run(executor.execute_page("SELECT n FROM t", "db", versions=["v1"]))
+
+        assert second == first
+        assert second["query_execution_id"] == "q-0"
+        assert len(client.start_calls) == 1
+
+    def test_result_reuse_only_for_select(self):
+        client = _count_client()
+        executor = AthenaExecutor(client, result_reuse_minutes=30)
+
+        asyncio.run(executor.execute("WITH x AS (SELECT 1) SELECT * FROM x", "db"))
+        asyncio.run(executor.execute("INSERT INTO t SELECT * FROM s", "db"))
+
+        assert client.start_calls[0]["ResultReuseConfiguration"] == {
+            "ResultReuseByAgeConfiguration": {"Enabled": True, "MaxAgeInMinutes": 30}
+        }
+        assert "ResultReuseConfiguration" not in client.start_calls[1]
+
+    def test_no_result_reuse_when_versions_known(self):
+        client = _count_client()
+        executor = AthenaExecutor(client, result_reuse_minutes=30)
+
+        # 投入直後にAthenaが投入前の結果を再利用しないよう、バージョンが分かる場合は無効にする
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=["v2"]))
+        asyncio.run(executor.execute_page("SELECT COUNT(*) FROM t", "db", versions=["v2"]))
+        asyncio.run(executor.execute("SELECT COUNT(*) FROM t", "db", versions=[None]))
+
+        assert "ResultReuseConfiguration" not in client.start_calls[0]
+        assert "ResultReuseConfiguration" not in client.start_calls[1]
+        assert "ResultReuseConfiguration" in client.start_calls[2]
@@ -0,0 +1,156 @@
+"""
+analyze_with_athena の集計クエリ
+
+基本分析・高度分析の各集計（全体統計・年別・地域別・カテゴリ別・時系列）を
+GROUPING SETS で1つのクエリにまとめ、テーブルのスキャンを1回にします。
+結果の行は GROUPING() の値でどの集計の行かを判別し、従来のレスポンスの各項目に振り分けます。
+"""
+
+from typing import Any, Dict, List, Optional
+
+# 地域別・カテゴリ別・年別（基本分析）で返す件数
+TOP_N = 10
+
+# GROUPING(region_code, category, year) の値（集計に使わない列のビットが1）
+GROUPING_REGION = 0b011
+GROUPING_CATEGORY = 0b101
+GROUPING_YEAR = 0b110
+
+
+def basic_analysis_query(table: str) -> str:
+    """
+    基本分析（レコード数・全体統計・年別集計）のクエリ
+
+    Args:
+        table: データベース名付きのテーブル名
+
+    Returns:
+        SQLクエリ
+    """
+    return f"""
+    SELECT
+        GROUPING(year) AS grouping_id,
+        year,
+        COUNT(*) AS total_records,
+        COUNT(value) AS count,
+        AVG(value) AS avg_value,
+        MIN(value) AS min_value,
+        MAX(value) AS max_value,
+        SUM(value) AS sum_value
+    FROM {table}
+    GROUP BY GROUPING SETS ((), (year))
+    """
+
+
+def advanced_analysis_query(table: str, top_n: int = TOP_N) -> str:
+    """
+    高度分析（地域別・カテゴリ別の上位と時系列トレンド）のクエリ
+
+    Args:
+        table: データベース名付きのテーブル名
+        top_n: 地域別・カテゴリ別で返す件数
+
+    Returns:
+        SQLクエリ
+    """
+    return f"""
+    WITH grouped AS (
+        SELECT
+            GROUPING(region_code, category, year) AS grouping_id,
+            region_code,
+            category,
+            year,
+            COUNT(*) AS count,
+            AVG(value) AS avg_value,
+            SUM(value) AS sum_value,
+            MIN(value) AS min_value,
+            MAX(value) AS max_value
+        FROM {table}
+        WHERE value IS NOT NULL
+        GROUP BY GROUPING SETS ((region_code), (category), (year))
+    ),
+    ranked AS (
+        SELECT
+            grouped.*,
+            ROW_NUMBER() OVER (
+                PARTITION BY grouping_id
+                ORDER BY CASE grouping_id
+                    WHEN {GROUPING_REGION} THEN sum_value
+                    WHEN {GROUPING_CATEGORY} THEN CAST(count AS DOUBLE)
+                END DESC
+            ) AS row_rank
+        FROM grouped
+        WHERE grouping_id <> {GROUPING_CATEGORY} OR category IS NOT NULL
+    )
+    SELECT grouping_id, region_code, category, year, count, avg_value, sum_value, min_value, max_value
+    FROM ranked
+    WHERE grouping_id = {GROUPING_YEAR} OR row_rank <= {top_n}
+    """
+
+
+def _by_year_key(year: Optional[int]):
+    # ORDER BY year と同じく null を最後にする
+    return (year is None, year or 0)
+
+
+def split_basic_rows(rows: List[List[Any]], top_n: int = TOP_N) -> Dict[str, Any]:
+    """
+    基本分析の結果行を total_records / statistics / by_year に振り分け
+
+    Args:
+        rows: basic_analysis_query の結果行
+        top_n: 年別集計で返す件数
+
+    Returns:
+        基本分析の結果
+    """
+    total = next((row for row in rows if row[0] == 1), None)
+    years = sorted((row for row in rows if row[0] == 0 and row[3]), key=lambda row: _by_year_key(row[1]))
+
+    results: Dict[str, Any] = {"total_records": None, "statistics": None}
+    if total is not None:
+        results["total_records"] = int(total[2]) if total[2] else 0
+        results["statistics"] = {
+            "count": int(total[3]) if total[3] else 0,
+            "avg_value": float(total[4]) if total[4] else 0.0,
+            "min_value": float(total[5]) if total[5] else 0.0,
+            "max_value": float(total[6]) if total[6] else 0.0,
+            "sum_value": float(total[7]) if total[7] else 0.0
+        }
+    results["by_year"] = [
+        {
+            "year": int(row[1]) if row[1] else 0,
+            "count": int(row[3]) if row[3] else 0,
+            "avg_value": float(row[4]) if row[4] else 0.0
+        }
+        for row in years[:top_n]
+    ]
+    return results
+
+
+def split_advanced_rows(rows: List[List[Any]]) -> Dict[str, Any]:
+    """
+    高度分析の結果行を by_region / by_category / trend に振り分け
+
+    各項目の行は従来の個別クエリと同じ列構成です。
+
+    Args:
+        rows: advanced_analysis_query の結果行
+
+    Returns:
+        高度分析の結果
+    """
+    by_grouping: Dict[int, List[List[Any]]] = {GROUPING_REGION: [], GROUPING_CATEGORY: [], GROUPING_YEAR: []}
+    for row in rows:
+        if row[0] in by_grouping:
+            by_grouping[row[0]].append(row)
+
+    regions = sorted(by_grouping[GROUPING_REGION], key=lambda row: row[6] or 0, reverse=True)
+    categories = sorted(by_grouping[GROUPING_CATEGORY], key=lambda row: row[4] or 0, reverse=True)
+    years = sorted(by_grouping[GROUPING_YEAR], key=lambda row: _by_year_key(row[3]))
+
+    return {
+        "by_region": [[row[1], row[4], row[5], row[6]] for row in regions],
+        "by_category": [[row[2], row[4], row[5]] for row in categories],
+        "trend": [[row[3], row[5], row[7], row[8]] for row in years]
+    }
@@ -0,0 +1,575 @@
+"""
+非同期Athenaクエリ実行
+
+boto3の呼び出しをスレッドで実行し、完了待ちはイベントループ上で指数バックオフしながら
+ポーリングします。同時に実行中のクエリ数はセマフォで制限し、ワークグループの同時実行
+クォータを超える分は待ち行列に入れます。TooManyRequestsException はバックオフして再送します。
+結果は NextToken でページを順に読み、結果セットの列型に従って値を変換します。
+大きな結果は出力先のCSV（または UNLOAD したParquet）をS3から直接Arrowテーブルとして読み込めます。
+テーブルのバージョンを渡すと結果をキャッシュし、バージョンが分からないSELECTだけAthenaの結果再利用に任せます。
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .query_cache import QueryResultCache, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# 使用するワークグループ（出力場所はワークグループの設定を使う）
+ATHENA_WORKGROUP = os.environ.get("ATHENA_WORKGROUP", "estat-mcp-workgroup")
+
+# 同時に実行するクエリ数の上限（ワークグループ/アカウントの同時実行クォータ以下にする）
+DEFAULT_MAX_CONCURRENT_QUERIES = int(os.environ.get("ATHENA_MAX_CONCURRENT_QUERIES", "5"))
+
+# 1クエリの最大待ち時間（秒）
+DEFAULT_QUERY_TIMEOUT = float(os.environ.get("ATHENA_QUERY_TIMEOUT", "300"))
+
+# ポーリング間隔（秒）: 初回から倍率をかけて上限まで延ばす
+INITIAL_POLL_INTERVAL = 0.2
+MAX_POLL_INTERVAL = 5.0
+POLL_BACKOFF = 1.5
+
+# Athenaの結果再利用で過去の結果を使う期間（分）。0で無効
+DEFAULT_RESULT_REUSE_MINUTES = int(os.environ.get("ATHENA_RESULT_REUSE_MINUTES", "60"))
+
+# スロットリング時の再送
+MAX_SUBMIT_RETRIES = 5
+SUBMIT_RETRY_DELAY = 1.0
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+# get_query_results の1ページあたりの最大行数（Athenaの上限）
+MAX_PAGE_SIZE = 1000
+
+THROTTLING_ERRORS = ("TooManyRequestsException", "ThrottlingException")
+
+
+def _run_in_thread(func: Callable, *args, **kwargs) -> "asyncio.Future":
+    """ブロッキング呼び出しをデフォルトのスレッドプールで実行（asyncio.to_thread はPython 3.9以降のため使わない）"""
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """スロットリング（同時実行・APIレート超過）のエラーか"""
+    code = getattr(error, "response", {}).get("Error", {}).get("Code", "")
+    return code in THROTTLING_ERRORS or type(error).__name__ in THROTTLING_ERRORS
+
+
+def is_read_query(query: str) -> bool:
+    """結果再利用の対象になる読み取りクエリ（SELECT / WITH）か"""
+    return normalize_sql(query).startswith(("select", "with"))
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+# Athenaの列型ごとの変換（ここに無い型は文字列のまま）
+TYPE_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "tinyint": int,
+    "smallint": int,
+    "integer": int,
+    "bigint": int,
+    "float": float,
+    "real": float,
+    "double": float,
+    "decimal": float,
+    "boolean": _to_bool,
+}
+
+
+def column_info(result_response: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    get_query_results のレスポンスから列名と型を取得
+
+    Args:
+        result_response: get_query_results のレスポンス
+
+    Returns:
+        {"name", "type"} のリスト
+    """
+    columns = result_response.get("ResultSet", {}).get("ResultSetMetadata", {}).get("ColumnInfo", [])
+    return [{"name": column.get("Name", ""), "type": column.get("Type", "varchar")} for column in columns]
+
+
+def convert_row(data: List[Dict[str, str]], columns: List[Dict[str, str]]) -> List[Any]:
+    """
+    1行の値を列型に従って変換（VarCharValue が無い値はnull）
+
+    Args:
+        data: 行の Data
+        columns: column_info の結果
+
+    Returns:
+        変換した値のリスト
+    """
+    row = []
+    for i, cell in enumerate(data):
+        value = cell.get("VarCharValue")
+        converter = TYPE_CONVERTERS.get(columns[i]["type"].lower()) if i < len(columns) else None
+        if value is not None and converter is not None:
+            try:
+                value = converter(value)
+            except ValueError:
+                pass
+        row.append(value)
+    return row
+
+
+def parse_rows(result_response: Dict[str, Any], skip_header: bool = True) -> List[List[Any]]:
+    """
+    get_query_results のレスポンスを行のリストに変換
+
+    Args:
+        result_response: get_query_results のレスポンス
+        skip_header: 先頭行が列名の場合に除くか（SELECTの結果の最初のページ）
+
+    Returns:
+        列型に従って変換した行のリスト
+    """
+    columns = column_info(result_response)
+    rows = result_response.get("ResultSet", {}).get("Rows", [])
+    if skip_header and rows and columns:
+        header = [cell.get("VarCharValue") for cell in rows[0].get("Data", [])]
+        if header == [column["name"] for column in columns]:
+            rows = rows[1:]
+    return [convert_row(row.get("Data", []), columns) for row in rows]
+
+
+class AthenaExecutor:
+    """非同期Athenaクエリ実行クラス"""
+
+    def __init__(
+        self,
+        athena_client,
+        workgroup: Optional[str] = ATHENA_WORKGROUP,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        timeout: float = DEFAULT_QUERY_TIMEOUT,
+        poll_interval: float = INITIAL_POLL_INTERVAL,
+        max_poll_interval: float = MAX_POLL_INTERVAL,
+        cache: Optional[QueryResultCache] = None,
+        result_reuse_minutes: int = DEFAULT_RESULT_REUSE_MINUTES
+    ):
+        """
+        Args:
+            athena_client: boto3 Athenaクライアント
+            workgroup: ワークグループ（Noneの場合は output_location を結果の出力先にする）
+            max_concurrent: 同時に実行するクエリ数の上限
+            timeout: 1クエリの最大待ち時間（秒）
+            poll_interval: 初回のポーリング間隔（秒）
+            max_poll_interval: ポーリング間隔の上限（秒）
+            cache: 結果のキャッシュ（テーブルのバージョンを渡したクエリだけ使う）
+            result_reuse_minutes: SELECTでAthenaの結果再利用を有効にする期間（分）。0で無効
+        """
+        self.athena_client = athena_client
+        self.workgroup = workgroup
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.cache = cache
+        self.result_reuse_minutes = result_reuse_minutes
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def start(self, query: str, database: str, output_location: Optional[str] = None,
+                    reuse_results: bool = True) -> str:
+        """
+        クエリを開始（スロットリング時はバックオフして再送）
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            reuse_results: SELECTでAthenaの結果再利用を有効にするか
+
+        Returns:
+            クエリ実行ID
+        """
+        params: Dict[str, Any] = {
+            "QueryString": query,
+            "QueryExecutionContext": {"Database": database}
+        }
+        if self.workgroup:
+            params["WorkGroup"] = self.workgroup
+        elif output_location:
+            params["ResultConfiguration"] = {"OutputLocation": output_location}
+        if reuse_results and self.result_reuse_minutes > 0 and is_read_query(query):
+            params["ResultReuseConfiguration"] = {
+                "ResultReuseByAgeConfiguration": {"Enabled": True, "MaxAgeInMinutes": self.result_reuse_minutes}
+            }
+
+        for attempt in range(MAX_SUBMIT_RETRIES + 1):
+            try:
+                response = await _run_in_thread(self.athena_client.start_query_execution, **params)
+                return response["QueryExecutionId"]
+            except Exception as e:
+                if not is_throttling_error(e) or attempt == MAX_SUBMIT_RETRIES:
+                    raise
+                delay = SUBMIT_RETRY_DELAY * (2 ** attempt)
+                logger.warning(f"Athena throttled, retrying in {delay:.1f}s ({attempt + 1}/{MAX_SUBMIT_RETRIES})")
+                await asyncio.sleep(delay)
+
+    async def wait(self, query_execution_id: str) -> Dict[str, Any]:
+        """
+        クエリの完了をバックオフしながら待つ（タイムアウト時はクエリを停止）
+
+        Args:
+            query_execution_id: クエリ実行ID
+
+        Returns:
+            get_query_execution の QueryExecution
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        interval = self.poll_interval
+
+        while True:
+            response = await _run_in_thread(
+                self.athena_client.get_query_execution, QueryExecutionId=query_execution_id
+            )
+            execution = response["QueryExecution"]
+            if execution["Status"]["State"] in TERMINAL_STATES:
+                return execution
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                try:
+                    await _run_in_thread(
+                        self.athena_client.stop_query_execution, QueryExecutionId=query_execution_id
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to stop query {query_execution_id}: {e}")
+                raise asyncio.TimeoutError(f"Query timeout after {self.timeout:.0f}s")
+
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, self.max_poll_interval)
+
+    async def fetch_page(self, query_execution_id: str, page_token: Optional[str] = None,
+                         page_size: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        結果を1ページ取得
+
+        Args:
+            query_execution_id: クエリ実行ID
+            page_token: 前のページの next_token（省略時は最初のページ）
+            page_size: 1ページの行数（最大1000）
+
+        Returns:
+            {"columns", "rows", "next_token"}（最後のページの next_token はNone）
+        """
+        params: Dict[str, Any] = {
+            "QueryExecutionId": query_execution_id,
+            "MaxResults": max(1, min(int(page_size), MAX_PAGE_SIZE))
+        }
+        if page_token:
+            params["NextToken"] = page_token
+
+        response = await _run_in_thread(self.athena_client.get_query_results, **params)
+        return {
+            "columns": column_info(response),
+            # 列名の行は最初のページにだけ含まれる
+            "rows": parse_rows(response, skip_header=not page_token),
+            "next_token": response.get("NextToken")
+        }
+
+    async def iter_pages(self, query_execution_id: str,
+                         page_size: int = MAX_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        結果の全ページを順に返す
+
+        Args:
+            query_execution_id: クエリ実行ID
+            page_size: 1ページの行数（最大1000）
+
+        Yields:
+            fetch_page と同じ形式のページ
+        """
+        page_token = None
+        while True:
+            page = await self.fetch_page(query_execution_id, page_token, page_size)
+            yield page
+            page_token = page["next_token"]
+            if not page_token:
+                return
+
+    async def fetch_rows(self, query_execution_id: str, max_rows: Optional[int] = None) -> List[List[Any]]:
+        """
+        クエリ結果の全行を取得（ヘッダー行を除く）
+
+        Args:
+            query_execution_id: クエリ実行ID
+            max_rows: 取得する最大行数（省略時は全行）
+
+        Returns:
+            列型に従って変換した行のリスト
+        """
+        rows: List[List[Any]] = []
+        async for page in self.iter_pages(query_execution_id):
+            rows.extend(page["rows"])
+            if max_rows is not None and len(rows) >= max_rows:
+                return rows[:max_rows]
+        return rows
+
+    async def run(self, query: str, database: str,
+                  output_location: Optional[str] = None,
+                  reuse_results: bool = True) -> Dict[str, Any]:
+        """
+        同時実行数の枠を確保してクエリを実行し、完了まで待つ
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            reuse_results: SELECTでAthenaの結果再利用を有効にするか
+
+        Returns:
+            get_query_execution の QueryExecution
+        """
+        async with self._semaphore:
+            query_execution_id = await self.start(query, database, output_location, reuse_results)
+            return await self.wait(query_execution_id)
+
+    async def _run_succeeded(self, query: str, database: str,
+                             output_location: Optional[str] = None,
+                             reuse_results: bool = True) -> Tuple[bool, str]:
+        """
+        クエリを実行し、成功した場合はクエリ実行IDを返す
+
+        Returns:
+            (success, クエリ実行ID / エラーメッセージ)
+        """
+        try:
+            execution = await self.run(query, database, output_location, reuse_results)
+        except asyncio.TimeoutError:
+            return (False, "Query timeout")
+        except Exception as e:
+            logger.error(f"Failed to execute Athena query: {e}")
+            return (False, f"Failed to start query: {str(e)}")
+
+        status = execution["Status"]
+        if status["State"] != "SUCCEEDED":
+            return (False, status.get("StateChangeReason", "Unknown error"))
+        return (True, execution["QueryExecutionId"])
+
+    @staticmethod
+    def _versions_known(versions: Optional[Sequence[Optional[str]]]) -> bool:
+        """参照する全テーブルのバージョンが分かっているか"""
+        return bool(versions) and all(versions)
+
+    def _cache_key(self, query: str, database: str, versions: Optional[Sequence[Optional[str]]],
+                   kind: str = "rows") -> Optional[Tuple]:
+        """キャッシュキー（キャッシュが無い・バージョンが分からないテーブルがある場合はNone）"""
+        if self.cache is None or not self._versions_known(versions):
+            return None
+        return QueryResultCache.make_key(query, database, versions, kind)
+
+    async def execute(self, query: str, database: str, output_location: Optional[str] = None,
+                      versions: Optional[Sequence[Optional[str]]] = None) -> Tuple[bool, Any]:
+        """
+        クエリを実行して結果の全行を取得（全ページを読む）
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            versions: クエリが参照するテーブルのバージョン（指定した場合は結果をキャッシュ）
+
+        Returns:
+            (success, 行のリスト / エラーメッセージ)
+        """
+        cache_key = self._cache_key(query, database, versions)
+        if cache_key is not None:
+            rows = self.cache.get(cache_key)
+            if rows is not None:
+                logger.debug("Athena result cache hit")
+                return (True, [list(row) for row in rows])
+
+        # バージョンが分かる場合はAthenaの結果再利用を使わない（投入直後に古い結果を返さないため）
+        success, result = await self._run_succeeded(
+            query, database, output_location, reuse_results=not self._versions_known(versions)
+        )
+        if not success:
+            return (False, result)
+
+        try:
+            rows = await self.fetch_rows(result)
+        except Exception as e:
+            return (False, str(e))
+
+        if cache_key is not None:
+            self.cache.put(cache_key, [list(row) for row in rows])
+        return (True, rows)
+
+    async def execute_statement(self, query: str, database: str,
+                                output_location: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        結果の行を読まないクエリ（DDL / INSERT）を実行し、実行統計を取得
+
+        書き込み行数は get_query_runtime_statistics の OutputRows から取得します
+        （取得できない場合はNone）。
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+
+        Returns:
+            (success, {"query_execution_id", "output_rows"} / エラーメッセージ)
+        """
+        success, result = await self._run_succeeded(query, database, output_location)
+        if not success:
+            return (False, result)
+
+        output_rows = None
+        try:
+            response = await _run_in_thread(
+                self.athena_client.get_query_runtime_statistics, QueryExecutionId=result
+            )
+            output_rows = response["QueryRuntimeStatistics"]["Rows"]["OutputRows"]
+        except Exception as e:
+            logger.debug(f"Runtime statistics not available for {result}: {e}")
+        return (True, {"query_execution_id": result, "output_rows": output_rows})
+
+    async def execute_page(self, query: str, database: str, output_location: Optional[str] = None,
+                           page_size: int = MAX_PAGE_SIZE,
+                           versions: Optional[Sequence[Optional[str]]] = None) -> Dict[str, Any]:
+        """
+        クエリを実行して結果の最初のページを取得
+
+        続きは返した query_execution_id と next_token で fetch_page から取得できます。
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            page_size: 1ページの行数（最大1000）
+            versions: クエリが参照するテーブルのバージョン（指定した場合は最初のページをキャッシュ）
+
+        Returns:
+            {"success", "query_execution_id", "columns", "rows", "next_token"} / {"success": False, "error"}
+        """
+        cache_key = self._cache_key(query, database, versions, kind=f"page:{page_size}")
+        if cache_key is not None:
+            page = self.cache.get(cache_key)
+            if page is not None:
+                # 実行IDが同じため、続きのページは元の実行結果から読める
+                return {**page, "rows": [list(row) for row in page["rows"]]}
+
+        success, result = await self._run_succeeded(
+            query, database, output_location, reuse_results=not self._versions_known(versions)
+        )
+        if not success:
+            return {"success": False, "error": result}
+
+        try:
+            page = await self.fetch_page(result, page_size=page_size)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        page = {"success": True, "query_execution_id": result, **page}
+        if cache_key is not None:
+            self.cache.put(cache_key, {**page, "rows": [list(row) for row in page["rows"]]})
+        return page
+
+    async def fetch_arrow(self, query_execution_id: str, s3_client) -> "pa.Table":
+        """
+        クエリ結果のCSVをS3から直接読み込み（get_query_results のページングを使わない）
+
+        Args:
+            query_execution_id: 成功したクエリの実行ID
+            s3_client: boto3 S3クライアント
+
+        Returns:
+            列型に従って型付けしたArrowテーブル
+        """
+        from .athena_results import read_csv_result
+
+        response = await _run_in_thread(
+            self.athena_client.get_query_execution, QueryExecutionId=query_execution_id
+        )
+        output_location = response["QueryExecution"]["ResultConfiguration"]["OutputLocation"]
+        # 列型だけ取得する
+        page = await self.fetch_page(query_execution_id, page_size=1)
+        return await _run_in_thread(read_csv_result, s3_client, output_location, page["columns"])
+
+    async def execute_arrow(self, query: str, database: str, s3_client,
+                            output_location: Optional[str] = None,
+                            unload_location: Optional[str] = None,
+                            versions: Optional[Sequence[Optional[str]]] = None) -> Tuple[bool, Any]:
+        """
+        クエリを実行して結果をArrowテーブルとしてS3から読み込み
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            s3_client: boto3 S3クライアント
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            unload_location: 指定した場合は UNLOAD でこのS3 URI（空のプレフィックス）にParquetを出力して読み、
+                読み込み後に削除する（ファイルをまたいだ順序は保たれないため、ORDER BY のクエリには使わない）
+            versions: クエリが参照するテーブルのバージョン（全て分かる場合はAthenaの結果再利用を使わない）
+
+        Returns:
+            (success, Arrowテーブル / エラーメッセージ)
+        """
+        if unload_location:
+            from .athena_results import delete_prefix, read_parquet_prefix, unload_statement
+
+            try:
+                success, result = await self._run_succeeded(
+                    unload_statement(query, unload_location), database, output_location
+                )
+                if not success:
+                    return (False, result)
+                return (True, await _run_in_thread(read_parquet_prefix, s3_client, unload_location))
+            except Exception as e:
+                return (False, str(e))
+            finally:
+                # 一時的な出力先のため、読み込み後（失敗時も）に削除する
+                try:
+                    await _run_in_thread(delete_prefix, s3_client, unload_location)
+                except Exception as e:
+                    logger.warning(f"Failed to delete UNLOAD output {unload_location}: {e}")
+
+        success, result = await self._run_succeeded(
+            query, database, output_location, reuse_results=not self._versions_known(versions)
+        )
+        if not success:
+            return (False, result)
+        try:
+            return (True, await self.fetch_arrow(result, s3_client))
+        except Exception as e:
+            return (False, str(e))
+
+    async def execute_many(self, queries: Union[Sequence[str], Dict[str, str]], database: str,
+                           output_location: Optional[str] = None,
+                           versions: Optional[Sequence[Optional[str]]] = None) -> Union[List[Tuple[bool, Any]],
+                                                                                        Dict[str, Tuple[bool, Any]]]:
+        """
+        独立した複数のクエリを並行して実行
+
+        同時実行数の上限を超える分は枠が空くまで待ってから開始します。
+
+        Args:
+            queries: SQLクエリのリスト、または名前をキーとする辞書
+            database: データベース名
+            output_location: 結果の出力先（ワークグループを使わない場合）
+            versions: クエリが参照するテーブルのバージョン（指定した場合は結果をキャッシュ）
+
+        Returns:
+            入力と同じ順序（辞書の場合は同じキー）の (success, 行のリスト / エラーメッセージ)
+        """
+        if isinstance(queries, dict):
+            names = list(queries)
+            results = await asyncio.gather(
+                *(self.execute(queries[name], database, output_location, versions) for name in names)
+            )
+            return dict(zip(names, results))
+
+        return list(await asyncio.gather(
+            *(self.execute(query, database, output_location, versions) for query in queries)
+        ))
@@ -0,0 +1,254 @@
+"""
+Athenaクエリ結果のS3からの一括読み込み
+
+get_query_results は1回1000行までのため、大きな結果はAPIの往復回数が増えます。
+ここではクエリの出力先（athena-results/）に書かれた結果ファイルをS3から直接読み、
+Arrowテーブルとして返します。
+
+- CSV: 通常のクエリ結果。列型（ResultSetMetadata）に従ってストリーミングで型変換します
+- Parquet: UNLOAD で出力した結果。大きな結果は UNLOAD の方が転送量・変換コストともに小さくなります
+  （ファイルをまたいだ順序は保たれないため、ORDER BY のあるクエリはCSVの結果を使います）
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .query_cache import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# CSVの読み込みブロックサイズ
+CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+# UNLOAD したファイルを同時に読み込む数
+DEFAULT_READ_WORKERS = 8
+
+# delete_objects の1回あたりの最大キー数
+DELETE_BATCH_SIZE = 1000
+
+# Athenaの列型に対応するArrow型（ここに無い型は文字列）
+ARROW_TYPES = {
+    "boolean": pa.bool_(),
+    "tinyint": pa.int8(),
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "float": pa.float32(),
+    "real": pa.float32(),
+    "double": pa.float64(),
+    "decimal": pa.float64(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("ms"),
+}
+
+
+def arrow_type(athena_type: str) -> pa.DataType:
+    """
+    Athenaの列型をArrow型に変換
+
+    Args:
+        athena_type: ColumnInfo の Type（decimal(10,2) などの精度付きも可）
+
+    Returns:
+        Arrow型
+    """
+    return ARROW_TYPES.get(athena_type.split("(", 1)[0].strip().lower(), pa.string())
+
+
+def result_schema(columns: List[Dict[str, str]]) -> pa.Schema:
+    """
+    列情報（{"name", "type"} のリスト）からArrowスキーマを作成
+
+    Args:
+        columns: 列情報
+
+    Returns:
+        Arrowスキーマ
+    """
+    return pa.schema([(column["name"], arrow_type(column["type"])) for column in columns])
+
+
+def parse_s3_uri(uri: str) -> Tuple[str, str]:
+    """
+    s3://bucket/key 形式のURIをバケットとキーに分割
+
+    Args:
+        uri: S3 URI
+
+    Returns:
+        (bucket, key)
+    """
+    if not uri.startswith("s3://"):
+        raise ValueError(f"Invalid S3 URI: {uri}")
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def read_csv_result(s3_client, output_location: str, columns: List[Dict[str, str]]) -> pa.Table:
+    """
+    クエリ結果のCSVをS3から読み込み
+
+    Athenaは値を引用符で囲んで出力し、nullは引用符なしの空欄になるため、
+    引用符なしの空欄だけをnullとして扱います。
+
+    Args:
+        s3_client: boto3 S3クライアント
+        output_location: クエリ結果のCSVのS3 URI（QueryExecution の OutputLocation）
+        columns: 列情報（{"name", "type"} のリスト）
+
+    Returns:
+        列型に従って型付けしたArrowテーブル
+    """
+    bucket, key = parse_s3_uri(output_location)
+    schema = result_schema(columns)
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+
+    reader = pacsv.open_csv(
+        body,
+        read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(
+            column_types=schema,
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False
+        )
+    )
+    return pa.Table.from_batches(list(reader), schema=reader.schema)
+
+
+def unload_statement(query: str, location: str) -> str:
+    """
+    SELECTクエリを Parquet への UNLOAD 文に変換
+
+    Args:
+        query: SELECTクエリ
+        location: 出力先のS3 URI（空のプレフィックス）
+
+    Returns:
+        UNLOAD 文
+    """
+    query = re.sub(r"[;\s]+$", "", query.strip())
+    return f"UNLOAD ({query}) TO '{location}' WITH (format = 'PARQUET', compression = 'SNAPPY')"
+
+
+def has_top_level_order_by(query: str) -> bool:
+    """
+    クエリの最も外側に ORDER BY があるか
+
+    UNLOAD は複数のファイルに並列で書き出すため、ORDER BY の順序はファイルをまたいで保たれません。
+
+    Args:
+        query: SELECTクエリ
+
+    Returns:
+        最も外側に ORDER BY があるか
+    """
+    depth = 0
+    tokens = re.findall(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\w+|[()]", normalize_sql(query))
+    for token, next_token in zip(tokens, tokens[1:] + [""]):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token == "order" and next_token == "by":
+            return True
+    return False
+
+
+def list_result_files(s3_client, location: str) -> List[str]:
+    """
+    出力先プレフィックスのファイルのキーを取得
+
+    Args:
+        s3_client: boto3 S3クライアント
+        location: 出力先のS3 URI
+
+    Returns:
+        キーのリスト（ディレクトリのマーカー・空のファイルは除く）
+    """
+    bucket, prefix = parse_s3_uri(location)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    return [
+        obj["Key"]
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+        for obj in page.get("Contents", [])
+        if not obj["Key"].endswith("/") and obj.get("Size", 1) != 0
+    ]
+
+
+def read_parquet_prefix(s3_client, location: str, schema: Optional[pa.Schema] = None,
+                        max_workers: int = DEFAULT_READ_WORKERS) -> pa.Table:
+    """
+    UNLOAD で出力したParquetファイルを並行して読み込み
+
+    ファイルの順序に意味は無いため、ORDER BY の結果は has_top_level_order_by で確認して
+    CSVの結果から読んでください。
+
+    Args:
+        s3_client: boto3 S3クライアント
+        location: UNLOAD の出力先S3 URI
+        schema: ファイルが無い場合に返す空テーブルのスキーマ
+        max_workers: 同時に読み込むファイル数
+
+    Returns:
+        Arrowテーブル
+    """
+    bucket, _ = parse_s3_uri(location)
+    keys = list_result_files(s3_client, location)
+    if not keys:
+        return (schema or pa.schema([])).empty_table()
+
+    def read(key: str) -> pa.Table:
+        body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+        return pq.read_table(pa.BufferReader(body))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as executor:
+        tables = list(executor.map(read, keys))
+
+    logger.info(f"Read {len(tables)} UNLOAD file(s) from {location}")
+    return pa.concat_tables(tables)
+
+
+def delete_keys(s3_client, bucket: str, keys: List[str]) -> int:
+    """
+    ファイルを DELETE_BATCH_SIZE 件ずつ一括削除
+
+    Args:
+        s3_client: boto3 S3クライアント
+        bucket: バケット
+        keys: 削除するキーのリスト
+
+    Returns:
+        削除したファイル数
+    """
+    keys = list(keys)
+    for offset in range(0, len(keys), DELETE_BATCH_SIZE):
+        s3_client.delete_objects(Bucket=bucket, Delete={
+            "Objects": [{"Key": key} for key in keys[offset:offset + DELETE_BATCH_SIZE]],
+            "Quiet": True
+        })
+    return len(keys)
+
+
+def delete_prefix(s3_client, location: str) -> int:
+    """
+    出力先プレフィックスのファイルを削除（UNLOAD の一時出力の後片付け）
+
+    Args:
+        s3_client: boto3 S3クライアント
+        location: 出力先のS3 URI
+
+    Returns:
+        削除したファイル数
+    """
+    bucket, prefix = parse_s3_uri(location)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    keys = [obj["Key"] for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+            for obj in page.get("Contents", [])]
+    return delete_keys(s3_client, bucket, keys)
@@ -0,0 +1,527 @@
+"""
+列プロファイル
+
+Parquet書き込み時に列ごとの統計（行数・null数・最小/最大/合計・HyperLogLogによる
+ユニーク数・t-digestによる分位点）を計算し、データセットのサイドカーJSONとして保存します。
+基本分析はAthenaクエリを実行せずにサイドカーを集計して回答できます。
+"""
+
+import base64
+import hashlib
+import logging
+import math
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+
+# サイドカーのファイル名（"_" 始まりのためAthenaの読み込み対象にならない）
+PROFILE_FILENAME = "_profile.json"
+
+# テーブルに登録したプロファイルの保存先プレフィックス
+PROFILE_PREFIX = "profiles"
+
+# 登録したプロファイルのS3メタデータ（投入前後のテーブルバージョン）
+TABLE_VERSION_METADATA = "table-version"
+BASE_VERSION_METADATA = "base-version"
+BASE_EMPTY_METADATA = "base-empty"
+
+# HyperLogLogのレジスタ数 2^HLL_PRECISION（標準誤差 約1.6%）
+HLL_PRECISION = 12
+
+# t-digestの圧縮パラメータ（centroid数は約 TDIGEST_COMPRESSION / 2）
+TDIGEST_COMPRESSION = 200
+
+# プロファイルに含める分位点
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 の最終化関数でビットを拡散"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _hash_strings(values: List[Any]) -> np.ndarray:
+    """一意な値のリストを64ビットにハッシュ"""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "little")
+         for value in values],
+        dtype=np.uint64
+    )
+
+
+def hash_values(array: pa.Array) -> np.ndarray:
+    """
+    null以外の値を64ビットにハッシュ
+
+    文字列・辞書エンコード列は一意な値ごとに1回だけハッシュし、数値はビット列を拡散します。
+
+    Args:
+        array: Arrow配列
+
+    Returns:
+        uint64のNumPy配列（nullを除いた件数）
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    array = array.drop_null()
+
+    if pa.types.is_dictionary(array.type):
+        hashes = _hash_strings(array.dictionary.to_pylist())
+        return hashes[array.indices.to_numpy(zero_copy_only=False).astype(np.int64)]
+    if pa.types.is_floating(array.type):
+        values = array.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        return _mix(values.view(np.uint64))
+    if pa.types.is_integer(array.type) or pa.types.is_boolean(array.type):
+        values = array.cast(pa.int64()).to_numpy(zero_copy_only=False)
+        return _mix(values.view(np.uint64))
+    if pa.types.is_temporal(array.type):
+        values = array.cast(pa.int64()).to_numpy(zero_copy_only=False)
+        return _mix(values.view(np.uint64))
+
+    encoded = pc.dictionary_encode(array)
+    hashes = _hash_strings(encoded.dictionary.to_pylist())
+    return hashes[encoded.indices.to_numpy(zero_copy_only=False).astype(np.int64)]
+
+
+class HyperLogLog:
+    """HyperLogLogによるユニーク数の推定"""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        """
+        Args:
+            precision: レジスタ数の指数
+            registers: 既存のレジスタ（復元時）
+        """
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """64ビットハッシュを追加"""
+        if not len(hashes):
+            return self
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        # 残りのビットの先頭の0の数 + 1（番兵ビットで上限を 64 - p + 1 にする）
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        rank = np.ones(len(hashes), dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            empty = rest < (np.uint64(1) << np.uint64(64 - shift))
+            rank[empty] += np.uint8(shift)
+            rest[empty] <<= np.uint64(shift)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """別のHyperLogLogを統合"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """ユニーク数の推定値"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # 少数の場合は線形カウント
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(zlib.compress(self.registers.tobytes())).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        registers = np.frombuffer(zlib.decompress(base64.b64decode(data["registers"])), dtype=np.uint8)
+        return cls(data["precision"], registers.copy())
+
+
+class TDigest:
+    """t-digestによる分位点の推定"""
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION,
+                 means: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None):
+        """
+        Args:
+            compression: 圧縮パラメータ
+            means: centroidの平均（平均の昇順）
+            weights: centroidの重み
+        """
+        self.compression = compression
+        self.means = means if means is not None else np.zeros(0)
+        self.weights = weights if weights is not None else np.zeros(0)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, compression: int = TDIGEST_COMPRESSION) -> "TDigest":
+        """値の配列から作成"""
+        values = np.sort(values[~np.isnan(values)])
+        return cls(compression)._compress(values, np.ones(len(values)))
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """別のt-digestを統合"""
+        means = np.concatenate([self.means, other.means])
+        weights = np.concatenate([self.weights, other.weights])
+        order = np.argsort(means, kind="stable")
+        return TDigest(self.compression)._compress(means[order], weights[order])
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> "TDigest":
+        """スケール関数 k1 の整数区間ごとにcentroidをまとめる"""
+        if not len(means):
+            self.means, self.weights = means, weights
+            return self
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        _, groups = np.unique(np.floor(k), return_inverse=True)
+        self.weights = np.bincount(groups, weights=weights)
+        self.means = np.bincount(groups, weights=weights * means) / self.weights
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位点の推定値"""
+        if not len(self.means):
+            return None
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), positions, self.means))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        return cls(data["compression"], np.array(data["means"], dtype=np.float64),
+                   np.array(data["weights"], dtype=np.float64))
+
+
+def _scalar(value: Any) -> Any:
+    """JSONに保存できる値に変換"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _is_numeric(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def profile_column(array: Any) -> Dict[str, Any]:
+    """
+    1列のプロファイルを計算
+
+    Args:
+        array: Arrow配列またはChunkedArray
+
+    Returns:
+        count, null_count, min, max, sum, distinct, quantiles を含む辞書
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+
+    value_type = array.type.value_type if pa.types.is_dictionary(array.type) else array.type
+    values = array.dictionary.take(pc.unique(array.indices).drop_null()) \
+        if pa.types.is_dictionary(array.type) else array
+
+    profile = {
+        "type": str(value_type),
+        "count": len(array) - array.null_count,
+        "null_count": array.null_count,
+        "min": None,
+        "max": None
+    }
+    if len(values) - values.null_count and not pa.types.is_null(value_type):
+        min_max = pc.min_max(values)
+        profile["min"] = _scalar(min_max["min"].as_py())
+        profile["max"] = _scalar(min_max["max"].as_py())
+
+    hll = HyperLogLog().add_hashes(hash_values(array))
+    profile["distinct"] = hll.to_dict()
+    profile["distinct_estimate"] = hll.estimate()
+
+    if _is_numeric(value_type):
+        numbers = array.cast(pa.float64()).drop_null().to_numpy(zero_copy_only=False)
+        profile["sum"] = float(numbers.sum())
+        digest = TDigest.from_values(numbers)
+        profile["tdigest"] = digest.to_dict()
+        profile["quantiles"] = {str(q): digest.quantile(q) for q in QUANTILES}
+    return profile
+
+
+def profile_partitions(table: pa.Table, partition_by: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    パーティション値ごとの行数・null以外の件数・数値列の最小/最大/合計を集計
+
+    パーティション数が多くてもサイドカーが大きくならないよう、項目ごとのリストで保持します。
+
+    Args:
+        table: Arrowテーブル
+        partition_by: パーティション列名のリスト（テーブルに無い列は無視）
+
+    Returns:
+        {"keys", "values", "row_count", "columns"}（パーティション列が無い場合はNone）
+    """
+    keys = [name for name in partition_by if name in table.column_names]
+    if not keys or table.num_rows == 0:
+        return None
+
+    aggregations = [([], "count_all")]
+    columns = [name for name in table.column_names if name not in keys]
+    for name in columns:
+        aggregations.append((name, "count"))
+        if _is_numeric(table.schema.field(name).type):
+            aggregations.extend([(name, "min"), (name, "max"), (name, "sum")])
+
+    # 辞書エンコード列はグループキーとして使えるよう値の型に戻す
+    source = {}
+    for name in keys + columns:
+        column = table.column(name)
+        if name in keys and pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        source[name] = column
+
+    grouped = pa.table(source).group_by(keys, use_threads=False).aggregate(aggregations)
+    grouped = grouped.sort_by([(name, "ascending") for name in keys]).to_pydict()
+
+    column_stats = {}
+    for name in columns:
+        stats = {"count": grouped[f"{name}_count"]}
+        if f"{name}_sum" in grouped:
+            for field in ("min", "max", "sum"):
+                stats[field] = [_scalar(v) for v in grouped[f"{name}_{field}"]]
+        column_stats[name] = stats
+
+    return {
+        "keys": keys,
+        "values": {name: [_scalar(v) for v in grouped[name]] for name in keys},
+        "row_count": grouped["count_all"],
+        "columns": column_stats
+    }
+
+
+def profile_table(table: pa.Table, partition_by: Optional[List[str]] = None,
+                  **attributes: Any) -> Dict[str, Any]:
+    """
+    テーブルのプロファイルを計算
+
+    Args:
+        table: Arrowテーブル
+        partition_by: パーティション列名のリスト
+        **attributes: プロファイルに含める追加情報（dataset_id, source_path など）
+
+    Returns:
+        サイドカーとして保存するプロファイル
+    """
+    partitions = profile_partitions(table, partition_by or [])
+    return {
+        "version": PROFILE_VERSION,
+        **attributes,
+        "created_at": datetime.now().isoformat(),
+        "row_count": table.num_rows,
+        "partition_by": [name for name in (partition_by or []) if name in table.column_names],
+        "columns": {name: profile_column(table.column(name)) for name in table.column_names},
+        "partitions": [partitions] if partitions else []
+    }
+
+
+def _merge_column(merged: Dict[str, Any], column: Dict[str, Any]) -> Dict[str, Any]:
+    """列プロファイルを統合"""
+    if merged is None:
+        return dict(column)
+
+    result = dict(merged)
+    result["count"] = merged["count"] + column["count"]
+    result["null_count"] = merged["null_count"] + column["null_count"]
+    for field, pick in (("min", min), ("max", max)):
+        values = [v for v in (merged.get(field), column.get(field)) if v is not None]
+        try:
+            result[field] = pick(values) if values else None
+        except TypeError:
+            result[field] = values[0]
+    if "sum" in merged and "sum" in column:
+        result["sum"] = merged["sum"] + column["sum"]
+    if "distinct" in merged and "distinct" in column:
+        hll = HyperLogLog.from_dict(merged["distinct"]).merge(HyperLogLog.from_dict(column["distinct"]))
+        result["distinct"] = hll.to_dict()
+        result["distinct_estimate"] = hll.estimate()
+    if "tdigest" in merged and "tdigest" in column:
+        digest = TDigest.from_dict(merged["tdigest"]).merge(TDigest.from_dict(column["tdigest"]))
+        result["tdigest"] = digest.to_dict()
+        result["quantiles"] = {str(q): digest.quantile(q) for q in QUANTILES}
+    return result
+
+
+def merge_profiles(profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    複数のプロファイル（例: テーブルに投入したデータセット）を統合
+
+    Args:
+        profiles: プロファイルのリスト
+
+    Returns:
+        統合したプロファイル（partitions は各プロファイルのパーティション集計の連結）
+    """
+    columns: Dict[str, Any] = {}
+    partitions = []
+    for profile in profiles:
+        for name, column in profile.get("columns", {}).items():
+            columns[name] = _merge_column(columns.get(name), column)
+        partitions.extend(profile.get("partitions", []))
+
+    return {
+        "version": PROFILE_VERSION,
+        "profile_count": len(profiles),
+        "row_count": sum(profile.get("row_count", 0) for profile in profiles),
+        "columns": columns,
+        "partitions": partitions
+    }
+
+
+def basic_statistics(profile: Dict[str, Any], value_column: str = "value",
+                     group_column: str = "year", limit: int = 10) -> Dict[str, Any]:
+    """
+    プロファイルから基本分析（レコード数・値の統計・年別集計）の結果を作成
+
+    Args:
+        profile: プロファイル
+        value_column: 値の列
+        group_column: 集計単位の列（パーティション列）
+        limit: 集計結果の最大件数
+
+    Returns:
+        analyze_with_athena の basic と同じ形式の結果
+    """
+    results: Dict[str, Any] = {"total_records": profile["row_count"]}
+
+    value = profile["columns"].get(value_column)
+    if value and value["count"]:
+        results["statistics"] = {
+            "count": value["count"],
+            "avg_value": value["sum"] / value["count"],
+            "min_value": value["min"],
+            "max_value": value["max"],
+            "sum_value": value["sum"]
+        }
+        results["quantiles"] = value.get("quantiles")
+    else:
+        results["statistics"] = None
+
+    groups: Dict[Any, List[float]] = {}
+    for block in profile.get("partitions", []):
+        stats = block["columns"].get(value_column)
+        if group_column not in block["values"] or not stats or "sum" not in stats:
+            continue
+        for key, count, total in zip(block["values"][group_column], stats["count"], stats["sum"]):
+            if key is None or not count:
+                continue
+            group = groups.setdefault(key, [0, 0.0])
+            group[0] += count
+            group[1] += total
+
+    results["by_year"] = [
+        {"year": key, "count": count, "avg_value": total / count}
+        for key, (count, total) in sorted(groups.items())[:limit]
+    ] if groups else None
+
+    results["distinct"] = {
+        name: column["distinct_estimate"]
+        for name, column in profile["columns"].items() if "distinct_estimate" in column
+    }
+    return results
+
+
+def profile_key_for(parquet_key: str) -> str:
+    """
+    Parquetの出力先に対応するサイドカーのキー
+
+    パーティション出力（プレフィックス）はその直下の _profile.json、
+    単一ファイルは同じディレクトリの _<ファイル名>_profile.json になります。
+
+    Args:
+        parquet_key: Parquetファイルのキーまたはパーティション出力のプレフィックス
+
+    Returns:
+        サイドカーのキー
+    """
+    if parquet_key.endswith(".parquet"):
+        directory, _, name = parquet_key.rpartition("/")
+        sidecar = f"_{name[:-len('.parquet')]}{PROFILE_FILENAME}"
+        return f"{directory}/{sidecar}" if directory else sidecar
+    return f"{parquet_key.strip('/')}/{PROFILE_FILENAME}"
+
+
+def registered_profile_key(table_name: str, table_version: str) -> str:
+    """テーブルに登録するプロファイルのキー（投入後のテーブルバージョンごとに1つ）"""
+    digest = hashlib.sha1(table_version.encode("utf-8")).hexdigest()[:16]
+    return f"{PROFILE_PREFIX}/{table_name}/{digest}.json"
+
+
+def registration_metadata(table_version: str, base_version: str, base_empty: bool) -> Dict[str, str]:
+    """
+    登録するプロファイルのS3メタデータ
+
+    Args:
+        table_version: 投入後のテーブルバージョン
+        base_version: 投入前のテーブルバージョン
+        base_empty: 投入前のテーブルが作成直後の空のテーブルだったか
+
+    Returns:
+        S3オブジェクトのメタデータ
+    """
+    return {
+        TABLE_VERSION_METADATA: table_version,
+        BASE_VERSION_METADATA: base_version,
+        BASE_EMPTY_METADATA: "true" if base_empty else "false",
+    }
+
+
+def profile_chain(registrations: List[Tuple[Dict[str, str], Dict[str, Any]]],
+                  current_version: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    現在のテーブルの内容に対応するプロファイルを選ぶ
+
+    現在のバージョンから投入前のバージョンを順にたどり、空のテーブルまでつながった場合だけ
+    プロファイルを返します。プロファイルの無い投入・再作成前の投入・投入以外の更新があると
+    つながらないため、Noneを返します（Athenaで集計する）。
+
+    Args:
+        registrations: (S3メタデータ, プロファイル) のリスト
+        current_version: 現在のテーブルバージョン
+
+    Returns:
+        プロファイルのリスト（つながらない場合はNone）
+    """
+    by_version = {
+        metadata[TABLE_VERSION_METADATA]: (metadata, profile)
+        for metadata, profile in registrations if metadata.get(TABLE_VERSION_METADATA)
+    }
+    chain = []
+    version = current_version
+    while version is not None and len(chain) < len(by_version):
+        if version not in by_version:
+            return None
+        metadata, profile = by_version[version]
+        chain.append(profile)
+        if metadata.get(BASE_EMPTY_METADATA) == "true":
+            return chain
+        version = metadata.get(BASE_VERSION_METADATA)
+    return None
@@ -0,0 +1,270 @@
+"""
+列指向変換ユーティリティ
+
+e-Stat APIのVALUEリストからレコード単位のループを介さずにArrow列を直接構築します。
+コード列は辞書エンコード、数値は一括パースして秘匿・欠損記号をnullに変換し、
+更新日時はバッチごとに1回だけ取得します。
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .time_codes import expand_time_columns
+from .labels import LabelIndex, label_column, LABEL_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# 数値として解釈できる文字列（'-', '…', 'x', '***', '' などの記号はnullになる）
+NUMERIC_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+# データ種別ごとの出力列定義: (出力列名, 値の種類, ソースフィールドまたは定数)
+#   code:     ソースフィールドを辞書エンコードした文字列
+#   time:     ソースフィールド（@time）の時間コードから年・四半期・月・年度を取得
+#   label:    ソースフィールドのコードの和名（ラベルが無い場合は空文字）
+#   constant: 全行同じ値
+DATA_TYPE_COLUMNS = {
+    "population": [
+        ("year", "time", "@time"),
+        ("region_code", "code", "@cat01"),
+        ("region_name", "label", "@cat01"),
+        ("category", "code", "@cat02"),
+    ],
+    "economy": [
+        ("year", "time", "@time"),
+        ("quarter", "time", "@time"),
+        ("region_code", "code", "@area"),
+        ("indicator", "code", "@cat01"),
+    ],
+    "education": [
+        ("year", "time", "@time"),
+        ("region_code", "code", "@area"),
+        ("school_type", "code", "@cat01"),
+        ("metric", "code", "@cat02"),
+    ],
+    "generic": [
+        ("year", "time", "@time"),
+        ("region_code", "code", "@area"),
+        ("category", "code", "@cat01"),
+    ],
+}
+
+
+def filter_records(values: List[Any]) -> List[Dict[str, Any]]:
+    """
+    VALUEリストから辞書以外の要素を除外
+
+    Args:
+        values: e-Stat APIのVALUEリスト
+
+    Returns:
+        辞書のみのリスト
+    """
+    if all(isinstance(v, dict) for v in values):
+        return values
+
+    records = [v for v in values if isinstance(v, dict)]
+    logger.warning(f"Skipped {len(values) - len(records)} non-dict values")
+    return records
+
+
+def extract_field(records: List[Dict[str, Any]], name: str, default: Optional[str] = None) -> pa.Array:
+    """
+    レコードリストから1フィールドを文字列配列として取り出す
+
+    Args:
+        records: レコードのリスト
+        name: フィールド名
+        default: フィールドが無い場合・null値の置き換え値
+
+    Returns:
+        文字列配列
+    """
+    raw = [r.get(name) for r in records]
+    try:
+        column = pa.array(raw, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 文字列と数値が混在する場合は文字列に揃える
+        column = pa.array([None if v is None else str(v) for v in raw], type=pa.string())
+
+    if default is not None:
+        column = pc.fill_null(column, default)
+    return column
+
+
+def parse_numeric(column: pa.Array) -> pa.Array:
+    """
+    値列を一括でfloat64に変換（数値として解釈できない記号はnull）
+
+    Args:
+        column: 文字列または数値の配列
+
+    Returns:
+        float64配列
+    """
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        return pc.cast(column, pa.float64())
+
+    trimmed = pc.utf8_trim_whitespace(pc.cast(column, pa.string()))
+    is_numeric = pc.match_substring_regex(trimmed, NUMERIC_PATTERN)
+    numeric_only = pc.if_else(is_numeric, trimmed, pa.scalar(None, type=pa.string()))
+    return pc.cast(numeric_only, pa.float64())
+
+
+def constant_column(value: Any, length: int) -> pa.Array:
+    """
+    全行同じ値の列を作成（文字列は辞書エンコード）
+
+    Args:
+        value: 値
+        length: 行数
+
+    Returns:
+        Arrow配列
+    """
+    if isinstance(value, str):
+        return pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(length, dtype=np.int32)),
+            pa.array([value], type=pa.string())
+        )
+    return pa.array(np.full(length, value, dtype=np.int64))
+
+
+def timestamp_column(timestamp: datetime, length: int) -> pa.Array:
+    """
+    全行同じ日時の列を作成
+
+    Args:
+        timestamp: 日時
+        length: 行数
+
+    Returns:
+        timestamp[us]配列
+    """
+    return pa.array(np.full(length, np.datetime64(timestamp, "us")), type=pa.timestamp("us"))
+
+
+def build_value_table(
+    values: List[Any],
+    data_type: str,
+    dataset_id: str,
+    updated_at: Optional[datetime] = None,
+    label_index: Optional[LabelIndex] = None
+) -> pa.Table:
+    """
+    VALUEリストからParquet出力用のArrowテーブルを構築
+
+    Args:
+        values: e-Stat APIのVALUEリスト
+        data_type: データ種別（population / economy / education / その他は汎用）
+        dataset_id: 統計表ID
+        updated_at: 更新日時（省略時は現在時刻）
+        label_index: 和名ラベルインデックス（指定時はコード列ごとに <列名>_name 列を追加）
+
+    Returns:
+        Arrowテーブル
+    """
+    records = filter_records(values)
+    length = len(records)
+    updated_at = updated_at or datetime.now()
+
+    columns: Dict[str, pa.Array] = {
+        "stats_data_id": constant_column(dataset_id, length),
+        "value": parse_numeric(extract_field(records, "$")),
+        "unit": extract_field(records, "@unit", "").dictionary_encode(),
+        "updated_at": timestamp_column(updated_at, length),
+    }
+
+    column_specs = DATA_TYPE_COLUMNS.get(data_type, DATA_TYPE_COLUMNS["generic"])
+    labeled_sources = {source for _, kind, source in column_specs if kind == "label"}
+    label_index = label_index or {}
+
+    time_parts = {}
+    for name, kind, source in column_specs:
+        if kind == "code":
+            columns[name] = extract_field(records, source, "").dictionary_encode()
+        elif kind == "time":
+            # 時間コードは重複を除いたコードごとに1回だけ解析する
+            if not time_parts:
+                time_parts = expand_time_columns(extract_field(records, source, ""))
+            columns[name] = time_parts[name]
+        elif kind == "label":
+            dimension = source.lstrip("@")
+            if dimension in label_index:
+                columns[name] = label_column(extract_field(records, source, ""), label_index[dimension])
+            else:
+                columns[name] = constant_column("", length)
+        else:
+            columns[name] = constant_column(source, length)
+
+        # コード列の和名ラベル列
+        dimension = source.lstrip("@") if isinstance(source, str) else None
+        if kind == "code" and dimension in label_index and source not in labeled_sources:
+            columns[f"{name}{LABEL_SUFFIX}"] = label_column(columns[name], label_index[dimension])
+
+    return pa.table(columns)
+
+
+def type_record_table(table: pa.Table, label_index: Optional[LabelIndex] = None) -> pa.Table:
+    """
+    VALUEレコードと同じ列構成（@area, @time, $ など）の文字列テーブルに型を付ける
+
+    文字列列は辞書エンコードし、値列（$）は元の記号を残したまま数値化した value 列（float64）を追加します。
+    CSVから読み込んだ value 列も数値化します。
+
+    Args:
+        table: 全列が文字列のテーブル
+        label_index: 和名ラベルインデックス（指定時はコード列の後ろに <次元ID>_name 列を追加）
+
+    Returns:
+        型付きのArrowテーブル
+    """
+    label_index = label_index or {}
+    names = []
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        if name == "value":
+            column = parse_numeric(column)
+        elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            column = column.dictionary_encode()
+        names.append(name)
+        columns.append(column)
+
+        dimension = name[1:] if name.startswith("@") else None
+        if dimension in label_index and f"{dimension}{LABEL_SUFFIX}" not in table.column_names:
+            names.append(f"{dimension}{LABEL_SUFFIX}")
+            columns.append(label_column(column, label_index[dimension]))
+
+        if name == "$" and "value" not in table.column_names:
+            names.append("value")
+            columns.append(parse_numeric(table.column(name).combine_chunks()))
+
+    return pa.table(columns, names=names)
+
+
+def build_record_table(values: List[Any], label_index: Optional[LabelIndex] = None) -> pa.Table:
+    """
+    VALUEリストを元の列構成のままArrowテーブルに変換（エクスポート用）
+
+    Args:
+        values: e-Stat APIのVALUEリスト
+        label_index: 和名ラベルインデックス（指定時はコード列の後ろに <次元ID>_name 列を追加）
+
+    Returns:
+        型付きのArrowテーブル（列は出現順）
+    """
+    records = filter_records(values)
+
+    names: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            if key not in names:
+                names[key] = None
+
+    table = pa.table({name: extract_field(records, name) for name in names})
+    return type_record_table(table, label_index)
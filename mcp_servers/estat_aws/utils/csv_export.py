@@ -0,0 +1,558 @@
+"""
+ストリーミングCSVエクスポート
+
+VALUEレコード（またはArrowのレコードバッチ）を1行ずつCSVに書き出し、
+S3のマルチパートアップロードへ直接ストリーミングします。
+DataFrame・文字列バッファ・エンコード済みバイト列といった全体のコピーを作らないため、
+100万行でもメモリ使用量はパートサイズ分（既定8MB）で一定です。
+
+型を保ったまま受け渡したい場合は Arrow IPC（Feather V2）・Parquet でも出力できます。
+Arrow IPCファイルはクライアント側でメモリマップして読み込めます。
+"""
+
+import csv
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# マルチパートアップロードのパートサイズ（S3の最小値は5MB）
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+CSV_CONTENT_TYPE = "text/csv"
+
+# エクスポート形式: 拡張子・Content-Type・S3の出力先プレフィックス
+EXPORT_FORMATS = {
+    "csv": {"extension": ".csv", "content_type": CSV_CONTENT_TYPE, "prefix": "csv"},
+    "arrow": {"extension": ".arrow", "content_type": "application/vnd.apache.arrow.file", "prefix": "export"},
+    "feather": {"extension": ".feather", "content_type": "application/vnd.apache.arrow.file", "prefix": "export"},
+    "parquet": {"extension": ".parquet", "content_type": "application/vnd.apache.parquet", "prefix": "export"},
+}
+
+# Arrow IPC（Feather）の圧縮方式
+ARROW_COMPRESSIONS = ("lz4", "zstd", "uncompressed")
+DEFAULT_ARROW_COMPRESSION = "lz4"
+
+# Excelで文字化けしないようにBOM付きUTF-8で出力
+CSV_ENCODING = "utf-8-sig"
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """S3マルチパートアップロードに書き込むファイルオブジェクト"""
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        content_type: str = CSV_CONTENT_TYPE,
+        part_size: int = DEFAULT_PART_SIZE
+    ):
+        """
+        初期化
+
+        Args:
+            s3_client: boto3 S3クライアント
+            bucket: 出力先バケット
+            key: 出力先キー
+            content_type: Content-Type
+            part_size: パートサイズ（5MB未満の場合は5MB）
+        """
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(MIN_PART_SIZE, part_size)
+
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def close(self) -> None:
+        """残りのデータをアップロードして完了（パート未送信の場合は単一のput_object）"""
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.s3_client.put_object(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    Body=bytes(self._buffer),
+                    ContentType=self.content_type
+                )
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts}
+                )
+            self._buffer = bytearray()
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """マルチパートアップロードを中止"""
+        if self._upload_id is not None:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload for {self.key}: {e}")
+            self._upload_id = None
+        self._buffer = bytearray()
+        if not self.closed:
+            super().close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self._upload_id = response["UploadId"]
+
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+
+def record_columns(records: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    レコードに現れるキーを出現順に列挙（DataFrame(records) の列順と同じ）
+
+    Args:
+        records: レコードのイテラブル
+
+    Returns:
+        列名のリスト
+    """
+    columns: Dict[str, None] = {}
+    for record in records:
+        if isinstance(record, dict):
+            for key in record:
+                if key not in columns:
+                    columns[key] = None
+    return list(columns)
+
+
+def label_output_columns(columns: List[str], label_maps: Dict[str, Dict[str, str]]) -> List[str]:
+    """
+    コード列（@area など）の後ろにラベル列（area_name など）を挿入した列順を作成
+
+    Args:
+        columns: 元の列名のリスト
+        label_maps: 次元IDをキーとする コード -> ラベル の辞書
+
+    Returns:
+        出力列名のリスト
+    """
+    output = []
+    for column in columns:
+        output.append(column)
+        dimension = column[1:] if column.startswith("@") else None
+        if dimension in label_maps:
+            output.append(f"{dimension}_name")
+    return output
+
+
+def write_records_csv(
+    stream,
+    records: Iterable[Dict[str, Any]],
+    columns: List[str],
+    label_maps: Optional[Dict[str, Dict[str, str]]] = None,
+    write_header: bool = True
+) -> int:
+    """
+    レコードをCSVとしてバイナリストリームに書き込み
+
+    Args:
+        stream: 書き込み先のバイナリストリーム
+        records: レコードのイテラブル
+        columns: 元の列名のリスト
+        label_maps: ラベル付与する次元の コード -> ラベル 辞書（オプション）
+        write_header: ヘッダー行を書き込むか
+
+    Returns:
+        書き込んだ行数
+    """
+    label_maps = label_maps or {}
+    output_columns = label_output_columns(columns, label_maps)
+
+    # 各出力列の値の取り出し方: (元の列名, ラベル辞書 or None)
+    getters = []
+    for column in output_columns:
+        if column.endswith("_name") and column[:-len("_name")] in label_maps \
+                and f"@{column[:-len('_name')]}" in columns:
+            dimension = column[:-len("_name")]
+            getters.append((f"@{dimension}", label_maps[dimension]))
+        else:
+            getters.append((column, None))
+
+    text = io.TextIOWrapper(stream, encoding=CSV_ENCODING, newline="", write_through=True)
+    try:
+        writer = csv.writer(text, lineterminator="\n")
+        if write_header:
+            writer.writerow(output_columns)
+
+        rows = 0
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            row = []
+            for column, labels in getters:
+                value = record.get(column)
+                if labels is not None:
+                    value = labels.get(value, "") if value is not None else None
+                row.append("" if value is None else value)
+            writer.writerow(row)
+            rows += 1
+        text.flush()
+    finally:
+        # 下位のストリームは呼び出し側で閉じる
+        text.detach()
+
+    return rows
+
+
+def write_arrow_csv(stream, batches: Iterable["pa.RecordBatch"], write_header: bool = True) -> int:
+    """
+    ArrowのレコードバッチをCSVとしてバイナリストリームに書き込み
+
+    Args:
+        stream: 書き込み先のバイナリストリーム
+        batches: レコードバッチのイテラブル（同一スキーマ）
+        write_header: ヘッダー行を書き込むか
+
+    Returns:
+        書き込んだ行数
+    """
+    import pyarrow.csv as pacsv
+
+    stream.write(b"\xef\xbb\xbf")
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                options = pacsv.WriteOptions(include_header=write_header)
+                writer = pacsv.CSVWriter(stream, batch.schema, write_options=options)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def normalize_export_format(export_format: Optional[str] = None) -> str:
+    """
+    エクスポート形式名を正規化
+
+    Args:
+        export_format: 形式名（csv / arrow / feather / parquet、省略時はcsv）
+
+    Returns:
+        小文字の形式名
+
+    Raises:
+        ValueError: 未知の形式名の場合
+    """
+    name = (export_format or "csv").lower()
+    if name not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format: {export_format} (available: {', '.join(EXPORT_FORMATS)})"
+        )
+    return name
+
+
+def get_export_format(export_format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    エクスポート形式の設定を取得
+
+    Args:
+        export_format: 形式名（省略時はcsv）
+
+    Returns:
+        形式の設定（extension, content_type, prefix）
+    """
+    return EXPORT_FORMATS[normalize_export_format(export_format)]
+
+
+def format_for_key(key: str) -> str:
+    """
+    S3キーやファイル名の拡張子から形式名を判定（不明な場合はcsv）
+
+    Args:
+        key: S3キーまたはファイル名
+
+    Returns:
+        形式名
+    """
+    lowered = key.lower()
+    for name, settings in EXPORT_FORMATS.items():
+        if lowered.endswith(settings["extension"]):
+            return name
+    if lowered.endswith(".ipc"):
+        return "arrow"
+    return "csv"
+
+
+def replace_extension(filename: str, export_format: str) -> str:
+    """
+    ファイル名の拡張子をエクスポート形式のものに置き換え
+
+    Args:
+        filename: ファイル名
+        export_format: 形式名
+
+    Returns:
+        ファイル名
+    """
+    current = EXPORT_FORMATS[format_for_key(filename)]["extension"]
+    if filename.lower().endswith(current):
+        filename = filename[:-len(current)]
+    return filename + get_export_format(export_format)["extension"]
+
+
+def split_file_ranges(key: str, total_rows: int,
+                      rows_per_file: Optional[int] = None) -> List[Tuple[str, int, int]]:
+    """
+    出力ファイルごとのキーと行範囲を作成
+
+    rows_per_file を超える場合は `{名前}_part00001.{拡張子}` 形式の複数ファイルに分割します。
+
+    Args:
+        key: 出力先キー
+        total_rows: 総行数
+        rows_per_file: 1ファイルあたりの最大行数（オプション）
+
+    Returns:
+        (キー, 開始行, 終了行) のリスト
+    """
+    if not rows_per_file or rows_per_file <= 0 or total_rows <= rows_per_file:
+        return [(key, 0, total_rows)]
+
+    extension = EXPORT_FORMATS[format_for_key(key)]["extension"]
+    base = key[:-len(extension)] if key.lower().endswith(extension) else key
+    return [
+        (f"{base}_part{i + 1:05d}{extension}", start, min(start + rows_per_file, total_rows))
+        for i, start in enumerate(range(0, total_rows, rows_per_file))
+    ]
+
+
+def write_table(stream, table: "pa.Table", export_format: str,
+                compression: Optional[str] = None) -> None:
+    """
+    ArrowテーブルをArrow IPC / Parquet / CSV でバイナリストリームに書き込み
+
+    Args:
+        stream: 書き込み先のバイナリストリーム
+        table: Arrowテーブル
+        export_format: 形式名
+        compression: Arrow IPCの圧縮方式（lz4 / zstd / uncompressed、デフォルト: lz4）
+
+    Raises:
+        ValueError: 未知の形式名・圧縮方式の場合
+    """
+    export_format = normalize_export_format(export_format)
+
+    if export_format in ("arrow", "feather"):
+        import pyarrow.ipc as ipc
+
+        compression = (compression or DEFAULT_ARROW_COMPRESSION).lower()
+        if compression not in ARROW_COMPRESSIONS:
+            raise ValueError(
+                f"Unknown compression: {compression} (available: {', '.join(ARROW_COMPRESSIONS)})"
+            )
+        options = ipc.IpcWriteOptions(compression=None if compression == "uncompressed" else compression)
+        with ipc.new_file(stream, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+    elif export_format == "parquet":
+        import pyarrow.parquet as pq
+        from .parquet_writer import get_write_profile, write_options
+
+        pq.write_table(table, stream, **write_options(table, get_write_profile()))
+
+    else:
+        write_arrow_csv(stream, table.to_batches())
+
+
+def read_table(body: bytes, source_format: str) -> "pa.Table":
+    """
+    エクスポート済みファイルのバイト列をArrowテーブルとして読み込み
+
+    CSVは全列を文字列として読み込み、コードの先頭ゼロなどを保ったまま型付けします。
+
+    Args:
+        body: ファイルのバイト列
+        source_format: 形式名
+
+    Returns:
+        Arrowテーブル
+    """
+    import pyarrow as pa
+
+    if source_format in ("arrow", "feather"):
+        import pyarrow.ipc as ipc
+        return ipc.open_file(pa.BufferReader(body)).read_all()
+
+    if source_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(pa.BufferReader(body))
+
+    import pyarrow.csv as pacsv
+    from .columnar import type_record_table
+
+    header = next(csv.reader(io.StringIO(body[:64 * 1024].decode(CSV_ENCODING, errors="ignore"))), [])
+    table = pacsv.read_csv(
+        pa.BufferReader(body),
+        convert_options=pacsv.ConvertOptions(column_types={name: pa.string() for name in header})
+    )
+    return type_record_table(table)
+
+
+def convert_export_bytes(body: bytes, source_format: str, export_format: str,
+                         compression: Optional[str] = None) -> bytes:
+    """
+    エクスポート済みファイルを別の形式に変換
+
+    Args:
+        body: ファイルのバイト列
+        source_format: 変換元の形式名
+        export_format: 変換先の形式名
+        compression: Arrow IPCの圧縮方式
+
+    Returns:
+        変換後のバイト列
+    """
+    source_format = normalize_export_format(source_format)
+    export_format = normalize_export_format(export_format)
+    if source_format == export_format and compression is None:
+        return body
+
+    output = io.BytesIO()
+    write_table(output, read_table(body, source_format), export_format, compression)
+    return output.getvalue()
+
+
+def export_table_to_s3(
+    s3_client,
+    table: "pa.Table",
+    bucket: str,
+    key: str,
+    export_format: str,
+    compression: Optional[str] = None,
+    rows_per_file: Optional[int] = None,
+    part_size: int = DEFAULT_PART_SIZE
+) -> Dict[str, Any]:
+    """
+    ArrowテーブルをArrow IPC / Parquet / CSV でS3にストリーミング出力
+
+    Args:
+        s3_client: boto3 S3クライアント
+        table: Arrowテーブル
+        bucket: 出力先バケット
+        key: 出力先キー
+        export_format: 形式名
+        compression: Arrow IPCの圧縮方式
+        rows_per_file: 1ファイルあたりの最大行数（オプション）
+        part_size: マルチパートアップロードのパートサイズ
+
+    Returns:
+        出力結果（列名、行数、ファイル一覧）
+    """
+    export_format = normalize_export_format(export_format)
+    content_type = EXPORT_FORMATS[export_format]["content_type"]
+
+    files = []
+    for file_key, start, end in split_file_ranges(key, table.num_rows, rows_per_file):
+        part = table.slice(start, end - start)
+        with S3MultipartWriter(s3_client, bucket, file_key, content_type=content_type,
+                               part_size=part_size) as writer:
+            write_table(writer, part, export_format, compression)
+        files.append({"key": file_key, "rows": part.num_rows, "size_bytes": writer.bytes_written})
+
+    return {
+        "columns": table.column_names,
+        "rows": table.num_rows,
+        "files": files
+    }
+
+
+def export_records_to_s3(
+    s3_client,
+    records: List[Dict[str, Any]],
+    bucket: str,
+    key: str,
+    rows_per_file: Optional[int] = None,
+    label_maps: Optional[Dict[str, Dict[str, str]]] = None,
+    part_size: int = DEFAULT_PART_SIZE
+) -> Dict[str, Any]:
+    """
+    レコードをCSVでS3にストリーミング出力
+
+    rows_per_file を指定した場合は `{名前}_part00001.csv` 形式の複数ファイルに分割します。
+
+    Args:
+        s3_client: boto3 S3クライアント
+        records: VALUEレコードのリスト
+        bucket: 出力先バケット
+        key: 出力先キー（.csv）
+        rows_per_file: 1ファイルあたりの最大行数（オプション）
+        label_maps: ラベル付与する次元の コード -> ラベル 辞書（オプション）
+        part_size: マルチパートアップロードのパートサイズ
+
+    Returns:
+        出力結果（列名、行数、ファイル一覧）
+    """
+    columns = record_columns(records)
+    output_columns = label_output_columns(columns, label_maps or {})
+
+    files = []
+    total_rows = 0
+    for file_key, start, end in split_file_ranges(key, len(records), rows_per_file):
+        chunk = (records[i] for i in range(start, end))
+        with S3MultipartWriter(s3_client, bucket, file_key, part_size=part_size) as writer:
+            rows = write_records_csv(writer, chunk, columns, label_maps)
+        files.append({"key": file_key, "rows": rows, "size_bytes": writer.bytes_written})
+        total_rows += rows
+
+    return {
+        "columns": output_columns,
+        "rows": total_rows,
+        "files": files
+    }
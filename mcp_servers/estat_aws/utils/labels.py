@@ -0,0 +1,140 @@
+"""
+コード→和名ラベル変換ユーティリティ
+
+e-StatのCLASS_INFを次元ごとの「コード配列・ラベル配列」に変換し、
+コード列にラベルを辞書型（DictionaryArray）の列として付与します。
+ラベルの検索は重複を除いたコードに対してのみ行うため、
+行数が多くてもレコード単位の辞書参照は発生せず、追加メモリも行あたりのインデックス分だけです。
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ラベル列名の接尾辞
+LABEL_SUFFIX = "_name"
+
+LabelIndex = Dict[str, Tuple[pa.Array, pa.Array]]
+
+
+def extract_class_inf(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    APIレスポンスからCLASS_INFを取り出す
+
+    Args:
+        response: getStatsData または getMetaInfo のレスポンス
+
+    Returns:
+        CLASS_INF（含まれていない場合はNone）
+    """
+    if not isinstance(response, dict):
+        return None
+
+    stats_data = response.get('GET_STATS_DATA', {}).get('STATISTICAL_DATA', {})
+    if stats_data.get('CLASS_INF'):
+        return stats_data['CLASS_INF']
+
+    metadata_inf = response.get('GET_META_INFO', {}).get('METADATA_INF', {})
+    if metadata_inf.get('CLASS_INF'):
+        return metadata_inf['CLASS_INF']
+
+    return None
+
+
+def build_label_index(class_inf: Optional[Dict[str, Any]]) -> LabelIndex:
+    """
+    CLASS_INFから次元ごとのコード配列・ラベル配列を作成
+
+    Args:
+        class_inf: e-StatのCLASS_INF
+
+    Returns:
+        次元ID（area, cat01, time など）をキーとする (コード配列, ラベル配列) の辞書
+    """
+    if not class_inf:
+        return {}
+
+    class_objs = class_inf.get('CLASS_OBJ', [])
+    if isinstance(class_objs, dict):
+        class_objs = [class_objs]
+
+    label_index = {}
+    for class_obj in class_objs:
+        dimension = class_obj.get('@id')
+        classes = class_obj.get('CLASS', [])
+        if isinstance(classes, dict):
+            classes = [classes]
+        if not dimension or not classes:
+            continue
+
+        codes = [cls.get('@code') for cls in classes]
+        labels = [cls.get('@name', '') for cls in classes]
+        label_index[dimension] = (
+            pa.array(codes, type=pa.string()),
+            pa.array(labels, type=pa.string())
+        )
+
+    return label_index
+
+
+def label_column(codes: pa.Array, entry: Tuple[pa.Array, pa.Array]) -> pa.DictionaryArray:
+    """
+    コード列をラベルの辞書型列に変換
+
+    コード列が辞書型の場合は辞書部分（重複のないコード）だけを変換し、インデックスを再利用します。
+    未知のコードのラベルは空文字になります。
+
+    Args:
+        codes: コード列（文字列または辞書型）
+        entry: build_label_indexで作成した (コード配列, ラベル配列)
+
+    Returns:
+        ラベルの辞書型列
+    """
+    label_codes, labels = entry
+
+    if isinstance(codes, pa.ChunkedArray):
+        codes = codes.combine_chunks()
+    if not pa.types.is_dictionary(codes.type):
+        codes = pc.cast(codes, pa.string()).dictionary_encode()
+
+    positions = pc.index_in(codes.dictionary, value_set=label_codes)
+    dictionary = pc.fill_null(labels.take(positions), "")
+    indices = codes.indices
+    if indices.type != pa.int32():
+        indices = pc.cast(indices, pa.int32())
+
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def label_records(records: List[Dict[str, Any]], label_index: LabelIndex) -> List[Dict[str, Any]]:
+    """
+    VALUEレコードに和名ラベル（<次元ID>_name）を付与
+
+    Args:
+        records: e-Stat APIのVALUEレコード
+        label_index: build_label_indexで作成したラベルインデックス
+
+    Returns:
+        ラベルを追加したレコードのリスト
+    """
+    labeled = [dict(record) for record in records if isinstance(record, dict)]
+    if not labeled or not label_index:
+        return labeled
+
+    for dimension, entry in label_index.items():
+        field = f"@{dimension}"
+        if not any(field in record for record in labeled):
+            continue
+
+        codes = pa.array(
+            [None if record.get(field) is None else str(record.get(field)) for record in labeled],
+            type=pa.string()
+        )
+        labels = label_column(codes, entry).to_pylist()
+        for record, label in zip(labeled, labels):
+            if field in record:
+                record[f"{dimension}{LABEL_SUFFIX}"] = label
+
+    return labeled
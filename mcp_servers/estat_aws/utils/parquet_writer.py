@@ -0,0 +1,489 @@
+"""
+Hiveパーティション形式のParquet書き込み
+
+パーティション列（既定は DEFAULT_PARTITION_BY）に従って `year=2020/part-00000.parquet`
+のようなディレクトリ構成でS3に書き込みます。
+1ファイルあたりの行数は max_rows_per_file で上限を設け、大きなパーティションは複数ファイルに分割します。
+
+パーティション列はファイル内にも残すため、パーティションを認識しない読み込み（外部テーブル等）でも列として参照できます。
+
+ファイルの書き込みは PARQUET_WRITE_PROFILES のプロファイルに従い、ディメンション列でソートした上で
+Athenaの分割サイズに合わせた行グループ・コード列の辞書エンコード・列統計を出力します。
+ソート済みの行グループは min/max 統計で year や region_code の条件を絞り込めます。
+また、コード列にはブルームフィルタ、全列にページインデックス（列インデックス・オフセットインデックス）を出力し、
+ソートキーの後方にある category などのコードでの絞り込みでもページ単位で読み飛ばせるようにします。
+"""
+
+import inspect
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# transform_to_parquetの既定のパーティション列
+# year×region_code では1データセットが数千の小さなファイルに分かれるため、year だけで分割する
+# （region_code の絞り込みはソート済みの行グループの min/max 統計とブルームフィルタで行う）
+DEFAULT_PARTITION_BY = ["year"]
+
+# 1ファイルあたりの最大行数
+DEFAULT_MAX_ROWS_PER_FILE = 1_000_000
+
+# nullのパーティション値（Hive/Athenaの既定値）
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+PARQUET_CONTENT_TYPE = "application/octet-stream"
+
+# 同時にアップロードするファイル数
+DEFAULT_UPLOAD_WORKERS = 8
+
+# Parquet書き込みプロファイル
+#   sort:               ディメンション列（パーティション列→その他のディメンション列）でソートするか
+#   row_group_bytes:    行グループの目標サイズ（非圧縮・メモリ上の推定値）
+#   dictionary_columns: 辞書エンコードする列（"codes" は文字列・辞書型の列、True は全列）
+#   bloom_filter_columns: ブルームフィルタを出力する列（"codes" はパーティション列以外のコード列）
+#   bloom_filter_fpp:   ブルームフィルタの偽陽性率
+#   write_page_index:   ページインデックスを出力するか
+#   data_page_size:     データページの目標サイズ（小さいほどページインデックスでの絞り込みが細かくなる）
+PARQUET_WRITE_PROFILES = {
+    # Athena向け: 128MB前後の行グループ（Athenaの分割単位）、zstd、列統計
+    "athena": {
+        "compression": "zstd",
+        "compression_level": 3,
+        "sort": True,
+        "row_group_bytes": 128 * 1024 * 1024,
+        "min_row_group_rows": 10_000,
+        "dictionary_columns": "codes",
+        "write_statistics": True,
+        "bloom_filter_columns": "codes",
+        "bloom_filter_fpp": 0.05,
+        "write_page_index": True,
+        "data_page_size": 256 * 1024,
+    },
+    # 従来の書き込み（ソートなし、1行グループ、snappy）
+    "snappy": {
+        "compression": "snappy",
+        "sort": False,
+        "row_group_bytes": None,
+        "dictionary_columns": True,
+        "write_statistics": True,
+    },
+}
+
+DEFAULT_WRITE_PROFILE = os.environ.get("PARQUET_WRITE_PROFILE", "athena")
+
+# ソートキーの対象外とする列（値・単位・ID、"$" はe-Stat APIの値フィールド）
+NON_DIMENSION_COLUMNS = {"value", "$", "unit", "stats_data_id", "dataset_id"}
+
+# ラベル列（<コード列>_name）の接尾辞
+LABEL_COLUMN_SUFFIX = "_name"
+
+# pyarrowのバージョンにより未対応の書き込みオプションがあるため、対応しているものだけ渡す
+_WRITE_TABLE_PARAMETERS = None
+
+
+def partition_path(partition_by: List[str], values: Tuple[Any, ...]) -> str:
+    """
+    パーティション値からHive形式のディレクトリパスを作成
+
+    Args:
+        partition_by: パーティション列名のリスト
+        values: パーティション列の値
+
+    Returns:
+        "year=2020/region_code=13000" 形式のパス
+    """
+    parts = []
+    for name, value in zip(partition_by, values):
+        if value is None or value == "":
+            encoded = HIVE_DEFAULT_PARTITION
+        else:
+            encoded = quote(str(value), safe="")
+        parts.append(f"{name}={encoded}")
+    return "/".join(parts)
+
+
+def split_partitions(table: "pa.Table",
+                     partition_by: List[str]) -> Iterator[Tuple[Tuple[Any, ...], "pa.Table"]]:
+    """
+    テーブルをパーティション値ごとに分割
+
+    各パーティション列を辞書エンコードして整数キーにまとめ、1回の安定ソートでグループ化します。
+
+    Args:
+        table: Arrowテーブル
+        partition_by: パーティション列名のリスト
+
+    Yields:
+        (パーティション値のタプル, パーティションのテーブル)
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    if table.num_rows == 0:
+        return
+
+    if not partition_by:
+        yield (), table
+        return
+
+    keys = np.zeros(table.num_rows, dtype=np.int64)
+    dictionaries = []
+    for name in partition_by:
+        column = table.column(name).combine_chunks()
+        if not pa.types.is_dictionary(column.type):
+            column = column.dictionary_encode()
+        # null は 0、辞書のインデックスは 1 始まりにする
+        indices = column.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64) + 1
+        radix = len(column.dictionary) + 1
+        keys = keys * radix + indices
+        dictionaries.append((column.dictionary.to_pylist(), radix))
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(sorted_keys)]))
+
+    for start, end in zip(starts, ends):
+        key = int(sorted_keys[start])
+        values = []
+        for dictionary, radix in reversed(dictionaries):
+            index = key % radix
+            key //= radix
+            values.append(dictionary[index - 1] if index else None)
+        yield tuple(reversed(values)), table.take(pa.array(order[start:end]))
+
+
+def get_write_profile(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    書き込みプロファイルを取得
+
+    Args:
+        profile: プロファイル名（省略時は DEFAULT_WRITE_PROFILE）
+
+    Returns:
+        プロファイル設定
+    """
+    name = profile or DEFAULT_WRITE_PROFILE
+    if name not in PARQUET_WRITE_PROFILES:
+        raise ValueError(f"Unknown Parquet write profile: {name}")
+    return PARQUET_WRITE_PROFILES[name]
+
+
+def dimension_columns(table: "pa.Table", partition_by: Optional[List[str]] = None) -> List[str]:
+    """
+    ソートキーとするディメンション列を決定
+
+    パーティション列を先頭に、残りの文字列・辞書型のコード列と整数の時間列をスキーマの順に並べます。
+    値・単位・ラベル列は含みません。
+
+    Args:
+        table: Arrowテーブル
+        partition_by: パーティション列名のリスト
+
+    Returns:
+        ディメンション列名のリスト
+    """
+    import pyarrow as pa
+
+    columns = [name for name in (partition_by or []) if name in table.column_names]
+    for field in table.schema:
+        if field.name in columns or field.name in NON_DIMENSION_COLUMNS:
+            continue
+        if field.name.endswith(LABEL_COLUMN_SUFFIX):
+            continue
+        if (pa.types.is_dictionary(field.type) or pa.types.is_string(field.type)
+                or pa.types.is_integer(field.type)):
+            columns.append(field.name)
+
+    return columns
+
+
+def sort_table(table: "pa.Table", sort_by: List[str]) -> "pa.Table":
+    """
+    テーブルをディメンション列でソート（nullは末尾）
+
+    辞書型の列は辞書の値の順位を行に展開してソートキーにするため、文字列への展開は行いません。
+
+    Args:
+        table: Arrowテーブル
+        sort_by: ソート列名のリスト（文字列・辞書型・整数の列）
+
+    Returns:
+        ソート済みのテーブル
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not sort_by or table.num_rows < 2:
+        return table
+
+    import numpy as np
+
+    keys = {}
+    for name in sort_by:
+        column = table.column(name).combine_chunks()
+        if pa.types.is_string(column.type):
+            column = column.dictionary_encode()
+        if pa.types.is_dictionary(column.type):
+            ranks = pc.rank(column.dictionary, sort_keys="ascending", tiebreaker="dense")
+            column = ranks.take(column.indices)
+        if column.null_count:
+            # nullは型の最大値に置き換えて末尾に並べる
+            column = pc.fill_null(column, np.iinfo(column.type.to_pandas_dtype()).max)
+        keys[name] = column
+
+    indices = pc.sort_indices(pa.table(keys), sort_keys=[(name, "ascending") for name in sort_by])
+    return table.take(indices)
+
+
+def row_group_size(table: "pa.Table", profile: Dict[str, Any]) -> Optional[int]:
+    """
+    目標サイズから行グループの行数を算出
+
+    Args:
+        table: Arrowテーブル
+        profile: 書き込みプロファイル
+
+    Returns:
+        行グループあたりの行数（None の場合は1行グループ）
+    """
+    target_bytes = profile.get("row_group_bytes")
+    if not target_bytes or table.num_rows == 0:
+        return None
+
+    bytes_per_row = max(1, table.nbytes // table.num_rows)
+    rows = max(profile.get("min_row_group_rows", 1), target_bytes // bytes_per_row)
+    return int(min(rows, table.num_rows))
+
+
+def bloom_filter_options(table: "pa.Table", profile: Dict[str, Any],
+                         partition_by: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    ブルームフィルタの列ごとの設定を作成
+
+    NDV（異なり数）はファイルごとの実際の異なり数を使い、フィルタのサイズを必要最小限にします。
+    パーティション列はファイル内で値が一定のため対象外です。
+
+    Args:
+        table: Arrowテーブル
+        profile: 書き込みプロファイル
+        partition_by: パーティション列名のリスト
+
+    Returns:
+        列名をキーとする {"ndv": 異なり数, "fpp": 偽陽性率} の辞書
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    columns = profile.get("bloom_filter_columns")
+    if not columns or table.num_rows == 0:
+        return {}
+
+    if columns == "codes":
+        columns = [
+            name for name in dimension_columns(table)
+            if name not in (partition_by or []) and not pa.types.is_integer(table.schema.field(name).type)
+        ]
+
+    options = {}
+    for name in columns:
+        if name not in table.column_names:
+            continue
+        column = table.column(name).combine_chunks()
+        if pa.types.is_dictionary(column.type):
+            column = column.indices
+        ndv = pc.count_distinct(column).as_py()
+        options[name] = {"ndv": max(1, ndv), "fpp": profile.get("bloom_filter_fpp", 0.05)}
+
+    return options
+
+
+def write_options(table: "pa.Table", profile: Dict[str, Any],
+                  sort_by: Optional[List[str]] = None,
+                  partition_by: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    プロファイルからpq.write_tableのオプションを作成
+
+    インストールされているpyarrowが対応していないオプション（sorting_columns, bloom_filter_options,
+    write_page_index など）は渡しません。
+
+    Args:
+        table: Arrowテーブル
+        profile: 書き込みプロファイル
+        sort_by: ソート済みの列名のリスト（sorting_columnsメタデータに記録）
+        partition_by: パーティション列名のリスト（ブルームフィルタの対象外）
+
+    Returns:
+        pq.write_tableのキーワード引数
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    global _WRITE_TABLE_PARAMETERS
+    if _WRITE_TABLE_PARAMETERS is None:
+        _WRITE_TABLE_PARAMETERS = set(inspect.signature(pq.write_table).parameters)
+
+    dictionary_columns = profile.get("dictionary_columns", True)
+    if dictionary_columns == "codes":
+        dictionary_columns = [
+            field.name for field in table.schema
+            if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type)
+        ]
+
+    options = {
+        "compression": profile.get("compression", "snappy"),
+        "use_dictionary": dictionary_columns,
+        "write_statistics": profile.get("write_statistics", True),
+    }
+    if profile.get("compression_level") is not None:
+        options["compression_level"] = profile["compression_level"]
+
+    rows = row_group_size(table, profile)
+    if rows:
+        options["row_group_size"] = rows
+
+    if profile.get("data_page_size"):
+        options["data_page_size"] = profile["data_page_size"]
+
+    if profile.get("write_page_index"):
+        options["write_page_index"] = True
+
+    if "bloom_filter_options" in _WRITE_TABLE_PARAMETERS:
+        bloom_filters = bloom_filter_options(table, profile, partition_by)
+        if bloom_filters:
+            options["bloom_filter_options"] = bloom_filters
+
+    if sort_by and "sorting_columns" in _WRITE_TABLE_PARAMETERS:
+        options["sorting_columns"] = [
+            pq.SortingColumn(table.column_names.index(name), nulls_first=False) for name in sort_by
+        ]
+
+    return {key: value for key, value in options.items() if key in _WRITE_TABLE_PARAMETERS}
+
+
+def write_table_bytes(table: "pa.Table", profile: Optional[str] = None,
+                      partition_by: Optional[List[str]] = None) -> bytes:
+    """
+    テーブルを書き込みプロファイルに従ってParquet形式のバイト列に変換
+
+    Args:
+        table: Arrowテーブル
+        profile: 書き込みプロファイル名（省略時は DEFAULT_WRITE_PROFILE）
+        partition_by: パーティション列名のリスト（ソートキーの先頭にする）
+
+    Returns:
+        Parquetファイルのバイト列
+    """
+    import pyarrow.parquet as pq
+
+    settings = get_write_profile(profile)
+    sort_by = dimension_columns(table, partition_by) if settings.get("sort") else []
+    table = sort_table(table, sort_by)
+
+    buffer = BytesIO()
+    pq.write_table(table, buffer, **write_options(table, settings, sort_by, partition_by))
+    return buffer.getvalue()
+
+
+def write_partitioned_to_s3(s3_client, table: "pa.Table", bucket: str, prefix: str,
+                            partition_by: Optional[List[str]] = None,
+                            max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+                            profile: Optional[str] = None,
+                            file_prefix: str = "part",
+                            overwrite: bool = False,
+                            upload_workers: int = DEFAULT_UPLOAD_WORKERS) -> Dict[str, Any]:
+    """
+    テーブルをHiveパーティション形式でS3に書き込み
+
+    Args:
+        s3_client: boto3 S3クライアント
+        table: Arrowテーブル
+        bucket: 出力先バケット
+        prefix: 出力先プレフィックス（例: "parquet/population/0003448237"）
+        partition_by: パーティション列名のリスト（テーブルに無い列は無視）
+        max_rows_per_file: 1ファイルあたりの最大行数
+        profile: 書き込みプロファイル名（省略時は DEFAULT_WRITE_PROFILE）
+        file_prefix: ファイル名の接頭辞（複数の書き込みが同じパーティションに出力する場合に区別する）
+        overwrite: 書き込み後、プレフィックス配下の既存のParquetファイルのうち今回書き込まなかったものを削除するか
+            （再実行で前回のパーティションのファイルが残らないようにする。
+            削除はすべてのアップロードが成功した後に行うため、失敗時は前回の出力が残る）
+        upload_workers: 同時にアップロードするファイル数
+
+    Returns:
+        書き込み結果（出力先、パーティション数、ファイル一覧、合計バイト数）
+    """
+    import pyarrow.parquet as pq
+    from .athena_results import delete_keys, list_result_files
+
+    prefix = prefix.strip("/")
+    partition_by = [name for name in (partition_by or []) if name in table.column_names]
+    max_rows_per_file = max(1, int(max_rows_per_file))
+    settings = get_write_profile(profile)
+
+    # 既存のファイルは書き込み前に列挙しておき、削除はアップロードの成功後に行う
+    existing = []
+    if overwrite:
+        existing = [key for key in list_result_files(s3_client, f"s3://{bucket}/{prefix}/")
+                    if key.endswith(".parquet")]
+
+    files = []
+    partitions = 0
+    total_bytes = 0
+    # 書き込み（CPU）は順に行い、アップロードだけを並行させる
+    # 未完了のアップロードは upload_workers の2倍までとし、保持するファイルの中身を抑える
+    upload_workers = max(1, int(upload_workers))
+    with ThreadPoolExecutor(max_workers=upload_workers) as executor:
+        pending = set()
+        for values, partition in split_partitions(table, partition_by):
+            partitions += 1
+            directory = f"{prefix}/{partition_path(partition_by, values)}" if partition_by else prefix
+
+            # ファイル分割の前にソートし、各ファイルが連続したキー範囲を持つようにする
+            sort_by = dimension_columns(partition, partition_by) if settings.get("sort") else []
+            partition = sort_table(partition, sort_by)
+
+            for part, offset in enumerate(range(0, partition.num_rows, max_rows_per_file)):
+                chunk = partition.slice(offset, max_rows_per_file)
+                buffer = BytesIO()
+                pq.write_table(chunk, buffer, **write_options(chunk, settings, sort_by, partition_by))
+                body = buffer.getvalue()
+                key = f"{directory}/{file_prefix}-{part:05d}.parquet"
+
+                if len(pending) >= 2 * upload_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(
+                    s3_client.put_object,
+                    Bucket=bucket,
+                    Key=key,
+                    Body=body,
+                    ContentType=PARQUET_CONTENT_TYPE
+                ))
+                files.append({"key": key, "records": chunk.num_rows, "size_bytes": len(body)})
+                total_bytes += len(body)
+
+        for future in pending:
+            future.result()
+
+    logger.info(f"Wrote {table.num_rows} records to s3://{bucket}/{prefix}/ "
+                f"({partitions} partitions, {len(files)} files)")
+
+    written = {f["key"] for f in files}
+    deleted = delete_keys(s3_client, bucket, [key for key in existing if key not in written])
+    if deleted:
+        logger.info(f"Deleted {deleted} stale files under s3://{bucket}/{prefix}/")
+
+    return {
+        "output_path": f"s3://{bucket}/{prefix}/",
+        "partition_by": partition_by,
+        "partitions": partitions,
+        "files": files,
+        "file_count": len(files),
+        "total_bytes": total_bytes
+    }
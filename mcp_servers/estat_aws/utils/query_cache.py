@@ -0,0 +1,258 @@
+"""
+Athenaクエリ結果のキャッシュ
+
+同じテーブル・同じ分析に対するクエリの結果を、正規化したSQLとテーブルのバージョンを
+キーにしてメモリ上に保持します。テーブルのバージョンはGlueカタログの metadata_location
+（Icebergテーブルはコミットごとに新しいメタデータファイルを指す）を使うため、
+データを投入するとキーが変わり、古いエントリは自動的に使われなくなります。
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# デフォルト設定（環境変数で上書き可能）
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+# 文字列リテラル・引用符付き識別子・コメント・空白・それ以外のトークン
+_SQL_TOKEN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\s+|[^'\"\s]+?(?=--|/\*|['\"\s]|$)|.",
+    re.DOTALL
+)
+
+# 正規化したSQLのトークン（文字列リテラル・引用符付き識別子・識別子/数値・記号）
+_REFERENCE_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[\w$]+|\S")
+
+# FROM句のテーブル（とエイリアス）の後に続いてよいキーワード
+_FROM_TERMINATORS = {
+    "where", "group", "order", "limit", "having", "union", "intersect", "except", "join", "inner",
+    "left", "right", "full", "cross", "natural", "on", "using", "window", "offset", "fetch",
+    "tablesample", "for", "select"
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    SQLを正規化（コメント除去・空白の統一・リテラル以外の小文字化・末尾のセミコロン除去）
+
+    Args:
+        sql: SQLクエリ
+
+    Returns:
+        正規化したSQL
+    """
+    tokens = []
+    for token in _SQL_TOKEN.findall(sql):
+        if token.startswith("--") or token.startswith("/*") or token.isspace():
+            if tokens and tokens[-1] != " ":
+                tokens.append(" ")
+        elif token[0] in ("'", '"'):
+            tokens.append(token)
+        else:
+            tokens.append(token.lower())
+    return re.sub(r"[\s;]+$", "", "".join(tokens)).strip()
+
+
+def _skip_parentheses(tokens: List[str], i: int) -> int:
+    """tokens[i] の "(" に対応する ")" の次の位置"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j] == "(":
+            depth += 1
+        elif tokens[j] == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(tokens)
+
+
+def _is_identifier(token: str) -> bool:
+    return token.startswith('"') or (token[0].isalpha() or token[0] == "_") and token not in _FROM_TERMINATORS
+
+
+def table_references(sql: str, default_database: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    クエリが参照するテーブルを抽出
+
+    FROM句のカンマ区切りのテーブルも含めます。FROM句を解釈しきれない場合は
+    参照するテーブルを確定できないため、Noneを返します（キャッシュしない）。
+
+    Args:
+        sql: SQLクエリ
+        default_database: データベース名が省略された場合のデータベース
+
+    Returns:
+        (database, table) のリスト（重複なし）。解釈できない場合はNone
+    """
+    tokens = _REFERENCE_TOKEN.findall(normalize_sql(sql))
+    references: List[Tuple[str, str]] = []
+
+    def relation(i: int) -> int:
+        # サブクエリ・括弧で囲んだ結合（中のFROM / JOINは別に処理する）
+        if i < len(tokens) and tokens[i] == "(":
+            i = _skip_parentheses(tokens, i)
+        elif i < len(tokens) and _is_identifier(tokens[i]):
+            parts = [tokens[i]]
+            i += 1
+            while i + 1 < len(tokens) and tokens[i] == "." and _is_identifier(tokens[i + 1]):
+                parts.append(tokens[i + 1])
+                i += 2
+            if i < len(tokens) and tokens[i] == "(":
+                # UNNEST(...) などのテーブル関数
+                i = _skip_parentheses(tokens, i)
+            else:
+                # Glueのデータベース名・テーブル名は小文字
+                names = [part.strip('"').lower() for part in parts[-2:]]
+                reference = (names[0], names[1]) if len(names) == 2 else (default_database, names[0])
+                if reference not in references:
+                    references.append(reference)
+        else:
+            return -1
+
+        # エイリアス（AS は省略可、列名リスト付きも可）
+        if i < len(tokens) and tokens[i] == "as":
+            i += 1
+        if i < len(tokens) and _is_identifier(tokens[i]):
+            i += 1
+            if i < len(tokens) and tokens[i] == "(":
+                i = _skip_parentheses(tokens, i)
+        return i
+
+    for i, token in enumerate(tokens):
+        if token not in ("from", "join"):
+            continue
+        j = relation(i + 1)
+        while token == "from" and 0 <= j < len(tokens) and tokens[j] == ",":
+            j = relation(j + 1)
+        if j < 0 or (j < len(tokens) and tokens[j] not in _FROM_TERMINATORS and tokens[j] not in (")", ";")):
+            return None
+    return references
+
+
+def table_version(glue_client, database: str, table_name: str) -> Optional[str]:
+    """
+    テーブルのバージョンを取得
+
+    Icebergテーブルは metadata_location（スナップショットごとに変わる）を、
+    それ以外のテーブルはGlueのテーブルバージョンIDを使います。
+
+    Args:
+        glue_client: boto3 Glueクライアント
+        database: データベース名
+        table_name: テーブル名
+
+    Returns:
+        バージョン文字列（取得できない場合はNone）
+    """
+    try:
+        table = glue_client.get_table(DatabaseName=database, Name=table_name)["Table"]
+    except Exception as e:
+        logger.debug(f"Failed to get table version for {database}.{table_name}: {e}")
+        return None
+
+    metadata_location = table.get("Parameters", {}).get("metadata_location")
+    if metadata_location:
+        return metadata_location
+    version_id = table.get("VersionId")
+    return f"{database}.{table_name}@{version_id}" if version_id else None
+
+
+class QueryResultCache:
+    """正規化SQLとテーブルのバージョンをキーにしたLRUキャッシュ"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            max_entries: 最大エントリ数（デフォルト: ATHENA_RESULT_CACHE_ENTRIES または 256、0で無効）
+            ttl_seconds: エントリの有効期間（秒）（デフォルト: ATHENA_RESULT_CACHE_TTL または 24時間）
+        """
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.environ.get("ATHENA_RESULT_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None
+                                 else os.environ.get("ATHENA_RESULT_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        self.enabled = self.max_entries > 0
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, database: str, versions: Sequence[str], kind: str = "rows") -> Tuple:
+        """
+        キャッシュキーを作成
+
+        Args:
+            query: SQLクエリ
+            database: データベース名
+            versions: 参照するテーブルのバージョン
+            kind: 保存する値の種類（全行 / 最初のページなど）
+
+        Returns:
+            キャッシュキー
+        """
+        return (kind, database, normalize_sql(query), tuple(versions))
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        キャッシュから値を取得
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            値（無い・期限切れの場合はNone）
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """
+        値をキャッシュに保存（上限を超えた分は古い順に削除）
+
+        Args:
+            key: キャッシュキー
+            value: 値
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """キャッシュを空にする"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報
+
+        Returns:
+            エントリ数・ヒット数・ミス数
+        """
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,327 @@
+"""
+S3オブジェクトのローカルディスクキャッシュ
+
+同じrawオブジェクトを短時間に何度も読み込むツール（transform / validate / parquet保存）のために、
+S3 GETの前段にETag検証付きのリードスルーキャッシュを置きます。
+キャッシュはバイト数ベースのLRUで上限を管理し、ヒット時はメモリマップで読み込みます。
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# デフォルト設定（環境変数で上書き可能）
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "estat-s3-cache")
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+
+
+def parse_s3_path(s3_path: str, default_bucket: Optional[str] = None) -> Tuple[str, str]:
+    """
+    S3パスをバケットとキーに分解
+
+    Args:
+        s3_path: S3パス (s3://bucket/key) またはキー
+        default_bucket: s3://形式でない場合に使用するバケット
+
+    Returns:
+        (バケット, キー) のタプル
+    """
+    if s3_path.startswith("s3://"):
+        parts = s3_path[5:].split("/", 1)
+        return parts[0], parts[1] if len(parts) > 1 else ""
+
+    if default_bucket is None:
+        raise ValueError(f"Invalid S3 path: {s3_path}")
+
+    return default_bucket, s3_path
+
+
+class S3ObjectCache:
+    """S3オブジェクトのリードスルーディスクキャッシュ"""
+
+    def __init__(
+        self,
+        s3_client,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        初期化
+
+        Args:
+            s3_client: boto3 S3クライアント
+            cache_dir: キャッシュディレクトリ（デフォルト: S3_CACHE_DIR または /tmp/estat-s3-cache）
+            max_bytes: キャッシュの最大バイト数（デフォルト: S3_CACHE_MAX_BYTES または 2GB）
+            enabled: キャッシュを有効にするか（デフォルト: S3_CACHE_ENABLED、未設定時は有効）
+        """
+        self.s3_client = s3_client
+        self.cache_dir = cache_dir or os.environ.get("S3_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else os.environ.get("S3_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        if enabled is None:
+            enabled = os.environ.get("S3_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.enabled = enabled and self.max_bytes > 0
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"S3 cache disabled, cannot create {self.cache_dir}: {e}")
+                self.enabled = False
+
+    # ========================================
+    # 公開API
+    # ========================================
+
+    def get_local_path(self, bucket: str, key: str) -> Optional[str]:
+        """
+        オブジェクトをキャッシュに取り込み、ローカルファイルパスを返す
+
+        キャッシュ済みの場合は If-None-Match による条件付きGETでETagを検証し、
+        変更がなければダウンロードせずにキャッシュファイルを返します。
+
+        Args:
+            bucket: S3バケット
+            key: S3キー
+
+        Returns:
+            ローカルファイルパス（キャッシュ無効またはサイズ超過の場合はNone）
+        """
+        path, response = self._fetch(bucket, key)
+        if response is not None:
+            response["Body"].close()
+        return path
+
+    @contextmanager
+    def open_mmap(self, bucket: str, key: str) -> Iterator[Any]:
+        """
+        オブジェクトをメモリマップで開く
+
+        キャッシュが使えない場合はS3から読み込んだbytesを返します。
+
+        Args:
+            bucket: S3バケット
+            key: S3キー
+
+        Yields:
+            mmapオブジェクトまたはbytes
+        """
+        path, response = self._fetch(bucket, key)
+        if path is None:
+            # サイズ超過の場合は取得済みのレスポンスをそのまま読み込む
+            if response is None:
+                response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            yield response["Body"].read()
+            return
+
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def read_bytes(self, bucket: str, key: str) -> bytes:
+        """
+        オブジェクトの内容をbytesで取得
+
+        Args:
+            bucket: S3バケット
+            key: S3キー
+
+        Returns:
+            オブジェクトの内容
+        """
+        with self.open_mmap(bucket, key) as buf:
+            return bytes(buf)
+
+    def read_json(self, bucket: str, key: str) -> Any:
+        """
+        JSONオブジェクトを読み込んでデコード
+
+        Args:
+            bucket: S3バケット
+            key: S3キー
+
+        Returns:
+            デコードされたJSON
+        """
+        with self.open_mmap(bucket, key) as buf:
+            return json.loads(bytes(buf).decode("utf-8"))
+
+    def invalidate(self, bucket: str, key: str) -> None:
+        """キャッシュエントリを削除"""
+        for path in self._entry_paths(bucket, key):
+            self._remove(path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            統計情報
+        """
+        entries = self._list_entries()
+        return {
+            "enabled": self.enabled,
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    # ========================================
+    # 内部処理
+    # ========================================
+
+    def _fetch(self, bucket: str, key: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        オブジェクトをキャッシュに取り込む（get_local_path / open_mmap の共通処理）
+
+        Returns:
+            (ローカルファイルパス, 未読のGETレスポンス) のタプル
+            （キャッシュ無効の場合は (None, None)、サイズ超過の場合は (None, レスポンス)）
+        """
+        if not self.enabled:
+            return None, None
+
+        data_path, meta_path = self._entry_paths(bucket, key)
+        cached_etag = self._read_etag(meta_path) if os.path.exists(data_path) else None
+
+        params = {"Bucket": bucket, "Key": key}
+        if cached_etag:
+            params["IfNoneMatch"] = cached_etag
+
+        try:
+            response = self.s3_client.get_object(**params)
+        except Exception as e:
+            if cached_etag and self._is_not_modified(e):
+                self.hits += 1
+                self._touch(data_path)
+                logger.debug(f"S3 cache hit: s3://{bucket}/{key}")
+                return data_path, None
+            raise
+
+        self.misses += 1
+        content_length = response.get("ContentLength")
+        if content_length is not None and content_length > self.max_bytes:
+            # キャッシュに収まらないオブジェクトは呼び出し側でこのレスポンスから直接読み込む
+            return None, response
+
+        self._store(response, data_path, meta_path)
+        self._evict(keep=data_path)
+        logger.debug(f"S3 cache miss: s3://{bucket}/{key}")
+        return data_path, None
+
+    def _entry_paths(self, bucket: str, key: str) -> Tuple[str, str]:
+        """キャッシュエントリのデータ・メタデータパスを取得"""
+        digest = hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + ".data", base + ".etag"
+
+    def _store(self, response: Dict[str, Any], data_path: str, meta_path: str) -> None:
+        """GETレスポンスをキャッシュファイルにストリーミング書き込み"""
+        body = response["Body"]
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = body.read(DOWNLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            # データを先に置き換えてからETagを書くことで、途中失敗時は次回再取得される
+            self._remove(meta_path)
+            os.replace(tmp_path, data_path)
+            etag = response.get("ETag")
+            if etag:
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    f.write(etag)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """合計サイズが上限を超えた場合、最終アクセスが古い順に削除"""
+        with self._lock:
+            entries = self._list_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                self._remove(path)
+                self._remove(path[:-len(".data")] + ".etag")
+                total -= size
+
+    def _list_entries(self) -> list:
+        """(パス, サイズ, 最終アクセス時刻) のリストを取得"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+
+        for name in names:
+            if not name.endswith(".data"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    @staticmethod
+    def _read_etag(meta_path: str) -> Optional[str]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    @staticmethod
+    def _is_not_modified(error: Exception) -> bool:
+        """条件付きGETの304レスポンスかどうかを判定"""
+        response = getattr(error, "response", None) or {}
+        code = str(response.get("Error", {}).get("Code", ""))
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return code in ("304", "NotModified") or status == 304
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
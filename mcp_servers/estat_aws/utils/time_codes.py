@@ -0,0 +1,159 @@
+"""
+e-Stat時間コードの解析
+
+e-Statの @time は "YYYY" + 種別(2桁) + 開始月(2桁) + 終了月(2桁) の10桁コードです。
+
+- 2020000000: 2020年（暦年）
+- 2020100000: 2020年度
+- 2020000101: 2020年1月
+- 2020000103: 2020年1～3月期
+
+データセット内の時間コードは数百種類程度しかないため、コードごとに一度だけ解析して
+結果をキャッシュし、列データには辞書インデックスで展開します。
+"2020", "2020Q1", "2020-01", "202001" などの従来形式にも対応します。
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+DEFAULT_YEAR = 2020
+
+# 10桁の時間コードの種別
+TIME_KIND_CALENDAR = "00"
+TIME_KIND_FISCAL = "10"
+
+# 年度の開始月
+FISCAL_YEAR_START_MONTH = 4
+
+TIME_DIMENSION_COLUMNS = ["year", "quarter", "month", "fiscal_year"]
+
+_ESTAT_TIME_CODE = re.compile(r"^(\d{4})(\d{2})(\d{2})(\d{2})$")
+_YEAR = re.compile(r"(\d{4})")
+_QUARTER = re.compile(r"Q([1-4])", re.IGNORECASE)
+_MONTH_HYPHEN = re.compile(r"\d{4}-(\d{2})")
+_MONTH_DATE = re.compile(r"\d{4}(\d{2})\d{2}")
+_MONTH_COMPACT = re.compile(r"\d{4}(\d{2})")
+
+
+@lru_cache(maxsize=4096)
+def parse_time_code(time_code: str) -> Tuple[int, int, int, int]:
+    """
+    時間コードを年・四半期・月・年度に分解
+
+    Args:
+        time_code: 時間コード (例: "2020000000", "2020001010", "2020Q1", "2020-01")
+
+    Returns:
+        (年, 四半期, 月, 年度) のタプル。四半期・月が無い場合は0
+    """
+    time_code = str(time_code).strip() if time_code else ""
+
+    match = _ESTAT_TIME_CODE.match(time_code)
+    if match:
+        return _parse_estat_code(*match.groups())
+
+    return _parse_legacy_code(time_code)
+
+
+def _parse_estat_code(year_str: str, kind: str, start_str: str, end_str: str) -> Tuple[int, int, int, int]:
+    """10桁のe-Stat時間コードを解析"""
+    year = int(year_str)
+    start_month = int(start_str)
+    end_month = int(end_str)
+
+    month = 0
+    quarter = 0
+    if 1 <= start_month <= 12:
+        if end_month == start_month:
+            # 月次
+            month = start_month
+            quarter = (start_month - 1) // 3 + 1
+        elif end_month - start_month == 2 and start_month % 3 == 1:
+            # 四半期（1～3月期など）
+            quarter = (start_month - 1) // 3 + 1
+
+    if kind == TIME_KIND_FISCAL:
+        fiscal_year = year
+    else:
+        fiscal_year = _fiscal_year(year, start_month)
+
+    return year, quarter, month, fiscal_year
+
+
+def _parse_legacy_code(time_code: str) -> Tuple[int, int, int, int]:
+    """従来形式の時間文字列を解析"""
+    if not time_code:
+        return DEFAULT_YEAR, 0, 0, DEFAULT_YEAR
+
+    match = _YEAR.search(time_code)
+    year = int(match.group(1)) if match else DEFAULT_YEAR
+
+    match = _QUARTER.search(time_code)
+    quarter = int(match.group(1)) if match else 0
+
+    month = 0
+    for pattern in (_MONTH_HYPHEN, _MONTH_DATE, _MONTH_COMPACT):
+        match = pattern.search(time_code)
+        if match:
+            month = int(match.group(1))
+            break
+
+    start_month = month or ((quarter - 1) * 3 + 1 if quarter else 0)
+    return year, quarter, month, _fiscal_year(year, start_month)
+
+
+def _fiscal_year(year: int, start_month: int) -> int:
+    """暦年と開始月から年度を算出（年単位のデータは暦年と同じ）"""
+    if 1 <= start_month < FISCAL_YEAR_START_MONTH:
+        return year - 1
+    return year
+
+
+def build_time_dimension(time_codes) -> "pa.Table":
+    """
+    時間コードの一覧から時間ディメンションテーブルを作成
+
+    Args:
+        time_codes: 重複のない時間コードの配列またはリスト
+
+    Returns:
+        time_code, year, quarter, month, fiscal_year 列を持つpyarrow Table
+    """
+    import pyarrow as pa
+
+    codes = time_codes.to_pylist() if hasattr(time_codes, "to_pylist") else list(time_codes)
+    parsed = [parse_time_code(code) for code in codes]
+
+    columns = {"time_code": pa.array(codes, type=pa.string())}
+    for i, name in enumerate(TIME_DIMENSION_COLUMNS):
+        columns[name] = pa.array([parts[i] for parts in parsed], type=pa.int32())
+
+    return pa.table(columns)
+
+
+def expand_time_columns(time_codes: "pa.Array") -> Dict[str, "pa.Array"]:
+    """
+    時間コード列から年・四半期・月・年度の列を作成
+
+    重複を除いたコードごとに時間ディメンションを作り、辞書インデックスで各行に展開します。
+
+    Args:
+        time_codes: @time の文字列配列
+
+    Returns:
+        列名をキーとするint32配列の辞書
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(time_codes, pa.ChunkedArray):
+        time_codes = time_codes.combine_chunks()
+
+    encoded = pc.fill_null(time_codes, "").dictionary_encode()
+    dimension = build_time_dimension(encoded.dictionary)
+
+    return {
+        name: dimension.column(name).combine_chunks().take(encoded.indices)
+        for name in TIME_DIMENSION_COLUMNS
+    }
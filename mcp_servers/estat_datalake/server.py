@@ -162,6 +162,10 @@ def main():
                                         "check_duplicates": {
                                             "type": "boolean",
                                             "description": "重複チェックを実行するか（デフォルト: false）"
+                                        },
+                                        "quarantine_output_path": {
+                                            "type": "string",
+                                            "description": "不正レコードを理由列付きで書き出すParquetのS3パス（オプション）"
                                         }
                                     },
                                     "required": ["s3_input_path", "domain", "dataset_id"]
@@ -188,6 +192,18 @@ def main():
                                         "dataset_id": {
                                             "type": "string",
                                             "description": "データセットID"
+                                        },
+                                        "partitioned": {
+                                            "type": "boolean",
+                                            "description": "ドメインのpartition_byでHiveパーティション形式に分割して保存するか（デフォルト: true）"
+                                        },
+                                        "max_rows_per_file": {
+                                            "type": "integer",
+                                            "description": "1ファイルあたりの最大行数（デフォルト: 1000000）"
+                                        },
+                                        "overwrite": {
+                                            "type": "boolean",
+                                            "description": "partitioned の場合に、保存後に出力パス配下の既存のParquetファイルのうち今回書き込まなかったものを削除するか（デフォルト: false）"
                                         }
                                     },
                                     "required": ["s3_input_path", "s3_output_path", "domain", "dataset_id"]
@@ -228,6 +244,14 @@ def main():
                                         "domain": {
                                             "type": "string",
                                             "description": "ドメイン"
+                                        },
+                                        "check_duplicates": {
+                                            "type": "boolean",
+                                            "description": "重複チェックを実行するか（デフォルト: false）"
+                                        },
+                                        "quarantine_output_path": {
+                                            "type": "string",
+                                            "description": "不正レコードを理由列付きで書き出すParquetのS3パス（オプション）"
                                         }
                                     },
                                     "required": ["s3_input_path", "dataset_id", "dataset_name", "domain"]
@@ -255,6 +279,71 @@ def main():
                                     "required": ["domain", "s3_parquet_path"]
                                 }
                             },
+                            {
+                                "name": "commit_to_iceberg",
+                                "description": "ParquetファイルをAthenaを介さずIcebergのデータファイルとして登録し、スナップショットをコミット",
+                                "inputSchema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "domain": {
+                                            "type": "string",
+                                            "description": "ドメイン"
+                                        },
+                                        "s3_parquet_path": {
+                                            "type": "string",
+                                            "description": "Parquetファイルまたはパーティション出力ディレクトリのS3パス"
+                                        },
+                                        "catalog": {
+                                            "type": "string",
+                                            "enum": ["glue", "sql"],
+                                            "description": "カタログの種類（デフォルト: glue、sqlはローカル検証用）"
+                                        },
+                                        "catalog_uri": {
+                                            "type": "string",
+                                            "description": "SQLカタログの接続URI（例: sqlite:////tmp/iceberg/catalog.db）"
+                                        },
+                                        "warehouse": {
+                                            "type": "string",
+                                            "description": "SQLカタログのウェアハウス（例: file:///tmp/iceberg/warehouse）"
+                                        }
+                                    },
+                                    "required": ["domain", "s3_parquet_path"]
+                                }
+                            },
+                            {
+                                "name": "maintain_iceberg_tables",
+                                "description": "Icebergテーブルの小ファイル統合（OPTIMIZE）と期限切れスナップショット・孤立ファイルの削除（VACUUM）を、ファイル数・サイズのしきい値に応じて実行",
+                                "inputSchema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "domains": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                            "description": "対象ドメインのリスト（デフォルト: 全ドメイン）"
+                                        },
+                                        "small_file_mb": {
+                                            "type": "number",
+                                            "description": "小ファイルとみなすサイズ（MB、デフォルト: 64）"
+                                        },
+                                        "min_small_files": {
+                                            "type": "integer",
+                                            "description": "OPTIMIZEを実行する統合可能な小ファイル数の下限（デフォルト: 10）"
+                                        },
+                                        "snapshot_retention_days": {
+                                            "type": "integer",
+                                            "description": "スナップショットの保持日数（デフォルト: 5）"
+                                        },
+                                        "force": {
+                                            "type": "boolean",
+                                            "description": "しきい値に関係なく実行するか（デフォルト: false）"
+                                        },
+                                        "dry_run": {
+                                            "type": "boolean",
+                                            "description": "統計と実行判定だけを返すか（デフォルト: false）"
+                                        }
+                                    }
+                                }
+                            },
                             {
                                 "name": "fetch_dataset_filtered",
                                 "description": "フィルタ条件を指定してE-statデータセットを取得",
@@ -333,6 +422,41 @@ def main():
                                     "required": ["dataset_id"]
                                 }
                             },
+                            {
+                                "name": "transform_dataset_parallel",
+                                "description": "並列取得したチャンクファイルをプロセスプールで並列にParquet変換",
+                                "inputSchema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "dataset_id": {
+                                            "type": "string",
+                                            "description": "データセットID"
+                                        },
+                                        "domain": {
+                                            "type": "string",
+                                            "description": "ドメイン"
+                                        },
+                                        "chunk_paths": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                            "description": "変換するチャンクのS3パス（省略時は raw/{dataset_id}/ の最新の取得分）"
+                                        },
+                                        "timestamp": {
+                                            "type": "string",
+                                            "description": "対象とする取得時のタイムスタンプ（YYYYMMDD_HHMMSS）"
+                                        },
+                                        "output_prefix": {
+                                            "type": "string",
+                                            "description": "出力先プレフィックス（デフォルト: parquet/{domain}/{dataset_id}）"
+                                        },
+                                        "max_workers": {
+                                            "type": "integer",
+                                            "description": "最大ワーカー数（デフォルト: CPUコア数）"
+                                        }
+                                    },
+                                    "required": ["dataset_id", "domain"]
+                                }
+                            },
                             {
                                 "name": "analyze_with_athena",
                                 "description": "Athenaで統計分析を実行",
@@ -427,10 +551,16 @@ def execute_tool(tool_name: str, arguments: dict) -> dict:
             return validate_data_quality(arguments)
         elif tool_name == "save_to_parquet":
             return save_to_parquet(arguments)
+        elif tool_name == "transform_dataset_parallel":
+            return transform_dataset_parallel(arguments)
         elif tool_name == "create_iceberg_table":
             return create_iceberg_table(arguments)
         elif tool_name == "load_to_iceberg":
             return load_to_iceberg(arguments)
+        elif tool_name == "commit_to_iceberg":
+            return commit_to_iceberg(arguments)
+        elif tool_name == "maintain_iceberg_tables":
+            return maintain_iceberg_tables(arguments)
         elif tool_name == "analyze_with_athena":
             return analyze_with_athena(arguments)
         elif tool_name == "ingest_dataset_complete":
@@ -583,12 +713,16 @@ def fetch_dataset(arguments: dict) -> dict:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             s3_key = f"raw/{dataset_id}/{dataset_id}_{timestamp}.json"
             
+            _add_project_root_to_path()
+            from datalake.s3_preview import record_count_metadata
+            
             s3_client = boto3.client('s3', region_name=aws_region)
             s3_client.put_object(
                 Bucket=s3_bucket,
                 Key=s3_key,
                 Body=json.dumps(value_list, ensure_ascii=False, indent=2).encode('utf-8'),
-                ContentType='application/json'
+                ContentType='application/json',
+                Metadata=record_count_metadata(len(value_list))
             )
             
             s3_path = f"s3://{s3_bucket}/{s3_key}"
@@ -751,12 +885,16 @@ def fetch_dataset_filtered(arguments: dict) -> dict:
             filter_str = "_".join([f"{k}_{v}" for k, v in filters.items()])
             s3_key = f"raw/{dataset_id}/{dataset_id}_{filter_str}_{timestamp}.json"
             
+            _add_project_root_to_path()
+            from datalake.s3_preview import record_count_metadata
+            
             s3_client = boto3.client('s3', region_name=aws_region)
             s3_client.put_object(
                 Bucket=s3_bucket,
                 Key=s3_key,
                 Body=json.dumps(value_list, ensure_ascii=False, indent=2).encode('utf-8'),
-                ContentType='application/json'
+                ContentType='application/json',
+                Metadata=record_count_metadata(len(value_list))
             )
             
             s3_path = f"s3://{s3_bucket}/{s3_key}"
@@ -877,12 +1015,16 @@ def fetch_large_dataset_complete(arguments: dict) -> dict:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             s3_key = f"raw/{dataset_id}/{dataset_id}_chunk_001_{timestamp}.json"
             
+            _add_project_root_to_path()
+            from datalake.s3_preview import record_count_metadata
+            
             s3_client = boto3.client('s3', region_name=aws_region)
             s3_client.put_object(
                 Bucket=s3_bucket,
                 Key=s3_key,
                 Body=json.dumps(chunk_values, ensure_ascii=False, indent=2).encode('utf-8'),
-                ContentType='application/json'
+                ContentType='application/json',
+                Metadata=record_count_metadata(len(chunk_values))
             )
             s3_location = f"s3://{s3_bucket}/{s3_key}"
         
@@ -965,6 +1107,56 @@ def fetch_large_dataset_parallel(arguments: dict) -> dict:
         }
 
 
+_S3_CACHE = None
+
+
+def _add_project_root_to_path():
+    """プロジェクトルートをパスに追加"""
+    from pathlib import Path
+    import sys
+
+    project_root = Path(__file__).parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+
+def _get_s3_cache():
+    """
+    S3ローカルディスクキャッシュを取得（プロセス内で共有）
+
+    キャッシュは初回呼び出し時に専用のS3クライアントで作成します。
+
+    Returns:
+        S3ObjectCache
+    """
+    global _S3_CACHE
+    _add_project_root_to_path()
+
+    import os
+    import boto3
+    from datalake.s3_cache import S3ObjectCache
+
+    if _S3_CACHE is None:
+        aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
+        _S3_CACHE = S3ObjectCache(boto3.client('s3', region_name=aws_region))
+
+    return _S3_CACHE
+
+
+def _read_s3_json(bucket: str, key: str):
+    """
+    S3のJSONオブジェクトをローカルディスクキャッシュ経由で読み込む
+
+    Args:
+        bucket: S3バケット
+        key: S3キー
+
+    Returns:
+        デコードされたJSON
+    """
+    return _get_s3_cache().read_json(bucket, key)
+
+
 def load_data_from_s3(arguments: dict) -> dict:
     """S3からデータを読み込む"""
     try:
@@ -984,19 +1176,28 @@ def load_data_from_s3(arguments: dict) -> dict:
         bucket = parts[0]
         key = parts[1]
         
-        # S3からデータ取得
-        s3_client = boto3.client('s3', region_name=aws_region)
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        data = json.loads(response['Body'].read().decode('utf-8'))
+        # S3からデータ取得（レンジGETでレコード数とサンプルのみ取得）
+        _add_project_root_to_path()
+        from datalake.s3_preview import preview_s3_object
         
-        record_count = len(data) if isinstance(data, list) else 1
+        s3_client = boto3.client('s3', region_name=aws_region)
+        preview = preview_s3_object(
+            s3_client, bucket, key,
+            sample_size=3,
+            cache=_get_s3_cache()
+        )
+        record_count = preview["record_count"]
         
         return {
             "success": True,
             "s3_path": f"s3://{bucket}/{key}",
+            "format": preview["format"],
+            "size_bytes": preview["size_bytes"],
             "record_count": record_count,
-            "sample": data[:3] if isinstance(data, list) and len(data) > 3 else data,
-            "message": f"Successfully loaded {record_count} records from S3"
+            "record_count_source": preview["record_count_source"],
+            "sample": preview["sample"],
+            "message": (f"Successfully loaded {record_count} records from S3" if record_count is not None
+                        else f"Successfully loaded preview from S3 ({preview['size_bytes']} bytes, record count unavailable)")
         }
     except Exception as e:
         return {
@@ -1009,7 +1210,6 @@ def load_data_from_s3(arguments: dict) -> dict:
 def transform_data(arguments: dict) -> dict:
     """データをIceberg形式に変換"""
     try:
-        import os
         from pathlib import Path
         import sys
         from datetime import datetime
@@ -1020,15 +1220,11 @@ def transform_data(arguments: dict) -> dict:
             sys.path.insert(0, str(project_root))
         
         from datalake.schema_mapper import SchemaMapper
-        import boto3
         
         s3_input_path = arguments["s3_input_path"]
         domain = arguments["domain"]
         dataset_id = arguments["dataset_id"]
         
-        # 環境変数を取得
-        aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
-        
         # S3からデータを読み込む
         if s3_input_path.startswith("s3://"):
             s3_input_path = s3_input_path[5:]
@@ -1037,9 +1233,7 @@ def transform_data(arguments: dict) -> dict:
         bucket = parts[0]
         key = parts[1]
         
-        s3_client = boto3.client('s3', region_name=aws_region)
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        data = json.loads(response['Body'].read().decode('utf-8'))
+        data = _read_s3_json(bucket, key)
         
         # SchemaMapperを使用してデータを変換
         mapper = SchemaMapper()
@@ -1048,27 +1242,23 @@ def transform_data(arguments: dict) -> dict:
         if not isinstance(data, list):
             data = [data]
         
-        # 各レコードを変換
-        transformed_records = []
-        for record in data:
-            transformed = mapper.map_estat_to_iceberg(
-                record, 
-                domain=domain,
-                dataset_id=dataset_id
-            )
-            # datetimeオブジェクトをISO形式の文字列に変換
+        # バッチで変換
+        table = mapper.map_batch(data, domain=domain, dataset_id=dataset_id)
+        
+        # datetimeオブジェクトをISO形式の文字列に変換
+        sample = table.slice(0, 3).to_pylist()
+        for transformed in sample:
             if 'updated_at' in transformed and isinstance(transformed['updated_at'], datetime):
                 transformed['updated_at'] = transformed['updated_at'].isoformat()
-            transformed_records.append(transformed)
         
         return {
             "success": True,
             "domain": domain,
             "dataset_id": dataset_id,
             "input_records": len(data),
-            "output_records": len(transformed_records),
-            "sample": transformed_records[:3] if len(transformed_records) > 3 else transformed_records,
-            "message": f"Successfully transformed {len(transformed_records)} records for domain '{domain}'"
+            "output_records": table.num_rows,
+            "sample": sample,
+            "message": f"Successfully transformed {table.num_rows} records for domain '{domain}'"
         }
     except Exception as e:
         return {
@@ -1090,14 +1280,14 @@ def validate_data_quality(arguments: dict) -> dict:
         if str(project_root) not in sys.path:
             sys.path.insert(0, str(project_root))
         
-        from datalake.data_quality_validator import DataQualityValidator
-        from datalake.schema_mapper import SchemaMapper
+        from datalake.ingest_pipeline import IngestPipeline
         import boto3
         
         s3_input_path = arguments["s3_input_path"]
         domain = arguments["domain"]
         dataset_id = arguments["dataset_id"]
         check_duplicates = arguments.get("check_duplicates", False)
+        quarantine_output_path = arguments.get("quarantine_output_path")
         
         # 環境変数を取得
         aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
@@ -1111,75 +1301,28 @@ def validate_data_quality(arguments: dict) -> dict:
         key = parts[1]
         
         s3_client = boto3.client('s3', region_name=aws_region)
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        data = json.loads(response['Body'].read().decode('utf-8'))
+        data = _read_s3_json(bucket, key)
         
         # データがリストでない場合はリストに変換
         if not isinstance(data, list):
             data = [data]
         
-        # SchemaMapperでスキーマを取得
-        mapper = SchemaMapper()
-        schema = mapper.get_schema(domain)
-        required_columns = [col["name"] for col in schema["columns"]]
-        
-        # データを変換
-        transformed_records = []
-        for record in data:
-            transformed = mapper.map_estat_to_iceberg(
-                record, 
-                domain=domain,
-                dataset_id=dataset_id
-            )
-            transformed_records.append(transformed)
-        
-        # DataQualityValidatorで検証
-        validator = DataQualityValidator()
-        
-        # 必須列の検証
-        required_check = validator.validate_required_columns(
-            transformed_records,
-            required_columns
-        )
+        # データを変換（Arrowテーブルのまま列単位で検証）
+        pipeline = IngestPipeline(s3_client, domain, dataset_id)
+        table = pipeline.transform(data)
+        del data
         
-        # null値のチェック
-        key_columns = ["dataset_id", "year", "value"]
-        null_check = validator.check_null_values(
-            transformed_records,
-            key_columns
+        # 必須列・null値・重複を一括チェック（quarantine_output_path指定時は不正行を隔離）
+        validation = pipeline.validate(
+            table, check_duplicates=check_duplicates, quarantine_path=quarantine_output_path
         )
         
-        # 重複チェック（オプション）
-        duplicate_check = None
-        if check_duplicates:
-            duplicate_check = validator.detect_duplicates(
-                transformed_records,
-                ["dataset_id", "year", "region_code"]
-            )
-        
-        # 総合判定
-        all_valid = (
-            required_check["valid"] and 
-            not null_check["has_nulls"] and 
-            (not duplicate_check["has_duplicates"] if check_duplicates else True)
-        )
-        
-        checks = {
-            "required_columns": required_check,
-            "null_values": null_check
-        }
-        
-        if check_duplicates:
-            checks["duplicates"] = duplicate_check
-        
         return {
             "success": True,
-            "valid": all_valid,
             "domain": domain,
             "dataset_id": dataset_id,
-            "total_records": len(transformed_records),
-            "checks": checks,
-            "message": f"Validation {'passed' if all_valid else 'failed'} for {len(transformed_records)} records"
+            **validation,
+            "message": f"Validation {'passed' if validation['valid'] else 'failed'} for {table.num_rows} records"
         }
     except Exception as e:
         return {
@@ -1202,14 +1345,18 @@ def save_to_parquet(arguments: dict) -> dict:
             sys.path.insert(0, str(project_root))
         
         from datalake.schema_mapper import SchemaMapper
+        from datalake.parquet_writer import (
+            DEFAULT_MAX_ROWS_PER_FILE, write_partitioned_to_s3, write_table_bytes
+        )
         import boto3
-        import pandas as pd
-        from io import BytesIO
         
         s3_input_path = arguments["s3_input_path"]
         s3_output_path = arguments["s3_output_path"]
         domain = arguments["domain"]
         dataset_id = arguments["dataset_id"]
+        partitioned = arguments.get("partitioned", True)
+        max_rows_per_file = arguments.get("max_rows_per_file", DEFAULT_MAX_ROWS_PER_FILE)
+        overwrite = arguments.get("overwrite", False)
         
         # 環境変数を取得
         aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
@@ -1223,8 +1370,7 @@ def save_to_parquet(arguments: dict) -> dict:
         key = parts[1]
         
         s3_client = boto3.client('s3', region_name=aws_region)
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        data = json.loads(response['Body'].read().decode('utf-8'))
+        data = _read_s3_json(bucket, key)
         
         # データがリストでない場合はリストに変換
         if not isinstance(data, list):
@@ -1232,17 +1378,7 @@ def save_to_parquet(arguments: dict) -> dict:
         
         # SchemaMapperを使用してデータを変換
         mapper = SchemaMapper()
-        transformed_records = []
-        for record in data:
-            transformed = mapper.map_estat_to_iceberg(
-                record, 
-                domain=domain,
-                dataset_id=dataset_id
-            )
-            transformed_records.append(transformed)
-        
-        # DataFrameに変換
-        df = pd.DataFrame(transformed_records)
+        table = mapper.map_batch(data, domain=domain, dataset_id=dataset_id)
         
         # Parquet形式でS3に保存
         if s3_output_path.startswith("s3://"):
@@ -1252,16 +1388,41 @@ def save_to_parquet(arguments: dict) -> dict:
         output_bucket = output_parts[0]
         output_key = output_parts[1]
         
-        # Parquetファイルをメモリに書き込み
-        parquet_buffer = BytesIO()
-        df.to_parquet(parquet_buffer, engine='pyarrow', compression='snappy', index=False)
-        parquet_buffer.seek(0)
+        if partitioned:
+            # partition_byに従って year=/region_code= のディレクトリに分割して保存
+            # （出力パスが .parquet で終わる場合は拡張子を除いたものをプレフィックスとする）
+            prefix = output_key[:-len(".parquet")] if output_key.endswith(".parquet") else output_key
+            partition_by = mapper.get_schema(domain).get("partition_by", [])
+            write_result = write_partitioned_to_s3(
+                s3_client, table, output_bucket, prefix,
+                partition_by=partition_by,
+                max_rows_per_file=max_rows_per_file,
+                overwrite=overwrite
+            )
+            
+            return {
+                "success": True,
+                "domain": domain,
+                "dataset_id": dataset_id,
+                "input_path": f"s3://{bucket}/{key}",
+                "output_path": write_result["output_path"],
+                "partition_by": write_result["partition_by"],
+                "partitions": write_result["partitions"],
+                "file_count": write_result["file_count"],
+                "records_saved": table.num_rows,
+                "file_size_bytes": write_result["total_bytes"],
+                "message": f"Successfully saved {table.num_rows} records to Parquet "
+                           f"({write_result['partitions']} partitions, {write_result['file_count']} files)"
+            }
+        
+        # Parquetファイルをメモリに書き込み（パーティション列を先頭にソート）
+        body = write_table_bytes(table, partition_by=mapper.get_schema(domain).get("partition_by"))
         
         # S3にアップロード
         s3_client.put_object(
             Bucket=output_bucket,
             Key=output_key,
-            Body=parquet_buffer.getvalue(),
+            Body=body,
             ContentType='application/octet-stream'
         )
         
@@ -1271,9 +1432,9 @@ def save_to_parquet(arguments: dict) -> dict:
             "dataset_id": dataset_id,
             "input_path": f"s3://{bucket}/{key}",
             "output_path": f"s3://{output_bucket}/{output_key}",
-            "records_saved": len(transformed_records),
-            "file_size_bytes": len(parquet_buffer.getvalue()),
-            "message": f"Successfully saved {len(transformed_records)} records to Parquet"
+            "records_saved": table.num_rows,
+            "file_size_bytes": len(body),
+            "message": f"Successfully saved {table.num_rows} records to Parquet"
         }
     except Exception as e:
         return {
@@ -1283,6 +1444,41 @@ def save_to_parquet(arguments: dict) -> dict:
         }
 
 
+def transform_dataset_parallel(arguments: dict) -> dict:
+    """並列取得したチャンクファイルを並列にParquet変換"""
+    try:
+        import os
+        
+        _add_project_root_to_path()
+        from datalake.parallel_transformer import ParallelTransformer
+        
+        dataset_id = arguments["dataset_id"]
+        domain = arguments["domain"]
+        
+        # 環境変数を取得
+        s3_bucket = os.environ.get('DATALAKE_S3_BUCKET', 'estat-iceberg-datalake')
+        
+        transformer = ParallelTransformer(max_workers=arguments.get("max_workers"))
+        result = transformer.transform_dataset(
+            bucket=s3_bucket,
+            dataset_id=dataset_id,
+            domain=domain,
+            output_prefix=arguments.get("output_prefix"),
+            chunk_keys=arguments.get("chunk_paths"),
+            timestamp=arguments.get("timestamp")
+        )
+        
+        if result["success"]:
+            result["next_action"] = "load_to_iceberg"
+        return result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": f"並列変換に失敗しました: {e}"
+        }
+
+
 def create_iceberg_table(arguments: dict) -> dict:
     """Icebergテーブルを作成"""
     try:
@@ -1539,6 +1735,141 @@ def load_to_iceberg(arguments: dict) -> dict:
         }
 
 
+def commit_to_iceberg(arguments: dict) -> dict:
+    """
+    ParquetファイルをIcebergテーブルに直接コミット
+
+    Athenaの一時テーブル・INSERTを使わず、Parquetファイルをそのままデータファイルとして
+    登録します。パーティション値はファイルの列統計から決まるため、パーティション列ごとに
+    分割して書き出したファイル（transform_to_parquet のパーティション出力など）を指定します。
+
+    Args:
+        arguments: domain, s3_parquet_path, catalog, catalog_uri, warehouse
+
+    Returns:
+        コミット結果
+    """
+    try:
+        import os
+        import boto3
+
+        _add_project_root_to_path()
+
+        from datalake.iceberg_commit import IcebergCommitter, list_parquet_files, load_catalog
+        from datalake.schema_mapper import SchemaMapper
+
+        domain = arguments["domain"]
+        s3_parquet_path = arguments["s3_parquet_path"]
+        catalog_type = arguments.get("catalog", "glue")
+
+        aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
+        s3_bucket = os.environ.get('DATALAKE_S3_BUCKET', 'estat-iceberg-datalake')
+        glue_database = os.environ.get('DATALAKE_GLUE_DATABASE', 'estat_iceberg_db')
+
+        table_name = f"{domain}_data"
+        schema = SchemaMapper().get_schema(domain)
+
+        catalog = load_catalog(
+            catalog_type,
+            region=aws_region,
+            uri=arguments.get("catalog_uri"),
+            warehouse=arguments.get("warehouse")
+        )
+        # GlueカタログではAthenaで作成した場合と同じ場所にテーブルを置く
+        location = f"s3://{s3_bucket}/iceberg-tables/{domain}/{table_name}/" if catalog_type == "glue" else None
+
+        committer = IcebergCommitter(catalog, glue_database)
+        table = committer.ensure_table(table_name, schema["columns"], schema.get("partition_by"), location=location)
+
+        s3_client = boto3.client('s3', region_name=aws_region) if s3_parquet_path.startswith("s3://") else None
+        file_paths = list_parquet_files(s3_client, s3_parquet_path)
+
+        result = committer.commit_files(table, file_paths, snapshot_properties={"source-path": s3_parquet_path})
+        if not result["success"]:
+            return {**result, "message": f"No Parquet files found: {s3_parquet_path}"}
+
+        return {
+            **result,
+            "domain": domain,
+            "table": f"{glue_database}.{table_name}",
+            "catalog": catalog_type,
+            "message": (f"Committed {result['files_committed']} file(s) "
+                        f"({result['added_records']} records) to {glue_database}.{table_name}")
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": f"Failed to commit to Iceberg: {e}"
+        }
+
+
+def maintain_iceberg_tables(arguments: dict) -> dict:
+    """
+    ドメインテーブルの保守（OPTIMIZE / VACUUM）
+
+    Args:
+        arguments: domains, small_file_mb, min_small_files, snapshot_retention_days, force, dry_run
+
+    Returns:
+        テーブルごとの実行前後の統計と実行結果
+    """
+    try:
+        import os
+        import boto3
+
+        _add_project_root_to_path()
+
+        from datalake.iceberg_maintenance import (
+            DEFAULT_MIN_SMALL_FILES,
+            DEFAULT_SMALL_FILE_BYTES,
+            DEFAULT_SNAPSHOT_RETENTION_DAYS,
+            IcebergMaintenance
+        )
+        from datalake.schema_mapper import DOMAIN_SCHEMAS
+
+        domains = arguments.get("domains") or list(DOMAIN_SCHEMAS)
+        unknown = [domain for domain in domains if domain not in DOMAIN_SCHEMAS]
+        if unknown:
+            return {"success": False, "error": f"Unknown domain(s): {', '.join(unknown)}"}
+
+        small_file_mb = arguments.get("small_file_mb")
+        options = {
+            "small_file_bytes": (int(small_file_mb * 1024 * 1024) if small_file_mb
+                                 else DEFAULT_SMALL_FILE_BYTES),
+            "min_small_files": arguments.get("min_small_files", DEFAULT_MIN_SMALL_FILES),
+            "retention_days": arguments.get("snapshot_retention_days", DEFAULT_SNAPSHOT_RETENTION_DAYS),
+            "force": arguments.get("force", False),
+            "dry_run": arguments.get("dry_run", False)
+        }
+
+        aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
+        s3_bucket = os.environ.get('DATALAKE_S3_BUCKET', 'estat-iceberg-datalake')
+        glue_database = os.environ.get('DATALAKE_GLUE_DATABASE', 'estat_iceberg_db')
+        athena_output = os.environ.get('ATHENA_OUTPUT_LOCATION', f's3://{s3_bucket}/athena-results/')
+
+        maintenance = IcebergMaintenance(
+            boto3.client('athena', region_name=aws_region),
+            database=glue_database,
+            output_location=athena_output
+        )
+        result = maintenance.maintain_tables([f"{domain}_data" for domain in domains], **options)
+
+        maintained = [table for table in result["tables"] if table.get("actions")]
+        return {
+            **result,
+            "dry_run": options["dry_run"],
+            "message": (f"Checked {len(result['tables'])} table(s), "
+                        f"maintained {len(maintained)}")
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": f"Failed to maintain Iceberg tables: {e}"
+        }
+
+
 def ingest_dataset_complete(arguments: dict) -> dict:
     """データセットの完全取り込み"""
     try:
@@ -1551,9 +1882,7 @@ def ingest_dataset_complete(arguments: dict) -> dict:
         
         # 環境変数を取得
         s3_bucket = os.environ.get('DATALAKE_S3_BUCKET', 'estat-iceberg-datalake')
-        
-        # 出力パスを生成
-        s3_output_path = f"s3://{s3_bucket}/parquet/{domain}/{dataset_id}.parquet"
+        aws_region = os.environ.get('AWS_REGION', 'ap-northeast-1')
         
         results = {
             "dataset_id": dataset_id,
@@ -1562,66 +1891,53 @@ def ingest_dataset_complete(arguments: dict) -> dict:
             "steps": []
         }
         
-        # ステップ1: データ変換
-        transform_result = transform_data({
-            "s3_input_path": s3_input_path,
-            "domain": domain,
-            "dataset_id": dataset_id
-        })
-        results["steps"].append({
-            "step": "transform",
-            "success": transform_result["success"],
-            "message": transform_result.get("message")
-        })
+        # ステップ1〜3: 生データを1回だけ読み込み、変換・検証・Parquet保存を同じテーブルに対して実行
+        _add_project_root_to_path()
+        from datalake.ingest_pipeline import IngestPipeline
+        import boto3
         
-        if not transform_result["success"]:
-            return {
-                "success": False,
-                "error": "Transform step failed",
-                "results": results
-            }
+        if s3_input_path.startswith("s3://"):
+            s3_input_path = s3_input_path[5:]
+        bucket, key = s3_input_path.split("/", 1)
         
-        # ステップ2: データ品質検証
-        validation_result = validate_data_quality({
-            "s3_input_path": s3_input_path,
-            "domain": domain,
-            "dataset_id": dataset_id
-        })
-        results["steps"].append({
-            "step": "validate",
-            "success": validation_result["success"],
-            "valid": validation_result.get("valid"),
-            "message": validation_result.get("message")
-        })
+        s3_client = boto3.client('s3', region_name=aws_region)
+        pipeline = IngestPipeline(s3_client, domain, dataset_id, cache=_get_s3_cache())
+        pipeline_result = pipeline.run(
+            bucket, key, s3_bucket, f"parquet/{domain}/{dataset_id}/",
+            overwrite=True,
+            check_duplicates=arguments.get("check_duplicates", False),
+            quarantine_path=arguments.get("quarantine_output_path")
+        )
+        results["timings"] = pipeline_result["timings"]
         
-        if not validation_result["success"]:
-            return {
-                "success": False,
-                "error": "Validation step failed",
-                "results": results
+        # 読み込みの失敗は変換ステップの失敗として報告する
+        for stage in pipeline_result["stages"]:
+            if stage["stage"] == "read" and stage["success"]:
+                continue
+            step_result = {
+                "step": "transform" if stage["stage"] == "read" else stage["stage"],
+                "success": stage["success"]
+            }
+            for field in ("valid", "output_path"):
+                if field in stage:
+                    step_result[field] = stage[field]
+            step_result["message"] = stage.get("message", stage.get("error"))
+            results["steps"].append(step_result)
+        
+        if not pipeline_result["success"]:
+            step_errors = {
+                "transform": "Transform step failed",
+                "validate": "Validation step failed",
+                "save_parquet": "Parquet save step failed"
             }
-        
-        # ステップ3: Parquet保存
-        parquet_result = save_to_parquet({
-            "s3_input_path": s3_input_path,
-            "s3_output_path": s3_output_path,
-            "domain": domain,
-            "dataset_id": dataset_id
-        })
-        results["steps"].append({
-            "step": "save_parquet",
-            "success": parquet_result["success"],
-            "output_path": parquet_result.get("output_path"),
-            "message": parquet_result.get("message")
-        })
-        
-        if not parquet_result["success"]:
             return {
                 "success": False,
-                "error": "Parquet save step failed",
+                "error": step_errors[results["steps"][-1]["step"]],
                 "results": results
             }
         
+        parquet_output_path = pipeline_result["parquet"]["output_path"]
+        
         # ステップ4: Icebergテーブル作成
         table_result = create_iceberg_table({
             "domain": domain
@@ -1638,7 +1954,7 @@ def ingest_dataset_complete(arguments: dict) -> dict:
             "dataset_id": dataset_id,
             "dataset_name": dataset_name,
             "domain": domain,
-            "parquet_path": parquet_result.get("output_path"),
+            "parquet_path": parquet_output_path,
             "table_name": table_result.get("table_name"),
             "results": results,
             "message": f"Successfully completed full ingestion for dataset {dataset_id}"
@@ -103,10 +103,15 @@ async def fetch_dataset_filtered(
 async def transform_to_parquet(
     s3_json_path: str,
     data_type: str,
-    output_prefix: str = None
+    output_prefix: str = None,
+    convert_to_japanese: bool = False,
+    partitioned: bool = True,
+    max_rows_per_file: int = None
 ) -> dict:
     """JSONデータをParquet形式に変換してS3に保存"""
-    return await estat_server.transform_to_parquet(s3_json_path, data_type, output_prefix)
+    return await estat_server.transform_to_parquet(
+        s3_json_path, data_type, output_prefix, convert_to_japanese, partitioned, max_rows_per_file
+    )
 
 @mcp.tool()
 async def load_to_iceberg(
@@ -121,28 +126,56 @@ async def load_to_iceberg(
 async def analyze_with_athena(
     table_name: str,
     analysis_type: str = "basic",
-    custom_query: str = None
+    custom_query: str = None,
+    use_profiles: bool = True
 ) -> dict:
     """Athenaで統計分析を実行"""
-    return await estat_server.analyze_with_athena(table_name, analysis_type, custom_query)
+    return await estat_server.analyze_with_athena(table_name, analysis_type, custom_query, use_profiles)
+
+@mcp.tool()
+async def get_athena_query_results(
+    query_execution_id: str,
+    next_token: str = None,
+    page_size: int = 1000
+) -> dict:
+    """実行済みのAthenaクエリの結果をページ単位で取得（next_tokenで続きを取得）"""
+    return await estat_server.get_athena_query_results(query_execution_id, next_token, page_size)
+
+@mcp.tool()
+async def export_athena_results(
+    query: str = None,
+    query_execution_id: str = None,
+    export_format: str = "parquet",
+    output_filename: str = None,
+    use_unload: bool = True,
+    compression: str = None
+) -> dict:
+    """Athenaクエリの結果をS3から直接読み込み、CSV / Arrow IPC / Parquetファイルとしてエクスポート"""
+    return await estat_server.export_athena_results(query, query_execution_id, export_format, output_filename, use_unload, compression)
 
 @mcp.tool()
 async def save_dataset_as_csv(
     dataset_id: str,
     s3_json_path: str = None,
     local_json_path: str = None,
-    output_filename: str = None
+    output_filename: str = None,
+    convert_to_japanese: bool = False,
+    rows_per_file: int = None,
+    export_format: str = "csv",
+    compression: str = None
 ) -> dict:
-    """取得したデータセットをCSV形式でS3に保存"""
-    return await estat_server.save_dataset_as_csv(dataset_id, s3_json_path, local_json_path, output_filename)
+    """取得したデータセットをCSV（またはArrow IPC / Feather / Parquet）形式でS3に保存"""
+    return await estat_server.save_dataset_as_csv(dataset_id, s3_json_path, local_json_path, output_filename, convert_to_japanese, rows_per_file, export_format, compression)
 
 @mcp.tool()
 async def download_csv_from_s3(
     s3_path: str,
-    local_path: str = None
+    local_path: str = None,
+    export_format: str = None,
+    compression: str = None
 ) -> dict:
-    """S3に保存されたCSVファイルをローカルにダウンロード"""
-    return await estat_server.download_csv_from_s3(s3_path, local_path)
+    """S3に保存されたCSV / Arrow IPC / Parquetファイルをローカルにダウンロード"""
+    return await estat_server.download_csv_from_s3(s3_path, local_path, False, export_format, compression)
 
 if __name__ == '__main__':
     # e-Stat AWSサーバーの初期化
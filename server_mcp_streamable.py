@@ -92,7 +92,10 @@ TOOLS = {
         "parameters": {
             "s3_json_path": {"type": "string", "required": True},
             "data_type": {"type": "string", "required": True},
-            "output_prefix": {"type": "string", "required": False}
+            "output_prefix": {"type": "string", "required": False},
+            "convert_to_japanese": {"type": "boolean", "default": False},
+            "partitioned": {"type": "boolean", "default": True},
+            "max_rows_per_file": {"type": "integer", "required": False}
         }
     },
     "load_to_iceberg": {
@@ -110,7 +113,29 @@ TOOLS = {
         "parameters": {
             "table_name": {"type": "string", "required": True},
             "analysis_type": {"type": "string", "default": "basic"},
-            "custom_query": {"type": "string", "required": False}
+            "custom_query": {"type": "string", "required": False},
+            "use_profiles": {"type": "boolean", "default": True}
+        }
+    },
+    "get_athena_query_results": {
+        "handler": lambda **kwargs: estat_server.get_athena_query_results(**kwargs),
+        "description": "実行済みのAthenaクエリの結果をページ単位で取得（next_tokenで続きを取得）",
+        "parameters": {
+            "query_execution_id": {"type": "string", "required": True},
+            "next_token": {"type": "string", "required": False},
+            "page_size": {"type": "integer", "default": 1000}
+        }
+    },
+    "export_athena_results": {
+        "handler": lambda **kwargs: estat_server.export_athena_results(**kwargs),
+        "description": "Athenaクエリの結果をS3から直接読み込み、CSV / Arrow IPC / Parquetファイルとしてエクスポート",
+        "parameters": {
+            "query": {"type": "string", "required": False},
+            "query_execution_id": {"type": "string", "required": False},
+            "export_format": {"type": "string", "enum": ["csv", "arrow", "feather", "parquet"], "default": "parquet"},
+            "output_filename": {"type": "string", "required": False},
+            "use_unload": {"type": "boolean", "default": True},
+            "compression": {"type": "string", "enum": ["lz4", "zstd", "uncompressed"], "required": False}
         }
     },
     "save_dataset_as_csv": {
@@ -120,7 +145,11 @@ TOOLS = {
             "dataset_id": {"type": "string", "required": True},
             "s3_json_path": {"type": "string", "required": False},
             "local_json_path": {"type": "string", "required": False},
-            "output_filename": {"type": "string", "required": False}
+            "output_filename": {"type": "string", "required": False},
+            "convert_to_japanese": {"type": "boolean", "default": False},
+            "rows_per_file": {"type": "integer", "required": False},
+            "export_format": {"type": "string", "enum": ["csv", "arrow", "feather", "parquet"], "default": "csv"},
+            "compression": {"type": "string", "enum": ["lz4", "zstd", "uncompressed"], "required": False}
         }
     },
     "save_metadata_as_csv": {
@@ -140,7 +169,7 @@ TOOLS = {
     },
     "get_csv_download_url": {
         "handler": lambda **kwargs: estat_server.get_csv_download_url(**kwargs),
-        "description": "S3 CSVファイルの署名付きダウンロードURLを生成（ブラウザまたはcurlでダウンロード可能）",
+        "description": "S3 CSV / Arrow IPC / Parquetファイルの署名付きダウンロードURLを生成（ブラウザまたはcurlでダウンロード可能）",
         "parameters": {
             "s3_path": {"type": "string", "required": True},
             "expires_in": {"type": "integer", "default": 3600},